@@ -3,39 +3,72 @@
 from __future__ import annotations
 
 import argparse
+import glob
+import json
 import platform
+from collections.abc import Callable
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 from typing import Any
 
 import pydicom
 import yaml
+from pydantic import ValidationError as PydanticValidationError
 
 from app.cli.progress import create_progress_callback
 from app.core import (
     AbnormalConfig,
     CharacterSetConfig,
+    CohortConfig,
     ConfigurationError,
+    ExecutionConfig,
     FileReadError,
     GenerationConfig,
+    IOError as CoreIOError,
+    Patient,
     PixelSpecCTRealistic,
     PixelSpecSimple,
     SeriesConfig,
     StudyConfig,
     TransferSyntaxConfig,
+    ValidationError as CoreValidationError,
+    cohort_patient_filter,
+    expand_cohort,
+)
+from app.services import (
+    BatchGeneratorService,
+    BatchJob,
+    BatchJobResult,
+    PatientLoaderService,
+    StudyGeneratorService,
+    TemplateLoaderService,
 )
-from app.services import PatientLoaderService, StudyGeneratorService, TemplateLoaderService
 
 TOOL_NAME = "DICOMテストデータ生成ツール"
 VERSION = "1.1.0"
+# generate に指定すると1行1ジョブの JSONL マニフェストとして読み込む拡張子
+JOB_MANIFEST_SUFFIX = ".jsonl"
 
 
 def generate_command(args: argparse.Namespace) -> int:
-    """Job YAMLからDICOM生成を実行する."""
-    job_data = _load_job_yaml(args.job_file)
+    """Job YAMLからDICOM生成を実行する.
+
+    ジョブファイルを複数・glob・JSONL マニフェストで指定した場合はバッチとして
+    1プロセス内で並行に生成し、ジョブごとの結果を表示する。
+    """
+    sources = args.job_file if isinstance(args.job_file, list) else [args.job_file]
+    if len(sources) == 1 and not _is_batch_source(sources[0]):
+        return _generate_single(args, sources[0])
+    return _generate_batch(args, sources)
+
+
+def _generate_single(args: argparse.Namespace, job_file: str) -> int:
+    job_data = _apply_generate_overrides(
+        _resolve_patient_reference(_load_job_yaml(job_file)), args
+    )
     if args.output:
         job_data["output_dir"] = args.output
-
     config = GenerationConfig.model_validate(job_data)
 
     if args.dry_run:
@@ -44,20 +77,68 @@ def generate_command(args: argparse.Namespace) -> int:
         print(f"Accession Number: {config.study.accession_number}")
         print(f"Series: {len(config.series_list)}")
         print(f"Total Images: {_total_images(config.series_list)}")
+        print(f"Workers: {config.execution.workers}")
         return 0
 
     progress_callback = create_progress_callback(bool(getattr(args, "quiet", False)))
-    output_path = StudyGeneratorService().generate(
+    output_path = StudyGeneratorService(_template_loader(args)).generate(
         config=config,
         progress_callback=progress_callback,
+        incremental=bool(getattr(args, "incremental", False)),
+        resume=bool(getattr(args, "resume", False)),
     )
     print(f"Generation completed: {output_path}")
     return 0
 
 
+def _generate_batch(args: argparse.Namespace, sources: list[str]) -> int:
+    # 読み込み・検証に失敗したジョブも実行結果と同じ順で表示する
+    entries: list[BatchJob | BatchJobResult] = []
+    for name, load in _expand_job_sources(sources):
+        try:
+            job_data = load()
+            if args.output:
+                # 出力先はジョブ名ごとのサブディレクトリとする
+                job_data["output_dir"] = str(
+                    Path(args.output) / str(job_data.get("job_name", ""))
+                )
+            job_data = _apply_generate_overrides(
+                _resolve_patient_reference(job_data), args
+            )
+            entries.append(BatchJob(name, GenerationConfig.model_validate(job_data)))
+        except Exception as exc:
+            entries.append(BatchJobResult(name, None, exc))
+
+    jobs = [entry for entry in entries if isinstance(entry, BatchJob)]
+    if args.dry_run:
+        print("Dry-run mode: batch configuration checked.")
+    service = BatchGeneratorService(
+        max_workers=getattr(args, "max_workers", None),
+        max_concurrent_jobs=getattr(args, "jobs", None),
+        template_loader=_template_loader(args),
+    )
+    job_results = iter(
+        service.run(
+            jobs,
+            progress_callback=create_progress_callback(
+                bool(getattr(args, "quiet", False))
+            ),
+            incremental=bool(getattr(args, "incremental", False)),
+            resume=bool(getattr(args, "resume", False)),
+            dry_run=bool(args.dry_run),
+        )
+    )
+    return _print_batch_summary(
+        [
+            next(job_results) if isinstance(entry, BatchJob) else entry
+            for entry in entries
+        ]
+    )
+
+
 def validate_command(args: argparse.Namespace) -> int:
     """Job YAMLのバリデーションのみを実行する."""
-    job_data = _load_job_yaml(args.job_file)
+    job_data = _resolve_patient_reference(_load_job_yaml(args.job_file))
     config = GenerationConfig.model_validate(job_data)
 
     print("Job configuration is valid")
@@ -71,10 +152,6 @@ def validate_command(args: argparse.Namespace) -> int:
 def quick_command(args: argparse.Namespace) -> int:
     """CLI引数のみで簡易生成を実行する."""
     patient = PatientLoaderService().find_by_id(args.patient)
-    TemplateLoaderService().merge_templates(
-        modality_name=args.modality,
-        hospital_name=args.hospital,
-    )
 
     images_per_series = _parse_images(args.images)
     if args.series != len(images_per_series):
@@ -115,6 +192,8 @@ def quick_command(args: argparse.Namespace) -> int:
     config = GenerationConfig(
         job_name=f"quick_{args.accession_number}",
         output_dir=args.output,
+        output_format=getattr(args, "output_format", None) or "directory",
+        dicomdir=bool(getattr(args, "dicomdir", False)),
         patient=patient,
         study=study,
         series_list=series_list,
@@ -126,13 +205,64 @@ def quick_command(args: argparse.Namespace) -> int:
         transfer_syntax=TransferSyntaxConfig(),
         character_set=CharacterSetConfig(),
         abnormal=AbnormalConfig(),
+        execution=_quick_execution_config(args),
     )
 
-    output_path = StudyGeneratorService().generate(config=config, progress_callback=None)
+    # テンプレートの検証を兼ねて生成計画を先に作成し、生成時に再利用する
+    service = StudyGeneratorService(_template_loader(args))
+    plan = service.compile_plan(config)
+    output_path = service.generate(config=config, progress_callback=None, plan=plan)
     print(f"Generation completed: {output_path}")
     return 0
 
 
+def cohort_command(args: argparse.Namespace) -> int:
+    """コホート設定から患者マスターの患者ごとに検査を生成する."""
+    cohort_data = _load_job_yaml(args.cohort_file)
+    if args.output:
+        cohort_data["output_dir"] = args.output
+    cohort = CohortConfig.model_validate(cohort_data)
+    jobs = [
+        BatchJob(config.job_name, config)
+        for config in expand_cohort(cohort, _cohort_candidates(cohort))
+    ]
+    if not jobs:
+        raise ConfigurationError(
+            "No patients match the cohort", {"cohort_name": cohort.cohort_name}
+        )
+
+    total_images = sum(_total_images(job.config.series_list) for job in jobs)
+    if args.dry_run:
+        print("Dry-run mode: cohort configuration checked.")
+        print(f"Patients: {len({job.config.patient.patient_id for job in jobs})}")
+        print(f"Studies: {len(jobs)}")
+        print(f"Total Images: {total_images}")
+
+    # 小さな検査が大量にあるため、検査単位でプロセスプールに割り当てる
+    service = BatchGeneratorService(
+        max_workers=getattr(args, "max_workers", None),
+        job_processes=True,
+        template_loader=_template_loader(args),
+    )
+    results = service.run(
+        jobs,
+        progress_callback=create_progress_callback(bool(getattr(args, "quiet", False))),
+        dry_run=bool(args.dry_run),
+    )
+    return _print_batch_summary(results, show_succeeded=False)
+
+
+def patients_import_command(args: argparse.Namespace) -> int:
+    """患者マスターの YAML を SQLite ファイルに取り込む."""
+    master = Path(args.master) if args.master else None
+    output = Path(args.output)
+    # 取り込み済みの SQLite ファイルではなく、常に YAML の患者マスターから取り込む
+    service = PatientLoaderService(master, prefer_database=False)
+    count = service.import_to_database(output)
+    print(f"Imported {count} patients: {output}")
+    return 0
+
+
 def scp_start_command(args: argparse.Namespace) -> int:
     """Storage SCPを起動する."""
     from app.scp.models import load_scp_config
@@ -159,6 +289,147 @@ def version_command(args: argparse.Namespace) -> int:
     return 0
 
 
+def exit_code_for_exception(exc: Exception) -> int:
+    """例外に対応する終了コードを返す（終了コードの一覧は CLI のヘルプを参照）."""
+    if isinstance(exc, ConfigurationError):
+        return 2
+    if isinstance(exc, CoreIOError):
+        return 3
+    if isinstance(exc, (CoreValidationError, PydanticValidationError)):
+        return 4
+    return 1
+
+
+def _cohort_candidates(cohort: CohortConfig) -> list[Patient]:
+    """コホートの対象になりうる患者を、全患者を読み込まずに患者マスターから引く."""
+    repository = PatientLoaderService().repository()
+    patient_ids = cohort.patients.patient_ids
+    if patient_ids is not None:
+        return [repository.get(patient_id) for patient_id in patient_ids]
+    return list(repository.iter_patients(cohort_patient_filter(cohort)))
+
+
+def _resolve_patient_reference(job_data: dict[str, Any]) -> dict[str, Any]:
+    """ジョブの ``patient_id`` 参照を患者マスターから解決する.
+
+    ``patient`` の代わりに ``patient_id`` だけを書いたジョブに患者情報を補う。
+    患者マスターはプロセス内で共有する索引から引くため、ジョブごとに読み直さない。
+    """
+    if "patient" in job_data or "patient_id" not in job_data:
+        return job_data
+    resolved = dict(job_data)
+    patient_id = str(resolved.pop("patient_id"))
+    resolved["patient"] = PatientLoaderService().find_by_id(patient_id)
+    return resolved
+
+
+def _apply_generate_overrides(
+    job_data: dict[str, Any], args: argparse.Namespace
+) -> dict[str, Any]:
+    """出力先以外の CLI 引数でジョブ設定を上書きする."""
+    workers = getattr(args, "workers", None)
+    if workers is not None:
+        execution = job_data.get("execution") or {}
+        job_data["execution"] = {**execution, "workers": workers}
+    output_format = getattr(args, "output_format", None)
+    if output_format is not None:
+        job_data["output_format"] = output_format
+    if getattr(args, "dicomdir", False):
+        job_data["dicomdir"] = True
+    return job_data
+
+
+def _is_batch_source(source: str) -> bool:
+    return source.endswith(JOB_MANIFEST_SUFFIX) or glob.has_magic(source)
+
+
+def _expand_job_sources(
+    sources: list[str],
+) -> list[tuple[str, Callable[[], dict[str, Any]]]]:
+    """ジョブファイル・glob・JSONL マニフェストを (表示名, 読み込み関数) に展開する."""
+    expanded: list[tuple[str, Callable[[], dict[str, Any]]]] = []
+    for source in sources:
+        if source.endswith(JOB_MANIFEST_SUFFIX):
+            expanded.extend(_read_job_manifest(Path(source)))
+        elif glob.has_magic(source):
+            matches = sorted(glob.glob(source))
+            if not matches:
+                raise ConfigurationError(
+                    "No job files match pattern", {"pattern": source}
+                )
+            expanded.extend(
+                (match, partial(_load_job_yaml, match)) for match in matches
+            )
+        else:
+            expanded.append((source, partial(_load_job_yaml, source)))
+    return expanded
+
+
+def _read_job_manifest(
+    path: Path,
+) -> list[tuple[str, Callable[[], dict[str, Any]]]]:
+    """JSONL マニフェストを読み込む.
+
+    各行はジョブ設定そのもの、または ``job_file`` でジョブファイルを参照し
+    残りのキーで設定を上書きするオブジェクトとする。``job_file`` の相対パスは
+    マニフェストのディレクトリを基準とする。
+    """
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError as exc:
+        raise FileReadError(str(path), str(exc)) from exc
+
+    expanded: list[tuple[str, Callable[[], dict[str, Any]]]] = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ConfigurationError(
+                f"Failed to parse job manifest line: {path}:{line_number}",
+                {"error": str(exc)},
+            ) from exc
+        if not isinstance(entry, dict):
+            raise ConfigurationError(
+                "Job manifest line must be an object",
+                {"path": str(path), "line": line_number},
+            )
+        if "job_file" in entry:
+            job_file = path.parent / str(entry.pop("job_file"))
+            expanded.append(
+                (str(job_file), partial(_load_manifest_job, job_file, entry))
+            )
+        else:
+            expanded.append((f"{path}:{line_number}", partial(dict, entry)))
+    return expanded
+
+
+def _load_manifest_job(job_file: Path, overrides: dict[str, Any]) -> dict[str, Any]:
+    return {**_load_job_yaml(str(job_file)), **overrides}
+
+
+def _print_batch_summary(
+    results: list[BatchJobResult], show_succeeded: bool = True
+) -> int:
+    """ジョブごとの結果を表示し、最初に失敗したジョブの終了コードを返す.
+
+    ``show_succeeded`` が偽の場合は失敗したジョブのみを表示する。
+    """
+    failed = [result for result in results if result.error is not None]
+    print(
+        f"Batch summary: {len(results) - len(failed)} succeeded, {len(failed)} failed"
+    )
+    for result in results:
+        if result.error is None:
+            if show_succeeded:
+                print(f"  [OK] {result.name}: {result.output_path}")
+        else:
+            code = exit_code_for_exception(result.error)
+            print(f"  [FAILED:{code}] {result.name}: {result.error}")
+    return exit_code_for_exception(failed[0].error) if failed else 0
+
+
 def _load_job_yaml(job_file: str) -> dict[str, Any]:
     path = Path(job_file)
     if not path.exists():
@@ -199,6 +470,18 @@ def _parse_images(images: str) -> list[int]:
     return values
 
 
+def _quick_execution_config(args: argparse.Namespace) -> ExecutionConfig:
+    workers = getattr(args, "workers", None)
+    if workers is None:
+        return ExecutionConfig()
+    return ExecutionConfig(workers=workers)
+
+
+def _template_loader(args: argparse.Namespace) -> TemplateLoaderService:
+    cache_dir = getattr(args, "template_cache_dir", None)
+    return TemplateLoaderService(Path(cache_dir) if cache_dir else None)
+
+
 def _total_images(series_list: list[SeriesConfig]) -> int:
     return sum(series.num_images for series in series_list)
 
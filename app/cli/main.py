@@ -9,23 +9,18 @@ from datetime import datetime
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
-from pydantic import ValidationError as PydanticValidationError
-
 from app.cli.commands import (
+    cohort_command,
+    exit_code_for_exception,
     generate_command,
+    patients_import_command,
     quick_command,
     scp_start_command,
     validate_command,
     version_command,
 )
-from app.core import (
-    ConfigurationError,
-    DICOMGeneratorError,
-    IOError as CoreIOError,
-    ValidationError as CoreValidationError,
-)
-
 DEFAULT_LOG_FILE = "logs/dicom_generator.log"
+DEFAULT_PATIENT_DATABASE = "data/patients_master.sqlite3"
 
 
 def setup_logging(verbose: bool, quiet: bool, log_file: str) -> None:
@@ -89,7 +84,16 @@ _EPILOG = """\
   python -m app.cli generate job.yaml
   python -m app.cli generate job.yaml -o output/ --verbose
   python -m app.cli generate job.yaml --dry-run
+  python -m app.cli generate job.yaml --workers 8
+  python -m app.cli generate job.yaml --incremental
+  python -m app.cli generate job.yaml --resume
+  python -m app.cli generate job.yaml --output-format tar
+  python -m app.cli generate job.yaml --dicomdir
+  python -m app.cli generate jobs/*.yaml --max-workers 8
+  python -m app.cli generate jobs.jsonl --jobs 4 -o output/
   python -m app.cli validate job.yaml
+  python -m app.cli cohort cohort.yaml --max-workers 8
+  python -m app.cli patients import
   python -m app.cli quick -p P000001 -m fujifilm_scenaria_view_ct -s 3 -i 1,20,20 -o output/
   python -m app.cli version
   python -m app.cli scp start
@@ -101,6 +105,7 @@ _EPILOG = """\
   2  設定エラー（Job YAML不正）
   3  ファイルI/Oエラー
   4  バリデーションエラー
+  複数ジョブの場合は最初に失敗したジョブの終了コード
 """
 
 
@@ -114,11 +119,15 @@ def _create_parser() -> argparse.ArgumentParser:
     subparsers = parser.add_subparsers(dest="command")
 
     generate_parser = subparsers.add_parser("generate", help="Job YAMLからDICOMを生成")
-    generate_parser.add_argument("job_file", help="Job YAMLファイル")
+    generate_parser.add_argument(
+        "job_file",
+        nargs="+",
+        help="Job YAMLファイル（複数・glob・1行1ジョブの .jsonl マニフェストも指定可）",
+    )
     generate_parser.add_argument(
         "-o",
         "--output",
-        help="出力先ディレクトリ（Job YAML設定を上書き）",
+        help="出力先ディレクトリ（Job YAML設定を上書き。複数ジョブではジョブ名のサブディレクトリ）",
     )
     log_group = generate_parser.add_mutually_exclusive_group()
     log_group.add_argument("-v", "--verbose", action="store_true", help="詳細ログを表示")
@@ -133,6 +142,33 @@ def _create_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="生成は行わず設定検証のみを実行",
     )
+    mode_group = generate_parser.add_mutually_exclusive_group()
+    mode_group.add_argument(
+        "--incremental",
+        action="store_true",
+        help="前回から変更のあったシリーズのみ再生成（出力先のマニフェストを使用）",
+    )
+    mode_group.add_argument(
+        "--resume",
+        action="store_true",
+        help="中断したジョブを同じUIDで続きから生成（出力先のジャーナルを使用）",
+    )
+    _add_workers_argument(generate_parser)
+    generate_parser.add_argument(
+        "--max-workers",
+        type=_positive_int,
+        default=None,
+        help="複数ジョブで同時に使うワーカー数の合計の上限（default: CPU数）",
+    )
+    generate_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=None,
+        help="複数ジョブで同時に実行するジョブ数の上限（default: --max-workers）",
+    )
+    _add_output_arguments(generate_parser)
+    _add_template_cache_argument(generate_parser)
     generate_parser.set_defaults(func=generate_command)
 
     validate_parser = subparsers.add_parser("validate", help="Job YAMLを検証")
@@ -166,8 +202,63 @@ def _create_parser() -> argparse.ArgumentParser:
         default="ct_realistic",
         help="ピクセルモード（simple_text / ct_realistic）",
     )
+    _add_workers_argument(quick_parser)
+    _add_output_arguments(quick_parser)
+    _add_template_cache_argument(quick_parser)
     quick_parser.set_defaults(func=quick_command)
 
+    cohort_parser = subparsers.add_parser(
+        "cohort", help="コホート設定から患者マスターの患者ごとに検査を生成"
+    )
+    cohort_parser.add_argument("cohort_file", help="コホート設定YAMLファイル")
+    cohort_parser.add_argument(
+        "-o",
+        "--output",
+        help="出力先ディレクトリ（コホート設定を上書き）",
+    )
+    cohort_log_group = cohort_parser.add_mutually_exclusive_group()
+    cohort_log_group.add_argument(
+        "-v", "--verbose", action="store_true", help="詳細ログを表示"
+    )
+    cohort_log_group.add_argument(
+        "-q", "--quiet", action="store_true", help="エラー以外を非表示"
+    )
+    cohort_parser.add_argument(
+        "--log-file",
+        default=DEFAULT_LOG_FILE,
+        help=f"ログファイルパス（default: {DEFAULT_LOG_FILE}）",
+    )
+    cohort_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="生成は行わず展開した検査数の確認と設定検証のみを実行",
+    )
+    cohort_parser.add_argument(
+        "--max-workers",
+        type=_positive_int,
+        default=None,
+        help="検査を並行に生成するプロセス数（default: CPU数）",
+    )
+    _add_template_cache_argument(cohort_parser)
+    cohort_parser.set_defaults(func=cohort_command)
+
+    patients_parser = subparsers.add_parser("patients", help="患者マスター操作")
+    patients_subparsers = patients_parser.add_subparsers(dest="patients_command")
+    patients_import_parser = patients_subparsers.add_parser(
+        "import", help="患者マスターを SQLite ファイルに取り込む"
+    )
+    patients_import_parser.add_argument(
+        "--master",
+        help="取り込む患者マスター（default: data/patients_master.yaml）",
+    )
+    patients_import_parser.add_argument(
+        "-o",
+        "--output",
+        default=DEFAULT_PATIENT_DATABASE,
+        help=f"出力する SQLite ファイル（default: {DEFAULT_PATIENT_DATABASE}）",
+    )
+    patients_import_parser.set_defaults(func=patients_import_command)
+
     version_parser = subparsers.add_parser("version", help="バージョン表示")
     version_parser.set_defaults(func=version_command)
 
@@ -184,22 +275,49 @@ def _create_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def _add_workers_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=_positive_int,
+        default=None,
+        help="インスタンス生成の並列プロセス数（Job YAMLの execution.workers を上書き）",
+    )
+
+
+def _add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--output-format",
+        choices=["directory", "tar", "zip"],
+        default=None,
+        help="出力形式（directory / tar / zip、Job YAMLの output_format を上書き）",
+    )
+    parser.add_argument(
+        "--dicomdir",
+        action="store_true",
+        help="出力先に DICOMDIR を作成（Job YAMLの dicomdir を上書き）",
+    )
+
+
+def _add_template_cache_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--template-cache-dir",
+        default=None,
+        help="テンプレートの解析結果を保存して再利用するディレクトリ（信頼できる場所のみ）",
+    )
+
+
+def _positive_int(value: str) -> int:
+    try:
+        parsed = int(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value}") from exc
+    if parsed < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1: {value}")
+    return parsed
+
+
 def _map_exception_to_exit_code(exc: Exception) -> int:
-    if isinstance(exc, ConfigurationError):
-        print(f"[ERROR] {exc}", file=sys.stderr)
-        return 2
-    if isinstance(exc, CoreIOError):
-        print(f"[ERROR] {exc}", file=sys.stderr)
-        return 3
-    if isinstance(exc, CoreValidationError):
-        print(f"[ERROR] {exc}", file=sys.stderr)
-        return 4
-    if isinstance(exc, PydanticValidationError):
-        print(f"[ERROR] {exc}", file=sys.stderr)
-        return 4
-    if isinstance(exc, DICOMGeneratorError):
-        print(f"[ERROR] {exc}", file=sys.stderr)
-        return 1
     print(f"[ERROR] {exc}", file=sys.stderr)
-    return 1
+    return exit_code_for_exception(exc)
 
@@ -27,55 +27,128 @@ from .exceptions import (
     ValidationError,
 )
 from .abnormal_generator import AbnormalGenerator
-from .generator import CT_IMAGE_STORAGE, DICOMBuilder
+from .cohort import cohort_patient_filter, expand_cohort, select_cohort_patients
+from .dicomdir import (
+    DICOMDIR_FILENAME,
+    MEDIA_STORAGE_DIRECTORY_STORAGE,
+    DicomdirImage,
+    DicomdirSeries,
+    encode_dicomdir,
+)
+from .frame_cache import CachedFrame, FrameCache, FrameKey
+from .generator import CT_IMAGE_STORAGE, ENHANCED_CT_IMAGE_STORAGE, DICOMBuilder
+from .manifest import (
+    MANIFEST_VERSION,
+    job_config_hash,
+    series_config_hash,
+    study_config_hash,
+)
 from .models import (
     AbnormalConfig,
     CharacterSetConfig,
+    CohortConfig,
+    DicomAttributes,
+    ExecutionConfig,
     GenerationConfig,
+    GenerationJournalHeader,
+    GenerationManifest,
+    GenerationPlan,
+    ImageStorageConfig,
     InstanceConfig,
+    ManifestFile,
     Patient,
+    PatientFilter,
     PatientName,
+    PatientSelector,
     PixelSpec,
     PixelSpecCTRealistic,
     PixelSpecSimple,
     SeriesConfig,
+    SeriesManifest,
+    SeriesPlan,
     SpatialCoordinates,
     StudyConfig,
     TransferSyntaxConfig,
     UIDContext,
 )
+from .part10_encoder import (
+    DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN,
+    EXPLICIT_VR_LITTLE_ENDIAN,
+    Part10Template,
+    deflate_compressor,
+    deflate_part10,
+    encode_part10,
+    encode_streaming_header,
+    part10_meta_length,
+)
 from .pixel_generator import PixelGenerator
-from .dicom_writer import FileMetaBuilder, SpatialCalculator
+from .rle_encoder import (
+    ENCAPSULATED_PIXEL_DATA_END,
+    RLE_LOSSLESS,
+    encapsulate_frames,
+    encapsulated_item,
+    rle_encode_frame,
+)
+from .dicom_writer import (
+    FileMetaBuilder,
+    SliceBatch,
+    SlicePosition,
+    SpatialCalculator,
+)
 from .uid_generator import UIDGenerator
 
 __all__ = [
     "AbnormalConfig",
     "AbnormalGenerator",
+    "CachedFrame",
     "CharacterSetConfig",
+    "CohortConfig",
     "CT_IMAGE_STORAGE",
     "ConfigurationError",
+    "DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN",
+    "DICOMDIR_FILENAME",
     "DICOMBuildError",
     "DICOMBuilder",
     "DICOMGeneratorError",
     "DICOMValidationError",
+    "DicomAttributes",
+    "DicomdirImage",
+    "DicomdirSeries",
     "DirectoryCreateError",
+    "ENCAPSULATED_PIXEL_DATA_END",
+    "ENHANCED_CT_IMAGE_STORAGE",
+    "EXPLICIT_VR_LITTLE_ENDIAN",
+    "ExecutionConfig",
     "FileMetaBuilder",
     "GenerationConfig",
     "FileMetaError",
     "FileReadError",
     "FileWriteError",
+    "FrameCache",
+    "FrameKey",
     "GenerationError",
+    "GenerationJournalHeader",
+    "GenerationManifest",
+    "GenerationPlan",
     "IOError",
+    "ImageStorageConfig",
     "InstanceConfig",
     "JobSchemaError",
     "JobValidationError",
+    "MANIFEST_VERSION",
+    "MEDIA_STORAGE_DIRECTORY_STORAGE",
+    "ManifestFile",
     "Patient",
     "PatientDataError",
     "PatientDataInvalidError",
     "PatientName",
     "PatientNotFoundError",
+    "PatientFilter",
+    "PatientSelector",
+    "Part10Template",
     "PixelGenerationError",
     "PixelGenerator",
+    "RLE_LOSSLESS",
     "SCPConfigError",
     "SCPError",
     "SCPStoreError",
@@ -83,6 +156,10 @@ __all__ = [
     "PixelSpecCTRealistic",
     "PixelSpecSimple",
     "SeriesConfig",
+    "SeriesManifest",
+    "SeriesPlan",
+    "SliceBatch",
+    "SlicePosition",
     "SpatialCalculator",
     "SpatialCoordinates",
     "StudyConfig",
@@ -94,4 +171,19 @@ __all__ = [
     "UIDGenerationError",
     "UIDGenerator",
     "ValidationError",
+    "cohort_patient_filter",
+    "deflate_compressor",
+    "deflate_part10",
+    "encapsulate_frames",
+    "encapsulated_item",
+    "encode_dicomdir",
+    "encode_part10",
+    "encode_streaming_header",
+    "expand_cohort",
+    "job_config_hash",
+    "part10_meta_length",
+    "rle_encode_frame",
+    "select_cohort_patients",
+    "series_config_hash",
+    "study_config_hash",
 ]
@@ -0,0 +1,132 @@
+"""Deterministic expansion of a cohort spec into per-study generation configs."""
+
+from __future__ import annotations
+
+import random
+from collections.abc import Iterator, Sequence
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from .exceptions import ConfigurationError, PatientNotFoundError
+from .models import CohortConfig, GenerationConfig, Patient, PatientFilter
+
+# Accession Number の最大長（SH）
+_ACCESSION_MAX_LENGTH = 16
+_MIN_ACCESSION_DIGITS = 6
+# 検査時刻は 08:00:00〜17:59:59 から選ぶ
+_STUDY_HOURS = range(8, 18)
+
+
+def select_cohort_patients(
+    cohort: CohortConfig, patients: Sequence[Patient]
+) -> list[Patient]:
+    """コホートの条件に合う患者を患者マスターの順で返す.
+
+    ``patient_ids`` を指定した場合は指定順とし、マスターにない ID はエラーとする。
+    """
+    selector = cohort.patients
+    if selector.patient_ids is None:
+        selected = list(patients)
+    else:
+        by_id = {patient.patient_id: patient for patient in patients}
+        selected = []
+        for patient_id in selector.patient_ids:
+            if patient_id not in by_id:
+                raise PatientNotFoundError(patient_id)
+            selected.append(by_id[patient_id])
+    if selector.sex is not None:
+        selected = [patient for patient in selected if patient.sex == selector.sex]
+    return selected
+
+
+def cohort_patient_filter(cohort: CohortConfig) -> PatientFilter:
+    """コホートの対象になりうる患者の条件を返す.
+
+    患者マスターから候補を絞り込んでから ``expand_cohort`` に渡すために使う。
+    ``patient_ids`` の指定は含まない。
+    """
+    return PatientFilter(
+        sex=cohort.patients.sex, birth_date_to=cohort.study_date_to
+    )
+
+
+def expand_cohort(
+    cohort: CohortConfig, patients: Sequence[Patient]
+) -> Iterator[GenerationConfig]:
+    """コホートを検査ごとの生成設定に展開する.
+
+    検査日・検査時刻・noiseパターンのシードはコホートのシード・患者ID・
+    患者内の検査番号から導出し、Accession Number は展開順の通し番号とするため、
+    同じコホート設定と患者マスターからは常に同じ設定が得られる。
+    Job 設定で ``uid_method`` を省略した場合は ``deterministic`` とし、UID の
+    シードも同様に検査ごとに導出する（Job 設定の ``uid_seed`` があれば基にする）。
+    検査日の範囲の終了より後に生まれた患者は対象外とする。
+    出力先は ``{output_dir}/{患者ID}/{Accession Number}`` となる。
+    """
+    date_from = _parse_date(cohort.study_date_from)
+    date_to = _parse_date(cohort.study_date_to)
+    eligible = [
+        patient
+        for patient in select_cohort_patients(cohort, patients)
+        if _parse_date(patient.birth_date) <= date_to
+    ]
+    total = len(eligible) * cohort.studies_per_patient
+    digits = max(_MIN_ACCESSION_DIGITS, len(str(total)))
+    if len(cohort.accession_prefix) + digits > _ACCESSION_MAX_LENGTH:
+        raise ConfigurationError(
+            "Accession number exceeds 16 characters",
+            {"accession_prefix": cohort.accession_prefix, "studies": total},
+        )
+
+    job = cohort.job
+    series_list = job.get("series_list") or []
+    study_defaults = job.get("study") or {}
+    pixel_spec = job.get("pixel_spec")
+    deterministic_uids = job.get("uid_method", "deterministic") == "deterministic"
+    uid_seed_base = job.get("uid_seed") or str(cohort.seed)
+    sequence = 0
+    for patient in eligible:
+        first_date = max(date_from, _parse_date(patient.birth_date))
+        days = (date_to - first_date).days
+        for study_index in range(cohort.studies_per_patient):
+            sequence += 1
+            rng = random.Random(f"{cohort.seed}:{patient.patient_id}:{study_index}")
+            accession_number = f"{cohort.accession_prefix}{sequence:0{digits}d}"
+            study_date = first_date + timedelta(days=rng.randint(0, days))
+            study_time = (
+                f"{rng.choice(_STUDY_HOURS):02d}"
+                f"{rng.randrange(60):02d}{rng.randrange(60):02d}"
+            )
+            job_data = {
+                **job,
+                "job_name": f"{cohort.cohort_name}_{accession_number}",
+                "output_dir": str(
+                    Path(cohort.output_dir) / patient.patient_id / accession_number
+                ),
+                "patient": patient,
+                "study": {
+                    **study_defaults,
+                    "accession_number": accession_number,
+                    "study_date": study_date.strftime("%Y%m%d"),
+                    "study_time": study_time,
+                    "num_series": len(series_list),
+                },
+            }
+            if (
+                isinstance(pixel_spec, dict)
+                and pixel_spec.get("mode") == "ct_realistic"
+                and pixel_spec.get("seed") is None
+            ):
+                # noiseパターンのシードも検査ごとに固定する
+                job_data["pixel_spec"] = {**pixel_spec, "seed": rng.getrandbits(63)}
+            if deterministic_uids:
+                job_data["uid_method"] = "deterministic"
+                job_data["uid_seed"] = (
+                    f"{uid_seed_base}:{cohort.cohort_name}:"
+                    f"{patient.patient_id}:{study_index}"
+                )
+            yield GenerationConfig.model_validate(job_data)
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y%m%d").date()
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+from typing import NamedTuple
+
+import numpy as np
 from pydicom.dataset import FileMetaDataset
 
 from .exceptions import FileMetaError
@@ -35,6 +38,33 @@ class FileMetaBuilder:
             raise FileMetaError(f"Failed to build File Meta Information: {exc}") from exc
 
 
+# SpatialCoordinates の既定値と同じ向き・画素間隔
+_DEFAULT_IMAGE_ORIENTATION_PATIENT = (1.0, 0.0, 0.0, 0.0, 1.0, 0.0)
+_DEFAULT_PIXEL_SPACING = (0.5, 0.5)
+
+
+class SlicePosition(NamedTuple):
+    """1スライス分の空間座標（生成ループで使う検証なしの軽量な値）.
+
+    ``SpatialCoordinates`` と同じ属性名を持ち、インスタンスの構築にそのまま渡せる。
+    """
+
+    instance_number: int
+    image_position_patient: tuple[float, float, float]
+    slice_location: float
+    image_orientation_patient: tuple[float, ...] = (
+        _DEFAULT_IMAGE_ORIENTATION_PATIENT
+    )
+    pixel_spacing: tuple[float, float] = _DEFAULT_PIXEL_SPACING
+
+
+class SliceBatch(NamedTuple):
+    """連続するスライスの Instance Number と z座標."""
+
+    instance_numbers: np.ndarray
+    z_positions: np.ndarray
+
+
 class SpatialCalculator:
     """空間座標計算器."""
 
@@ -67,3 +97,28 @@ class SpatialCalculator:
             image_position_patient=[0.0, 0.0, z],
             slice_location=z,
         )
+
+    def position(self, slice_index: int) -> SlicePosition:
+        """``calculate`` と同じ値を検証なしの ``SlicePosition`` で返す（生成ループ用）."""
+        if slice_index < 0:
+            raise ValueError(f"slice_index must be >= 0, got {slice_index}")
+        z = self._start_z + (slice_index * self._slice_spacing)
+        return SlicePosition(slice_index + 1, (0.0, 0.0, z), z)
+
+    def calculate_batch(self, start_index: int, count: int) -> SliceBatch:
+        """連続する ``count`` 枚のスライス（0始まり）の座標を配列でまとめて計算."""
+        z_positions = self.z_positions(start_index, count)
+        instance_numbers = np.arange(
+            start_index + 1, start_index + count + 1, dtype=np.int64
+        )
+        return SliceBatch(instance_numbers, z_positions)
+
+    def z_positions(self, start_index: int, count: int) -> np.ndarray:
+        """連続する ``count`` 枚のスライス（0始まり）のz座標をまとめて計算.
+
+        ``calculate(i).slice_location`` と同じ値を返す。
+        """
+        if start_index < 0:
+            raise ValueError(f"start_index must be >= 0, got {start_index}")
+        indices = np.arange(start_index, start_index + count, dtype=np.float64)
+        return self._start_z + indices * self._slice_spacing
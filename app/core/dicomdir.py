@@ -0,0 +1,241 @@
+"""Single-pass DICOMDIR (Basic Directory) encoder from collected records."""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Sequence
+from typing import NamedTuple
+
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.filebase import DicomBytesIO
+from pydicom.filewriter import write_dataset, write_file_meta_info
+
+from .exceptions import DICOMBuildError
+from .models import DicomAttributes
+
+# Media Storage Directory Storage SOP Class UID
+MEDIA_STORAGE_DIRECTORY_STORAGE = "1.2.840.10008.1.3.10"
+DICOMDIR_FILENAME = "DICOMDIR"
+
+# ディレクトリレコードのキー属性（PS3.3 F.5）。タイプ2の属性は値がなくても空で出力する
+_PATIENT_KEYS = ("PatientName", "PatientID", "PatientBirthDate", "PatientSex")
+_STUDY_KEYS = (
+    "StudyDate",
+    "StudyTime",
+    "AccessionNumber",
+    "StudyDescription",
+    "StudyInstanceUID",
+    "StudyID",
+)
+_SERIES_KEYS = ("Modality", "SeriesInstanceUID", "SeriesNumber", "SeriesDescription")
+_TYPE2_KEYS = frozenset({"PatientName", "AccessionNumber", "StudyDescription"})
+
+_ITEM_HEADER = struct.Struct("<HHI")
+_ITEM_TAG = (0xFFFE, 0xE000)
+_SEQUENCE_DELIMITER = b"\xfe\xff\xdd\xe0\x00\x00\x00\x00"
+_SHORT_HEADER = struct.Struct("<HH2sH")
+_UL = struct.Struct("<I")
+_UNDEFINED_LENGTH = 0xFFFFFFFF
+_IN_USE = 0xFFFF
+
+# レコード先頭の Offset of the Next Directory Record (UL) と
+# Offset of Referenced Lower-Level Directory Entity (UL) の値の位置
+# （(0004,1400) UL 12バイト + (0004,1410) US 10バイトの後）
+_NEXT_OFFSET_POSITION = 8
+_LOWER_OFFSET_POSITION = 12 + 10 + 8
+
+
+class DicomdirImage(NamedTuple):
+    """IMAGE レコードに記録する1ファイル分の情報."""
+
+    # DICOMDIR からの相対パス（"/" 区切り）
+    file_id: str
+    sop_instance_uid: str
+    instance_number: int
+
+
+class DicomdirSeries(NamedTuple):
+    """SERIES レコードと、その配下の IMAGE レコード."""
+
+    attributes: DicomAttributes
+    sop_class_uid: str
+    transfer_syntax_uid: str
+    images: Sequence[DicomdirImage]
+
+
+def encode_dicomdir(
+    file_meta: FileMetaDataset,
+    study_attributes: DicomAttributes,
+    series: Sequence[DicomdirSeries],
+    file_set_id: str = "",
+) -> bytes:
+    """1患者・1スタディの DICOMDIR を Explicit VR Little Endian でエンコードする.
+
+    ``study_attributes`` から PATIENT / STUDY レコード、``series`` の属性から
+    SERIES レコードのキー属性を取り出す。レコードは深さ優先の順に並べ、
+    オフセットの要素は固定長のため、全レコードをエンコードした後に値を書き込む。
+    IMAGE レコードはシリーズ共通の部分を使い回してエンコードする。
+    """
+    try:
+        header = _encode_meta(file_meta)
+        study_values = dict(study_attributes)
+        records: list[bytearray] = [
+            _encode_record("PATIENT", study_values, _PATIENT_KEYS),
+            _encode_record("STUDY", study_values, _STUDY_KEYS),
+        ]
+        # (レコード番号, 次のレコード番号, 下位の先頭レコード番号)
+        links: list[tuple[int, int | None, int | None]] = [(0, None, 1)]
+        study_lower: int | None = None
+        previous_series: int | None = None
+        for series_entry in series:
+            series_index = len(records)
+            records.append(
+                _encode_record(
+                    "SERIES",
+                    {**study_values, **dict(series_entry.attributes)},
+                    _SERIES_KEYS,
+                )
+            )
+            if previous_series is None:
+                study_lower = series_index
+            else:
+                links.append((previous_series, series_index, None))
+            previous_series = series_index
+
+            encode_image = _ImageRecordEncoder(
+                series_entry.sop_class_uid, series_entry.transfer_syntax_uid
+            )
+            first_image = len(records)
+            records.extend(encode_image(image) for image in series_entry.images)
+            last_image = len(records) - 1
+            for index in range(first_image, last_image):
+                links.append((index, index + 1, None))
+            if first_image <= last_image:
+                links.append((series_index, None, first_image))
+        links.append((1, None, study_lower))
+
+        file_set = _element(
+            (0x0004, 0x1130), "CS", _pad(file_set_id.encode("ascii"), b" ")
+        )
+        # ルート要素は固定長のため、仮の値で長さを求めてからレコードの位置を決める
+        position = len(header) + len(file_set) + len(_root_elements(0))
+        offsets = []
+        for record in records:
+            offsets.append(position)
+            position += _ITEM_HEADER.size + len(record)
+        for index, next_index, lower_index in links:
+            record = records[index]
+            if next_index is not None:
+                _UL.pack_into(record, _NEXT_OFFSET_POSITION, offsets[next_index])
+            if lower_index is not None:
+                _UL.pack_into(record, _LOWER_OFFSET_POSITION, offsets[lower_index])
+
+        parts = [header, file_set, _root_elements(offsets[0])]
+        for record in records:
+            parts.append(_ITEM_HEADER.pack(*_ITEM_TAG, len(record)))
+            parts.append(record)
+        parts.append(_SEQUENCE_DELIMITER)
+        data = b"".join(parts)
+    except DICOMBuildError:
+        raise
+    except Exception as exc:
+        raise DICOMBuildError(f"Failed to encode DICOMDIR: {exc}") from exc
+    return data
+
+
+class _ImageRecordEncoder:
+    """シリーズ内で共通の要素をエンコード済みで保持する IMAGE レコードエンコーダ."""
+
+    def __init__(self, sop_class_uid: str, transfer_syntax_uid: str) -> None:
+        self._head = b"".join(
+            [
+                _element((0x0004, 0x1400), "UL", b"\x00" * 4),
+                _element((0x0004, 0x1410), "US", struct.pack("<H", _IN_USE)),
+                _element((0x0004, 0x1420), "UL", b"\x00" * 4),
+                _element((0x0004, 0x1430), "CS", b"IMAGE "),
+            ]
+        )
+        self._sop_class = _element((0x0004, 0x1510), "UI", _uid(sop_class_uid))
+        self._transfer_syntax = _element(
+            (0x0004, 0x1512), "UI", _uid(transfer_syntax_uid)
+        )
+
+    def __call__(self, image: DicomdirImage) -> bytearray:
+        file_id = "\\".join(image.file_id.split("/")).encode("ascii")
+        return bytearray(
+            self._head
+            + _element((0x0004, 0x1500), "CS", _pad(file_id, b" "))
+            + self._sop_class
+            + _element((0x0004, 0x1511), "UI", _uid(image.sop_instance_uid))
+            + self._transfer_syntax
+            + _element(
+                (0x0020, 0x0013), "IS", _pad(str(image.instance_number).encode(), b" ")
+            )
+        )
+
+
+def _root_elements(root_offset: int) -> bytes:
+    """ルートレコードのオフセットから Directory Record Sequence のヘッダまで.
+
+    ルートは患者レコードのみのため、先頭と末尾のオフセットは同じ値となる。
+    """
+    return b"".join(
+        [
+            _element((0x0004, 0x1200), "UL", _UL.pack(root_offset)),
+            _element((0x0004, 0x1202), "UL", _UL.pack(root_offset)),
+            # File-set Consistency Flag: 0 は整合性に問題がないことを示す
+            _element((0x0004, 0x1212), "US", b"\x00\x00"),
+            struct.pack("<HH2s2xI", 0x0004, 0x1220, b"SQ", _UNDEFINED_LENGTH),
+        ]
+    )
+
+
+def _encode_meta(file_meta: FileMetaDataset) -> bytes:
+    buffer = DicomBytesIO()
+    buffer.write(b"\x00" * 128 + b"DICM")
+    write_file_meta_info(buffer, file_meta, enforce_standard=True)
+    return buffer.getvalue()
+
+
+def _encode_record(
+    record_type: str, values: dict[str, object], keys: Sequence[str]
+) -> bytearray:
+    """PATIENT / STUDY / SERIES レコードを pydicom でエンコードする.
+
+    患者名など文字集合に依存する値を正しく符号化するため、
+    Specific Character Set があればレコードにも設定する。
+    """
+    record = Dataset()
+    record.OffsetOfTheNextDirectoryRecord = 0
+    record.RecordInUseFlag = _IN_USE
+    record.OffsetOfReferencedLowerLevelDirectoryEntity = 0
+    record.DirectoryRecordType = record_type
+    if "SpecificCharacterSet" in values:
+        record.SpecificCharacterSet = _multi_value(values["SpecificCharacterSet"])
+    for keyword in keys:
+        if keyword in values:
+            setattr(record, keyword, _multi_value(values[keyword]))
+        elif keyword in _TYPE2_KEYS:
+            setattr(record, keyword, "")
+    buffer = DicomBytesIO()
+    buffer.is_little_endian = True
+    buffer.is_implicit_VR = False
+    write_dataset(buffer, record)
+    return bytearray(buffer.getvalue())
+
+
+def _multi_value(value: object) -> object:
+    # pydicom はタプルを多値として扱わないためリストに戻す
+    return list(value) if isinstance(value, tuple) else value
+
+
+def _element(tag: tuple[int, int], vr: str, value: bytes) -> bytes:
+    return _SHORT_HEADER.pack(*tag, vr.encode(), len(value)) + value
+
+
+def _uid(value: str) -> bytes:
+    return _pad(value.encode("ascii"), b"\x00")
+
+
+def _pad(value: bytes, padding: bytes) -> bytes:
+    return value + padding if len(value) % 2 else value
@@ -24,6 +24,19 @@ class DICOMGeneratorError(Exception):
             "details": self.details,
         }
 
+    def __reduce__(self):
+        # サブクラスは __init__ の引数が異なるため、message/details から直接復元する
+        return (_restore_error, (self.__class__, self.message, self.details))
+
+
+def _restore_error(
+    error_class: type[DICOMGeneratorError], message: str, details: dict
+) -> DICOMGeneratorError:
+    """プロセス間で受け渡された例外を復元する."""
+    error = error_class.__new__(error_class)
+    DICOMGeneratorError.__init__(error, message, details)
+    return error
+
 
 class GenerationError(DICOMGeneratorError):
     pass
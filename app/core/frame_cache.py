@@ -0,0 +1,121 @@
+"""LRU cache for deterministic pixel frames."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import NamedTuple
+
+import numpy as np
+
+from .exceptions import PixelGenerationError
+
+DEFAULT_FRAME_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class FrameKey(NamedTuple):
+    """フレームを一意に決める生成パラメータ."""
+
+    width: int
+    height: int
+    pattern: str
+    bits_stored: int
+    dtype: str
+    # 圧縮転送構文でエンコードしたフレームを保持する場合の転送構文
+    transfer_syntax_uid: str | None = None
+
+
+class CachedFrame(NamedTuple):
+    """読み取り専用のフレーム配列と、そのエンコード済みバイト列.
+
+    バイト列は通常はリトルエンディアンのピクセル値、圧縮転送構文では
+    圧縮したフレームとなる。
+    """
+
+    array: np.ndarray
+    data: bytes
+
+    @property
+    def nbytes(self) -> int:
+        return self.array.nbytes + len(self.data)
+
+
+class FrameCache:
+    """生成結果が毎回同一になるフレームを保持するLRUキャッシュ.
+
+    ``max_bytes`` は配列とバイト列を合わせた保持量の上限。
+    単体で上限を超えるフレームはキャッシュせずに毎回生成する。
+    ``max_bytes=0`` でキャッシュを無効化する。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_FRAME_CACHE_BYTES) -> None:
+        if max_bytes < 0:
+            raise PixelGenerationError(f"max_bytes must be >= 0, got {max_bytes}")
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[FrameKey, CachedFrame] = OrderedDict()
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def current_bytes(self) -> int:
+        return self._current_bytes
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_create(
+        self,
+        key: FrameKey,
+        factory: Callable[[], np.ndarray],
+        encoder: Callable[[np.ndarray], bytes] | None = None,
+    ) -> CachedFrame:
+        """キャッシュ済みフレームを返す。未登録なら ``factory`` で生成して登録する.
+
+        ``encoder`` を指定した場合は、生成したフレームを圧縮したバイト列を保持する。
+        ``key.transfer_syntax_uid`` で圧縮の有無を区別すること。
+        """
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return cached
+
+        self._misses += 1
+        frame = self._freeze(factory(), encoder)
+        if frame.nbytes > self._max_bytes:
+            return frame
+
+        self._entries[key] = frame
+        self._current_bytes += frame.nbytes
+        while self._current_bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._current_bytes -= evicted.nbytes
+        return frame
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._current_bytes = 0
+
+    @staticmethod
+    def _freeze(
+        pixels: np.ndarray, encoder: Callable[[np.ndarray], bytes] | None = None
+    ) -> CachedFrame:
+        array = np.ascontiguousarray(pixels, dtype=pixels.dtype.newbyteorder("<"))
+        if array is pixels:
+            array = array.copy()
+        array.flags.writeable = False
+        data = encoder(array) if encoder is not None else array.tobytes()
+        return CachedFrame(array=array, data=data)
@@ -2,13 +2,18 @@
 
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta
+from collections.abc import Sequence
+from datetime import datetime
 
 import numpy as np
 from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import generate_uid
 
+from .dicom_writer import SlicePosition
 from .exceptions import DICOMBuildError
 from .models import (
+    DicomAttributes,
+    GenerationPlan,
     InstanceConfig,
     Patient,
     SeriesConfig,
@@ -16,9 +21,32 @@ from .models import (
     StudyConfig,
     UIDContext,
 )
+from .part10_encoder import DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN
+from .patient_age import age_reached_date
+from .rle_encoder import RLE_LOSSLESS, encapsulate_frames, rle_encode_frame
 
 # CT Image Storage SOP Class UID
 CT_IMAGE_STORAGE = "1.2.840.10008.5.1.4.1.1.2"
+# Enhanced CT Image Storage SOP Class UID
+ENHANCED_CT_IMAGE_STORAGE = "1.2.840.10008.5.1.4.1.1.2.1"
+
+# 単一フレームのトップレベル属性のうち、Enhanced CT では機能グループに移すもの
+_ENHANCED_CT_FUNCTIONAL_GROUP_KEYWORDS = frozenset(
+    {
+        "ImageOrientationPatient",
+        "PixelSpacing",
+        "SliceThickness",
+        "KVP",
+        "ExposureTime",
+        "XRayTubeCurrent",
+        "ConvolutionKernel",
+    }
+)
+_ENHANCED_CT_IMAGE_TYPE = ["ORIGINAL", "PRIMARY", "AXIAL", "NONE"]
+# Dimension Index Pointer / Functional Group Pointer に設定するタグ
+_STACK_ID_TAG = 0x00209056
+_IN_STACK_POSITION_NUMBER_TAG = 0x00209057
+_FRAME_CONTENT_SEQUENCE_TAG = 0x00209111
 
 
 class DICOMBuilder:
@@ -40,85 +68,365 @@ class DICOMBuilder:
         use_ideographic: bool = True,
         use_phonetic: bool = True,
         bits_stored: int = 16,
+        pixel_bytes: bytes | None = None,
+    ) -> Dataset:
+        """CT Image Storageを構築.
+
+        ``pixel_bytes`` を指定した場合は ``pixel_data`` を再エンコードせず
+        そのまま Pixel Data に設定する（キャッシュ済みフレーム用）。
+        RLE Lossless では ``pixel_bytes`` は圧縮済みのフレームとし、カプセル化して設定する。
+        """
+        study_attributes = self.resolve_study_attributes(
+            patient=patient,
+            study_config=study_config,
+            sop_class_uid=str(
+                getattr(file_meta, "MediaStorageSOPClassUID", CT_IMAGE_STORAGE)
+            ),
+            specific_character_set=specific_character_set,
+            use_ideographic=use_ideographic,
+            use_phonetic=use_phonetic,
+        )
+        series_attributes = self.resolve_series_attributes(
+            series_config=series_config,
+            image_orientation_patient=spatial.image_orientation_patient,
+            pixel_spacing=spatial.pixel_spacing,
+        )
+        return self._build_instance(
+            attribute_groups=(study_attributes, series_attributes),
+            uid_context=uid_context,
+            series_instance_uid=series_instance_uid,
+            sop_instance_uid=sop_instance_uid,
+            instance_number=instance_config.instance_number,
+            acquisition_number=instance_config.acquisition_number,
+            spatial=spatial,
+            pixel_data=pixel_data,
+            file_meta=file_meta,
+            bits_stored=bits_stored,
+            pixel_bytes=pixel_bytes,
+        )
+
+    def build_ct_image_from_plan(
+        self,
+        plan: GenerationPlan,
+        series_index: int,
+        uid_context: UIDContext,
+        spatial: SpatialCoordinates | SlicePosition,
+        pixel_data: np.ndarray,
+        file_meta: FileMetaDataset,
+        sop_instance_uid: str,
+        series_instance_uid: str,
+        bits_stored: int = 16,
+        pixel_bytes: bytes | None = None,
+    ) -> Dataset:
+        """解決済みの生成計画からCT Image Storageを構築.
+
+        スタディ・シリーズ単位の属性は計画の値をそのまま設定し、
+        インスタンスごとにはUID・空間座標・ピクセルデータのみを設定する。
+        ``spatial`` には生成ループ用の ``SlicePosition`` も渡せる。
+        """
+        try:
+            series_plan = plan.series[series_index]
+        except IndexError as exc:
+            raise DICOMBuildError(
+                f"Series index out of range: {series_index}",
+                tag="SeriesInstanceUID",
+            ) from exc
+        return self._build_instance(
+            attribute_groups=(plan.attributes, series_plan.attributes),
+            uid_context=uid_context,
+            series_instance_uid=series_instance_uid,
+            sop_instance_uid=sop_instance_uid,
+            instance_number=spatial.instance_number,
+            acquisition_number=1,
+            spatial=spatial,
+            pixel_data=pixel_data,
+            file_meta=file_meta,
+            bits_stored=bits_stored,
+            pixel_bytes=pixel_bytes,
+        )
+
+    def build_enhanced_ct_from_plan(
+        self,
+        plan: GenerationPlan,
+        series_index: int,
+        uid_context: UIDContext,
+        frame_positions: Sequence[Sequence[float]],
+        file_meta: FileMetaDataset,
+        sop_instance_uid: str,
+        series_instance_uid: str,
+        instance_number: int,
+        rows: int,
+        columns: int,
+        bits_stored: int = 16,
+        first_in_stack_position: int = 1,
     ) -> Dataset:
-        """CT Image Storageを構築."""
+        """解決済みの生成計画から Enhanced CT Image Storage を構築（Pixel Data を除く）.
+
+        向き・画素間隔・スライス厚・撮影条件と画素値変換は Shared Functional Groups に、
+        フレームごとの位置は Per-frame Functional Groups に設定する。
+        シリーズを複数オブジェクトに分割する場合は ``first_in_stack_position`` に
+        先頭フレームのシリーズ内位置（1始まり）を指定する。
+        Pixel Data は呼び出し元がフレーム単位でストリーム書き込みする。
+        """
         try:
-            media_storage_sop_uid = str(
-                getattr(file_meta, "MediaStorageSOPInstanceUID", "")
+            series_plan = plan.series[series_index]
+        except IndexError as exc:
+            raise DICOMBuildError(
+                f"Series index out of range: {series_index}",
+                tag="SeriesInstanceUID",
+            ) from exc
+        if not frame_positions:
+            raise DICOMBuildError(
+                "Enhanced CT requires at least one frame", tag="NumberOfFrames"
+            )
+        meta_sop_class_uid = str(getattr(file_meta, "MediaStorageSOPClassUID", ""))
+        if meta_sop_class_uid != ENHANCED_CT_IMAGE_STORAGE:
+            raise DICOMBuildError(
+                "File meta SOP Class UID must be Enhanced CT Image Storage",
+                tag="MediaStorageSOPClassUID",
             )
-            if media_storage_sop_uid != sop_instance_uid:
-                raise DICOMBuildError(
-                    "SOP Instance UID mismatch between dataset and file meta",
-                    tag="MediaStorageSOPInstanceUID",
-                )
+
+        try:
+            self._check_file_meta_sop_instance_uid(file_meta, sop_instance_uid)
 
             ds = Dataset()
             ds.file_meta = file_meta
+            functional_values: dict[str, str | list[str]] = {}
+            for attributes in (plan.attributes, series_plan.attributes):
+                for keyword, value in attributes:
+                    # pydicom はタプルを多値として扱わないためリストに戻す
+                    if isinstance(value, tuple):
+                        value = list(value)
+                    if keyword in _ENHANCED_CT_FUNCTIONAL_GROUP_KEYWORDS:
+                        functional_values[keyword] = value
+                    else:
+                        setattr(ds, keyword, value)
+            ds.SOPClassUID = ENHANCED_CT_IMAGE_STORAGE
+
+            # UIDs
+            ds.StudyInstanceUID = uid_context.study_instance_uid
+            ds.SeriesInstanceUID = series_instance_uid
+            ds.FrameOfReferenceUID = uid_context.frame_of_reference_uid
+            ds.SOPInstanceUID = sop_instance_uid
+            ds.InstanceCreatorUID = uid_context.instance_creator_uid
 
-            # Patient Module
+            # Enhanced CT Image Module
+            ds.InstanceNumber = str(instance_number)
+            ds.ImageType = list(_ENHANCED_CT_IMAGE_TYPE)
+            if "ContentDate" in ds and "ContentTime" in ds:
+                ds.AcquisitionDateTime = f"{ds.ContentDate}{ds.ContentTime}"
+            ds.ContentQualification = "PRODUCT"
+            ds.BurnedInAnnotation = "NO"
+            ds.LossyImageCompression = "00"
+            ds.PresentationLUTShape = "IDENTITY"
+
+            # Image Pixel / Multi-frame Modules
+            ds.NumberOfFrames = str(len(frame_positions))
+            ds.Rows = rows
+            ds.Columns = columns
+            ds.SamplesPerPixel = 1
+            ds.PhotometricInterpretation = "MONOCHROME2"
+            ds.BitsAllocated = 16
+            ds.BitsStored = bits_stored
+            ds.HighBit = bits_stored - 1
+            ds.PixelRepresentation = 1
+
+            # Multi-frame Dimension Module（スタックID × スタック内位置）
+            dimension_uid = generate_uid(
+                prefix=None, entropy_srcs=[sop_instance_uid, "dimension"]
+            )
+            ds.DimensionOrganizationSequence = [
+                self._item(DimensionOrganizationUID=dimension_uid)
+            ]
+            ds.DimensionIndexSequence = [
+                self._item(
+                    DimensionOrganizationUID=dimension_uid,
+                    DimensionIndexPointer=pointer,
+                    FunctionalGroupPointer=_FRAME_CONTENT_SEQUENCE_TAG,
+                )
+                for pointer in (_STACK_ID_TAG, _IN_STACK_POSITION_NUMBER_TAG)
+            ]
+
+            ds.SharedFunctionalGroupsSequence = [
+                self._shared_functional_groups(functional_values)
+            ]
+            ds.PerFrameFunctionalGroupsSequence = [
+                self._item(
+                    FrameContentSequence=[
+                        self._item(
+                            StackID="1",
+                            InStackPositionNumber=position_number,
+                            DimensionIndexValues=[1, position_number],
+                        )
+                    ],
+                    PlanePositionSequence=[
+                        self._item(ImagePositionPatient=[str(v) for v in position])
+                    ],
+                )
+                for position_number, position in enumerate(
+                    frame_positions, start=first_in_stack_position
+                )
+            ]
+
+            self._apply_transfer_syntax(ds, file_meta)
+            return ds
+        except Exception as exc:
+            if isinstance(exc, DICOMBuildError):
+                raise
+            raise DICOMBuildError(
+                f"Failed to build Enhanced CT image dataset: {exc}"
+            ) from exc
+
+    def resolve_study_attributes(
+        self,
+        patient: Patient,
+        study_config: StudyConfig,
+        sop_class_uid: str = CT_IMAGE_STORAGE,
+        specific_character_set: str | None = None,
+        use_ideographic: bool = True,
+        use_phonetic: bool = True,
+    ) -> DicomAttributes:
+        """スタディ内の全インスタンスで共通の属性（UIDを除く）を解決する."""
+        try:
             patient_name = patient.patient_name.to_dicom_pn(
                 use_ideographic=use_ideographic,
                 use_phonetic=use_phonetic,
             )
-            self._apply_character_set(ds, patient_name, specific_character_set)
-            ds.PatientName = patient_name
-            ds.PatientID = patient.patient_id
-            ds.PatientBirthDate = patient.birth_date
-            ds.PatientSex = patient.sex
-            ds.PatientAge = self._calculate_patient_age(
-                patient.birth_date,
-                study_config.study_date,
+            attributes: list[tuple[str, str | tuple[str, ...]]] = []
+
+            # Patient Module
+            character_set = self._resolve_character_set(
+                patient_name, specific_character_set
+            )
+            if character_set is not None:
+                attributes.append(("SpecificCharacterSet", character_set))
+            attributes.extend(
+                [
+                    ("PatientName", patient_name),
+                    ("PatientID", patient.patient_id),
+                    ("PatientBirthDate", patient.birth_date),
+                    ("PatientSex", patient.sex),
+                    (
+                        "PatientAge",
+                        self._calculate_patient_age(
+                            patient.birth_date,
+                            study_config.study_date,
+                        ),
+                    ),
+                ]
             )
             if patient.weight is not None:
-                ds.PatientWeight = str(patient.weight)
+                attributes.append(("PatientWeight", str(patient.weight)))
             if patient.size_in_meters is not None:
-                ds.PatientSize = str(patient.size_in_meters)
+                attributes.append(("PatientSize", str(patient.size_in_meters)))
 
             # General Study Module
-            ds.StudyInstanceUID = uid_context.study_instance_uid
-            ds.StudyDate = study_config.study_date
-            ds.StudyTime = study_config.study_time
-            ds.AccessionNumber = study_config.accession_number
+            attributes.extend(
+                [
+                    ("StudyDate", study_config.study_date),
+                    ("StudyTime", study_config.study_time),
+                    ("AccessionNumber", study_config.accession_number),
+                ]
+            )
             if study_config.study_description is not None:
-                ds.StudyDescription = study_config.study_description
+                attributes.append(("StudyDescription", study_config.study_description))
             if study_config.referring_physician_name is not None:
-                ds.ReferringPhysicianName = study_config.referring_physician_name
-            ds.StudyID = ""
+                attributes.append(
+                    ("ReferringPhysicianName", study_config.referring_physician_name)
+                )
+            attributes.append(("StudyID", ""))
 
             # General Series Module
-            ds.Modality = "CT"
-            ds.SeriesInstanceUID = series_instance_uid
-            ds.SeriesNumber = str(series_config.series_number)
-            if series_config.series_description is not None:
-                ds.SeriesDescription = series_config.series_description
-            if series_config.protocol_name is not None:
-                ds.ProtocolName = series_config.protocol_name
-            ds.FrameOfReferenceUID = uid_context.frame_of_reference_uid
+            attributes.append(("Modality", "CT"))
 
             # General Image Module
-            ds.InstanceNumber = str(instance_config.instance_number)
-            ds.AcquisitionNumber = str(instance_config.acquisition_number)
-            ds.ContentDate = study_config.study_date
-            ds.ContentTime = study_config.study_time
+            attributes.extend(
+                [
+                    ("ContentDate", study_config.study_date),
+                    ("ContentTime", study_config.study_time),
+                ]
+            )
 
             # SOP Common Module
-            ds.SOPClassUID = str(
-                getattr(file_meta, "MediaStorageSOPClassUID", CT_IMAGE_STORAGE)
-            )
+            attributes.append(("SOPClassUID", sop_class_uid))
+            return tuple(attributes)
+        except Exception as exc:
+            if isinstance(exc, DICOMBuildError):
+                raise
+            raise DICOMBuildError(f"Failed to build CT image dataset: {exc}") from exc
+
+    def resolve_series_attributes(
+        self,
+        series_config: SeriesConfig,
+        image_orientation_patient: Sequence[float],
+        pixel_spacing: Sequence[float],
+    ) -> DicomAttributes:
+        """シリーズ内の全インスタンスで共通の属性（UIDを除く）を解決する."""
+        attributes: list[tuple[str, str | tuple[str, ...]]] = [
+            ("SeriesNumber", str(series_config.series_number)),
+        ]
+        if series_config.series_description is not None:
+            attributes.append(("SeriesDescription", series_config.series_description))
+        if series_config.protocol_name is not None:
+            attributes.append(("ProtocolName", series_config.protocol_name))
+        attributes.extend(
+            [
+                (
+                    "ImageOrientationPatient",
+                    tuple(str(v) for v in image_orientation_patient),
+                ),
+                ("SliceThickness", str(series_config.slice_thickness)),
+                ("PixelSpacing", tuple(str(v) for v in pixel_spacing)),
+            ]
+        )
+        return tuple(attributes)
+
+    def _build_instance(
+        self,
+        attribute_groups: tuple[DicomAttributes, ...],
+        uid_context: UIDContext,
+        series_instance_uid: str,
+        sop_instance_uid: str,
+        instance_number: int,
+        acquisition_number: int,
+        spatial: SpatialCoordinates | SlicePosition,
+        pixel_data: np.ndarray,
+        file_meta: FileMetaDataset,
+        bits_stored: int,
+        pixel_bytes: bytes | None,
+    ) -> Dataset:
+        """解決済み属性にインスタンス固有の値を加えてDatasetを組み立てる."""
+        try:
+            self._check_file_meta_sop_instance_uid(file_meta, sop_instance_uid)
+
+            ds = Dataset()
+            ds.file_meta = file_meta
+            for attributes in attribute_groups:
+                for keyword, value in attributes:
+                    # pydicom はタプルを多値として扱わないためリストに戻す
+                    if isinstance(value, tuple):
+                        value = list(value)
+                    setattr(ds, keyword, value)
+
+            # UIDs
+            ds.StudyInstanceUID = uid_context.study_instance_uid
+            ds.SeriesInstanceUID = series_instance_uid
+            ds.FrameOfReferenceUID = uid_context.frame_of_reference_uid
             ds.SOPInstanceUID = sop_instance_uid
             ds.InstanceCreatorUID = uid_context.instance_creator_uid
 
+            # General Image Module
+            ds.InstanceNumber = str(instance_number)
+            ds.AcquisitionNumber = str(acquisition_number)
+
             # Spatial
             ds.ImagePositionPatient = [str(v) for v in spatial.image_position_patient]
-            ds.ImageOrientationPatient = [
-                str(v) for v in spatial.image_orientation_patient
-            ]
             ds.SliceLocation = str(spatial.slice_location)
-            ds.SliceThickness = str(series_config.slice_thickness)
-            ds.PixelSpacing = [str(v) for v in spatial.pixel_spacing]
 
             # Pixel Data
-            self._set_pixel_data(ds, pixel_data, bits_stored=bits_stored)
+            self._set_pixel_data(
+                ds, pixel_data, bits_stored=bits_stored, pixel_bytes=pixel_bytes
+            )
 
             # Transfer Syntax compatibility
             self._apply_transfer_syntax(ds, file_meta)
@@ -129,8 +437,80 @@ class DICOMBuilder:
                 raise
             raise DICOMBuildError(f"Failed to build CT image dataset: {exc}") from exc
 
+    @staticmethod
+    def _check_file_meta_sop_instance_uid(
+        file_meta: FileMetaDataset, sop_instance_uid: str
+    ) -> None:
+        media_storage_sop_uid = str(
+            getattr(file_meta, "MediaStorageSOPInstanceUID", "")
+        )
+        if media_storage_sop_uid != sop_instance_uid:
+            raise DICOMBuildError(
+                "SOP Instance UID mismatch between dataset and file meta",
+                tag="MediaStorageSOPInstanceUID",
+            )
+
+    @staticmethod
+    def _item(**elements: object) -> Dataset:
+        item = Dataset()
+        for keyword, value in elements.items():
+            setattr(item, keyword, value)
+        return item
+
+    def _shared_functional_groups(
+        self, functional_values: dict[str, str | list[str]]
+    ) -> Dataset:
+        """全フレーム共通の機能グループ（単一フレームCTと同じ画素値変換・表示条件）."""
+        shared = self._item(
+            PixelMeasuresSequence=[
+                self._item(
+                    PixelSpacing=functional_values.get("PixelSpacing"),
+                    SliceThickness=functional_values.get("SliceThickness"),
+                )
+            ],
+            PlaneOrientationSequence=[
+                self._item(
+                    ImageOrientationPatient=functional_values.get(
+                        "ImageOrientationPatient"
+                    )
+                )
+            ],
+            CTImageFrameTypeSequence=[
+                self._item(
+                    FrameType=list(_ENHANCED_CT_IMAGE_TYPE),
+                    PixelPresentation="MONOCHROME",
+                    VolumetricProperties="VOLUME",
+                    VolumeBasedCalculationTechnique="NONE",
+                )
+            ],
+            PixelValueTransformationSequence=[
+                self._item(RescaleIntercept="-1024", RescaleSlope="1", RescaleType="HU")
+            ],
+            FrameVOILUTSequence=[
+                self._item(WindowCenter=["40", "400"], WindowWidth=["400", "1500"])
+            ],
+        )
+        if "KVP" in functional_values:
+            shared.CTXRayDetailsSequence = [self._item(KVP=functional_values["KVP"])]
+        if "ConvolutionKernel" in functional_values:
+            shared.CTReconstructionSequence = [
+                self._item(ConvolutionKernel=functional_values["ConvolutionKernel"])
+            ]
+        exposure = self._item()
+        if "ExposureTime" in functional_values:
+            exposure.ExposureTimeInms = float(functional_values["ExposureTime"])
+        if "XRayTubeCurrent" in functional_values:
+            exposure.XRayTubeCurrentInmA = float(functional_values["XRayTubeCurrent"])
+        if len(exposure):
+            shared.CTExposureSequence = [exposure]
+        return shared
+
     def _set_pixel_data(
-        self, ds: Dataset, pixel_data: np.ndarray, bits_stored: int = 16
+        self,
+        ds: Dataset,
+        pixel_data: np.ndarray,
+        bits_stored: int = 16,
+        pixel_bytes: bytes | None = None,
     ) -> None:
         """ピクセルデータをDatasetに設定."""
         rows, cols = pixel_data.shape
@@ -159,12 +539,21 @@ class DICOMBuilder:
                 tag="PixelData",
             )
 
-        ds.PixelData = pixel_data.tobytes()
+        if str(getattr(ds.file_meta, "TransferSyntaxUID", "")) == RLE_LOSSLESS:
+            frame = pixel_bytes if pixel_bytes is not None else rle_encode_frame(pixel_data)
+            ds.PixelData = encapsulate_frames([frame])
+            ds["PixelData"].VR = "OB"
+            ds["PixelData"].is_undefined_length = True
+            return
+
+        ds.PixelData = pixel_bytes if pixel_bytes is not None else pixel_data.tobytes()
 
     _SUPPORTED_TRANSFER_SYNTAXES = {
         "1.2.840.10008.1.2",      # Implicit VR Little Endian
         "1.2.840.10008.1.2.1",    # Explicit VR Little Endian
         "1.2.840.10008.1.2.2",    # Explicit VR Big Endian
+        DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN,
+        RLE_LOSSLESS,             # RLE Lossless
     }
 
     def _apply_transfer_syntax(self, ds: Dataset, file_meta: FileMetaDataset) -> None:
@@ -177,25 +566,26 @@ class DICOMBuilder:
 
     _DEFAULT_JP_CHARACTER_SET = r"ISO 2022 IR 6\ISO 2022 IR 87"
 
-    def _apply_character_set(
+    def _resolve_character_set(
         self,
-        ds: Dataset,
         patient_name: str,
         specific_character_set: str | None,
-    ) -> None:
+    ) -> str | tuple[str, ...] | None:
+        """設定するSpecificCharacterSetを返す（設定不要ならNone）."""
         if specific_character_set is not None:
             parsed = self._parse_charset(specific_character_set)
             if parsed:
-                ds.SpecificCharacterSet = parsed
-            elif self._contains_non_ascii(patient_name):
+                return parsed if isinstance(parsed, str) else tuple(parsed)
+            if self._contains_non_ascii(patient_name):
                 raise DICOMBuildError(
                     "SpecificCharacterSet is required for non-ASCII PatientName",
                     tag="SpecificCharacterSet",
                 )
-            return
+            return None
 
         if self._contains_non_ascii(patient_name):
-            ds.SpecificCharacterSet = self._parse_charset(self._DEFAULT_JP_CHARACTER_SET)
+            return tuple(self._parse_charset(self._DEFAULT_JP_CHARACTER_SET))
+        return None
 
     @staticmethod
     def _parse_charset(value: str) -> str | list[str]:
@@ -208,26 +598,6 @@ class DICOMBuilder:
     def _contains_non_ascii(self, value: str) -> bool:
         return any(ord(char) > 127 for char in value)
 
-    @staticmethod
-    def _age_reached_date(birth: date, n: int) -> date:
-        """民法143条に基づきN歳到達日（加齢日）を算出する.
-
-        年齢計算ニ関スル法律: 出生日から起算し、誕生日の前日の満了をもって加齢。
-        加齢日 = 誕生日のN年後の応当日の前日。
-        応当日が存在しない場合（2/29生まれの非閏年）→ その月の末日（2/28）を
-        応当日とみなし、その前日（2/27）…ではなく、
-        誕生日の前日（2/28）のN年後 = 2/28 が加齢日。
-        """
-        # 誕生日の前日のN年後を直接求める（前日は常に存在する）
-        eve = birth - timedelta(days=1)
-        target_year = eve.year + n
-        try:
-            return eve.replace(year=target_year)
-        except ValueError:
-            # eve が 2/28 で target_year が閏年の場合は起こらない
-            # eve が 2/29（birth=3/1 で閏年）で非閏年の場合 → 2/28
-            return date(target_year, eve.month, 28)
-
     def _calculate_patient_age(self, birth_date: str, study_date: str) -> str:
         try:
             birth = datetime.strptime(birth_date, "%Y%m%d").date()
@@ -245,9 +615,9 @@ class DICOMBuilder:
             )
 
         age_years = study.year - birth.year
-        if study >= self._age_reached_date(birth, age_years + 1):
+        if study >= age_reached_date(birth, age_years + 1):
             age_years += 1
-        elif study < self._age_reached_date(birth, age_years):
+        elif study < age_reached_date(birth, age_years):
             age_years -= 1
 
         if not 0 <= age_years <= 999:
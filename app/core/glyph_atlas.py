@@ -0,0 +1,78 @@
+"""Pre-rasterized glyph atlas for simple_text pixel rendering."""
+
+from __future__ import annotations
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .exceptions import PixelGenerationError
+
+DEFAULT_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"
+# 印字可能なASCII文字（UIDの数字とドットを含む）
+ATLAS_CHARACTERS = "".join(chr(code) for code in range(0x20, 0x7F))
+# アトラスに含まれない文字の代替
+FALLBACK_CHARACTER = "?"
+
+
+class GlyphAtlas:
+    """文字グリフを前景色・背景色で合成済みのタイルとして保持するアトラス.
+
+    作成時に一度だけ PIL でラスタライズし、以降の描画は numpy のスライス代入のみで行う。
+    全グリフは同じセル幅・セル高さのタイルに揃える。
+    """
+
+    def __init__(
+        self,
+        font_size: int,
+        background_color: int,
+        text_color: int,
+        font_path: str = DEFAULT_FONT_PATH,
+    ) -> None:
+        try:
+            font = self._load_font(font_path, font_size)
+            bboxes = [font.getbbox(char) for char in ATLAS_CHARACTERS]
+            self.cell_width = max(1, max(bbox[2] for bbox in bboxes))
+            self.cell_height = max(1, max(bbox[3] for bbox in bboxes))
+
+            coverage = np.empty(
+                (len(ATLAS_CHARACTERS), self.cell_height, self.cell_width),
+                dtype=np.float32,
+            )
+            for index, char in enumerate(ATLAS_CHARACTERS):
+                glyph = Image.new("L", (self.cell_width, self.cell_height), color=0)
+                ImageDraw.Draw(glyph).text((0, 0), char, fill=255, font=font)
+                coverage[index] = np.asarray(glyph, dtype=np.float32)
+        except Exception as exc:
+            raise PixelGenerationError(
+                f"Failed to rasterize glyph atlas: {exc}", mode="simple_text"
+            ) from exc
+
+        # アンチエイリアスの被覆率で背景色と前景色を合成しておく
+        blended = background_color + (text_color - background_color) * coverage / 255.0
+        self._tiles = np.rint(blended).astype(np.uint8)
+        self._tiles.flags.writeable = False
+
+        fallback = ATLAS_CHARACTERS.index(FALLBACK_CHARACTER)
+        self._lookup = np.full(256, fallback, dtype=np.intp)
+        for index, char in enumerate(ATLAS_CHARACTERS):
+            self._lookup[ord(char)] = index
+
+    def render_line(self, text: str) -> np.ndarray:
+        """1行分の文字列を (cell_height, cell_width * len(text)) の配列にする."""
+        codes = np.frombuffer(text.encode("ascii", errors="replace"), dtype=np.uint8)
+        tiles = self._tiles[self._lookup[codes]]
+        return tiles.transpose(1, 0, 2).reshape(self.cell_height, -1)
+
+    @staticmethod
+    def _load_font(
+        font_path: str, font_size: int
+    ) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+        try:
+            return ImageFont.truetype(font_path, font_size)
+        except OSError:
+            pass
+        try:
+            return ImageFont.load_default(size=font_size)
+        except TypeError:
+            # Pillow 10.1 未満はサイズ指定のデフォルトフォントに対応しない
+            return ImageFont.load_default()
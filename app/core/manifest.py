@@ -0,0 +1,80 @@
+"""Content hashes of effective generation settings for incremental regeneration."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+from .models import (
+    AbnormalConfig,
+    GenerationPlan,
+    ImageStorageConfig,
+    PixelSpec,
+    SeriesPlan,
+)
+
+# マニフェスト形式・ハッシュ対象を変更した場合に上げる（旧マニフェストは全再生成扱い）
+MANIFEST_VERSION = 2
+
+
+def study_config_hash(
+    plan: GenerationPlan,
+    pixel_spec: PixelSpec,
+    image_storage: ImageStorageConfig,
+    abnormal: AbnormalConfig,
+    uid_method: str,
+    uid_custom_root: str | None,
+    uid_seed: str | None = None,
+) -> str:
+    """スタディ単位の実効設定のハッシュ.
+
+    テンプレートをマージして解決済みの属性（患者・検査情報を含む）と、
+    シード確定後のピクセル設定・保存形式・UID設定を対象とする。
+    ``uid_seed`` は指定した場合のみ含め、既存のマニフェストのハッシュを変えない。
+    """
+    values = {
+        "version": MANIFEST_VERSION,
+        "plan": plan.model_dump(mode="json", exclude={"series"}),
+        "pixel_spec": pixel_spec.model_dump(mode="json"),
+        "image_storage": image_storage.model_dump(mode="json"),
+        "abnormal": abnormal.model_dump(mode="json"),
+        "uid_method": uid_method,
+        "uid_custom_root": uid_custom_root,
+    }
+    if uid_seed is not None:
+        values["uid_seed"] = uid_seed
+    return _digest(values)
+
+
+def series_config_hash(
+    study_hash: str,
+    series_plan: SeriesPlan,
+    first_file_sequence: int,
+    sequence_width: int,
+) -> str:
+    """シリーズ単位の実効設定のハッシュ.
+
+    ファイル名とノイズはジョブ内の通し番号で決まるため、シリーズ先頭の通し番号と
+    桁数も対象に含める。
+    """
+    return _digest(
+        {
+            "study": study_hash,
+            "series": series_plan.model_dump(mode="json"),
+            "first_file_sequence": first_file_sequence,
+            "sequence_width": sequence_width,
+        }
+    )
+
+
+def job_config_hash(series_hashes: list[str]) -> str:
+    """ジョブ全体の実効設定のハッシュ（各シリーズのハッシュはスタディのハッシュを含む）."""
+    return _digest({"series": series_hashes})
+
+
+def _digest(payload: dict[str, Any]) -> str:
+    canonical = json.dumps(
+        payload, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Literal
+from datetime import date, datetime, timedelta
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field, model_validator
 from pydantic_core import PydanticCustomError
 
+from .patient_age import age_reached_date
+
 
 class PatientName(BaseModel):
     model_config = {"frozen": True}
@@ -57,6 +59,93 @@ class Patient(BaseModel):
         return self.size / 100.0
 
 
+class PatientFilter(BaseModel):
+    """患者マスターから患者を絞り込む条件（指定した条件をすべて満たす患者）.
+
+    年齢は ``reference_date`` 時点の年齢（日本法基準、PatientAge と同じ）とし、
+    生年月日の範囲に変換して判定する。
+    """
+
+    model_config = {"frozen": True}
+
+    sex: Literal["M", "F", "O"] | None = Field(None, description="性別")
+    min_age: int | None = Field(None, ge=0, le=999, description="年齢の下限（含む）")
+    max_age: int | None = Field(None, ge=0, le=999, description="年齢の上限（含む）")
+    birth_date_from: str | None = Field(
+        None, pattern=r"^\d{8}$", description="生年月日の範囲の開始（含む）"
+    )
+    birth_date_to: str | None = Field(
+        None, pattern=r"^\d{8}$", description="生年月日の範囲の終了（含む）"
+    )
+    reference_date: str | None = Field(
+        None, pattern=r"^\d{8}$", description="年齢の基準日（年齢を指定する場合は必須）"
+    )
+
+    @model_validator(mode="after")
+    def validate_age_range(self) -> PatientFilter:
+        has_age = self.min_age is not None or self.max_age is not None
+        if has_age and self.reference_date is None:
+            raise PydanticCustomError(
+                "missing_reference_date",
+                "reference_date is required when min_age or max_age is set",
+                {},
+            )
+        if (
+            self.min_age is not None
+            and self.max_age is not None
+            and self.min_age > self.max_age
+        ):
+            raise PydanticCustomError(
+                "invalid_age_range", "min_age must be <= max_age", {}
+            )
+        return self
+
+    def birth_date_bounds(self) -> tuple[str | None, str | None]:
+        """条件を満たす生年月日の範囲（両端を含む YYYYMMDD、制限がなければ ``None``）."""
+        lower = self.birth_date_from
+        upper = self.birth_date_to
+        if self.reference_date is not None:
+            reference = datetime.strptime(self.reference_date, "%Y%m%d").date()
+            # N歳以上 = N歳の加齢日が基準日以前（加齢日は生年月日について単調）
+            if self.min_age is not None:
+                latest = _format_date(_latest_birth(reference, self.min_age))
+                upper = latest if upper is None else min(upper, latest)
+            if self.max_age is not None:
+                # max_age+1 歳に達していない最も早い生年月日から
+                earliest = _format_date(
+                    _latest_birth(reference, self.max_age + 1) + timedelta(days=1)
+                )
+                lower = earliest if lower is None else max(lower, earliest)
+        return lower, upper
+
+    def matches(self, patient: Patient) -> bool:
+        if self.sex is not None and patient.sex != self.sex:
+            return False
+        lower, upper = self.birth_date_bounds()
+        return (lower is None or patient.birth_date >= lower) and (
+            upper is None or patient.birth_date <= upper
+        )
+
+
+def _latest_birth(reference: date, years: int) -> date:
+    """基準日に ``years`` 歳に達している最も遅い生年月日を返す."""
+    try:
+        eve = reference.replace(year=reference.year - years)
+    except ValueError:
+        eve = date(reference.year - years, reference.month, 28)
+    birth = eve + timedelta(days=1)
+    # 2/29 を 2/28 とみなす分のずれを加齢日で補正する
+    while age_reached_date(birth + timedelta(days=1), years) <= reference:
+        birth += timedelta(days=1)
+    while age_reached_date(birth, years) > reference:
+        birth -= timedelta(days=1)
+    return birth
+
+
+def _format_date(value: date) -> str:
+    return f"{value.year:04d}{value.month:02d}{value.day:02d}"
+
+
 class StudyConfig(BaseModel):
     model_config = {"frozen": True}
 
@@ -135,13 +224,42 @@ class PixelSpecCTRealistic(BaseModel):
     mode: Literal["ct_realistic"] = "ct_realistic"
     width: int = Field(512, ge=64, le=4096)
     height: int = Field(512, ge=64, le=4096)
-    pattern: Literal["gradient", "circle", "noise"] = "gradient"
+    pattern: Literal["gradient", "circle", "noise", "phantom"] = "gradient"
     bits_stored: int = Field(12, ge=8, le=16)
+    seed: int | None = Field(
+        None,
+        ge=0,
+        le=2**64 - 1,
+        description="noiseパターンの乱数シード（省略時はジョブごとにランダム）",
+    )
 
 
 PixelSpec = PixelSpecSimple | PixelSpecCTRealistic
 
 
+class ImageStorageConfig(BaseModel):
+    """画像の保存形式設定."""
+
+    model_config = {"frozen": True}
+
+    mode: Literal["single_frame", "enhanced_multiframe"] = Field(
+        "single_frame",
+        description="single_frame: CT Image Storage（1スライス1ファイル）, "
+        "enhanced_multiframe: Enhanced CT Image Storage（複数フレーム）",
+    )
+    frames_per_object: int = Field(
+        256,
+        ge=1,
+        le=65535,
+        description="enhanced_multiframe の1オブジェクトあたりの最大フレーム数",
+    )
+
+    @property
+    def frames_per_file(self) -> int:
+        """1ファイルあたりの最大フレーム数（single_frame は常に1）."""
+        return self.frames_per_object if self.mode == "enhanced_multiframe" else 1
+
+
 class TransferSyntaxConfig(BaseModel):
     """Transfer Syntax設定."""
 
@@ -151,6 +269,12 @@ class TransferSyntaxConfig(BaseModel):
     name: str = Field("Implicit VR Little Endian", description="名称")
     is_implicit_vr: bool = Field(True, description="Implicit VR か")
     is_little_endian: bool = Field(True, description="Little Endian か")
+    deflate_level: int = Field(
+        6,
+        ge=0,
+        le=9,
+        description="Deflated Explicit VR Little Endian の圧縮レベル（zlib）",
+    )
 
 
 class CharacterSetConfig(BaseModel):
@@ -177,6 +301,27 @@ class AbnormalConfig(BaseModel):
     )
 
 
+class ExecutionConfig(BaseModel):
+    """生成実行設定."""
+
+    model_config = {"frozen": True}
+
+    workers: int = Field(1, ge=1, le=256, description="インスタンス生成の並列プロセス数")
+    write_workers: int = Field(2, ge=1, le=64, description="書き込みステージのスレッド数")
+    max_in_flight: int = Field(
+        8, ge=1, le=1024, description="パイプライン内で同時に保持するインスタンス数の上限"
+    )
+    frame_cache_mb: int = Field(
+        256, ge=0, le=65536, description="同一フレームキャッシュのメモリ上限（MB、0で無効）"
+    )
+    fast_encoder: bool = Field(
+        False, description="シリーズ共通のヘッダを再利用するバイト列エンコーダを使う"
+    )
+    compress_workers: int = Field(
+        4, ge=1, le=64, description="deflate 圧縮ステージのスレッド数"
+    )
+
+
 class GenerationConfig(BaseModel):
     """DICOM生成全体設定（Jobファイルから読み込む）."""
 
@@ -184,17 +329,35 @@ class GenerationConfig(BaseModel):
 
     job_name: str = Field(..., description="ジョブ名")
     output_dir: str = Field(..., description="出力ディレクトリ")
+    output_format: Literal["directory", "tar", "zip"] = Field(
+        "directory",
+        description="directory: 1インスタンス1ファイル, tar / zip: 出力ディレクトリに"
+        "1つのアーカイブを作成",
+    )
+    dicomdir: bool = Field(False, description="出力先に DICOMDIR を作成する")
     patient: Patient
     study: StudyConfig
     series_list: list[SeriesConfig] = Field(..., min_length=1, max_length=100)
     modality_template: str = Field(..., description="モダリティテンプレート名")
     hospital_template: str | None = Field(None, description="病院テンプレート名")
-    uid_method: Literal["uuid_2_25", "custom_root"] = "uuid_2_25"
+    uid_method: Literal["uuid_2_25", "custom_root", "deterministic"] = "uuid_2_25"
     uid_custom_root: str | None = Field(None, description="カスタムRoot")
+    uid_seed: str | None = Field(
+        None,
+        min_length=1,
+        description="deterministic で UID を導出するシード（同じシードなら同じ UID）",
+    )
+    uid_counter_store: str | None = Field(
+        None,
+        min_length=1,
+        description="custom_root の連番を実行をまたいで払い出す SQLite ファイル",
+    )
     pixel_spec: PixelSpecSimple | PixelSpecCTRealistic
+    image_storage: ImageStorageConfig = Field(default_factory=ImageStorageConfig)
     transfer_syntax: TransferSyntaxConfig
     character_set: CharacterSetConfig
     abnormal: AbnormalConfig = Field(default_factory=AbnormalConfig)
+    execution: ExecutionConfig = Field(default_factory=ExecutionConfig)
 
     @model_validator(mode="after")
     def validate_date_consistency(self) -> GenerationConfig:
@@ -215,3 +378,176 @@ class GenerationConfig(BaseModel):
                 {},
             )
         return self
+
+    @model_validator(mode="after")
+    def validate_uid_options(self) -> GenerationConfig:
+        if self.uid_method == "deterministic" and self.uid_seed is None:
+            raise PydanticCustomError(
+                "missing_uid_seed",
+                "uid_seed is required when uid_method is deterministic",
+                {},
+            )
+        if self.uid_counter_store is not None and self.uid_method != "custom_root":
+            raise PydanticCustomError(
+                "uid_counter_store_without_custom_root",
+                "uid_counter_store requires uid_method custom_root",
+                {},
+            )
+        return self
+
+    @model_validator(mode="after")
+    def validate_image_storage(self) -> GenerationConfig:
+        # Enhanced CT は Bits Allocated 16 のみ許可されるため 8bit の simple_text は不可
+        if self.image_storage.mode == "enhanced_multiframe" and not isinstance(
+            self.pixel_spec, PixelSpecCTRealistic
+        ):
+            raise PydanticCustomError(
+                "unsupported_image_storage",
+                "image_storage.mode enhanced_multiframe requires pixel_spec.mode "
+                "ct_realistic",
+                {},
+            )
+        return self
+
+
+class PatientSelector(BaseModel):
+    """コホートの対象患者の条件（省略時は患者マスターの全患者）."""
+
+    model_config = {"frozen": True}
+
+    patient_ids: list[str] | None = Field(
+        None, min_length=1, description="対象の患者ID（省略時は全患者）"
+    )
+    sex: Literal["M", "F", "O"] | None = Field(None, description="対象の性別")
+
+
+class CohortConfig(BaseModel):
+    """患者マスターの患者ごとに複数の検査を生成するコホート設定."""
+
+    model_config = {"frozen": True}
+
+    cohort_name: str = Field(..., description="コホート名")
+    output_dir: str = Field(..., description="出力ディレクトリ")
+    seed: int = Field(
+        0, ge=0, description="検査日・検査時刻・noiseパターンのシードを導出するシード"
+    )
+    patients: PatientSelector = Field(default_factory=PatientSelector)
+    studies_per_patient: int = Field(1, ge=1, le=1000, description="患者あたりの検査数")
+    study_date_from: str = Field(..., pattern=r"^\d{8}$", description="検査日の範囲の開始")
+    study_date_to: str = Field(..., pattern=r"^\d{8}$", description="検査日の範囲の終了")
+    accession_prefix: str = Field(
+        "C", max_length=10, description="Accession Number の接頭辞（後ろに通し番号）"
+    )
+    job: dict[str, Any] = Field(
+        ...,
+        description="各検査の Job 設定（patient・job_name・output_dir と"
+        "study の Accession Number・検査日時・シリーズ数を除く）",
+    )
+
+    @model_validator(mode="after")
+    def validate_study_date_range(self) -> CohortConfig:
+        try:
+            date_from = datetime.strptime(self.study_date_from, "%Y%m%d").date()
+            date_to = datetime.strptime(self.study_date_to, "%Y%m%d").date()
+        except ValueError as exc:
+            raise PydanticCustomError(
+                "invalid_calendar_date",
+                "study_date_from/study_date_to must be valid calendar dates: {reason}",
+                {"reason": str(exc)},
+            ) from exc
+
+        if date_to < date_from:
+            raise PydanticCustomError(
+                "invalid_date_order",
+                "study_date_to must be on or after study_date_from",
+                {},
+            )
+        return self
+
+
+# (DICOMキーワード, 値) の組。値は文字列、または多値要素の場合は文字列のタプル
+DicomAttributes = tuple[tuple[str, str | tuple[str, ...]], ...]
+
+
+class SeriesPlan(BaseModel):
+    """シリーズ単位で解決済みの生成計画."""
+
+    model_config = {"frozen": True}
+
+    num_images: int = Field(..., ge=1)
+    slice_thickness: float
+    slice_spacing: float
+    start_z: float
+    attributes: DicomAttributes = ()
+
+
+class GenerationPlan(BaseModel):
+    """スタディ単位で解決済みの生成計画.
+
+    ``GenerationConfig`` とマージ済みテンプレートから一度だけ作成し、
+    全インスタンスで共有する。UIDは含まないため、同じ計画から何度でも生成できる。
+    """
+
+    model_config = {"frozen": True}
+
+    modality: str
+    sop_class_uid: str
+    transfer_syntax_uid: str
+    # Deflated Explicit VR Little Endian の場合のみ使う
+    deflate_level: int = Field(6, ge=0, le=9)
+    implementation_version_name: str
+    filename_prefix: str
+    attributes: DicomAttributes = ()
+    series: tuple[SeriesPlan, ...] = Field(..., min_length=1)
+
+
+class ManifestFile(BaseModel):
+    """マニフェストに記録する出力ファイル（出力先からの相対パスとサイズ）."""
+
+    model_config = {"frozen": True}
+
+    name: str
+    size: int = Field(..., ge=0)
+    # 再利用したシリーズもファイルを読み直さずに DICOMDIR へ記録するため保持する
+    sop_instance_uid: str
+
+
+class SeriesManifest(BaseModel):
+    """シリーズ単位の生成記録."""
+
+    model_config = {"frozen": True}
+
+    config_hash: str
+    series_instance_uid: str
+    files: tuple[ManifestFile, ...] = ()
+
+
+class GenerationManifest(BaseModel):
+    """差分再生成のため出力先に保存する生成記録.
+
+    ``study_hash`` が一致する限りスタディ単位のUIDを再利用し、
+    ``config_hash`` とファイルが一致するシリーズは再生成しない。
+    """
+
+    model_config = {"frozen": True}
+
+    version: int
+    study_hash: str
+    uid_context: UIDContext
+    noise_seed: int | None = None
+    series: tuple[SeriesManifest, ...] = ()
+
+
+class GenerationJournalHeader(BaseModel):
+    """中断したジョブを再開するためのジャーナルの先頭レコード.
+
+    ``job_hash`` が一致する場合に限り、記録したUIDで続きから生成する。
+    """
+
+    model_config = {"frozen": True}
+
+    version: int
+    job_hash: str
+    uid_context: UIDContext
+    noise_seed: int | None = None
+    series_instance_uids: tuple[str, ...] = Field(..., min_length=1)
@@ -0,0 +1,113 @@
+"""Deterministic noise texture bank for the ct_realistic noise pattern."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from .exceptions import PixelGenerationError
+
+# バンクに保持するノイズタイルの枚数
+NOISE_BANK_TILES = 4
+
+_MASK64 = (1 << 64) - 1
+
+
+def _splitmix64(value: int) -> int:
+    """64bit整数の決定的なハッシュ（SplitMix64 の出力関数）."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def _wrapped_spans(
+    size: int, first_shift: int, second_shift: int
+) -> list[tuple[slice, slice, slice]]:
+    """2つの巡回シフトで折り返さない区間ごとに (出力, 1枚目, 2枚目) の範囲を返す."""
+    cuts = sorted({0, size - first_shift, size - second_shift, size})
+    spans = []
+    for start, stop in zip(cuts, cuts[1:]):
+        first = (start + first_shift) % size
+        second = (start + second_shift) % size
+        spans.append(
+            (
+                slice(start, stop),
+                slice(first, first + stop - start),
+                slice(second, second + stop - start),
+            )
+        )
+    return spans
+
+
+class NoiseBank:
+    """シードから作った少数のノイズタイルを組み合わせて各スライスを導出する.
+
+    タイルはスライスと同じ大きさで作成し、スライスごとに異なる2枚のタイルを
+    (seed, スライス番号) のハッシュで決まる量だけ巡回シフトして XOR する。
+    メモリはタイルの枚数 × スライス1枚分（int16）で、4096x4096 でも 128MiB に収まる。
+    値域が2のべき乗 ``[0, 2**value_bits)`` のため、XOR の結果も同じ値域の一様分布になる。
+    同じシード・スライス番号からは、プロセスや実行順序によらず同じスライスが得られる。
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        width: int,
+        height: int,
+        value_bits: int,
+        n_tiles: int = NOISE_BANK_TILES,
+    ) -> None:
+        if n_tiles < 2:
+            raise PixelGenerationError(
+                f"n_tiles must be >= 2, got {n_tiles}", mode="ct_realistic"
+            )
+        if not 1 <= value_bits <= 15:
+            raise PixelGenerationError(
+                f"value_bits must be between 1 and 15, got {value_bits}",
+                mode="ct_realistic",
+            )
+        self._seed = seed & _MASK64
+        self._width = width
+        self._height = height
+        rng = np.random.default_rng(seed)
+        self._tiles = rng.integers(
+            0,
+            1 << value_bits,
+            size=(n_tiles, height, width),
+            dtype=np.int16,
+        )
+        self._tiles.flags.writeable = False
+
+    def volume(self, first_slice: int, n_slices: int) -> np.ndarray:
+        """スライス番号 ``first_slice`` から ``n_slices`` 枚分を返す.
+
+        Returns: shape=(n_slices, height, width), dtype=int16
+        """
+        volume = np.empty((n_slices, self._height, self._width), dtype=np.int16)
+        for offset in range(n_slices):
+            (first, y1, x1), (second, y2, x2) = self._shifts(first_slice + offset)
+            out = volume[offset]
+            # 巡回シフトの境界で区切った矩形ごとに、2枚のタイルの連続した領域を XOR する
+            for rows, first_rows, second_rows in _wrapped_spans(self._height, y1, y2):
+                for cols, first_cols, second_cols in _wrapped_spans(
+                    self._width, x1, x2
+                ):
+                    np.bitwise_xor(
+                        self._tiles[first, first_rows, first_cols],
+                        self._tiles[second, second_rows, second_cols],
+                        out=out[rows, cols],
+                    )
+        return volume
+
+    def _shifts(self, slice_index: int) -> tuple[tuple[int, int, int], ...]:
+        n_tiles = len(self._tiles)
+        key = _splitmix64(self._seed ^ _splitmix64(slice_index & _MASK64))
+        fields = [_splitmix64(key + n) for n in range(6)]
+
+        first_tile = fields[0] % n_tiles
+        # 同じタイル同士の XOR はオフセットによって0になり得るため別のタイルを使う
+        second_tile = (first_tile + 1 + fields[1] % (n_tiles - 1)) % n_tiles
+        return (
+            (first_tile, fields[2] % self._height, fields[3] % self._width),
+            (second_tile, fields[4] % self._height, fields[5] % self._width),
+        )
@@ -0,0 +1,362 @@
+"""Byte-level Part 10 encoder that splices per-instance elements into a template."""
+
+from __future__ import annotations
+
+import struct
+import zlib
+from collections.abc import Iterable, Sequence
+from io import BytesIO
+
+import pydicom
+from pydicom.dataset import Dataset
+from pydicom.filebase import DicomBytesIO
+from pydicom.filewriter import write_dataset, write_file_meta_info
+
+from .exceptions import DICOMBuildError
+from .rle_encoder import RLE_LOSSLESS
+
+IMPLICIT_VR_LITTLE_ENDIAN = "1.2.840.10008.1.2"
+EXPLICIT_VR_LITTLE_ENDIAN = "1.2.840.10008.1.2.1"
+EXPLICIT_VR_BIG_ENDIAN = "1.2.840.10008.1.2.2"
+DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN = "1.2.840.10008.1.2.1.99"
+
+# Deflated 転送構文はヘッダなしの raw deflate（PS3.5 A.5）
+_DEFLATE_WBITS = -zlib.MAX_WBITS
+
+# プリアンブル(128) + "DICM"(4) の直後に File Meta Information Group Length が続く
+_GROUP_LENGTH_VALUE_OFFSET = 128 + 4 + 8
+_META_SOP_INSTANCE_UID_TAG = (0x0002, 0x0003)
+
+# インスタンスごとに値が変わる要素（タグ順）
+_SOP_INSTANCE_UID_TAG = (0x0008, 0x0018)
+_INSTANCE_NUMBER_TAG = (0x0020, 0x0013)
+_IMAGE_POSITION_PATIENT_TAG = (0x0020, 0x0032)
+_SLICE_LOCATION_TAG = (0x0020, 0x1041)
+_PIXEL_DATA_TAG = (0x7FE0, 0x0010)
+
+_VARIABLE_KEYWORDS = (
+    "SOPInstanceUID",
+    "InstanceNumber",
+    "ImagePositionPatient",
+    "SliceLocation",
+    "PixelData",
+)
+
+_LONG_LENGTH_VRS = frozenset({"OB", "OW"})
+
+# カプセル化した Pixel Data は値の長さを未定義とする
+_UNDEFINED_LENGTH = 0xFFFFFFFF
+# 空の Basic Offset Table（値なしの Item）
+_EMPTY_BASIC_OFFSET_TABLE = b"\xfe\xff\x00\xe0\x00\x00\x00\x00"
+
+
+class _ElementEncoder:
+    """転送構文に応じて1要素をエンコードする."""
+
+    def __init__(self, transfer_syntax_uid: str) -> None:
+        if transfer_syntax_uid == IMPLICIT_VR_LITTLE_ENDIAN:
+            self._implicit = True
+            self._endian = "<"
+        elif transfer_syntax_uid in (
+            EXPLICIT_VR_LITTLE_ENDIAN,
+            DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN,
+            RLE_LOSSLESS,
+        ):
+            self._implicit = False
+            self._endian = "<"
+        elif transfer_syntax_uid == EXPLICIT_VR_BIG_ENDIAN:
+            self._implicit = False
+            self._endian = ">"
+        else:
+            raise DICOMBuildError(
+                f"Unsupported Transfer Syntax UID: {transfer_syntax_uid}",
+                tag="TransferSyntaxUID",
+            )
+        # RLE Lossless の Pixel Data はカプセル化する
+        self.encapsulated = transfer_syntax_uid == RLE_LOSSLESS
+        self._implicit_header = struct.Struct(f"{self._endian}HHI")
+        self._short_header = struct.Struct(f"{self._endian}HH2sH")
+        self._long_header = struct.Struct(f"{self._endian}HH2s2xI")
+
+    def encode(self, tag: tuple[int, int], vr: str, value: bytes) -> bytes:
+        if len(value) % 2:
+            value += _padding(vr)
+        return self.header(tag, vr, len(value)) + value
+
+    def pixel_data_header(self, vr: str, length: int) -> bytes:
+        """Pixel Data の要素ヘッダ（カプセル化時は長さ未定義の OB）."""
+        if self.encapsulated:
+            return self.header(_PIXEL_DATA_TAG, "OB", _UNDEFINED_LENGTH)
+        return self.header(_PIXEL_DATA_TAG, vr, length)
+
+    def header(self, tag: tuple[int, int], vr: str, length: int) -> bytes:
+        group, element = tag
+        if self._implicit:
+            return self._implicit_header.pack(group, element, length)
+        if vr in _LONG_LENGTH_VRS:
+            return self._long_header.pack(group, element, vr.encode(), length)
+        return self._short_header.pack(group, element, vr.encode(), length)
+
+
+class Part10Template:
+    """同一シリーズのインスタンスに共通するバイト列を再利用する Part 10 エンコーダ.
+
+    プロトタイプ Dataset を pydicom で一度だけエンコードし、インスタンスごとに
+    変わる要素（SOP Instance UID、Instance Number、Image Position (Patient)、
+    Slice Location、Pixel Data）の位置で分割して保持する。
+    ``encode`` は可変要素だけをエンコードして定数部分の間に挿入するため、
+    出力はプロトタイプと他の属性が同一である限り ``pydicom.dcmwrite`` と一致する。
+    """
+
+    def __init__(
+        self,
+        segments: Sequence[bytes],
+        transfer_syntax_uid: str,
+        pixel_vr: str,
+        meta_group_length: int,
+        meta_uid_length: int,
+    ) -> None:
+        self._segments = tuple(segments)
+        self._encoder = _ElementEncoder(transfer_syntax_uid)
+        self._meta_encoder = _ElementEncoder(EXPLICIT_VR_LITTLE_ENDIAN)
+        self._pixel_vr = pixel_vr
+        self._meta_group_length = meta_group_length
+        self._meta_uid_length = meta_uid_length
+
+    @classmethod
+    def from_dataset(cls, dataset: Dataset) -> Part10Template:
+        """プロトタイプ Dataset から定数部分を抽出する.
+
+        可変要素のエンコード結果がプロトタイプの出力中に見つからない場合は
+        ``DICOMBuildError`` を送出する。
+        """
+        missing = [
+            keyword
+            for keyword in (*_VARIABLE_KEYWORDS, "BitsAllocated")
+            if keyword not in dataset
+        ]
+        if missing:
+            raise DICOMBuildError(
+                f"Prototype dataset is missing elements: {', '.join(missing)}",
+                tag=missing[0],
+            )
+        transfer_syntax_uid = str(dataset.file_meta.TransferSyntaxUID)
+        pixel_vr = "OW" if int(dataset.BitsAllocated) > 8 else "OB"
+
+        try:
+            encoded = encode_part10(dataset)
+        except DICOMBuildError as exc:
+            raise DICOMBuildError(f"Failed to encode prototype dataset: {exc}") from exc
+
+        meta_encoder = _ElementEncoder(EXPLICIT_VR_LITTLE_ENDIAN)
+        encoder = _ElementEncoder(transfer_syntax_uid)
+        sop_instance_uid = str(dataset.SOPInstanceUID).encode()
+        variable_elements = [
+            (
+                "MediaStorageSOPInstanceUID",
+                meta_encoder.encode(_META_SOP_INSTANCE_UID_TAG, "UI", sop_instance_uid),
+            ),
+            (
+                "SOPInstanceUID",
+                encoder.encode(_SOP_INSTANCE_UID_TAG, "UI", sop_instance_uid),
+            ),
+            (
+                "InstanceNumber",
+                encoder.encode(
+                    _INSTANCE_NUMBER_TAG, "IS", str(dataset.InstanceNumber).encode()
+                ),
+            ),
+            (
+                "ImagePositionPatient",
+                encoder.encode(
+                    _IMAGE_POSITION_PATIENT_TAG,
+                    "DS",
+                    _join_multi_value(dataset.ImagePositionPatient),
+                ),
+            ),
+            (
+                "SliceLocation",
+                encoder.encode(
+                    _SLICE_LOCATION_TAG, "DS", str(dataset.SliceLocation).encode()
+                ),
+            ),
+            (
+                "PixelData",
+                encoder.pixel_data_header(pixel_vr, len(dataset.PixelData))
+                + dataset.PixelData
+                if encoder.encapsulated
+                else encoder.encode(_PIXEL_DATA_TAG, pixel_vr, dataset.PixelData),
+            ),
+        ]
+
+        # 可変要素はタグ順に並ぶため、直前の要素の後ろから順に探す
+        segments: list[bytes] = []
+        position = 0
+        for keyword, element in variable_elements:
+            found = encoded.find(element, position)
+            if found < 0:
+                raise DICOMBuildError(
+                    "Variable element not found in prototype encoding", tag=keyword
+                )
+            segments.append(encoded[position:found])
+            position = found + len(element)
+        segments.append(encoded[position:])
+
+        (meta_group_length,) = struct.unpack_from(
+            "<I", encoded, _GROUP_LENGTH_VALUE_OFFSET
+        )
+        return cls(
+            segments=segments,
+            transfer_syntax_uid=transfer_syntax_uid,
+            pixel_vr=pixel_vr,
+            meta_group_length=meta_group_length,
+            meta_uid_length=len(variable_elements[0][1]),
+        )
+
+    def encode(
+        self,
+        sop_instance_uid: str,
+        instance_number: int,
+        image_position_patient: Sequence[float],
+        slice_location: float,
+        pixel_bytes: bytes,
+    ) -> bytes:
+        """可変要素を挿入して1インスタンス分の Part 10 バイト列を返す.
+
+        カプセル化する転送構文では ``pixel_bytes`` はカプセル化済みの値とする。
+        """
+        uid = sop_instance_uid.encode()
+        meta_uid = self._meta_encoder.encode(_META_SOP_INSTANCE_UID_TAG, "UI", uid)
+        group_length = self._meta_group_length + len(meta_uid) - self._meta_uid_length
+
+        encoder = self._encoder
+        segments = self._segments
+        head = segments[0]
+        pixel_padding = len(pixel_bytes) % 2
+        return b"".join(
+            (
+                head[:_GROUP_LENGTH_VALUE_OFFSET],
+                struct.pack("<I", group_length),
+                head[_GROUP_LENGTH_VALUE_OFFSET + 4 :],
+                meta_uid,
+                segments[1],
+                encoder.encode(_SOP_INSTANCE_UID_TAG, "UI", uid),
+                segments[2],
+                encoder.encode(_INSTANCE_NUMBER_TAG, "IS", str(instance_number).encode()),
+                segments[3],
+                encoder.encode(
+                    _IMAGE_POSITION_PATIENT_TAG,
+                    "DS",
+                    _join_multi_value(str(v) for v in image_position_patient),
+                ),
+                segments[4],
+                encoder.encode(_SLICE_LOCATION_TAG, "DS", str(slice_location).encode()),
+                segments[5],
+                # 大きな Pixel Data はヘッダと連結せずそのまま結合してコピーを1回に抑える
+                encoder.pixel_data_header(
+                    self._pixel_vr, len(pixel_bytes) + pixel_padding
+                ),
+                pixel_bytes,
+                b"\x00" * pixel_padding,
+                segments[6],
+            )
+        )
+
+
+def encode_streaming_header(dataset: Dataset, pixel_data_length: int) -> bytes:
+    """Pixel Data を含まない Dataset をエンコードし、Pixel Data の要素ヘッダを付けて返す.
+
+    呼び出し元は返り値に続けて ``pixel_data_length`` バイトの値を書き込む。
+    複数フレームの Pixel Data をボリューム全体を保持せずにフレーム単位で書き込むために使う。
+    Pixel Data はデータセット中で最後の要素となる必要がある。
+
+    カプセル化する転送構文では長さ未定義のヘッダと空の Basic Offset Table を返し、
+    ``pixel_data_length`` は使わない。呼び出し元はフレームごとのアイテムと
+    ``ENCAPSULATED_PIXEL_DATA_END`` を書き込む。
+    Deflated 転送構文ではデータセット部分を圧縮せずに返すため、呼び出し元が
+    Pixel Data の値と合わせて ``deflate_compressor`` で圧縮する。
+    """
+    if "PixelData" in dataset:
+        raise DICOMBuildError(
+            "Streaming dataset must not contain Pixel Data", tag="PixelData"
+        )
+    if "BitsAllocated" not in dataset:
+        raise DICOMBuildError(
+            "Streaming dataset is missing BitsAllocated", tag="BitsAllocated"
+        )
+    if pixel_data_length % 2:
+        raise DICOMBuildError(
+            f"Pixel Data length must be even, got {pixel_data_length}", tag="PixelData"
+        )
+    pixel_data_tag = (_PIXEL_DATA_TAG[0] << 16) | _PIXEL_DATA_TAG[1]
+    if max(dataset.keys(), default=0) > pixel_data_tag:
+        raise DICOMBuildError(
+            "Streaming dataset has elements after Pixel Data", tag="PixelData"
+        )
+
+    try:
+        encoded = encode_part10(dataset)
+    except DICOMBuildError as exc:
+        raise DICOMBuildError(f"Failed to encode streaming dataset: {exc}") from exc
+    pixel_vr = "OW" if int(dataset.BitsAllocated) > 8 else "OB"
+    encoder = _ElementEncoder(str(dataset.file_meta.TransferSyntaxUID))
+    header = encoded + encoder.pixel_data_header(pixel_vr, pixel_data_length)
+    if encoder.encapsulated:
+        return header + _EMPTY_BASIC_OFFSET_TABLE
+    return header
+
+
+def encode_part10(dataset: Dataset) -> bytes:
+    """Dataset を Part 10 のバイト列にエンコードする（``pydicom.dcmwrite`` 相当）.
+
+    Deflated 転送構文ではデータセット部分を圧縮しない。圧縮は ``deflate_part10`` で
+    別に行い、エンコードと圧縮を異なるスレッドで実行できるようにする。
+    """
+    transfer_syntax_uid = str(dataset.file_meta.TransferSyntaxUID)
+    try:
+        if transfer_syntax_uid != DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN:
+            buffer = BytesIO()
+            pydicom.dcmwrite(buffer, dataset, enforce_file_format=True)
+            return buffer.getvalue()
+
+        encoded = DicomBytesIO()
+        encoded.write(getattr(dataset, "preamble", None) or b"\x00" * 128)
+        encoded.write(b"DICM")
+        write_file_meta_info(encoded, dataset.file_meta, enforce_standard=True)
+        encoded.is_implicit_VR = False
+        encoded.is_little_endian = True
+        write_dataset(encoded, dataset)
+        return encoded.getvalue()
+    except Exception as exc:
+        raise DICOMBuildError(f"Failed to encode dataset: {exc}") from exc
+
+
+def deflate_compressor(level: int) -> zlib._Compress:
+    """Deflated 転送構文用の圧縮器（ヘッダなしの raw deflate）を返す."""
+    return zlib.compressobj(level, zlib.DEFLATED, _DEFLATE_WBITS)
+
+
+def part10_meta_length(data: bytes) -> int:
+    """プリアンブルと File Meta Information を合わせたバイト数を返す."""
+    (group_length,) = struct.unpack_from("<I", data, _GROUP_LENGTH_VALUE_OFFSET)
+    return _GROUP_LENGTH_VALUE_OFFSET + 4 + group_length
+
+
+def deflate_part10(data: bytes, level: int) -> bytes:
+    """``encode_part10`` の出力のデータセット部分を deflate 圧縮する.
+
+    既定の圧縮レベル（6）では ``pydicom.dcmwrite`` と同一のバイト列となる。
+    """
+    meta_length = part10_meta_length(data)
+    compressor = deflate_compressor(level)
+    deflated = compressor.compress(memoryview(data)[meta_length:]) + compressor.flush()
+    return b"".join((data[:meta_length], deflated, b"\x00" * (len(deflated) % 2)))
+
+
+def _padding(vr: str) -> bytes:
+    # UI と OB/OW は NULL、文字列 VR は空白で偶数長に揃える
+    return b"\x00" if vr in ("UI", "OB", "OW") else b" "
+
+
+def _join_multi_value(values: Iterable[object]) -> bytes:
+    return "\\".join(str(v) for v in values).encode()
@@ -0,0 +1,25 @@
+"""Age-reached dates under the Japanese age calculation law."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+
+def age_reached_date(birth: date, years: int) -> date:
+    """民法143条に基づき ``years`` 歳到達日（加齢日）を算出する.
+
+    年齢計算ニ関スル法律: 出生日から起算し、誕生日の前日の満了をもって加齢。
+    加齢日 = 誕生日のN年後の応当日の前日。
+    応当日が存在しない場合（2/29生まれの非閏年）→ その月の末日（2/28）を
+    応当日とみなし、その前日（2/27）…ではなく、
+    誕生日の前日（2/28）のN年後 = 2/28 が加齢日。
+    """
+    # 誕生日の前日のN年後を直接求める（前日は常に存在する）
+    eve = birth - timedelta(days=1)
+    target_year = eve.year + years
+    try:
+        return eve.replace(year=target_year)
+    except ValueError:
+        # eve が 2/28 で target_year が閏年の場合は起こらない
+        # eve が 2/29（birth=3/1 で閏年）で非閏年の場合 → 2/28
+        return date(target_year, eve.month, 28)
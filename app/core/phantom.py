@@ -0,0 +1,106 @@
+"""3-D analytic Shepp-Logan style phantom evaluated over slice positions."""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Sequence
+from typing import NamedTuple
+
+import numpy as np
+
+# CT値（HU）から Pixel Value への変換（Rescale Intercept = -1024）
+HU_OFFSET = 1024
+AIR_HU = -1000
+
+
+class Ellipsoid(NamedTuple):
+    """ファントムを構成する楕円体（座標は面内半視野で正規化）."""
+
+    hu_delta: float
+    a: float
+    b: float
+    c: float
+    x0: float
+    y0: float
+    z0: float
+    phi_degrees: float
+
+
+# 3-D Shepp-Logan（modified）の楕円体配置をHUの加算量で表したもの
+# 頭蓋骨 +1000 HU、脳実質 40 HU、脳室 0 HU、病変 60〜70 HU 程度になる
+SHEPP_LOGAN_ELLIPSOIDS: tuple[Ellipsoid, ...] = (
+    Ellipsoid(2000.0, 0.6900, 0.920, 0.810, 0.00, 0.0000, 0.00, 0.0),
+    Ellipsoid(-960.0, 0.6624, 0.874, 0.780, 0.00, -0.0184, 0.00, 0.0),
+    Ellipsoid(-40.0, 0.1100, 0.310, 0.220, 0.22, 0.0000, 0.00, -18.0),
+    Ellipsoid(-40.0, 0.1600, 0.410, 0.280, -0.22, 0.0000, 0.00, 18.0),
+    Ellipsoid(20.0, 0.2100, 0.250, 0.410, 0.00, 0.3500, -0.15, 0.0),
+    Ellipsoid(30.0, 0.0460, 0.046, 0.050, 0.00, 0.1000, 0.25, 0.0),
+    Ellipsoid(30.0, 0.0460, 0.046, 0.050, 0.00, -0.1000, 0.25, 0.0),
+    Ellipsoid(30.0, 0.0460, 0.023, 0.050, -0.08, -0.6050, 0.00, 0.0),
+    Ellipsoid(30.0, 0.0230, 0.023, 0.020, 0.00, -0.6060, 0.00, 0.0),
+    Ellipsoid(30.0, 0.0230, 0.046, 0.020, 0.06, -0.6050, 0.00, 0.0),
+)
+
+
+class PhantomField:
+    """面内座標の項を事前計算した3次元ファントム.
+
+    楕円体の内外判定 ``(x'/a)^2 + (y'/b)^2 + ((z - z0)/c)^2 <= 1`` のうち
+    面内の項は (width, height, pixel_spacing) ごとに一度だけ計算し、
+    スラブごとには z の項だけを加えてベクトル化して評価する。
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        pixel_spacing: float,
+        ellipsoids: Sequence[Ellipsoid] = SHEPP_LOGAN_ELLIPSOIDS,
+    ) -> None:
+        # 面内の半視野（mm）を正規化の単位とする
+        self._scale = min(width, height) * pixel_spacing / 2.0
+        self._ellipsoids = tuple(ellipsoids)
+
+        x = (np.arange(width, dtype=np.float32) - (width - 1) / 2.0) * (
+            pixel_spacing / self._scale
+        )
+        y = (np.arange(height, dtype=np.float32) - (height - 1) / 2.0) * (
+            pixel_spacing / self._scale
+        )
+        xx = x[np.newaxis, :]
+        yy = y[:, np.newaxis]
+
+        self._in_plane_terms: list[np.ndarray] = []
+        for ellipsoid in self._ellipsoids:
+            phi = math.radians(ellipsoid.phi_degrees)
+            cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+            dx = xx - ellipsoid.x0
+            dy = yy - ellipsoid.y0
+            xr = cos_phi * dx + sin_phi * dy
+            yr = -sin_phi * dx + cos_phi * dy
+            term = (xr / ellipsoid.a) ** 2 + (yr / ellipsoid.b) ** 2
+            self._in_plane_terms.append(term.astype(np.float32))
+
+    def evaluate_hu(
+        self, z_positions: Sequence[float] | np.ndarray, center_z: float = 0.0
+    ) -> np.ndarray:
+        """指定z位置（mm）のスライス群のCT値を返す.
+
+        Returns: shape=(len(z_positions), height, width), dtype=float32
+        """
+        z = (np.asarray(z_positions, dtype=np.float32) - center_z) / self._scale
+        height, width = self._in_plane_terms[0].shape
+        hu = np.full((len(z), height, width), AIR_HU, dtype=np.float32)
+
+        for ellipsoid, in_plane in zip(self._ellipsoids, self._in_plane_terms):
+            z_term = ((z - ellipsoid.z0) / ellipsoid.c) ** 2
+            # スラブ内のどのスライスとも交差しない楕円体は評価しない
+            hits = np.flatnonzero(z_term <= 1.0)
+            if hits.size == 0:
+                continue
+            # 交差範囲外のスライスは z の項が1を超えるため、範囲内に混ざっても判定は偽になる
+            start, stop = hits[0], hits[-1] + 1
+            inside = in_plane + z_term[start:stop, np.newaxis, np.newaxis] <= 1.0
+            target = hu[start:stop]
+            np.add(target, np.float32(ellipsoid.hu_delta), out=target, where=inside)
+        return hu
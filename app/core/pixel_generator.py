@@ -2,51 +2,73 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
 from typing import Literal
 
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
 
 from .exceptions import PixelGenerationError
+from .glyph_atlas import GlyphAtlas
+from .noise_bank import NoiseBank
+from .phantom import HU_OFFSET, PhantomField
+
+CTPattern = Literal["gradient", "circle", "noise", "phantom"]
+# SpatialCoordinates の既定 Pixel Spacing（mm）
+DEFAULT_PIXEL_SPACING = 0.5
+# Simple Textモードの左余白（px）
+SIMPLE_TEXT_MARGIN = 10
 
 
 class PixelGenerator:
     """ピクセルデータ生成器."""
 
+    def __init__(self) -> None:
+        self._glyph_atlases: dict[tuple[int, int, int], GlyphAtlas] = {}
+        self._backgrounds: dict[tuple[int, int, int], np.ndarray] = {}
+        self._phantom_fields: dict[tuple[int, int, float], PhantomField] = {}
+        self._noise_banks: dict[tuple[int, int, int, int], NoiseBank] = {}
+
     def generate_simple_text(
         self,
         sop_instance_uid: str,
         width: int = 512,
         height: int = 512,
+        background_color: int = 0,
+        text_color: int = 255,
+        font_size: int = 24,
     ) -> np.ndarray:
-        """Simple Textモード: 黒背景に白文字でSOP Instance UIDを描画.
+        """Simple Textモード: 背景色の上に文字色でSOP Instance UIDを描画.
+
+        グリフは (font_size, 背景色, 文字色) ごとに一度だけラスタライズし、
+        各フレームはキャッシュした背景にグリフのタイルを貼り付けて作る。
 
         Returns: shape=(height, width), dtype=uint8
         """
         try:
-            img = Image.new("L", (width, height), color=0)
-            draw = ImageDraw.Draw(img)
+            atlas = self._glyph_atlas(font_size, background_color, text_color)
+            pixels = self._background(width, height, background_color).copy()
 
-            try:
-                font = ImageFont.truetype(
-                    "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
-                    16,
-                )
-            except (OSError, IOError):
-                font = ImageFont.load_default()
-
-            max_chars_per_line = max(1, width // 10)
-            lines = [
-                sop_instance_uid[i : i + max_chars_per_line]
-                for i in range(0, len(sop_instance_uid), max_chars_per_line)
-            ]
+            max_chars_per_line = max(
+                1, (width - 2 * SIMPLE_TEXT_MARGIN) // atlas.cell_width
+            )
+            line_step = atlas.cell_height + max(1, font_size // 4)
 
             y_offset = height // 4
-            for line in lines:
-                draw.text((10, y_offset), line, fill=255, font=font)
-                y_offset += 20
+            for start in range(0, len(sop_instance_uid), max_chars_per_line):
+                if y_offset >= height:
+                    break
+                line = atlas.render_line(
+                    sop_instance_uid[start : start + max_chars_per_line]
+                )
+                line_height = min(line.shape[0], height - y_offset)
+                line_width = min(line.shape[1], width - SIMPLE_TEXT_MARGIN)
+                pixels[
+                    y_offset : y_offset + line_height,
+                    SIMPLE_TEXT_MARGIN : SIMPLE_TEXT_MARGIN + line_width,
+                ] = line[:line_height, :line_width]
+                y_offset += line_step
 
-            return np.array(img, dtype=np.uint8)
+            return pixels
         except Exception as exc:
             if isinstance(exc, PixelGenerationError):
                 raise
@@ -59,7 +81,7 @@ class PixelGenerator:
         self,
         width: int = 512,
         height: int = 512,
-        pattern: Literal["gradient", "circle", "noise"] = "gradient",
+        pattern: CTPattern = "gradient",
         bits_stored: int = 12,
     ) -> np.ndarray:
         """CT Realisticモード: 16bit signed, HU値対応.
@@ -69,8 +91,14 @@ class PixelGenerator:
         Pixel Value 1024 -> HU 0 (Water)
         Pixel Value 2048 -> HU 1024 (Bone)
 
+        ``phantom`` はファントム中心（z=0）のスライスを返す。
+
         Returns: shape=(height, width), dtype=int16
         """
+        if pattern == "phantom":
+            return self.generate_ct_volume(
+                1, width=width, height=height, pattern=pattern, bits_stored=bits_stored
+            )[0]
         try:
             max_val = min((1 << bits_stored) - 1, np.iinfo(np.int16).max)
 
@@ -115,3 +143,137 @@ class PixelGenerator:
                 f"Failed to generate CT realistic pixel data: {exc}",
                 mode="ct_realistic",
             ) from exc
+
+    def generate_ct_volume(
+        self,
+        n_slices: int,
+        width: int = 512,
+        height: int = 512,
+        pattern: CTPattern = "gradient",
+        bits_stored: int = 12,
+        z_positions: Sequence[float] | np.ndarray | None = None,
+        center_z: float = 0.0,
+        pixel_spacing: float = DEFAULT_PIXEL_SPACING,
+        seed: int | None = None,
+        first_slice: int = 0,
+    ) -> np.ndarray:
+        """CT Realisticモードの複数スライスをまとめて生成.
+
+        スライス方向をまとめてベクトル化して生成する。スライスごとに同一となる
+        パターン（gradient / circle）は1フレームを読み取り専用のビューで複製する。
+        各スライスは ``volume[i]`` としてコピーせずに取り出せる。
+
+        ``phantom`` は ``z_positions``（mm）の各スライスで、``center_z`` を中心とする
+        3次元ファントムを評価する。省略時は ``pixel_spacing`` 間隔の等方ボクセルとする。
+
+        ``noise`` で ``seed`` を指定した場合は、シードごとに一度だけ作るノイズバンクから
+        スライス番号 ``first_slice`` 以降のスライスを導出する。結果はシードと
+        スライス番号だけで決まり、呼び出しの分割方法やプロセスに依存しない。
+
+        Returns: shape=(n_slices, height, width), dtype=int16
+        """
+        if n_slices < 1:
+            raise PixelGenerationError(
+                f"n_slices must be >= 1, got {n_slices}", mode="ct_realistic"
+            )
+        if pattern == "phantom":
+            return self._generate_phantom_volume(
+                n_slices, width, height, bits_stored, z_positions, center_z, pixel_spacing
+            )
+        if pattern != "noise":
+            frame = self.generate_ct_realistic(
+                width=width, height=height, pattern=pattern, bits_stored=bits_stored
+            )
+            return np.broadcast_to(frame, (n_slices, height, width))
+
+        try:
+            if seed is not None:
+                return self._noise_bank(seed, width, height, bits_stored).volume(
+                    first_slice, n_slices
+                )
+            max_val = min((1 << bits_stored) - 1, np.iinfo(np.int16).max)
+            rng = np.random.default_rng()
+            return rng.integers(
+                0,
+                min(max_val + 1, 32768),
+                size=(n_slices, height, width),
+                dtype=np.int16,
+            )
+        except Exception as exc:
+            if isinstance(exc, PixelGenerationError):
+                raise
+            raise PixelGenerationError(
+                f"Failed to generate CT realistic volume: {exc}",
+                mode="ct_realistic",
+            ) from exc
+
+    def _glyph_atlas(
+        self, font_size: int, background_color: int, text_color: int
+    ) -> GlyphAtlas:
+        key = (font_size, background_color, text_color)
+        atlas = self._glyph_atlases.get(key)
+        if atlas is None:
+            atlas = GlyphAtlas(
+                font_size=font_size,
+                background_color=background_color,
+                text_color=text_color,
+            )
+            self._glyph_atlases[key] = atlas
+        return atlas
+
+    def _noise_bank(
+        self, seed: int, width: int, height: int, bits_stored: int
+    ) -> NoiseBank:
+        # int16 の正の範囲に収まるよう値域は最大15bitとする
+        key = (seed, width, height, min(bits_stored, 15))
+        bank = self._noise_banks.get(key)
+        if bank is None:
+            bank = NoiseBank(seed, width, height, value_bits=key[3])
+            self._noise_banks[key] = bank
+        return bank
+
+    def _background(self, width: int, height: int, color: int) -> np.ndarray:
+        key = (width, height, color)
+        background = self._backgrounds.get(key)
+        if background is None:
+            background = np.full((height, width), color, dtype=np.uint8)
+            background.flags.writeable = False
+            self._backgrounds[key] = background
+        return background
+
+    def _generate_phantom_volume(
+        self,
+        n_slices: int,
+        width: int,
+        height: int,
+        bits_stored: int,
+        z_positions: Sequence[float] | np.ndarray | None,
+        center_z: float,
+        pixel_spacing: float,
+    ) -> np.ndarray:
+        if z_positions is None:
+            z = center_z + (np.arange(n_slices) - (n_slices - 1) / 2.0) * pixel_spacing
+        else:
+            z = np.asarray(z_positions, dtype=np.float64)
+            if z.shape != (n_slices,):
+                raise PixelGenerationError(
+                    f"z_positions must have {n_slices} values, got {z.size}",
+                    mode="ct_realistic",
+                )
+        try:
+            key = (width, height, pixel_spacing)
+            field = self._phantom_fields.get(key)
+            if field is None:
+                field = PhantomField(width, height, pixel_spacing)
+                self._phantom_fields[key] = field
+
+            max_val = min((1 << bits_stored) - 1, np.iinfo(np.int16).max)
+            pixel_values = field.evaluate_hu(z, center_z=center_z)
+            pixel_values += HU_OFFSET
+            np.clip(pixel_values, 0, max_val, out=pixel_values)
+            return np.rint(pixel_values).astype(np.int16)
+        except Exception as exc:
+            raise PixelGenerationError(
+                f"Failed to generate phantom volume: {exc}",
+                mode="ct_realistic",
+            ) from exc
@@ -0,0 +1,127 @@
+"""Vectorized RLE Lossless (PackBits) encoder for DICOM pixel frames."""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+from pydicom.encaps import encapsulate, itemize_fragment
+
+from .exceptions import DICOMBuildError
+
+# RLE Lossless Transfer Syntax UID
+RLE_LOSSLESS = "1.2.840.10008.1.2.5"
+
+# カプセル化した Pixel Data の終端（Sequence Delimitation Item）
+ENCAPSULATED_PIXEL_DATA_END = b"\xfe\xff\xdd\xe0\x00\x00\x00\x00"
+
+# PackBits の1ランに含められる最大バイト数
+_MAX_RUN = 128
+# RLE ヘッダは16個の uint32（セグメント数と最大15個のオフセット）
+_RLE_HEADER = struct.Struct("<16I")
+_MAX_SEGMENTS = 15
+
+
+def rle_encode_frame(pixels: np.ndarray) -> bytes:
+    """2次元のフレームを DICOM RLE Lossless の1フレーム分にエンコードする.
+
+    ピクセルをリトルエンディアンのバイト平面に分け、上位バイトから順に
+    1セグメントずつ PackBits で圧縮する（PS3.5 Annex G）。
+    出力は pydicom の RLE エンコーダと同一のバイト列となる。
+    """
+    if pixels.ndim != 2:
+        raise DICOMBuildError(
+            f"RLE frame must be 2-dimensional, got shape {pixels.shape}",
+            tag="PixelData",
+        )
+    bytes_allocated = pixels.dtype.itemsize
+    if bytes_allocated > _MAX_SEGMENTS:
+        raise DICOMBuildError(
+            f"RLE supports at most {_MAX_SEGMENTS} segments, got {bytes_allocated}",
+            tag="PixelData",
+        )
+
+    rows, columns = pixels.shape
+    planes = np.ascontiguousarray(
+        pixels, dtype=pixels.dtype.newbyteorder("<")
+    ).view(np.uint8).reshape(rows, columns, bytes_allocated)
+    segments = [
+        _encode_segment(planes[:, :, byte], columns)
+        for byte in reversed(range(bytes_allocated))
+    ]
+
+    offsets = [_RLE_HEADER.size]
+    for segment in segments[:-1]:
+        offsets.append(offsets[-1] + len(segment))
+    header = _RLE_HEADER.pack(
+        len(segments), *offsets, *([0] * (_MAX_SEGMENTS - len(offsets)))
+    )
+    return header + b"".join(segments)
+
+
+def encapsulate_frames(frames: Sequence[bytes]) -> bytes:
+    """エンコード済みフレームを1フレーム1フラグメントでカプセル化した Pixel Data の値を返す.
+
+    Basic Offset Table は空とする。
+    """
+    return encapsulate(list(frames), has_bot=False)
+
+
+def encapsulated_item(frame: bytes) -> bytes:
+    """エンコード済みフレームを1フラグメントのアイテムにする（ストリーミング書き込み用）."""
+    return itemize_fragment(frame)
+
+
+def _encode_segment(plane: np.ndarray, columns: int) -> bytes:
+    """1バイト平面を行ごとに PackBits で圧縮する.
+
+    行内の同一値の連続（ラン）を配列演算で求め、長さ2以上のランは複製ラン、
+    長さ1のランが続く区間はリテラルランとして、それぞれ128バイトごとに分割する。
+    """
+    flat = np.ascontiguousarray(plane).reshape(-1)
+    size = flat.size
+
+    # ランの先頭: 値が変わる位置と、行の先頭（ランは行をまたがない）
+    is_run_start = np.empty(size, dtype=bool)
+    is_run_start[0] = True
+    np.not_equal(flat[1:], flat[:-1], out=is_run_start[1:])
+    is_run_start[::columns] = True
+    run_starts = np.flatnonzero(is_run_start)
+    run_lengths = np.diff(run_starts, append=size)
+    replicate = run_lengths >= 2
+
+    # 複製ランとその直後のラン、行先頭のランが新しいグループを始める
+    is_group_start = replicate.copy()
+    is_group_start[1:] |= replicate[:-1]
+    is_group_start |= run_starts % columns == 0
+    group_starts = run_starts[is_group_start]
+    group_lengths = np.diff(group_starts, append=size)
+    group_replicate = replicate[is_group_start]
+
+    # グループを最大128バイトのランに分割する
+    n_runs = -(-group_lengths // _MAX_RUN)
+    run_group = np.repeat(np.arange(group_starts.size), n_runs)
+    run_index = np.arange(run_group.size) - np.repeat(np.cumsum(n_runs) - n_runs, n_runs)
+    starts = group_starts[run_group] + run_index * _MAX_RUN
+    lengths = np.minimum(group_lengths[run_group] - run_index * _MAX_RUN, _MAX_RUN)
+    is_replicate = group_replicate[run_group]
+
+    # 複製ランはヘッダ+値の2バイト、リテラルランはヘッダ+値の列
+    out_sizes = np.where(is_replicate, 2, lengths + 1)
+    out_offsets = np.cumsum(out_sizes) - out_sizes
+    total = int(out_sizes.sum())
+    # セグメントは偶数長に揃える（末尾に 0x00）
+    out = np.zeros(total + total % 2, dtype=np.uint8)
+    out[out_offsets] = np.where(is_replicate, 257 - lengths, lengths - 1) & 0xFF
+    out[out_offsets[is_replicate] + 1] = flat[starts[is_replicate]]
+
+    literal_lengths = lengths[~is_replicate]
+    if literal_lengths.size:
+        within = np.arange(int(literal_lengths.sum())) - np.repeat(
+            np.cumsum(literal_lengths) - literal_lengths, literal_lengths
+        )
+        source = np.repeat(starts[~is_replicate], literal_lengths) + within
+        target = np.repeat(out_offsets[~is_replicate] + 1, literal_lengths) + within
+        out[target] = flat[source]
+    return out.tobytes()
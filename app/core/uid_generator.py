@@ -2,28 +2,94 @@
 
 from __future__ import annotations
 
+from collections import defaultdict
+from collections.abc import Callable, Iterator
 from typing import Literal
+import hashlib
+import itertools
+import operator
+import os
 import re
 import random
-import uuid
+import threading
+import weakref
 
 from .exceptions import UIDGenerationError
 
+# 2.25 方式で1回に乱数を取得する UID 数の上限。少数の UID しか使わないジョブで
+# 無駄にならないよう、補充のたびに初期値から倍にしていく
+UID_BLOCK_SIZE = 4096
+_INITIAL_BLOCK_SIZE = 16
+
+# UUID version 4 / RFC 4122 variant のビット（uuid.uuid4() と同じ値域にする）
+_UUID_BYTES = 16
+_UUID_VERSION_MASK = ~((0xF << 76) | (0x3 << 62)) & ((1 << 128) - 1)
+_UUID4_BITS = (0x4 << 76) | (0x2 << 62)
+# 決定的方式は UUID version 8（RFC 9562 の独自形式）のビットを立てる
+_UUID8_BITS = (0x8 << 76) | (0x2 << 62)
+# 決定的方式でハッシュの入力の各要素を区切るバイト
+_KEY_SEPARATOR = b"\x1f"
+
+# fork した子プロセスが親と同じ UID を払い出さないよう、事前生成分を破棄する
+_generators: weakref.WeakSet[UIDGenerator] = weakref.WeakSet()
+
+
+def _discard_pools_after_fork() -> None:
+    for generator in list(_generators):
+        generator._pool = []
+        if generator._counter_lease is not None:
+            generator._counter = iter(())
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_discard_pools_after_fork)
+
+
+def _random_uids(count: int) -> list[str]:
+    """1回の os.urandom で ``count`` 個の 2.25 UID を作る."""
+    data = os.urandom(_UUID_BYTES * count)
+    from_bytes = int.from_bytes
+    uids = []
+    for start in range(0, len(data), _UUID_BYTES):
+        value = from_bytes(data[start : start + _UUID_BYTES], "big")
+        uids.append("2.25." + str(value & _UUID_VERSION_MASK | _UUID4_BITS))
+    return uids
+
 
 class UIDGenerator:
     """UID生成器.
 
-    2つの生成方式:
-    1. UUID 2.25方式（デフォルト）: f"2.25.{uuid.uuid4().int}"
+    3つの生成方式:
+    1. UUID 2.25方式（デフォルト）: 乱数をまとめて取得し、UUID version 4 と同じ
+       値域の整数から f"2.25.{int}" を事前に作っておいて払い出す
     2. カスタムRoot方式: f"{root}.{counter}" で連番管理
+    3. 決定的方式: (シード, UID の種類, シリーズ番号, インスタンス番号) のハッシュから
+       f"2.25.{int}" を導出する。同じシードなら、どのプロセス・ホストで、
+       どの部分集合を生成しても同じ UID になる
+
+    決定的方式では ``generate_series_uid`` / ``generate_sop_uid`` に番号を渡す。
+    省略した場合は UID の種類ごとの呼び出し順を番号とする。
+
+    どちらの方式も複数スレッドから呼び出せる。カスタムRoot方式で複数の
+    ワーカーが採番する場合は ``partition`` でワーカーごとの生成器を作ると、
+    連番が重ならず、ワーカー間で同期せずに採番できる。
+
+    カスタムRoot方式で ``counter_lease`` を渡した場合は、連番を1から数えずに
+    ``counter_lease()`` が返す範囲（ブロック）から払い出し、使い切ったら次の
+    ブロックを受け取る。ブロックを重ならないように払い出す側（永続化した
+    カウンタ）と組み合わせると、プロセスや実行をまたいでも UID が重ならない。
     """
 
     def __init__(
         self,
-        method: Literal["uuid_2_25", "custom_root"] = "uuid_2_25",
+        method: Literal["uuid_2_25", "custom_root", "deterministic"] = "uuid_2_25",
         custom_root: str = "",
+        partition_index: int = 0,
+        partition_count: int = 1,
+        seed: str = "",
+        counter_lease: Callable[[], range] | None = None,
     ):
-        if method not in ("uuid_2_25", "custom_root"):
+        if method not in ("uuid_2_25", "custom_root", "deterministic"):
             raise UIDGenerationError(
                 f"Invalid UID generation method: {method}",
                 uid_type="configuration",
@@ -38,45 +104,197 @@ class UIDGenerator:
                 f"Invalid OID format for custom_root: {custom_root}",
                 uid_type="configuration",
             )
+        if method == "deterministic" and not seed:
+            raise UIDGenerationError(
+                "seed is required when method is 'deterministic'",
+                uid_type="configuration",
+            )
+        if partition_count < 1 or not 0 <= partition_index < partition_count:
+            raise UIDGenerationError(
+                f"Invalid counter partition: {partition_index}/{partition_count}",
+                uid_type="configuration",
+            )
+        if counter_lease is not None and partition_count != 1:
+            raise UIDGenerationError(
+                "A leased counter cannot be partitioned",
+                uid_type="configuration",
+            )
 
         self._method = method
         self._custom_root = custom_root
-        self._counter = 0
+        self._partition_index = partition_index
+        self._partition_count = partition_count
+        self._counter_lease = counter_lease
+        # パーティション i は i+1, i+1+n, i+1+2n, ... を使う
+        # （itertools.count・range の next は GIL の下でアトミック）
+        self._counter: Iterator[int] = itertools.count(
+            partition_index + 1, partition_count
+        )
+        self._block = range(0)
+        if counter_lease is not None:
+            self._counter = iter(self._block)
+        self._pool: list[str] = []
+        self._block_size = _INITIAL_BLOCK_SIZE
+        self._refill_lock = threading.Lock()
+        self._seed = seed
+        self._role_counters: defaultdict[str, itertools.count[int]] = defaultdict(
+            itertools.count
+        )
+        # シードと UID の種類までを入力済みのハッシュ（番号ごとに copy して使う）
+        self._role_hashes: dict[str, hashlib.blake2b] = {}
+        _generators.add(self)
 
-    def _generate_uid(self) -> str:
+    def partition(self, index: int, count: int) -> UIDGenerator:
+        """カスタムRoot方式の連番を ``count`` 個に分けた ``index`` 番目の生成器を作る.
+
+        各ワーカーは自分の生成器だけで採番するため、ワーカー間でロックや
+        通信を必要としない。UUID 2.25 方式では同じ方式の独立した生成器を返す。
+        ``counter_lease`` を持つ生成器では、同じ払い出し元から別々のブロックを
+        受け取る独立した生成器を返す。分割できるのは分割していない生成器のみ。
+        """
+        if self._partition_count != 1:
+            raise UIDGenerationError(
+                "A partitioned UIDGenerator cannot be partitioned again",
+                uid_type="configuration",
+            )
+        if self._counter_lease is not None:
+            return UIDGenerator(
+                method=self._method,
+                custom_root=self._custom_root,
+                seed=self._seed,
+                counter_lease=self._counter_lease,
+            )
+        return UIDGenerator(
+            method=self._method,
+            custom_root=self._custom_root,
+            partition_index=index,
+            partition_count=count,
+            seed=self._seed,
+        )
+
+    def _generate_uid(
+        self,
+        role: str,
+        series_index: int | None = None,
+        instance_index: int | None = None,
+    ) -> str:
         if self._method == "uuid_2_25":
-            return f"2.25.{uuid.uuid4().int}"
+            return self._pop_random_uid()
+        if self._method == "deterministic":
+            return "2.25." + str(
+                self._derive(self._key(role, series_index, instance_index))
+            )
+        return f"{self._custom_root}.{self._next_counter()}"
+
+    def _next_counter(self) -> int:
+        while True:
+            counter = self._counter
+            try:
+                return next(counter)
+            except StopIteration:
+                # 使い切るのは counter_lease を持つ場合のみ
+                with self._refill_lock:
+                    if self._counter is counter:
+                        self._block = self._counter_lease()
+                        self._counter = iter(self._block)
 
-        self._counter += 1
-        return f"{self._custom_root}.{self._counter}"
+    def unused_counters(self) -> range:
+        """受け取ったブロックのうち、まだ払い出していない連番の範囲を返す.
+
+        以後の採番では新しいブロックを受け取る。``counter_lease`` を持たない
+        生成器では空の範囲を返す。
+        """
+        if self._counter_lease is None:
+            return range(0)
+        with self._refill_lock:
+            remaining = operator.length_hint(self._counter)
+            block = self._block
+            self._block = range(0)
+            self._counter = iter(self._block)
+        return block[len(block) - remaining :]
+
+    def _key(
+        self, role: str, series_index: int | None, instance_index: int | None
+    ) -> hashlib.blake2b:
+        """(シード, 種類, シリーズ番号, インスタンス番号) を入力したハッシュを返す."""
+        if instance_index is None:
+            instance_index = next(self._role_counters[role])
+        role_hash = self._role_hashes.get(role)
+        if role_hash is None:
+            role_hash = hashlib.blake2b(
+                _KEY_SEPARATOR.join((self._seed.encode("utf-8"), role.encode(), b"")),
+                digest_size=_UUID_BYTES,
+            )
+            self._role_hashes[role] = role_hash
+        key = role_hash.copy()
+        series = b"" if series_index is None else b"%d" % series_index
+        key.update(series + _KEY_SEPARATOR + b"%d" % instance_index)
+        return key
+
+    @staticmethod
+    def _derive(key: hashlib.blake2b) -> int:
+        value = int.from_bytes(key.digest(), "big")
+        return value & _UUID_VERSION_MASK | _UUID8_BITS
+
+    def _pop_random_uid(self) -> str:
+        while True:
+            try:
+                return self._pool.pop()
+            except IndexError:
+                with self._refill_lock:
+                    if not self._pool:
+                        self._pool = _random_uids(self._block_size)
+                        self._block_size = min(self._block_size * 2, UID_BLOCK_SIZE)
 
     def generate_study_uid(self) -> str:
-        return self._generate_uid()
+        return self._generate_uid("study")
 
-    def generate_series_uid(self) -> str:
-        return self._generate_uid()
+    def generate_series_uid(self, series_index: int | None = None) -> str:
+        return self._generate_uid("series", instance_index=series_index)
 
-    def generate_sop_uid(self, allow_invalid: bool = False) -> str:
+    def generate_sop_uid(
+        self,
+        allow_invalid: bool = False,
+        series_index: int | None = None,
+        instance_index: int | None = None,
+    ) -> str:
         """SOP Instance UIDを生成.
 
         allow_invalid=True の場合、10%の確率で0始まり不正OIDを生成
         不正パターン: "2.25.0{split}.{rest}" のようにドット直後に0を配置
+        決定的方式では、不正にするかどうかと分割位置もハッシュから決める。
         """
-        uid = self._generate_uid()
+        if self._method == "deterministic":
+            key = self._key("sop", series_index, instance_index)
+            value = str(self._derive(key))
+            if allow_invalid:
+                rng = random.Random(key.digest())
+                if rng.random() < 0.1:
+                    split_pos = rng.randint(3, len(value) - 3)
+                    return f"2.25.0{value[:split_pos]}.{value[split_pos:]}"
+            return "2.25." + value
+
+        uid = self._generate_uid("sop")
 
         if allow_invalid and random.random() < 0.1:
             if self._method == "uuid_2_25":
-                uuid_part = str(uuid.uuid4().int)
+                uuid_part = self._pop_random_uid().removeprefix("2.25.")
                 split_pos = random.randint(3, len(uuid_part) - 3)
                 uid = f"2.25.0{uuid_part[:split_pos]}.{uuid_part[split_pos:]}"
             else:
-                self._counter += 1
-                uid = f"{self._custom_root}.0{self._counter}"
+                uid = f"{self._custom_root}.0{self._next_counter()}"
 
         return uid
 
     def generate_frame_of_reference_uid(self) -> str:
-        return self._generate_uid()
+        return self._generate_uid("frame_of_reference")
 
     def generate_instance_creator_uid(self) -> str:
-        return self._generate_uid()
+        return self._generate_uid("instance_creator")
+
+    def generate_implementation_class_uid(self) -> str:
+        return self._generate_uid("implementation_class")
+
+    def generate_media_storage_uid(self) -> str:
+        """DICOMDIR など、インスタンス以外のファイルの SOP Instance UID を生成."""
+        return self._generate_uid("media_storage")
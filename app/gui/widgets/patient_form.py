@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 import logging
+from typing import Any
 
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QPersistentModelIndex, Qt
 from PySide6.QtWidgets import (
     QComboBox,
     QFormLayout,
@@ -14,10 +16,69 @@ from PySide6.QtWidgets import (
 )
 
 from app.core.models import Patient, PatientName
-from app.services.patient_loader import PatientLoaderService
+from app.services.patient_database import SQLitePatientRepository
+from app.services.patient_loader import PatientLoaderService, PatientRepository
 
 logger = logging.getLogger(__name__)
 
+# 患者選択の一覧に1回で追加する患者数
+PATIENT_PAGE_SIZE = 200
+
+
+class PatientListModel(QAbstractListModel):
+    """患者マスターを必要になった分だけページ単位で読み込む一覧モデル."""
+
+    def __init__(
+        self,
+        repository: PatientRepository | SQLitePatientRepository | None = None,
+        parent: QWidget | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self._repository = repository
+        self._total = len(repository) if repository is not None else 0
+        self._patients: list[Patient] = []
+        self.fetchMore(QModelIndex())
+
+    def patient(self, row: int) -> Patient | None:
+        if 0 <= row < len(self._patients):
+            return self._patients[row]
+        return None
+
+    def rowCount(
+        self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()
+    ) -> int:
+        return 0 if parent.isValid() else len(self._patients)
+
+    def data(
+        self,
+        index: QModelIndex | QPersistentModelIndex,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        patient = self.patient(index.row())
+        if patient is None or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return f"{patient.patient_id} - {patient.patient_name.alphabetic}"
+
+    def canFetchMore(self, parent: QModelIndex | QPersistentModelIndex) -> bool:
+        return not parent.isValid() and len(self._patients) < self._total
+
+    def fetchMore(self, parent: QModelIndex | QPersistentModelIndex) -> None:
+        if not self.canFetchMore(parent) or self._repository is None:
+            return
+        start = len(self._patients)
+        try:
+            patients = self._repository.page(start, PATIENT_PAGE_SIZE)
+        except Exception:
+            logger.warning("Failed to load patient master", exc_info=True)
+            self._total = start
+            return
+        if not patients:
+            self._total = start
+            return
+        self.beginInsertRows(QModelIndex(), start, start + len(patients) - 1)
+        self._patients.extend(patients)
+        self.endInsertRows()
+
 
 class PatientForm(QWidget):
     """患者情報入力フォーム."""
@@ -53,8 +114,8 @@ class PatientForm(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(group)
 
-        self._patients: list[Patient] = []
-        self._load_patients()
+        self._patients = self._load_patients()
+        self.patient_combo.setModel(self._patients)
 
         self.patient_combo.currentIndexChanged.connect(self._on_patient_selected)
         if self.patient_combo.count() > 0:
@@ -79,21 +140,18 @@ class PatientForm(QWidget):
             sex=self.sex_combo.currentText(),
         )
 
-    def _load_patients(self) -> None:
+    def _load_patients(self) -> PatientListModel:
+        """患者マスターの先頭ページを読み込み、残りは一覧のスクロールに合わせて読む."""
         try:
-            self._patients = PatientLoaderService().load_all()
+            return PatientListModel(PatientLoaderService().repository(), self)
         except Exception:
             logger.warning("Failed to load patient master", exc_info=True)
-            self._patients = []
-
-        for patient in self._patients:
-            label = f"{patient.patient_id} - {patient.patient_name.alphabetic}"
-            self.patient_combo.addItem(label)
+            return PatientListModel(parent=self)
 
     def _on_patient_selected(self, index: int) -> None:
-        if index < 0 or index >= len(self._patients):
+        patient = self._patients.patient(index)
+        if patient is None:
             return
-        patient = self._patients[index]
         self.patient_id_edit.setText(patient.patient_id)
 
         name_parts = [patient.patient_name.alphabetic]
@@ -7,7 +7,7 @@ import logging
 from PySide6.QtCore import QThread, Signal
 
 from app.core.exceptions import DICOMGeneratorError
-from app.core.models import GenerationConfig
+from app.core.models import GenerationConfig, GenerationPlan
 from app.services.study_generator import StudyGeneratorService
 
 logger = logging.getLogger(__name__)
@@ -19,9 +19,12 @@ class GeneratorWorker(QThread):
     progress_updated = Signal(int, int, str)
     generation_finished = Signal(bool, str)
 
-    def __init__(self, config: GenerationConfig) -> None:
+    def __init__(
+        self, config: GenerationConfig, plan: GenerationPlan | None = None
+    ) -> None:
         super().__init__()
         self.config = config
+        self.plan = plan
         self.cancel_requested = False
 
     def run(self) -> None:
@@ -30,6 +33,7 @@ class GeneratorWorker(QThread):
             service.generate(
                 config=self.config,
                 progress_callback=self._on_progress,
+                plan=self.plan,
             )
             if self.cancel_requested:
                 self.generation_finished.emit(False, "Cancelled by user")
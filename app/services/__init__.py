@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from .batch_generator import BatchGeneratorService, BatchJob, BatchJobResult
 from .patient_loader import PatientLoaderService
 from .study_generator import StudyGeneratorService
 from .template_loader import TemplateLoaderService
@@ -10,5 +11,8 @@ __all__ = [
     "TemplateLoaderService",
     "PatientLoaderService",
     "StudyGeneratorService",
+    "BatchGeneratorService",
+    "BatchJob",
+    "BatchJobResult",
 ]
 
@@ -0,0 +1,331 @@
+"""Concurrent execution of many generation jobs in one process."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple
+
+from app.core import ConfigurationError, GenerationConfig, GenerationPlan
+
+from .study_generator import StudyGeneratorService
+from .template_loader import TemplateLoaderService
+
+logger = logging.getLogger(__name__)
+
+# (ジョブ番号, 設定, 生成計画, UID の連番の分割)
+_RunnableJob = tuple[int, GenerationConfig, GenerationPlan, tuple[int, int]]
+
+
+class BatchJob(NamedTuple):
+    """バッチで実行する1ジョブ."""
+
+    # 結果の表示に使う名前（ジョブファイルのパスなど）
+    name: str
+    config: GenerationConfig
+
+
+class BatchJobResult(NamedTuple):
+    """1ジョブの実行結果（成功時は ``error`` が ``None``）."""
+
+    name: str
+    output_path: Path | None
+    error: Exception | None
+
+
+class _WorkerBudget:
+    """同時に実行するジョブのワーカー数の合計を上限以下に保つ."""
+
+    def __init__(self, limit: int) -> None:
+        self._available = limit
+        self._condition = threading.Condition()
+
+    def acquire(self, workers: int) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self._available >= workers)
+            self._available -= workers
+
+    def release(self, workers: int) -> None:
+        with self._condition:
+            self._available += workers
+            self._condition.notify_all()
+
+
+class _BatchProgress:
+    """ジョブごとの進捗を合算して1つの進捗として通知する."""
+
+    def __init__(
+        self, callback: Callable[[int, int], None] | None, totals: Sequence[int]
+    ) -> None:
+        self._callback = callback
+        self._totals = totals
+        self._reported = [0] * len(totals)
+        self._current = 0
+        self._total = sum(totals)
+        self._lock = threading.Lock()
+
+    def job_callback(self, index: int) -> Callable[[int, int], None]:
+        def callback(current: int, total: int) -> None:
+            _ = total
+            self._advance(index, current)
+
+        return callback
+
+    def finish(self, index: int) -> None:
+        # 差分再生成・再開では生成枚数が少ないため、残りをまとめて進める
+        self._advance(index, self._totals[index])
+
+    def _advance(self, index: int, current: int) -> None:
+        with self._lock:
+            delta = min(current, self._totals[index]) - self._reported[index]
+            if delta <= 0:
+                return
+            self._reported[index] += delta
+            self._current += delta
+            if self._callback is not None:
+                self._callback(self._current, self._total)
+
+
+class BatchGeneratorService:
+    """複数のジョブを1プロセス内で並行に生成する Service Layer.
+
+    ジョブはスレッドで並行に実行し、各ジョブの ``execution.workers`` の合計が
+    ``max_workers`` を超えないように開始を待たせる。生成計画は実行前にまとめて
+    作成する（テンプレートはプロセス内のキャッシュで1回だけ解析される）。1ジョブの失敗は他の
+    ジョブを止めず、結果として返す。
+
+    ``job_processes`` が真の場合は ``max_workers`` 個のプロセスプールで
+    ジョブを1つずつ実行する（各ジョブは ``workers: 1`` とする）。小さなジョブが
+    大量にある場合に GIL を取り合わずに済む。進捗はジョブの完了ごとに進む。
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_concurrent_jobs: int | None = None,
+        job_processes: bool = False,
+        template_loader: TemplateLoaderService | None = None,
+    ) -> None:
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._max_concurrent_jobs = max_concurrent_jobs or self._max_workers
+        if self._max_workers < 1 or self._max_concurrent_jobs < 1:
+            raise ConfigurationError(
+                "max_workers and max_concurrent_jobs must be >= 1",
+                {
+                    "max_workers": self._max_workers,
+                    "max_concurrent_jobs": self._max_concurrent_jobs,
+                },
+            )
+        self._job_processes = job_processes
+        self._template_loader = template_loader or TemplateLoaderService()
+
+    def run(
+        self,
+        jobs: Sequence[BatchJob],
+        progress_callback: Callable[[int, int], None] | None = None,
+        incremental: bool = False,
+        resume: bool = False,
+        dry_run: bool = False,
+    ) -> list[BatchJobResult]:
+        """ジョブを実行し、入力と同じ順で結果を返す.
+
+        出力先が重複するジョブは同じファイルを書き換え合うため、実行せずに失敗とする。
+        進捗の総数は実行する全ジョブの画像枚数の合計となる。``dry_run`` が真の場合は
+        生成計画の作成と出力先の確認のみを行い、成功したジョブの出力先を返す。
+        """
+        results: list[BatchJobResult | None] = [None] * len(jobs)
+        runnable: list[tuple[int, GenerationConfig, GenerationPlan]] = []
+        compiler = StudyGeneratorService(template_loader=self._template_loader)
+        output_dirs: dict[Path, str] = {}
+        for index, job in enumerate(jobs):
+            output_dir = Path(job.config.output_dir).resolve()
+            try:
+                if output_dir in output_dirs:
+                    raise ConfigurationError(
+                        "Output directory is shared with another job",
+                        {"output_dir": str(output_dir), "job": output_dirs[output_dir]},
+                    )
+                output_dirs[output_dir] = job.name
+                config = self._limit_workers(job.config)
+                runnable.append((index, config, compiler.compile_plan(config)))
+            except Exception as exc:
+                logger.error("Batch job rejected: job=%s error=%s", job.name, exc)
+                results[index] = BatchJobResult(job.name, None, exc)
+
+        if dry_run:
+            for index, config, _ in runnable:
+                results[index] = BatchJobResult(
+                    jobs[index].name, Path(config.output_dir), None
+                )
+            return [result for result in results if result is not None]
+
+        partitions = self._uid_partitions(
+            [config for _, config, _ in runnable]
+        )
+        runnable_jobs = [
+            (index, config, plan, partition)
+            for (index, config, plan), partition in zip(runnable, partitions)
+        ]
+        # 実行前に失敗としたジョブは進捗の総数に含めない
+        totals = [0] * len(jobs)
+        for index, config, _ in runnable:
+            totals[index] = sum(series.num_images for series in config.series_list)
+        progress = _BatchProgress(progress_callback, totals)
+        logger.info(
+            "Batch started: jobs=%s runnable=%s max_workers=%s max_concurrent_jobs=%s "
+            "job_processes=%s",
+            len(jobs),
+            len(runnable),
+            self._max_workers,
+            self._max_concurrent_jobs,
+            self._job_processes,
+        )
+        run_jobs = (
+            self._run_in_processes if self._job_processes else self._run_in_threads
+        )
+        for index, output_path, error in run_jobs(
+            runnable_jobs, progress, incremental, resume
+        ):
+            if error is not None:
+                logger.error(
+                    "Batch job failed: job=%s error=%s", jobs[index].name, error
+                )
+            results[index] = BatchJobResult(jobs[index].name, output_path, error)
+
+        completed = [result for result in results if result is not None]
+        failed = sum(1 for result in completed if result.error is not None)
+        logger.info(
+            "Batch completed: succeeded=%s failed=%s", len(completed) - failed, failed
+        )
+        return completed
+
+    def _run_in_threads(
+        self,
+        runnable: list[_RunnableJob],
+        progress: _BatchProgress,
+        incremental: bool,
+        resume: bool,
+    ) -> Iterator[tuple[int, Path | None, Exception | None]]:
+        budget = _WorkerBudget(self._max_workers)
+
+        def run_job(
+            index: int,
+            config: GenerationConfig,
+            plan: GenerationPlan,
+            uid_partition: tuple[int, int],
+        ) -> tuple[Path | None, Exception | None]:
+            workers = config.execution.workers
+            budget.acquire(workers)
+            try:
+                output_path = StudyGeneratorService(
+                    template_loader=self._template_loader
+                ).generate(
+                    config=config,
+                    progress_callback=progress.job_callback(index),
+                    plan=plan,
+                    incremental=incremental,
+                    resume=resume,
+                    uid_partition=uid_partition,
+                )
+            except Exception as exc:
+                return None, exc
+            finally:
+                budget.release(workers)
+                progress.finish(index)
+            return output_path, None
+
+        with ThreadPoolExecutor(
+            max_workers=self._max_concurrent_jobs, thread_name_prefix="batch-job"
+        ) as executor:
+            futures = [
+                (index, executor.submit(run_job, index, *job))
+                for index, *job in runnable
+            ]
+            for index, future in futures:
+                yield (index, *future.result())
+
+    def _run_in_processes(
+        self,
+        runnable: list[_RunnableJob],
+        progress: _BatchProgress,
+        incremental: bool,
+        resume: bool,
+    ) -> Iterator[tuple[int, Path | None, Exception | None]]:
+        # Qt のスレッドを含むプロセスからも安全に起動できるよう spawn を使う
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=min(self._max_workers, max(len(runnable), 1)),
+            mp_context=context,
+        ) as executor:
+            futures = {
+                executor.submit(_run_job, *job, incremental, resume): index
+                for index, *job in runnable
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                progress.finish(index)
+                try:
+                    yield index, future.result(), None
+                except Exception as exc:
+                    yield index, None, exc
+
+    @staticmethod
+    def _uid_partitions(configs: list[GenerationConfig]) -> list[tuple[int, int]]:
+        """同じカスタムRootを使うジョブに、連番を分割した別々の番号を割り当てる.
+
+        連番をファイルのカウンタから受け取るジョブは分割しない。
+        """
+        roots = [
+            config.uid_custom_root
+            if config.uid_method == "custom_root" and config.uid_counter_store is None
+            else None
+            for config in configs
+        ]
+        counts = Counter(root for root in roots if root is not None)
+        assigned: Counter[str] = Counter()
+        partitions = []
+        for root in roots:
+            if root is None:
+                partitions.append((0, 1))
+                continue
+            partitions.append((assigned[root], counts[root]))
+            assigned[root] += 1
+        return partitions
+
+    def _limit_workers(self, config: GenerationConfig) -> GenerationConfig:
+        """1ジョブのワーカー数を全体の上限（プロセスプールでは1）に合わせる."""
+        execution = config.execution
+        limit = 1 if self._job_processes else self._max_workers
+        if execution.workers <= limit:
+            return config
+        logger.debug(
+            "Job workers limited to batch budget: requested=%s limit=%s",
+            execution.workers,
+            limit,
+        )
+        return config.model_copy(
+            update={"execution": execution.model_copy(update={"workers": limit})}
+        )
+
+
+def _run_job(
+    config: GenerationConfig,
+    plan: GenerationPlan,
+    uid_partition: tuple[int, int],
+    incremental: bool,
+    resume: bool,
+) -> Path:
+    """ワーカープロセスで1ジョブを生成する."""
+    return StudyGeneratorService().generate(
+        config=config,
+        plan=plan,
+        incremental=incremental,
+        resume=resume,
+        uid_partition=uid_partition,
+    )
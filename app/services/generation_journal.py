@@ -0,0 +1,130 @@
+"""Append-only generation journal for resuming interrupted jobs."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import IO, NamedTuple
+
+from pydantic import ValidationError as PydanticValidationError
+
+from app.core import FileReadError, FileWriteError, GenerationJournalHeader
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILENAME = "generation_journal.jsonl"
+
+
+class JournalState(NamedTuple):
+    """中断したジョブのジャーナルから復元した状態."""
+
+    header: GenerationJournalHeader
+    # 書き込み完了したファイル通し番号 -> SOP Instance UID
+    completed: dict[int, str]
+
+
+class GenerationJournal:
+    """出力先ディレクトリに置く追記専用のジャーナル.
+
+    1行目にジョブのハッシュとスタディ・シリーズのUIDを記録し、以降は
+    ファイルの書き込み（一時ファイルからの置き換え）が完了したインスタンスを
+    1行ずつ追記する。行ごとにフラッシュするため、プロセスが異常終了しても
+    完了済みの行は失われない。ジョブが正常に完了したら削除する。
+    """
+
+    def __init__(self, output_dir: Path) -> None:
+        self.path = output_dir / JOURNAL_FILENAME
+        self._file: IO[str] | None = None
+
+    def load(self) -> JournalState | None:
+        """ジャーナルを読み込む（存在しない場合は ``None``）.
+
+        異常終了で書きかけになった末尾の行は無視する。
+        """
+        try:
+            with self.path.open(encoding="utf-8") as file:
+                lines = file.read().splitlines()
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            raise FileReadError(str(self.path), str(exc)) from exc
+
+        if not lines:
+            return None
+        try:
+            header = GenerationJournalHeader.model_validate_json(lines[0])
+        except PydanticValidationError as exc:
+            raise FileReadError(str(self.path), f"invalid journal header: {exc}") from exc
+
+        completed: dict[int, str] = {}
+        for line_number, line in enumerate(lines[1:], start=2):
+            try:
+                record = json.loads(line)
+                completed[int(record["seq"])] = str(record["sop"])
+            except (ValueError, KeyError, TypeError):
+                if line_number == len(lines):
+                    logger.warning("Journal tail truncated: path=%s", self.path)
+                    break
+                raise FileReadError(
+                    str(self.path), f"invalid journal record at line {line_number}"
+                ) from None
+        return JournalState(header=header, completed=completed)
+
+    def start(
+        self,
+        header: GenerationJournalHeader,
+        completed: dict[int, str] | None = None,
+    ) -> None:
+        """ヘッダと完了済みのレコードを書いた一時ファイルでジャーナルを置き換えて開く.
+
+        再開時は書きかけの末尾行を取り除いた状態から追記を続ける。
+        """
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as file:
+                file.write(header.model_dump_json() + "\n")
+                for file_sequence, sop_instance_uid in (completed or {}).items():
+                    file.write(self._format(file_sequence, sop_instance_uid))
+            os.replace(tmp_path, self.path)
+            self._file = self.path.open("a", encoding="utf-8")
+        except OSError as exc:
+            raise FileWriteError(str(self.path), str(exc)) from exc
+
+    def record(self, file_sequence: int, sop_instance_uid: str) -> None:
+        """書き込み完了したインスタンスを追記する."""
+        if self._file is None:
+            raise FileWriteError(str(self.path), "journal is not open")
+        try:
+            self._file.write(self._format(file_sequence, sop_instance_uid))
+            self._file.flush()
+        except OSError as exc:
+            raise FileWriteError(str(self.path), str(exc)) from exc
+
+    @staticmethod
+    def _format(file_sequence: int, sop_instance_uid: str) -> str:
+        return (
+            json.dumps(
+                {"seq": file_sequence, "sop": sop_instance_uid}, separators=(",", ":")
+            )
+            + "\n"
+        )
+
+    def close(self) -> None:
+        if self._file is not None:
+            try:
+                os.fsync(self._file.fileno())
+            except OSError:
+                pass
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """正常完了したジョブのジャーナルを削除する."""
+        self.close()
+        try:
+            self.path.unlink(missing_ok=True)
+        except OSError as exc:
+            raise FileWriteError(str(self.path), str(exc)) from exc
+
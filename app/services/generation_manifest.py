@@ -0,0 +1,114 @@
+"""Persistence of generation manifests for incremental regeneration."""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+from pydantic import ValidationError as PydanticValidationError
+
+from app.core import (
+    MANIFEST_VERSION,
+    FileWriteError,
+    GenerationManifest,
+    ManifestFile,
+    SeriesManifest,
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "generation_manifest.json"
+
+
+class ManifestStore:
+    """出力先ディレクトリのマニフェストと、記録されたファイルを扱う."""
+
+    def __init__(self, output_dir: Path) -> None:
+        self._output_dir = output_dir
+        self.path = output_dir / MANIFEST_FILENAME
+
+    def load(self) -> GenerationManifest | None:
+        """マニフェストを読み込む.
+
+        存在しない・壊れている・形式のバージョンが異なる場合は ``None`` を返し、
+        呼び出し元は全シリーズを再生成する。
+        """
+        try:
+            text = self.path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            logger.warning("Manifest unreadable: path=%s error=%s", self.path, exc)
+            return None
+
+        try:
+            manifest = GenerationManifest.model_validate_json(text)
+        except PydanticValidationError as exc:
+            logger.warning(
+                "Manifest invalid: path=%s errors=%s", self.path, exc.error_count()
+            )
+            return None
+        if manifest.version != MANIFEST_VERSION:
+            logger.info(
+                "Manifest version mismatch: path=%s version=%s expected=%s",
+                self.path,
+                manifest.version,
+                MANIFEST_VERSION,
+            )
+            return None
+        return manifest
+
+    def save(self, manifest: GenerationManifest) -> None:
+        """一時ファイルへ書き込んでから置き換え、途中で中断しても旧マニフェストを残す."""
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        try:
+            tmp_path.write_text(manifest.model_dump_json(indent=2), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            raise FileWriteError(str(self.path), str(exc)) from exc
+
+    def is_intact(self, series: SeriesManifest) -> bool:
+        """記録されたファイルがすべて同じサイズで残っているか."""
+        for file in series.files:
+            try:
+                if (self._output_dir / file.name).stat().st_size != file.size:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def describe(
+        self, files: Iterable[tuple[str, str]]
+    ) -> tuple[ManifestFile, ...]:
+        """生成済みファイル（ファイル名, SOP Instance UID）のサイズを記録用に取得する."""
+        try:
+            return tuple(
+                ManifestFile(
+                    name=name,
+                    size=(self._output_dir / name).stat().st_size,
+                    sop_instance_uid=sop_instance_uid,
+                )
+                for name, sop_instance_uid in files
+            )
+        except OSError as exc:
+            raise FileWriteError(str(self._output_dir), str(exc)) from exc
+
+    def remove_stale(self, manifest: GenerationManifest, keep: set[str]) -> int:
+        """前回記録したファイルのうち、今回の出力に含まれないものを削除する."""
+        removed = 0
+        for series in manifest.series:
+            for file in series.files:
+                if file.name in keep:
+                    continue
+                try:
+                    (self._output_dir / file.name).unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as exc:
+                    raise FileWriteError(
+                        str(self._output_dir / file.name), str(exc)
+                    ) from exc
+        return removed
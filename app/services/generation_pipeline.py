@@ -0,0 +1,273 @@
+"""Staged producer/consumer pipeline for instance generation."""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any
+
+from app.core import GenerationError
+
+# キュー待ちで停止要求を確認する間隔（秒）
+POLL_INTERVAL_SECONDS = 0.1
+
+_END = object()
+# 停止要求によりキュー待ちを打ち切ったことを示す（要素としての None と区別する）
+_STOPPED = object()
+
+
+class _Countdown:
+    """同じステージのスレッドのうち、最後に終了したものを判定する."""
+
+    def __init__(self, count: int) -> None:
+        self._count = count
+        self._lock = threading.Lock()
+
+    def done(self) -> bool:
+        """1スレッド分減らし、全スレッドが終了した場合に真を返す."""
+        with self._lock:
+            self._count -= 1
+            return self._count == 0
+
+
+class _StageFailure:
+    """ステージで発生した例外を完了キュー経由で呼び出し元へ渡す."""
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+class GenerationPipeline:
+    """ステージ間をバウンデッドキューで接続した生成パイプライン.
+
+    ``source`` の各要素は ``stages`` を順に通過し、最後に ``sink`` で消費される。
+    各ステージは ``stage_workers`` で指定した本数（省略時は1本）の専用スレッド、
+    ``sink`` は ``sink_workers`` 本のスレッドで動作する。
+    複数スレッドのステージでは要素の順序は保たれない。
+    処理中（投入済み・未完了）の要素数は ``max_in_flight`` を超えないため、
+    ピーク時のメモリ使用量は要素数に比例して一定に保たれる。
+    完了通知は呼び出し元スレッドで ``on_complete`` として投入順に関係なく行う。
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Callable[[Any], Any]],
+        sink: Callable[[Any], Any],
+        sink_workers: int = 1,
+        max_in_flight: int = 8,
+        stage_workers: Sequence[int] | None = None,
+    ) -> None:
+        if sink_workers < 1:
+            raise GenerationError(
+                "sink_workers must be >= 1", {"sink_workers": sink_workers}
+            )
+        if stage_workers is None:
+            stage_workers = [1] * len(stages)
+        if len(stage_workers) != len(stages) or any(n < 1 for n in stage_workers):
+            raise GenerationError(
+                "stage_workers must have one positive count per stage",
+                {"stage_workers": list(stage_workers)},
+            )
+        if max_in_flight < 1:
+            raise GenerationError(
+                "max_in_flight must be >= 1", {"max_in_flight": max_in_flight}
+            )
+        self._stages = list(stages)
+        self._stage_workers = list(stage_workers)
+        self._sink = sink
+        self._sink_workers = sink_workers
+        self._max_in_flight = max_in_flight
+
+    def run(
+        self,
+        source: Iterable[Any],
+        on_complete: Callable[[Any], None] | None = None,
+    ) -> int:
+        """パイプラインを実行し、完了した要素数を返す.
+
+        いずれかのステージで例外が発生した場合は全スレッドを停止し、
+        その例外を呼び出し元スレッドで再送出する。
+        """
+        stop_event = threading.Event()
+        in_flight = threading.BoundedSemaphore(self._max_in_flight)
+        completions: queue.Queue[Any] = queue.Queue()
+        queues: list[queue.Queue[Any]] = [
+            queue.Queue(maxsize=self._max_in_flight) for _ in range(len(self._stages) + 1)
+        ]
+
+        # 各層のスレッド数（ソース → ステージ → シンク）
+        layer_workers = [*self._stage_workers, self._sink_workers]
+        threads = [
+            threading.Thread(
+                target=self._run_source,
+                args=(
+                    source,
+                    queues[0],
+                    layer_workers[0],
+                    in_flight,
+                    stop_event,
+                    completions,
+                ),
+                name="pipeline-source",
+                daemon=True,
+            )
+        ]
+        for index, stage in enumerate(self._stages):
+            # 同じステージの最後に終了したスレッドが下流へ終端を送る
+            remaining = _Countdown(layer_workers[index])
+            for worker in range(layer_workers[index]):
+                threads.append(
+                    threading.Thread(
+                        target=self._run_stage,
+                        args=(
+                            stage,
+                            queues[index],
+                            queues[index + 1],
+                            layer_workers[index + 1],
+                            remaining,
+                            stop_event,
+                            completions,
+                        ),
+                        name=f"pipeline-stage-{index}-{worker}",
+                        daemon=True,
+                    )
+                )
+        for index in range(self._sink_workers):
+            threads.append(
+                threading.Thread(
+                    target=self._run_sink,
+                    args=(queues[-1], in_flight, stop_event, completions),
+                    name=f"pipeline-sink-{index}",
+                    daemon=True,
+                )
+            )
+
+        for thread in threads:
+            thread.start()
+
+        completed = 0
+        finished_sinks = 0
+        failure: BaseException | None = None
+        try:
+            while finished_sinks < self._sink_workers:
+                item = completions.get()
+                if isinstance(item, _StageFailure):
+                    failure = item.error
+                    break
+                if item is _END:
+                    finished_sinks += 1
+                    continue
+                completed += 1
+                if on_complete is not None:
+                    on_complete(item)
+        except BaseException as exc:
+            failure = exc
+        finally:
+            if failure is not None:
+                stop_event.set()
+            for thread in threads:
+                thread.join()
+
+        if failure is not None:
+            raise failure
+        return completed
+
+    def _run_source(
+        self,
+        source: Iterable[Any],
+        output: queue.Queue[Any],
+        downstream_ends: int,
+        in_flight: threading.BoundedSemaphore,
+        stop_event: threading.Event,
+        completions: queue.Queue[Any],
+    ) -> None:
+        try:
+            for item in source:
+                if not self._acquire(in_flight, stop_event):
+                    return
+                if not self._put(output, item, stop_event):
+                    return
+            for _ in range(downstream_ends):
+                if not self._put(output, _END, stop_event):
+                    return
+        except BaseException as exc:
+            completions.put(_StageFailure(exc))
+
+    def _run_stage(
+        self,
+        stage: Callable[[Any], Any],
+        input_queue: queue.Queue[Any],
+        output: queue.Queue[Any],
+        downstream_ends: int,
+        remaining: _Countdown,
+        stop_event: threading.Event,
+        completions: queue.Queue[Any],
+    ) -> None:
+        try:
+            while True:
+                item = self._get(input_queue, stop_event)
+                if item is _STOPPED:
+                    return
+                if item is _END:
+                    if not remaining.done():
+                        return
+                    for _ in range(downstream_ends):
+                        if not self._put(output, _END, stop_event):
+                            return
+                    return
+                if not self._put(output, stage(item), stop_event):
+                    return
+        except BaseException as exc:
+            completions.put(_StageFailure(exc))
+
+    def _run_sink(
+        self,
+        input_queue: queue.Queue[Any],
+        in_flight: threading.BoundedSemaphore,
+        stop_event: threading.Event,
+        completions: queue.Queue[Any],
+    ) -> None:
+        try:
+            while True:
+                item = self._get(input_queue, stop_event)
+                if item is _STOPPED:
+                    return
+                if item is _END:
+                    completions.put(_END)
+                    return
+                result = self._sink(item)
+                in_flight.release()
+                completions.put(result)
+        except BaseException as exc:
+            completions.put(_StageFailure(exc))
+
+    @staticmethod
+    def _acquire(
+        semaphore: threading.BoundedSemaphore, stop_event: threading.Event
+    ) -> bool:
+        while not stop_event.is_set():
+            if semaphore.acquire(timeout=POLL_INTERVAL_SECONDS):
+                return True
+        return False
+
+    @staticmethod
+    def _put(
+        target: queue.Queue[Any], item: Any, stop_event: threading.Event
+    ) -> bool:
+        while not stop_event.is_set():
+            try:
+                target.put(item, timeout=POLL_INTERVAL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(source: queue.Queue[Any], stop_event: threading.Event) -> Any:
+        while not stop_event.is_set():
+            try:
+                return source.get(timeout=POLL_INTERVAL_SECONDS)
+            except queue.Empty:
+                continue
+        return _STOPPED
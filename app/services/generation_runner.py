@@ -0,0 +1,242 @@
+"""Execution of instance tasks in a pipeline or a worker process pool."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from collections.abc import Callable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
+from typing import Any
+
+from app.core import ExecutionConfig, GenerationConfig, GenerationError
+
+from .generation_pipeline import GenerationPipeline
+from .instance_writer import EncodeStageResult, InstanceTask, InstanceWriter
+from .output_archive import ArchiveWriter
+
+logger = logging.getLogger(__name__)
+
+# 1チャンクあたりの最大インスタンス数（プロセス間通信の回数と負荷分散のバランス）
+MAX_CHUNK_SIZE = 64
+# ワーカー1プロセスあたりのチャンク数の目安
+CHUNKS_PER_WORKER = 8
+# ワーカー1プロセスあたりに同時投入するチャンク数の上限
+IN_FLIGHT_CHUNKS_PER_WORKER = 4
+
+# ワーカープロセスごとに initializer で設定される書き込み器
+_worker_writer: InstanceWriter | None = None
+# ワーカープロセス内で書き込みを計算と重ねるためのスレッドプール
+_worker_write_executor: ThreadPoolExecutor | None = None
+_worker_max_pending_writes = 1
+
+
+def _init_worker(
+    writer: InstanceWriter, write_workers: int, max_pending_writes: int
+) -> None:
+    global _worker_writer, _worker_write_executor, _worker_max_pending_writes
+    _worker_writer = writer
+    _worker_write_executor = ThreadPoolExecutor(
+        max_workers=write_workers, thread_name_prefix="worker-write"
+    )
+    _worker_max_pending_writes = max_pending_writes
+
+
+def _write_chunk(tasks: list[InstanceTask]) -> int:
+    """ワーカープロセスでタスクのチャンクを処理し、生成枚数を返す.
+
+    エンコードまではワーカーのメインスレッドで行い、書き込みは
+    スレッドプールへ渡して次のインスタンスの計算と重ねる。
+    未完了の書き込みは ``max_in_flight`` 件までに制限する。
+    """
+    if _worker_writer is None or _worker_write_executor is None:
+        raise GenerationError("Worker process is not initialized")
+
+    if _worker_writer.multiframe:
+        # 複数フレームはスラブを共有するため書き込みも同じスレッドで行う
+        for task in tasks:
+            _worker_writer.write(task)
+        return len(tasks)
+
+    pending: set[Future[InstanceTask]] = set()
+    try:
+        for task in tasks:
+            item = _worker_writer.encode_task(task)
+            if len(pending) >= _worker_max_pending_writes:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            # 圧縮（Deflated のみ）も書き込みスレッドで行い、エンコードと重ねる
+            pending.add(
+                _worker_write_executor.submit(_worker_writer.compress_and_write, item)
+            )
+        for future in pending:
+            future.result()
+    finally:
+        wait(pending)
+    return len(tasks)
+
+
+def _encode_chunk(tasks: list[InstanceTask]) -> list[EncodeStageResult]:
+    """ワーカープロセスでタスクのチャンクをエンコードし、バイト列を返す.
+
+    アーカイブ出力では書き込みを親プロセスで行うため、ワーカーはファイルを書かない。
+    """
+    if _worker_writer is None:
+        raise GenerationError("Worker process is not initialized")
+    return [_worker_writer.encode_and_compress(task) for task in tasks]
+
+
+def generate_parallel(
+    writer: InstanceWriter,
+    tasks: Iterator[InstanceTask],
+    workers: int,
+    execution: ExecutionConfig,
+    total_images: int,
+    progress_callback: Callable[[int, int], None] | None,
+    record: Callable[[InstanceTask], None],
+    archive: ArchiveWriter | None = None,
+) -> int:
+    """タスクをチャンク単位でプロセスプールへ投入し、完了順に進捗を通知する.
+
+    同時投入数を制限して、巨大ジョブでもタスク保持量を一定に保つ。
+    各ワーカー内の書き込みは ``execution.write_workers`` 本のスレッドで行う。
+    書き込み完了は ``record`` へチャンク単位で、全件の書き込みが完了してから通知する。
+
+    アーカイブ出力ではワーカーはエンコードまでを行い、完了したチャンクの
+    バイト列を親プロセスがアーカイブへ書き込む。
+    """
+    chunk_size = max(
+        1, min(MAX_CHUNK_SIZE, total_images // (workers * CHUNKS_PER_WORKER))
+    )
+    max_in_flight = workers * IN_FLIGHT_CHUNKS_PER_WORKER
+    logger.debug(
+        "Parallel generation: workers=%s chunk_size=%s", workers, chunk_size
+    )
+
+    archive_sink = writer.archive_sink(archive) if archive is not None else None
+    generated_count = 0
+
+    def on_complete(task: InstanceTask) -> None:
+        nonlocal generated_count
+        record(task)
+        generated_count += task.n_frames
+        if progress_callback is not None:
+            progress_callback(generated_count, total_images)
+
+    # Qt のスレッドを含むプロセスからも安全に起動できるよう spawn を使う
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(writer, execution.write_workers, execution.max_in_flight),
+    ) as executor:
+        in_flight: dict[Future[Any], list[InstanceTask]] = {}
+        try:
+            while True:
+                while len(in_flight) < max_in_flight:
+                    chunk = list(islice(tasks, chunk_size))
+                    if not chunk:
+                        break
+                    if archive_sink is not None:
+                        future = executor.submit(_encode_chunk, chunk)
+                    else:
+                        future = executor.submit(_write_chunk, chunk)
+                    in_flight[future] = chunk
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                _complete_chunks(done, in_flight, archive_sink, on_complete)
+        except BaseException:
+            for future in in_flight:
+                future.cancel()
+            raise
+    return generated_count
+
+
+def _complete_chunks(
+    done: set[Future[Any]],
+    in_flight: dict[Future[Any], list[InstanceTask]],
+    archive_sink: Callable[[EncodeStageResult], InstanceTask] | None,
+    on_complete: Callable[[InstanceTask], None],
+) -> None:
+    """完了したチャンクを ``in_flight`` から外して記録し、失敗があれば送出する.
+
+    失敗したチャンクがあっても、完了済みのチャンクは先に記録する。
+    """
+    failed = [future for future in done if future.exception() is not None]
+    for future in done:
+        chunk = in_flight.pop(future)
+        if future in failed:
+            continue
+        if archive_sink is not None:
+            for item in future.result():
+                archive_sink(item)
+        for task in chunk:
+            on_complete(task)
+    if failed:
+        failed[0].result()
+
+
+def generate_pipelined(
+    writer: InstanceWriter,
+    tasks: Iterator[InstanceTask],
+    config: GenerationConfig,
+    total_images: int,
+    progress_callback: Callable[[int, int], None] | None,
+    record: Callable[[InstanceTask], None],
+    archive: ArchiveWriter | None = None,
+) -> int:
+    """ピクセル → 構築 → エンコード → 書き込みのパイプラインで生成する.
+
+    書き込みはスレッドプールで行い、ディスク待ちを計算と重ねる。
+    アーカイブ出力では1スレッドでアーカイブへ順に書き込む。
+    """
+    execution = config.execution
+    logger.debug(
+        "Pipelined generation: write_workers=%s max_in_flight=%s fast_encoder=%s",
+        execution.write_workers,
+        execution.max_in_flight,
+        execution.fast_encoder,
+    )
+    stages = writer.stages
+    stage_workers = [1] * len(stages)
+    if writer.compress_stage is not None:
+        stages = [*stages, writer.compress_stage]
+        stage_workers.append(execution.compress_workers)
+    pipeline = GenerationPipeline(
+        stages=stages,
+        sink=writer.sink if archive is None else writer.archive_sink(archive),
+        sink_workers=(
+            writer.max_sink_workers(execution.write_workers)
+            if archive is None
+            else 1
+        ),
+        max_in_flight=execution.max_in_flight,
+        stage_workers=stage_workers,
+    )
+
+    generated_count = 0
+
+    def on_complete(task: InstanceTask) -> None:
+        nonlocal generated_count
+        record(task)
+        generated_count += task.n_frames
+        if progress_callback is not None:
+            progress_callback(generated_count, total_images)
+
+    pipeline.run(tasks, on_complete=on_complete)
+    logger.debug(
+        "Frame cache: hits=%s misses=%s cached_bytes=%s",
+        writer.frame_cache.hits,
+        writer.frame_cache.misses,
+        writer.frame_cache.current_bytes,
+    )
+    return generated_count
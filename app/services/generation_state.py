@@ -0,0 +1,317 @@
+"""UID and file assignment for resumed and incremental generation."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Container, Mapping
+from pathlib import Path
+from typing import NamedTuple
+
+from app.core import (
+    MANIFEST_VERSION,
+    ConfigurationError,
+    GenerationConfig,
+    GenerationJournalHeader,
+    GenerationManifest,
+    GenerationPlan,
+    PixelSpec,
+    SeriesManifest,
+    UIDContext,
+    UIDGenerator,
+    job_config_hash,
+    series_config_hash,
+    study_config_hash,
+)
+
+from .generation_journal import JOURNAL_FILENAME, GenerationJournal, JournalState
+from .generation_manifest import ManifestStore
+from .instance_writer import InstanceWriter
+
+logger = logging.getLogger(__name__)
+
+
+class FileLayout(NamedTuple):
+    """ジョブの出力ファイルの構成（シリーズごとの各ファイルのフレーム数と通し番号）."""
+
+    series_frames: list[list[int]]
+    first_file_sequences: list[int]
+    sequence_width: int
+
+    @classmethod
+    def from_plan(cls, plan: GenerationPlan, frames_per_file: int) -> FileLayout:
+        series_frames = [
+            file_frame_counts(series_plan.num_images, frames_per_file)
+            for series_plan in plan.series
+        ]
+        first_file_sequences = []
+        file_sequence = 1
+        for frames in series_frames:
+            first_file_sequences.append(file_sequence)
+            file_sequence += len(frames)
+        return cls(
+            series_frames=series_frames,
+            first_file_sequences=first_file_sequences,
+            sequence_width=sequence_width(file_sequence - 1),
+        )
+
+    @property
+    def total_files(self) -> int:
+        return sum(len(frames) for frames in self.series_frames)
+
+    def file_sequences(self, series_index: int) -> range:
+        """シリーズのファイル通し番号（1始まり）."""
+        first = self.first_file_sequences[series_index]
+        return range(first, first + len(self.series_frames[series_index]))
+
+    def series_filenames(self, writer: InstanceWriter) -> list[list[str]]:
+        return [
+            [writer.filename(sequence) for sequence in self.file_sequences(index)]
+            for index in range(len(self.series_frames))
+        ]
+
+    def pending_images(
+        self, skip_series: Container[int], completed: Container[int]
+    ) -> int:
+        """再利用するシリーズと書き込み完了したファイルを除いた生成枚数."""
+        return sum(
+            n_frames
+            for index, frames in enumerate(self.series_frames)
+            if index not in skip_series
+            for file_sequence, n_frames in zip(self.file_sequences(index), frames)
+            if file_sequence not in completed
+        )
+
+    def series_sop_uids(
+        self, reused: Mapping[int, SeriesManifest], written: Mapping[int, str]
+    ) -> list[list[str]]:
+        """シリーズごとのファイル順の SOP Instance UID."""
+        return [
+            [file.sop_instance_uid for file in reused[index].files]
+            if index in reused
+            else [written[sequence] for sequence in self.file_sequences(index)]
+            for index in range(len(self.series_frames))
+        ]
+
+
+class ConfigHashes(NamedTuple):
+    """差分再生成・再開の判定に使う実効設定のハッシュ."""
+
+    study_hash: str
+    series_hashes: list[str]
+    job_hash: str
+
+
+class UIDAssignment(NamedTuple):
+    """今回の生成で使う UID と、生成しないシリーズ・ファイル."""
+
+    uid_context: UIDContext
+    series_uids: list[str]
+    # 差分再生成で再利用するシリーズ（シリーズ番号 -> 前回のマニフェスト）
+    reused: dict[int, SeriesManifest]
+    # 再開時に書き込み完了しているファイル（ファイル通し番号 -> SOP Instance UID）
+    completed: dict[int, str]
+
+
+def file_frame_counts(num_images: int, frames_per_file: int) -> list[int]:
+    """シリーズ内の各ファイルに含めるフレーム数（単一フレームなら全て1）."""
+    return [
+        min(frames_per_file, num_images - start)
+        for start in range(0, num_images, frames_per_file)
+    ]
+
+
+def sequence_width(total_files: int) -> int:
+    """ファイル名の通し番号の桁数（最低4桁）."""
+    return max(4, len(str(total_files)))
+
+
+def config_hashes(
+    config: GenerationConfig,
+    plan: GenerationPlan,
+    pixel_spec: PixelSpec,
+    layout: FileLayout,
+) -> ConfigHashes:
+    study_hash = study_config_hash(
+        plan,
+        pixel_spec,
+        config.image_storage,
+        config.abnormal,
+        config.uid_method,
+        config.uid_custom_root,
+        config.uid_seed,
+    )
+    series_hashes = [
+        series_config_hash(study_hash, series_plan, first, layout.sequence_width)
+        for series_plan, first in zip(plan.series, layout.first_file_sequences)
+    ]
+    return ConfigHashes(study_hash, series_hashes, job_config_hash(series_hashes))
+
+
+def create_uid_context(uid_generator: UIDGenerator) -> UIDContext:
+    return UIDContext(
+        study_instance_uid=uid_generator.generate_study_uid(),
+        frame_of_reference_uid=uid_generator.generate_frame_of_reference_uid(),
+        implementation_class_uid=uid_generator.generate_implementation_class_uid(),
+        instance_creator_uid=uid_generator.generate_instance_creator_uid(),
+    )
+
+
+def load_journal(journal: GenerationJournal | None) -> JournalState | None:
+    """中断したジョブのジャーナルを読み込む（なければ最初から生成する）."""
+    if journal is None:
+        return None
+    resumed = journal.load()
+    if resumed is None:
+        logger.warning(
+            "Journal not found, starting from the beginning: path=%s", journal.path
+        )
+    return resumed
+
+
+def journal_header(
+    hashes: ConfigHashes, uids: UIDAssignment, pixel_spec: PixelSpec
+) -> GenerationJournalHeader:
+    """中断時に同じ UID で再開するためにジャーナルの先頭へ記録する内容."""
+    return GenerationJournalHeader(
+        version=MANIFEST_VERSION,
+        job_hash=hashes.job_hash,
+        uid_context=uids.uid_context,
+        noise_seed=getattr(pixel_spec, "seed", None),
+        series_instance_uids=tuple(uids.series_uids),
+    )
+
+
+def prepare_resume(
+    resumed: JournalState, hashes: ConfigHashes, output_dir: Path
+) -> UIDAssignment:
+    """中断したジョブのジャーナルから UID と書き込み完了したファイルを引き継ぐ."""
+    if resumed.header.job_hash != hashes.job_hash:
+        raise ConfigurationError(
+            "Job configuration changed since the interrupted run",
+            {"journal": str(output_dir / JOURNAL_FILENAME)},
+        )
+    return UIDAssignment(
+        uid_context=resumed.header.uid_context,
+        series_uids=list(resumed.header.series_instance_uids),
+        reused={},
+        completed=resumed.completed,
+    )
+
+
+def prepare_incremental(
+    manifest_store: ManifestStore | None,
+    previous: GenerationManifest | None,
+    hashes: ConfigHashes,
+    uid_generator: UIDGenerator,
+) -> UIDAssignment:
+    """前回から変わっていないシリーズを再利用し、それ以外の UID を採番する.
+
+    差分再生成でない場合や、スタディ単位の設定が変わった場合は全シリーズを採番する。
+    """
+    reused: dict[int, SeriesManifest] = {}
+    if (
+        manifest_store is not None
+        and previous is not None
+        and previous.study_hash == hashes.study_hash
+    ):
+        uid_context = previous.uid_context
+        reused = {
+            index: entry
+            for index, (entry, config_hash) in enumerate(
+                zip(previous.series, hashes.series_hashes)
+            )
+            if entry.config_hash == config_hash and manifest_store.is_intact(entry)
+        }
+    else:
+        uid_context = create_uid_context(uid_generator)
+    series_uids = [
+        reused[index].series_instance_uid
+        if index in reused
+        else uid_generator.generate_series_uid(series_index=index)
+        for index in range(len(hashes.series_hashes))
+    ]
+    return UIDAssignment(uid_context, series_uids, reused, {})
+
+
+def keep_existing_files(
+    uids: UIDAssignment, writer: InstanceWriter, layout: FileLayout, output_dir: Path
+) -> UIDAssignment:
+    """ジャーナル記録後に削除されたファイルは再生成の対象に戻す."""
+    if not uids.completed:
+        return uids
+    completed = {
+        file_sequence: sop_uid
+        for file_sequence, sop_uid in uids.completed.items()
+        if (output_dir / writer.filename(file_sequence)).exists()
+    }
+    logger.info(
+        "Resuming generation: completed=%s remaining=%s",
+        len(completed),
+        layout.total_files - len(completed),
+    )
+    return uids._replace(completed=completed)
+
+
+def start_incremental(
+    manifest_store: ManifestStore,
+    previous: GenerationManifest | None,
+    hashes: ConfigHashes,
+    uids: UIDAssignment,
+    pixel_spec: PixelSpec,
+    series_filenames: list[list[str]],
+) -> None:
+    """不要になったファイルを削除し、再利用するシリーズのみのマニフェストを保存する.
+
+    生成途中で中断した場合に、再生成対象のシリーズを再利用しないよう先に記録する。
+    """
+    logger.info(
+        "Incremental generation: reused_series=%s regenerated_series=%s",
+        len(uids.reused),
+        len(series_filenames) - len(uids.reused),
+    )
+    if previous is not None:
+        removed = manifest_store.remove_stale(
+            previous, keep={name for names in series_filenames for name in names}
+        )
+        if removed:
+            logger.info("Stale files removed: count=%s", removed)
+    series = tuple(uids.reused[index] for index in sorted(uids.reused))
+    manifest_store.save(_manifest(hashes, uids, pixel_spec, series))
+
+
+def save_manifest(
+    manifest_store: ManifestStore,
+    hashes: ConfigHashes,
+    uids: UIDAssignment,
+    pixel_spec: PixelSpec,
+    series_filenames: list[list[str]],
+    series_sop_uids: list[list[str]],
+) -> None:
+    """全シリーズのファイルと UID を記録したマニフェストを保存する."""
+    series = tuple(
+        uids.reused.get(index)
+        or SeriesManifest(
+            config_hash=hashes.series_hashes[index],
+            series_instance_uid=uids.series_uids[index],
+            files=manifest_store.describe(
+                zip(series_filenames[index], series_sop_uids[index])
+            ),
+        )
+        for index in range(len(series_filenames))
+    )
+    manifest_store.save(_manifest(hashes, uids, pixel_spec, series))
+
+
+def _manifest(
+    hashes: ConfigHashes,
+    uids: UIDAssignment,
+    pixel_spec: PixelSpec,
+    series: tuple[SeriesManifest, ...],
+) -> GenerationManifest:
+    return GenerationManifest(
+        version=MANIFEST_VERSION,
+        study_hash=hashes.study_hash,
+        uid_context=uids.uid_context,
+        noise_seed=getattr(pixel_spec, "seed", None),
+        series=series,
+    )
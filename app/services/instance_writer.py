@@ -0,0 +1,512 @@
+"""Instance generation and writing shared by the pipeline and worker processes."""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, BinaryIO, NamedTuple
+
+import numpy as np
+from pydicom.dataset import Dataset
+
+from app.core import (
+    DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN,
+    ENCAPSULATED_PIXEL_DATA_END,
+    ENHANCED_CT_IMAGE_STORAGE,
+    RLE_LOSSLESS,
+    DICOMBuilder,
+    DICOMBuildError,
+    ExecutionConfig,
+    FileMetaBuilder,
+    FileWriteError,
+    FrameCache,
+    FrameKey,
+    GenerationError,
+    GenerationPlan,
+    ImageStorageConfig,
+    Part10Template,
+    PixelGenerator,
+    PixelSpec,
+    PixelSpecCTRealistic,
+    SpatialCalculator,
+    UIDContext,
+    deflate_compressor,
+    deflate_part10,
+    encapsulate_frames,
+    encapsulated_item,
+    encode_part10,
+    encode_streaming_header,
+    part10_meta_length,
+    rle_encode_frame,
+)
+
+from .output_archive import ArchiveWriter
+
+# 全スライスで同一のフレームになる（キャッシュ可能な）CT Realistic パターン
+CACHEABLE_CT_PATTERNS = frozenset({"gradient", "circle"})
+BYTES_PER_MEGABYTE = 1024 * 1024
+
+# ボリューム生成で一度に作るスライス数
+# ワーカーのチャンク境界をまたいだ先読み（無駄な生成）を小さく抑える大きさにする
+VOLUME_SLAB_SLICES = 16
+# 書き込み中のインスタンスの一時ファイル名の接尾辞（"." + 出力ファイル名 + 接尾辞）
+TEMP_FILE_SUFFIX = ".tmp"
+
+
+class InstanceTask(NamedTuple):
+    """1インスタンス（1ファイル）分の生成タスク（UIDは親プロセスで採番済み）.
+
+    複数フレームの場合は ``image_index`` から ``n_frames`` 枚のスライスを含む。
+    """
+
+    file_sequence: int
+    series_index: int
+    image_index: int
+    series_instance_uid: str
+    sop_instance_uid: str
+    n_frames: int = 1
+
+
+class PixelStageResult(NamedTuple):
+    task: InstanceTask
+    pixel_data: np.ndarray
+    bits_stored: int
+    pixel_bytes: bytes | None = None
+
+
+class BuildStageResult(NamedTuple):
+    task: InstanceTask
+    dataset: Dataset
+
+
+class EncodeStageResult(NamedTuple):
+    task: InstanceTask
+    data: bytes
+
+
+class _DeflatingWriter:
+    """書き込んだバイト列を raw deflate で圧縮しながらファイルへ書き込む."""
+
+    def __init__(self, file: BinaryIO, level: int) -> None:
+        self._file = file
+        self._compressor = deflate_compressor(level)
+        self._length = 0
+
+    def write(self, data: bytes | memoryview) -> None:
+        self._emit(self._compressor.compress(data))
+
+    def finish(self) -> None:
+        """圧縮を終え、圧縮後のデータセットを偶数長に揃える."""
+        self._emit(self._compressor.flush())
+        if self._length % 2:
+            self._file.write(b"\x00")
+
+    def _emit(self, data: bytes) -> None:
+        self._file.write(data)
+        self._length += len(data)
+
+
+class InstanceWriter:
+    """解決済みの生成計画から1インスタンスを生成・書き込みする.
+
+    ワーカープロセスへ pickle で受け渡すため、保持するのは
+    生成計画・UID・画素設定と Core 部品のみとする。
+    フレームキャッシュはプロセスごとに独立して蓄積される。
+    """
+
+    def __init__(
+        self,
+        plan: GenerationPlan,
+        uid_context: UIDContext,
+        pixel_spec: PixelSpec,
+        execution: ExecutionConfig,
+        output_dir: Path,
+        sequence_width: int,
+        image_storage: ImageStorageConfig | None = None,
+    ) -> None:
+        self._plan = plan
+        self._uid_context = uid_context
+        self._pixel_spec = pixel_spec
+        image_storage = image_storage or ImageStorageConfig()
+        self.multiframe = image_storage.mode == "enhanced_multiframe"
+        self._frames_per_file = image_storage.frames_per_file
+        self._output_dir = output_dir
+        self._sequence_width = sequence_width
+        self._dicom_builder = DICOMBuilder()
+        self._pixel_generator = PixelGenerator()
+        self._file_meta_builder = FileMetaBuilder()
+        self.frame_cache = FrameCache(
+            max_bytes=execution.frame_cache_mb * BYTES_PER_MEGABYTE
+        )
+        self._fast_encoder = execution.fast_encoder
+        # RLE Lossless ではフレームを圧縮し、同一フレームは圧縮済みのままキャッシュする
+        self._rle = plan.transfer_syntax_uid == RLE_LOSSLESS
+        # Deflated ではエンコード後のデータセット部分を圧縮ステージで圧縮する
+        self._deflate_level = (
+            plan.deflate_level
+            if plan.transfer_syntax_uid == DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN
+            else None
+        )
+        # シリーズごとの Part 10 テンプレート（プロセスごとに最初のインスタンスで作成）
+        self._part10_templates: dict[int, Part10Template] = {}
+        # シリーズごとに生成済みのスラブ（先頭スライス番号, (N, H, W) 配列）
+        self._slabs: dict[int, tuple[int, np.ndarray]] = {}
+        self._spatial_calculators = [
+            SpatialCalculator(
+                slice_thickness=series_plan.slice_thickness,
+                slice_spacing=series_plan.slice_spacing,
+                start_z=series_plan.start_z,
+            )
+            for series_plan in plan.series
+        ]
+        # 各シリーズ先頭スライスのジョブ内通し番号（0始まり、保存形式に依存しない）
+        self._image_offsets: list[int] = []
+        offset = 0
+        for series_plan in plan.series:
+            self._image_offsets.append(offset)
+            offset += series_plan.num_images
+
+    @property
+    def stages(self) -> list[Callable[[Any], Any]]:
+        """書き込み前までのステージ（高速エンコーダ有効時は構築とエンコードを統合）."""
+        if self.multiframe:
+            return [self.encode_multiframe_header]
+        if self._fast_encoder:
+            return [self.generate_pixels, self.encode_fast]
+        return [self.generate_pixels, self.build, self.encode]
+
+    @property
+    def compress_stage(
+        self,
+    ) -> Callable[[EncodeStageResult], EncodeStageResult] | None:
+        """エンコード後の圧縮ステージ（Deflated 転送構文の単一フレームのみ）.
+
+        zlib は圧縮中に GIL を解放するため、複数スレッドで並列に実行できる。
+        複数フレームは書き込みながら圧縮する。
+        """
+        if self._deflate_level is None or self.multiframe:
+            return None
+        return self.deflate
+
+    @property
+    def sink(self) -> Callable[[EncodeStageResult], InstanceTask]:
+        """書き込みステージ.
+
+        複数フレームはフレームを生成しながら書き込むため、スラブを共有する
+        書き込みステージは1スレッドで動かす（``max_sink_workers``）。
+        """
+        return self.write_multiframe if self.multiframe else self.write_encoded
+
+    def max_sink_workers(self, requested: int) -> int:
+        return 1 if self.multiframe else requested
+
+    def write(self, task: InstanceTask) -> Path:
+        """タスク1件分のDICOMファイルを生成して書き込む."""
+        self.compress_and_write(self.encode_task(task))
+        return self.filepath(task)
+
+    def compress_and_write(self, item: EncodeStageResult) -> InstanceTask:
+        """圧縮ステージ（ある場合）と書き込みステージを続けて実行する."""
+        compress_stage = self.compress_stage
+        if compress_stage is not None:
+            item = compress_stage(item)
+        return self.sink(item)
+
+    def encode_and_compress(self, task: InstanceTask) -> EncodeStageResult:
+        """タスク1件分を書き込み前の全ステージ（圧縮を含む）に通す."""
+        item = self.encode_task(task)
+        compress_stage = self.compress_stage
+        return compress_stage(item) if compress_stage is not None else item
+
+    def encode_task(self, task: InstanceTask) -> EncodeStageResult:
+        """タスク1件分を圧縮前までの全ステージに通す."""
+        item: Any = task
+        for stage in self.stages:
+            item = stage(item)
+        return item
+
+    def generate_pixels(self, task: InstanceTask) -> PixelStageResult:
+        """ピクセルステージ: タスクのピクセルデータを生成する."""
+        pixel_spec = self._pixel_spec
+        if isinstance(pixel_spec, PixelSpecCTRealistic):
+            if pixel_spec.pattern in CACHEABLE_CT_PATTERNS:
+                frame = self.frame_cache.get_or_create(
+                    FrameKey(
+                        width=pixel_spec.width,
+                        height=pixel_spec.height,
+                        pattern=pixel_spec.pattern,
+                        bits_stored=pixel_spec.bits_stored,
+                        dtype="int16",
+                        transfer_syntax_uid=RLE_LOSSLESS if self._rle else None,
+                    ),
+                    lambda: self._generate_ct_realistic(pixel_spec),
+                    encoder=rle_encode_frame if self._rle else None,
+                )
+                return PixelStageResult(
+                    task, frame.array, pixel_spec.bits_stored, frame.data
+                )
+            return PixelStageResult(
+                task, self._ct_slice(task, pixel_spec), pixel_spec.bits_stored
+            )
+
+        pixels = self._pixel_generator.generate_simple_text(
+            sop_instance_uid=task.sop_instance_uid,
+            width=pixel_spec.width,
+            height=pixel_spec.height,
+            background_color=pixel_spec.background_color,
+            text_color=pixel_spec.text_color,
+            font_size=pixel_spec.font_size,
+        )
+        return PixelStageResult(task, pixels, 8)
+
+    def build(self, item: PixelStageResult) -> BuildStageResult:
+        """構築ステージ: File Meta と Dataset を構築する."""
+        plan = self._plan
+        task = item.task
+        sop_uid = task.sop_instance_uid
+
+        file_meta = self._file_meta_builder.build(
+            sop_class_uid=plan.sop_class_uid,
+            sop_instance_uid=sop_uid,
+            transfer_syntax_uid=plan.transfer_syntax_uid,
+            implementation_class_uid=self._uid_context.implementation_class_uid,
+            implementation_version_name=plan.implementation_version_name,
+        )
+        spatial = self._spatial_calculators[task.series_index].position(task.image_index)
+
+        dataset = self._dicom_builder.build_ct_image_from_plan(
+            plan=plan,
+            series_index=task.series_index,
+            uid_context=self._uid_context,
+            spatial=spatial,
+            pixel_data=item.pixel_data,
+            file_meta=file_meta,
+            sop_instance_uid=sop_uid,
+            series_instance_uid=task.series_instance_uid,
+            bits_stored=item.bits_stored,
+            pixel_bytes=item.pixel_bytes,
+        )
+        return BuildStageResult(task, dataset)
+
+    def encode(self, item: BuildStageResult) -> EncodeStageResult:
+        """エンコードステージ: Dataset を DICOM File Format のバイト列にする.
+
+        Deflated 転送構文ではデータセット部分を圧縮せずに返す（``deflate`` で圧縮）。
+        """
+        try:
+            data = encode_part10(item.dataset)
+        except DICOMBuildError as exc:
+            raise FileWriteError(str(self.filepath(item.task)), str(exc)) from exc
+        return EncodeStageResult(item.task, data)
+
+    def deflate(self, item: EncodeStageResult) -> EncodeStageResult:
+        """圧縮ステージ: データセット部分を deflate 圧縮する."""
+        if self._deflate_level is None:
+            return item
+        return EncodeStageResult(
+            item.task, deflate_part10(item.data, self._deflate_level)
+        )
+
+    def encode_fast(self, item: PixelStageResult) -> EncodeStageResult:
+        """高速エンコードステージ: シリーズ共通のバイト列に可変要素だけを挿入する.
+
+        シリーズの最初のインスタンスは通常の構築で Dataset を作り、
+        そのエンコード結果をテンプレートとして以降のインスタンスに再利用する。
+        """
+        task = item.task
+        template = self._part10_templates.get(task.series_index)
+        if template is None:
+            template = Part10Template.from_dataset(self.build(item).dataset)
+            self._part10_templates[task.series_index] = template
+
+        spatial = self._spatial_calculators[task.series_index].position(task.image_index)
+        pixel_bytes = self._frame_bytes(item)
+        if self._rle:
+            pixel_bytes = encapsulate_frames([pixel_bytes])
+        data = template.encode(
+            sop_instance_uid=task.sop_instance_uid,
+            instance_number=spatial.instance_number,
+            image_position_patient=spatial.image_position_patient,
+            slice_location=spatial.slice_location,
+            pixel_bytes=pixel_bytes,
+        )
+        return EncodeStageResult(task, data)
+
+    def write_encoded(self, item: EncodeStageResult) -> InstanceTask:
+        """書き込みステージ: エンコード済みバイト列をファイルに書き込み、タスクを返す.
+
+        一時ファイルに書き込んでから置き換えるため、中断しても
+        出力ファイル名で書きかけのファイルが残ることはない。
+        """
+        filepath = self.filepath(item.task)
+        tmp_path = filepath.with_name(f".{filepath.name}{TEMP_FILE_SUFFIX}")
+        try:
+            tmp_path.write_bytes(item.data)
+            os.replace(tmp_path, filepath)
+        except OSError as exc:
+            raise FileWriteError(str(filepath), str(exc)) from exc
+        return item.task
+
+    def encode_multiframe_header(self, task: InstanceTask) -> EncodeStageResult:
+        """複数フレームのヘッダステージ: Pixel Data の値を除く Part 10 バイト列を作る."""
+        plan = self._plan
+        pixel_spec = self._pixel_spec
+        if not isinstance(pixel_spec, PixelSpecCTRealistic):
+            raise GenerationError(
+                "Enhanced CT output requires ct_realistic pixel mode",
+                {"mode": pixel_spec.mode},
+            )
+        file_meta = self._file_meta_builder.build(
+            sop_class_uid=ENHANCED_CT_IMAGE_STORAGE,
+            sop_instance_uid=task.sop_instance_uid,
+            transfer_syntax_uid=plan.transfer_syntax_uid,
+            implementation_class_uid=self._uid_context.implementation_class_uid,
+            implementation_version_name=plan.implementation_version_name,
+        )
+        frames = self._spatial_calculators[task.series_index].calculate_batch(
+            task.image_index, task.n_frames
+        )
+        dataset = self._dicom_builder.build_enhanced_ct_from_plan(
+            plan=plan,
+            series_index=task.series_index,
+            uid_context=self._uid_context,
+            frame_positions=[(0.0, 0.0, z) for z in frames.z_positions.tolist()],
+            file_meta=file_meta,
+            sop_instance_uid=task.sop_instance_uid,
+            series_instance_uid=task.series_instance_uid,
+            instance_number=task.image_index // self._frames_per_file + 1,
+            rows=pixel_spec.height,
+            columns=pixel_spec.width,
+            bits_stored=pixel_spec.bits_stored,
+            first_in_stack_position=int(frames.instance_numbers[0]),
+        )
+        frame_length = pixel_spec.width * pixel_spec.height * 2
+        return EncodeStageResult(
+            task, encode_streaming_header(dataset, frame_length * task.n_frames)
+        )
+
+    def write_multiframe(self, item: EncodeStageResult) -> InstanceTask:
+        """複数フレームの書き込みステージ: ヘッダに続けてフレームを順に書き込む.
+
+        フレームはスラブ単位で生成しながら書き込むため、オブジェクト全体の
+        ピクセルデータをメモリ上に組み立てない。
+        """
+        task = item.task
+        filepath = self.filepath(task)
+        tmp_path = filepath.with_name(f".{filepath.name}{TEMP_FILE_SUFFIX}")
+        try:
+            with tmp_path.open("wb") as file:
+                self._stream_multiframe(item, file)
+            os.replace(tmp_path, filepath)
+        except OSError as exc:
+            raise FileWriteError(str(filepath), str(exc)) from exc
+        return task
+
+    def archive_sink(
+        self, archive: ArchiveWriter
+    ) -> Callable[[EncodeStageResult], InstanceTask]:
+        """アーカイブへの書き込みステージ（出力ファイル名をメンバー名とする）.
+
+        複数フレームはファイルと同様にフレームを生成しながらメンバーへ書き込む。
+        """
+
+        def write_to_archive(item: EncodeStageResult) -> InstanceTask:
+            name = self.filename(item.task.file_sequence)
+            if self.multiframe:
+                with archive.open(name) as member:
+                    self._stream_multiframe(item, member)
+            else:
+                archive.add(name, item.data)
+            return item.task
+
+        return write_to_archive
+
+    def _stream_multiframe(self, item: EncodeStageResult, file: Any) -> None:
+        """ヘッダに続けてフレームを生成しながら ``file`` へ書き込む."""
+        task = item.task
+        output: BinaryIO | _DeflatingWriter = file
+        if self._deflate_level is None:
+            file.write(item.data)
+        else:
+            meta_length = part10_meta_length(item.data)
+            file.write(item.data[:meta_length])
+            output = _DeflatingWriter(file, self._deflate_level)
+            output.write(item.data[meta_length:])
+        for offset in range(task.n_frames):
+            frame = self.generate_pixels(
+                task._replace(image_index=task.image_index + offset, n_frames=1)
+            )
+            if self._rle:
+                output.write(encapsulated_item(self._frame_bytes(frame)))
+            elif frame.pixel_bytes is not None:
+                output.write(frame.pixel_bytes)
+            else:
+                output.write(np.ascontiguousarray(frame.pixel_data).data)
+        if self._rle:
+            output.write(ENCAPSULATED_PIXEL_DATA_END)
+        if isinstance(output, _DeflatingWriter):
+            output.finish()
+
+    def _frame_bytes(self, item: PixelStageResult) -> bytes:
+        """転送構文でエンコードした1フレーム分のバイト列（RLE Lossless では圧縮済み）."""
+        if item.pixel_bytes is not None:
+            return item.pixel_bytes
+        if self._rle:
+            return rle_encode_frame(item.pixel_data)
+        return item.pixel_data.tobytes()
+
+    def filepath(self, task: InstanceTask) -> Path:
+        return self._output_dir / self.filename(task.file_sequence)
+
+    def filename(self, file_sequence: int) -> str:
+        """ファイル通し番号（1始まり）に対応する出力ファイル名."""
+        return (
+            f"{self._plan.filename_prefix}_"
+            f"{file_sequence:0{self._sequence_width}d}.dcm"
+        )
+
+    def _ct_slice(
+        self, task: InstanceTask, pixel_spec: PixelSpecCTRealistic
+    ) -> np.ndarray:
+        """シリーズのスラブからタスクのスライスをビューとして取り出す.
+
+        スラブに含まれないスライスが要求された場合は、そのスライスから
+        ``VOLUME_SLAB_SLICES`` 枚分（シリーズ末尾まで）を新たに生成する。
+        """
+        cached = self._slabs.get(task.series_index)
+        if cached is not None:
+            start, slab = cached
+            offset = task.image_index - start
+            if 0 <= offset < len(slab):
+                return slab[offset]
+
+        series_plan = self._plan.series[task.series_index]
+        calculator = self._spatial_calculators[task.series_index]
+        n_slices = min(VOLUME_SLAB_SLICES, series_plan.num_images - task.image_index)
+        slab = self._pixel_generator.generate_ct_volume(
+            n_slices=n_slices,
+            width=pixel_spec.width,
+            height=pixel_spec.height,
+            pattern=pixel_spec.pattern,
+            bits_stored=pixel_spec.bits_stored,
+            z_positions=calculator.z_positions(task.image_index, n_slices),
+            # ファントムはシリーズの撮像範囲の中央に置く
+            center_z=series_plan.start_z
+            + series_plan.slice_spacing * (series_plan.num_images - 1) / 2.0,
+            pixel_spacing=calculator.position(task.image_index).pixel_spacing[0],
+            seed=pixel_spec.seed,
+            # ノイズはジョブ内のスライス通し番号で決まるため、
+            # ワーカー・スラブの分割や保存形式に依存しない
+            first_slice=self._image_offsets[task.series_index] + task.image_index,
+        )
+        self._slabs[task.series_index] = (task.image_index, slab)
+        return slab[0]
+
+    def _generate_ct_realistic(self, pixel_spec: PixelSpecCTRealistic) -> np.ndarray:
+        return self._pixel_generator.generate_ct_realistic(
+            width=pixel_spec.width,
+            height=pixel_spec.height,
+            pattern=pixel_spec.pattern,
+            bits_stored=pixel_spec.bits_stored,
+        )
@@ -0,0 +1,205 @@
+"""Streaming tar / zip archive writers for generated DICOM files."""
+
+from __future__ import annotations
+
+import os
+import tarfile
+import time
+import zipfile
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager
+from pathlib import Path
+from typing import BinaryIO, Literal
+
+from app.core import ConfigurationError, FileWriteError
+
+ArchiveFormat = Literal["tar", "zip"]
+
+ARCHIVE_SUFFIXES: dict[str, str] = {"tar": ".tar", "zip": ".zip"}
+
+# 書き込み中のアーカイブは一時ファイル名で作成し、完了時に置き換える
+_TEMP_FILE_SUFFIX = ".tmp"
+_MEMBER_MODE = 0o644
+
+
+class _MemberWriter:
+    """メンバーの内容を書き込みながら長さを数えるラッパー."""
+
+    def __init__(self, file: BinaryIO) -> None:
+        self._file = file
+        self.size = 0
+
+    def write(self, data: bytes | memoryview) -> int:
+        written = self._file.write(data)
+        self.size += len(data)
+        return written
+
+
+class ArchiveWriter(ABC):
+    """生成したファイルを1つのアーカイブへ順に書き込む.
+
+    一時ファイルに書き込み、``commit`` でアーカイブ名に置き換える。
+    例外で抜けた場合は一時ファイルを削除するため、書きかけのアーカイブは残らない。
+    スレッドセーフではないため、書き込みは1スレッドから行うこと。
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._tmp_path = path.with_name(f".{path.name}{_TEMP_FILE_SUFFIX}")
+        # 全メンバーに同じ更新日時を設定する
+        self._mtime = time.time()
+
+    def add(self, name: str, data: bytes) -> None:
+        """エンコード済みのバイト列を1メンバーとして追加する."""
+        with self.open(name) as member:
+            member.write(data)
+
+    @abstractmethod
+    def open(self, name: str) -> AbstractContextManager[BinaryIO | _MemberWriter]:
+        """長さを事前に決めずに書き込むメンバーを開く."""
+
+    def commit(self) -> Path:
+        """アーカイブを閉じてアーカイブ名に置き換える."""
+        try:
+            self._close()
+            os.replace(self._tmp_path, self.path)
+        except OSError as exc:
+            raise FileWriteError(str(self.path), str(exc)) from exc
+        return self.path
+
+    def abort(self) -> None:
+        """アーカイブを閉じて一時ファイルを削除する."""
+        try:
+            self._close()
+        except OSError:
+            pass
+        self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> ArchiveWriter:
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, traceback: object) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    @abstractmethod
+    def _close(self) -> None:
+        """アーカイブのファイルを閉じる."""
+
+
+class TarArchiveWriter(ArchiveWriter):
+    """GNU tar 形式のアーカイブライター.
+
+    長さが事前に分からないメンバーは長さ0のヘッダを書いてから内容を書き込み、
+    書き終えた後にヘッダを正しい長さで書き直す。ヘッダの長さは名前だけで
+    決まるため、書き直しで後続の位置はずれない。
+    """
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        try:
+            self._file: BinaryIO = self._tmp_path.open("wb")
+        except OSError as exc:
+            raise FileWriteError(str(self._tmp_path), str(exc)) from exc
+
+    def add(self, name: str, data: bytes) -> None:
+        try:
+            self._file.write(self._header(name, len(data)))
+            self._file.write(data)
+            self._pad(len(data))
+        except OSError as exc:
+            raise FileWriteError(f"{self.path}:{name}", str(exc)) from exc
+
+    @contextmanager
+    def open(self, name: str) -> Iterator[_MemberWriter]:
+        try:
+            header_offset = self._file.tell()
+            self._file.write(self._header(name, 0))
+            member = _MemberWriter(self._file)
+            yield member
+            end_offset = self._file.tell()
+            self._file.seek(header_offset)
+            self._file.write(self._header(name, member.size))
+            self._file.seek(end_offset)
+            self._pad(member.size)
+        except OSError as exc:
+            raise FileWriteError(f"{self.path}:{name}", str(exc)) from exc
+
+    def _header(self, name: str, size: int) -> bytes:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(self._mtime)
+        info.mode = _MEMBER_MODE
+        return info.tobuf(tarfile.GNU_FORMAT, "utf-8", "surrogateescape")
+
+    def _pad(self, size: int) -> None:
+        remainder = size % tarfile.BLOCKSIZE
+        if remainder:
+            self._file.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+
+    def _close(self) -> None:
+        if self._file.closed:
+            return
+        # アーカイブ終端の2ブロックを書き、レコード長の倍数に揃える
+        self._file.write(tarfile.NUL * (tarfile.BLOCKSIZE * 2))
+        remainder = self._file.tell() % tarfile.RECORDSIZE
+        if remainder:
+            self._file.write(tarfile.NUL * (tarfile.RECORDSIZE - remainder))
+        self._file.close()
+
+
+class ZipArchiveWriter(ArchiveWriter):
+    """無圧縮（stored）の zip アーカイブライター.
+
+    DICOM 側で圧縮する転送構文もあるため zip では圧縮しない。
+    長さが事前に分からないメンバーは ZIP64 のデータ記述子で長さを記録する。
+    """
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        try:
+            self._zip = zipfile.ZipFile(
+                self._tmp_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True
+            )
+        except OSError as exc:
+            raise FileWriteError(str(self._tmp_path), str(exc)) from exc
+        self._closed = False
+
+    def add(self, name: str, data: bytes) -> None:
+        try:
+            self._zip.writestr(self._info(name), data)
+        except OSError as exc:
+            raise FileWriteError(f"{self.path}:{name}", str(exc)) from exc
+
+    @contextmanager
+    def open(self, name: str) -> Iterator[BinaryIO]:
+        try:
+            with self._zip.open(self._info(name), "w", force_zip64=True) as member:
+                yield member
+        except OSError as exc:
+            raise FileWriteError(f"{self.path}:{name}", str(exc)) from exc
+
+    def _info(self, name: str) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(name, date_time=time.localtime(self._mtime)[:6])
+        info.external_attr = _MEMBER_MODE << 16
+        return info
+
+    def _close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._zip.close()
+
+
+def open_archive(path: Path, archive_format: str) -> ArchiveWriter:
+    """形式に対応するアーカイブライターを開く."""
+    if archive_format == "tar":
+        return TarArchiveWriter(path)
+    if archive_format == "zip":
+        return ZipArchiveWriter(path)
+    raise ConfigurationError(
+        "Unsupported archive format", {"output_format": archive_format}
+    )
@@ -0,0 +1,249 @@
+"""SQLite-backed patient master for large synthetic populations."""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import closing
+from pathlib import Path
+from typing import Any, overload
+
+from pydantic import ValidationError
+
+from app.core.exceptions import (
+    FileReadError,
+    FileWriteError,
+    PatientDataInvalidError,
+    PatientNotFoundError,
+)
+from app.core.models import Patient, PatientFilter
+
+logger = logging.getLogger(__name__)
+
+# 患者マスターを SQLite で持つ場合の拡張子
+PATIENT_DATABASE_SUFFIXES = frozenset({".sqlite", ".sqlite3", ".db"})
+# 読み出しで1回に取得する行数
+_BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE patients (
+    patient_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL UNIQUE,
+    sex TEXT NOT NULL,
+    birth_date TEXT NOT NULL,
+    record TEXT NOT NULL
+)
+"""
+# 行の挿入後に作る（挿入中に索引を更新しない）
+_INDEXES = (
+    "CREATE INDEX patients_sex_birth_date ON patients (sex, birth_date)",
+    "CREATE INDEX patients_birth_date ON patients (birth_date)",
+)
+
+
+class SQLitePatientRepository(Sequence[Patient]):
+    """SQLite ファイルに取り込んだ患者マスター.
+
+    ``PatientRepository`` と同じ操作を持ち、患者IDの検索・条件での絞り込み・
+    範囲の取得をファイルの索引で行うため、全患者をメモリに読み込まない。
+    並びは取り込み元の患者マスターの順とする。接続はスレッドごとに読み取り専用で開く。
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._length = self._query_one("SELECT COUNT(*) FROM patients", ())
+
+    def get(self, patient_id: str) -> Patient:
+        """患者IDの患者を返す（存在しない場合は ``PatientNotFoundError``）."""
+        rows = self._query(
+            "SELECT record FROM patients WHERE patient_id = ?", (patient_id,)
+        )
+        for (record,) in rows:
+            return self._validate(record)
+        raise PatientNotFoundError(patient_id)
+
+    def ids(self) -> list[str]:
+        """患者IDを患者マスターの順で返す."""
+        rows = self._query("SELECT patient_id FROM patients ORDER BY position", ())
+        return [patient_id for (patient_id,) in rows]
+
+    def iter_patients(
+        self, patient_filter: PatientFilter | None = None
+    ) -> Iterator[Patient]:
+        """条件に合う患者を患者マスターの順に少しずつ読み出して返す."""
+        where, parameters = _where_clause(patient_filter)
+        rows = self._query(
+            f"SELECT record FROM patients{where} ORDER BY position", parameters
+        )
+        for (record,) in rows:
+            yield self._validate(record)
+
+    def page(
+        self, offset: int, limit: int, patient_filter: PatientFilter | None = None
+    ) -> list[Patient]:
+        """条件に合う患者のうち ``offset`` 番目から最大 ``limit`` 人を返す."""
+        where, parameters = _where_clause(patient_filter)
+        rows = self._query(
+            f"SELECT record FROM patients{where} ORDER BY position LIMIT ? OFFSET ?",
+            (*parameters, limit, offset),
+        )
+        return [self._validate(record) for (record,) in rows]
+
+    def count(self, patient_filter: PatientFilter | None = None) -> int:
+        """条件に合う患者の数を返す."""
+        if patient_filter is None:
+            return self._length
+        where, parameters = _where_clause(patient_filter)
+        return self._query_one(f"SELECT COUNT(*) FROM patients{where}", parameters)
+
+    def __contains__(self, patient_id: object) -> bool:
+        if not isinstance(patient_id, str):
+            return False
+        rows = self._query(
+            "SELECT 1 FROM patients WHERE patient_id = ?", (patient_id,)
+        )
+        return any(True for _ in rows)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> Patient: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Patient]: ...
+
+    def __getitem__(self, index: int | slice) -> Patient | list[Patient]:
+        if isinstance(index, slice):
+            positions = range(self._length)[index]
+            if positions.step != 1:
+                return [self[position] for position in positions]
+            rows = self._query(
+                "SELECT record FROM patients WHERE position >= ? AND position < ? "
+                "ORDER BY position",
+                (positions.start, positions.stop),
+            )
+            return [self._validate(record) for (record,) in rows]
+        position = range(self._length)[index]
+        rows = self._query(
+            "SELECT record FROM patients WHERE position = ?", (position,)
+        )
+        for (record,) in rows:
+            return self._validate(record)
+        raise PatientDataInvalidError(f"Patient database has no position {position}")
+
+    def __iter__(self) -> Iterator[Patient]:
+        return self.iter_patients()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            try:
+                connection = sqlite3.connect(
+                    f"{self.path.resolve().as_uri()}?mode=ro", uri=True
+                )
+            except sqlite3.Error as exc:
+                raise FileReadError(str(self.path), str(exc)) from exc
+            self._local.connection = connection
+        return connection
+
+    def _query(self, sql: str, parameters: tuple[Any, ...]) -> Iterator[tuple]:
+        """結果を ``_BATCH_SIZE`` 行ずつ読み出す."""
+        try:
+            cursor = self._connection().execute(sql, parameters)
+            while rows := cursor.fetchmany(_BATCH_SIZE):
+                yield from rows
+        except sqlite3.Error as exc:
+            raise FileReadError(str(self.path), str(exc)) from exc
+
+    def _query_one(self, sql: str, parameters: tuple[Any, ...]) -> int:
+        for (value,) in self._query(sql, parameters):
+            return int(value)
+        return 0
+
+    def _validate(self, record: str) -> Patient:
+        try:
+            return Patient.model_validate_json(record)
+        except ValidationError as exc:
+            raise PatientDataInvalidError(
+                f"Failed to validate patient database record: {exc}"
+            ) from exc
+
+
+def import_patients(patients: Iterable[Patient], database_path: Path) -> int:
+    """患者を SQLite ファイルに取り込み、取り込んだ患者数を返す.
+
+    同じ患者IDが複数ある場合は先のものを使う。一時ファイルに書いてから
+    置き換えるため、取り込みに失敗しても既存のファイルは変わらない。
+    """
+    tmp_path = database_path.with_name(f".{database_path.name}.{os.getpid()}.tmp")
+    seen: set[str] = set()
+
+    def rows() -> Iterator[tuple[str, int, str, str, str]]:
+        for patient in patients:
+            if patient.patient_id in seen:
+                continue
+            position = len(seen)
+            seen.add(patient.patient_id)
+            yield (
+                patient.patient_id,
+                position,
+                patient.sex,
+                patient.birth_date,
+                patient.model_dump_json(),
+            )
+
+    try:
+        database_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.unlink(missing_ok=True)
+        with closing(sqlite3.connect(tmp_path)) as connection:
+            # 一時ファイルは完成後に置き換えるため、途中の耐障害性は不要
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.execute(_SCHEMA)
+            connection.executemany(
+                "INSERT INTO patients "
+                "(patient_id, position, sex, birth_date, record) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows(),
+            )
+            for index in _INDEXES:
+                connection.execute(index)
+            connection.commit()
+        os.replace(tmp_path, database_path)
+    except (OSError, sqlite3.Error) as exc:
+        tmp_path.unlink(missing_ok=True)
+        raise FileWriteError(str(database_path), str(exc)) from exc
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    logger.info(
+        "Patient database imported: path=%s patients=%s", database_path, len(seen)
+    )
+    return len(seen)
+
+
+def _where_clause(
+    patient_filter: PatientFilter | None,
+) -> tuple[str, tuple[Any, ...]]:
+    if patient_filter is None:
+        return "", ()
+    conditions = []
+    parameters: list[Any] = []
+    if patient_filter.sex is not None:
+        conditions.append("sex = ?")
+        parameters.append(patient_filter.sex)
+    lower, upper = patient_filter.birth_date_bounds()
+    if lower is not None:
+        conditions.append("birth_date >= ?")
+        parameters.append(lower)
+    if upper is not None:
+        conditions.append("birth_date <= ?")
+        parameters.append(upper)
+    if not conditions:
+        return "", ()
+    return " WHERE " + " AND ".join(conditions), tuple(parameters)
@@ -2,40 +2,220 @@
 
 from __future__ import annotations
 
+import itertools
+import logging
+import threading
+from collections.abc import Iterator, Sequence
 from pathlib import Path
+from typing import Any, overload
 
 import yaml
 from pydantic import ValidationError
 
 from app.core.exceptions import FileReadError, PatientDataInvalidError, PatientNotFoundError
-from app.core.models import Patient
+from app.core.models import Patient, PatientFilter
+
+from .patient_database import (
+    PATIENT_DATABASE_SUFFIXES,
+    SQLitePatientRepository,
+    import_patients,
+)
+
+logger = logging.getLogger(__name__)
+
+# libyaml があれば C 実装のローダーを使う（結果は SafeLoader と同じ）
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# 患者マスターの更新検出に使う (st_mtime_ns, st_size)
+_FileSignature = tuple[int, int]
+
+# プロセス内で共有する患者マスター（パス -> (更新検出用の値, 索引)）
+_repositories_lock = threading.Lock()
+_repositories: dict[
+    Path, tuple[_FileSignature, PatientRepository | SQLitePatientRepository]
+] = {}
+
+
+class PatientRepository(Sequence[Patient]):
+    """患者IDで索引した患者マスター.
+
+    読み込み時には患者IDの索引のみを作り、``Patient`` への検証は患者ごとに
+    最初に参照した時点で行って結果を保持する。並びは患者マスターの順とし、
+    同じ患者IDが複数ある場合は先のものを使う。
+    """
+
+    def __init__(self, records: Sequence[Any]) -> None:
+        self._records: dict[str, dict[str, Any]] = {}
+        for position, record in enumerate(records):
+            if not isinstance(record, dict) or not isinstance(
+                record.get("patient_id"), str
+            ):
+                raise PatientDataInvalidError(
+                    f"Patient record {position} must be a mapping with a patient_id"
+                )
+            self._records.setdefault(record["patient_id"], record)
+        self._ids = list(self._records)
+        self._patients: dict[str, Patient] = {}
+
+    def get(self, patient_id: str) -> Patient:
+        """患者IDの患者を返す（存在しない場合は ``PatientNotFoundError``）."""
+        patient = self._patients.get(patient_id)
+        if patient is not None:
+            return patient
+        record = self._records.get(patient_id)
+        if record is None:
+            raise PatientNotFoundError(patient_id)
+        try:
+            patient = Patient.model_validate(record)
+        except ValidationError as exc:
+            raise PatientDataInvalidError(
+                f"Failed to validate patient master data: {patient_id}: {exc}"
+            ) from exc
+        self._patients[patient_id] = patient
+        return patient
+
+    def ids(self) -> list[str]:
+        """患者IDを患者マスターの順で返す."""
+        return list(self._ids)
+
+    def iter_patients(
+        self, patient_filter: PatientFilter | None = None
+    ) -> Iterator[Patient]:
+        """条件に合う患者を患者マスターの順に返す."""
+        if patient_filter is None:
+            yield from self
+            return
+        sex = patient_filter.sex
+        lower, upper = patient_filter.birth_date_bounds()
+        for patient_id in self._ids:
+            # 検証前の値で絞り込み、条件に合う患者のみ検証する
+            record = self._records[patient_id]
+            if sex is not None and record.get("sex") != sex:
+                continue
+            birth_date = str(record.get("birth_date"))
+            if (lower is not None and birth_date < lower) or (
+                upper is not None and birth_date > upper
+            ):
+                continue
+            yield self.get(patient_id)
+
+    def page(
+        self, offset: int, limit: int, patient_filter: PatientFilter | None = None
+    ) -> list[Patient]:
+        """条件に合う患者のうち ``offset`` 番目から最大 ``limit`` 人を返す."""
+        if patient_filter is None:
+            return self[offset : offset + limit]
+        matched = self.iter_patients(patient_filter)
+        return list(itertools.islice(matched, offset, offset + limit))
+
+    def count(self, patient_filter: PatientFilter | None = None) -> int:
+        """条件に合う患者の数を返す."""
+        if patient_filter is None:
+            return len(self)
+        return sum(1 for _ in self.iter_patients(patient_filter))
+
+    def __contains__(self, patient_id: object) -> bool:
+        return patient_id in self._records
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @overload
+    def __getitem__(self, index: int) -> Patient: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Patient]: ...
+
+    def __getitem__(self, index: int | slice) -> Patient | list[Patient]:
+        if isinstance(index, slice):
+            return [self.get(patient_id) for patient_id in self._ids[index]]
+        return self.get(self._ids[index])
+
+    def __iter__(self) -> Iterator[Patient]:
+        for patient_id in self._ids:
+            yield self.get(patient_id)
 
 
 class PatientLoaderService:
-    """患者マスターデータの読み込みサービス."""
+    """患者マスターデータの読み込みサービス.
+
+    患者マスターはプロセス内で共有する ``PatientRepository`` に1回だけ読み込み、
+    ファイルの更新時刻とサイズが変わった場合のみ読み直す。
+    拡張子が ``.sqlite`` / ``.sqlite3`` / ``.db`` の患者マスターは
+    ``import_to_database`` で取り込んだ SQLite ファイルとして扱い、全患者を
+    読み込まずに ``SQLitePatientRepository`` から参照する。
+    ``master_path`` を省略した場合は、``data/patients_master.sqlite3`` があれば
+    それを、なければ ``data/patients_master.yaml`` を使う（``prefer_database`` が
+    偽なら常に YAML を使う）。
+    """
 
-    def __init__(self) -> None:
+    def __init__(
+        self, master_path: Path | None = None, prefer_database: bool = True
+    ) -> None:
         self._project_root = Path(__file__).resolve().parents[2]
-        self._patient_master_path = self._project_root / "data" / "patients_master.yaml"
+        self._yaml_master_path = self._project_root / "data" / "patients_master.yaml"
+        if master_path is None:
+            master_path = self._yaml_master_path
+            database_path = self._project_root / "data" / "patients_master.sqlite3"
+            if prefer_database and database_path.exists():
+                master_path = database_path
+                self._warn_if_database_outdated(database_path)
+        self._patient_master_path = master_path
+
+    def repository(self) -> PatientRepository | SQLitePatientRepository:
+        """患者マスターの索引を返す（更新されていれば読み直す）."""
+        path = self._patient_master_path
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            raise FileReadError(str(path), "File does not exist") from None
+        except OSError as exc:
+            raise FileReadError(str(path), str(exc)) from exc
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with _repositories_lock:
+            cached = _repositories.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        repository: PatientRepository | SQLitePatientRepository
+        if path.suffix in PATIENT_DATABASE_SUFFIXES:
+            repository = SQLitePatientRepository(path)
+        else:
+            data = self._load_master_data()
+            patients_raw = data.get("patients", [])
+            if not isinstance(patients_raw, list):
+                raise PatientDataInvalidError("'patients' must be a list")
+            repository = PatientRepository(patients_raw)
+        with _repositories_lock:
+            _repositories[path] = (signature, repository)
+        return repository
 
     def load_all(self) -> list[Patient]:
         """患者マスターの全患者を返す."""
-        data = self._load_master_data()
-        patients_raw = data.get("patients", [])
-        if not isinstance(patients_raw, list):
-            raise PatientDataInvalidError("'patients' must be a list")
-
-        try:
-            return [Patient.model_validate(item) for item in patients_raw]
-        except ValidationError as exc:
-            raise PatientDataInvalidError(f"Failed to validate patient master data: {exc}") from exc
+        return list(self.repository())
 
     def find_by_id(self, patient_id: str) -> Patient:
         """患者IDから患者情報を検索して返す."""
-        for patient in self.load_all():
-            if patient.patient_id == patient_id:
-                return patient
-        raise PatientNotFoundError(patient_id)
+        return self.repository().get(patient_id)
+
+    def import_to_database(self, database_path: Path) -> int:
+        """患者マスターを SQLite ファイルに取り込み、取り込んだ患者数を返す."""
+        return import_patients(self.repository(), database_path)
+
+    def _warn_if_database_outdated(self, database_path: Path) -> None:
+        try:
+            outdated = (
+                self._yaml_master_path.stat().st_mtime_ns
+                > database_path.stat().st_mtime_ns
+            )
+        except OSError:
+            return
+        if outdated:
+            logger.warning(
+                "Patient database is older than the YAML master; "
+                "run 'patients import' again: path=%s",
+                database_path,
+            )
 
     def _load_master_data(self) -> dict:
         path = self._patient_master_path
@@ -44,7 +224,7 @@ class PatientLoaderService:
 
         try:
             with path.open("r", encoding="utf-8") as fp:
-                loaded = yaml.safe_load(fp)
+                loaded = yaml.load(fp, Loader=_YAML_LOADER)
         except yaml.YAMLError as exc:
             raise PatientDataInvalidError(f"Failed to parse patient master YAML: {exc}") from exc
         except OSError as exc:
@@ -53,4 +233,3 @@ class PatientLoaderService:
         if not isinstance(loaded, dict):
             raise PatientDataInvalidError("Patient master root must be a mapping")
         return loaded
-
@@ -3,31 +3,63 @@
 from __future__ import annotations
 
 import logging
-from collections.abc import Callable
+import os
+import secrets
+from collections.abc import Callable, Container, Iterator, Mapping
+from functools import partial
 from pathlib import Path
-
-import numpy as np
-import pydicom
-from pydicom.dataset import Dataset
+from typing import Any
 
 from app.core import (
     CT_IMAGE_STORAGE,
+    DICOMDIR_FILENAME,
+    ENHANCED_CT_IMAGE_STORAGE,
+    EXPLICIT_VR_LITTLE_ENDIAN,
+    MEDIA_STORAGE_DIRECTORY_STORAGE,
+    ConfigurationError,
+    DicomAttributes,
     DICOMBuilder,
+    DicomdirImage,
+    DicomdirSeries,
     DICOMGeneratorError,
     DirectoryCreateError,
     FileMetaBuilder,
     FileWriteError,
     GenerationConfig,
     GenerationError,
-    InstanceConfig,
-    PixelGenerator,
+    GenerationManifest,
+    GenerationPlan,
+    PixelSpec,
     PixelSpecCTRealistic,
+    SeriesConfig,
+    SeriesPlan,
     SpatialCalculator,
     UIDContext,
     UIDGenerator,
+    encode_dicomdir,
 )
 
+from .generation_journal import GenerationJournal, JournalState
+from .generation_manifest import ManifestStore
+from .generation_runner import generate_parallel, generate_pipelined
+from .generation_state import (
+    ConfigHashes,
+    FileLayout,
+    UIDAssignment,
+    config_hashes,
+    file_frame_counts,
+    journal_header,
+    keep_existing_files,
+    load_journal,
+    prepare_incremental,
+    prepare_resume,
+    save_manifest,
+    start_incremental,
+)
+from .instance_writer import TEMP_FILE_SUFFIX, InstanceTask, InstanceWriter
+from .output_archive import ARCHIVE_SUFFIXES, ArchiveWriter, open_archive
 from .template_loader import TemplateLoaderService
+from .uid_counter_store import UIDCounterStore
 
 logger = logging.getLogger(__name__)
 DEFAULT_IMPLEMENTATION_VERSION_NAME = "DICOM_GEN_1.1"
@@ -47,137 +79,72 @@ CT_IMAGE_TAG_MAP = {
     "convolution_kernel": "ConvolutionKernel",
 }
 
+# ワーカー1プロセスに割り当てる最小インスタンス数
+# spawn 起動コスト（約1.3秒/プール）を 512x512 の逐次生成（約5.6ms/枚）で
+# 回収できる枚数を目安とし、これに満たない場合はワーカー数を減らす
+MIN_IMAGES_PER_WORKER = 256
+
 
 class StudyGeneratorService:
     """DICOMスタディ生成を担うService Layer."""
 
-    def __init__(self) -> None:
-        self._template_loader = TemplateLoaderService()
+    def __init__(self, template_loader: TemplateLoaderService | None = None) -> None:
+        self._template_loader = template_loader or TemplateLoaderService()
         self._dicom_builder = DICOMBuilder()
-        self._pixel_generator = PixelGenerator()
-        self._file_meta_builder = FileMetaBuilder()
 
     def generate(
         self,
         config: GenerationConfig,
         progress_callback: Callable[[int, int], None] | None = None,
+        plan: GenerationPlan | None = None,
+        incremental: bool = False,
+        resume: bool = False,
+        uid_partition: tuple[int, int] = (0, 1),
     ) -> Path:
-        """設定に基づいてDICOMファイルを生成する."""
+        """設定に基づいてDICOMファイルを生成する.
+
+        ``config.execution.workers`` が2以上の場合はプロセスプールで並列生成し、
+        1の場合はステージ間をキューで接続したパイプラインで生成する。
+        UIDの採番と進捗通知は常に呼び出し元で行う。
+        ``plan`` を省略した場合は ``compile_plan`` で作成する。
+
+        生成中は出力先にジャーナルを追記し、正常完了したら削除する。
+        ``resume`` が真の場合は中断したジョブのジャーナルを読み込み、同じUIDで
+        書き込み完了していないインスタンスのみを生成する。
+
+        ``incremental`` が真の場合は出力先のマニフェストと実効設定のハッシュを比較し、
+        設定とファイルが前回から変わっていないシリーズはUIDごとそのまま残して、
+        それ以外のシリーズのみを生成する。
+
+        ``config.output_format`` が tar / zip の場合は、エンコードしたインスタンスを
+        出力先の1つのアーカイブへ直接書き込み、アーカイブのパスを返す。
+        アーカイブは再開・差分再生成に対応しないため、ジャーナルは記録しない。
+
+        ``config.dicomdir`` が真の場合は、書き込みと同時に集めた SOP Instance UID から
+        DICOMDIR を作成し、出力先（アーカイブ出力ではアーカイブ）へ追加する。
+
+        ``uid_partition``（番号, 分割数）はカスタムRoot方式の連番を分割して使う。
+        同じ Root で並行に生成するジョブに別々の番号を渡すと UID が重ならない。
+        ``config.uid_counter_store`` を指定した場合は、連番を分割せずにファイルの
+        カウンタからブロック単位で受け取り、終了時に使わなかった分を返却する。
+
+        進捗の総数は今回生成する枚数となる。
+        """
         total_images = sum(series.num_images for series in config.series_list)
         logger.info(
-            "Generation started: job_name=%s patient_id=%s total_images=%s output_dir=%s",
+            "Generation started: job_name=%s patient_id=%s total_images=%s "
+            "workers=%s output_dir=%s",
             config.job_name,
             config.patient.patient_id,
             total_images,
+            config.execution.workers,
             config.output_dir,
         )
 
         try:
-            uid_generator = UIDGenerator(
-                method=config.uid_method,
-                custom_root=config.uid_custom_root or "",
-            )
-            study_uid = uid_generator.generate_study_uid()
-            frame_of_reference_uid = uid_generator.generate_frame_of_reference_uid()
-            implementation_class_uid = uid_generator.generate_instance_creator_uid()
-            instance_creator_uid = uid_generator.generate_instance_creator_uid()
-
-            uid_context = UIDContext(
-                study_instance_uid=study_uid,
-                frame_of_reference_uid=frame_of_reference_uid,
-                implementation_class_uid=implementation_class_uid,
-                instance_creator_uid=instance_creator_uid,
-            )
-
-            template = self._template_loader.merge_templates(
-                modality_name=config.modality_template,
-                hospital_name=config.hospital_template,
-            )
-
-            output_dir = Path(config.output_dir)
-            try:
-                output_dir.mkdir(parents=True, exist_ok=True)
-            except OSError as exc:
-                raise DirectoryCreateError(str(output_dir), str(exc)) from exc
-
-            modality = self._resolve_modality(template)
-            sop_class_uid, implementation_version_name = self._resolve_file_meta_settings(
-                template
-            )
-            specific_character_set, use_ideographic, use_phonetic = (
-                self._resolve_character_set_settings(config, template)
+            output_path, generated_count = self._generate_job(
+                config, progress_callback, plan, incremental, resume, uid_partition
             )
-            sequence_width = self._sequence_width(total_images)
-
-            generated_count = 0
-            file_sequence = 1
-            for series_config in config.series_list:
-                series_uid = uid_generator.generate_series_uid()
-                spatial_calculator = SpatialCalculator(
-                    slice_thickness=series_config.slice_thickness,
-                    slice_spacing=series_config.slice_spacing,
-                    start_z=series_config.start_z,
-                )
-
-                for image_index in range(series_config.num_images):
-                    sop_uid = uid_generator.generate_sop_uid(
-                        allow_invalid=config.abnormal.allow_invalid_sop_uid
-                    )
-                    pixel_data, bits_stored = self._generate_pixel_data(config, sop_uid)
-
-                    file_meta = self._file_meta_builder.build(
-                        sop_class_uid=sop_class_uid,
-                        sop_instance_uid=sop_uid,
-                        transfer_syntax_uid=config.transfer_syntax.uid,
-                        implementation_class_uid=uid_context.implementation_class_uid,
-                        implementation_version_name=implementation_version_name,
-                    )
-
-                    instance_config = InstanceConfig(instance_number=image_index + 1)
-                    spatial = spatial_calculator.calculate(image_index)
-
-                    dataset = self._dicom_builder.build_ct_image(
-                        patient=config.patient,
-                        study_config=config.study,
-                        series_config=series_config,
-                        instance_config=instance_config,
-                        uid_context=uid_context,
-                        spatial=spatial,
-                        pixel_data=pixel_data,
-                        file_meta=file_meta,
-                        sop_instance_uid=sop_uid,
-                        series_instance_uid=series_uid,
-                        specific_character_set=specific_character_set,
-                        use_ideographic=use_ideographic,
-                        use_phonetic=use_phonetic,
-                        bits_stored=bits_stored,
-                    )
-                    self._apply_template_attributes(dataset, template)
-
-                    filename = (
-                        f"{config.patient.patient_id}_{config.study.study_date}_"
-                        f"{modality}_{file_sequence:0{sequence_width}d}.dcm"
-                    )
-                    filepath = output_dir / filename
-                    try:
-                        pydicom.dcmwrite(
-                            str(filepath), dataset, enforce_file_format=True
-                        )
-                    except Exception as exc:
-                        raise FileWriteError(str(filepath), str(exc)) from exc
-
-                    generated_count += 1
-                    file_sequence += 1
-                    if progress_callback is not None:
-                        progress_callback(generated_count, total_images)
-
-            logger.info(
-                "Generation completed: patient_id=%s generated=%s output_dir=%s",
-                config.patient.patient_id,
-                generated_count,
-                output_dir,
-            )
-            return output_dir
         except DICOMGeneratorError:
             logger.error(
                 "Generation failed: patient_id=%s output_dir=%s",
@@ -195,15 +162,584 @@ class StudyGeneratorService:
             )
             raise GenerationError(f"Unexpected generation error: {exc}") from exc
 
-    def _resolve_modality(self, template: dict) -> str:
+        logger.info(
+            "Generation completed: patient_id=%s generated=%s output=%s",
+            config.patient.patient_id,
+            generated_count,
+            output_path,
+        )
+        return output_path
+
+    def _generate_job(
+        self,
+        config: GenerationConfig,
+        progress_callback: Callable[[int, int], None] | None,
+        plan: GenerationPlan | None,
+        incremental: bool,
+        resume: bool,
+        uid_partition: tuple[int, int],
+    ) -> tuple[Path, int]:
+        """``generate`` の本体. 出力先のパスと生成枚数を返す."""
+        self._check_output_modes(config, incremental, resume)
+        if plan is None:
+            plan = self.compile_plan(config)
+        output_dir = self._create_output_dir(config)
+        counter_store = (
+            UIDCounterStore(Path(config.uid_counter_store))
+            if config.uid_counter_store is not None
+            else None
+        )
+        uid_generator = self._create_uid_generator(
+            config, uid_partition, counter_store
+        )
+        journal = (
+            GenerationJournal(output_dir)
+            if config.output_format == "directory"
+            else None
+        )
+        try:
+            return self._run_job(
+                config,
+                plan,
+                output_dir,
+                uid_generator,
+                journal,
+                ManifestStore(output_dir) if incremental else None,
+                load_journal(journal) if resume else None,
+                progress_callback,
+            )
+        finally:
+            if journal is not None:
+                journal.close()
+            if counter_store is not None:
+                counter_store.release(
+                    config.uid_custom_root, uid_generator.unused_counters()
+                )
+
+    def _run_job(
+        self,
+        config: GenerationConfig,
+        plan: GenerationPlan,
+        output_dir: Path,
+        uid_generator: UIDGenerator,
+        journal: GenerationJournal | None,
+        manifest_store: ManifestStore | None,
+        resumed: JournalState | None,
+        progress_callback: Callable[[int, int], None] | None,
+    ) -> tuple[Path, int]:
+        """UID とファイルの割り当てを確定し、生成してマニフェストを保存する."""
+        previous = manifest_store.load() if manifest_store is not None else None
+        pixel_spec, layout, hashes, uids = self._assign_uids(
+            config, plan, output_dir, uid_generator, manifest_store, previous, resumed
+        )
+        writer = InstanceWriter(
+            plan=plan,
+            uid_context=uids.uid_context,
+            pixel_spec=pixel_spec,
+            execution=config.execution,
+            output_dir=output_dir,
+            sequence_width=layout.sequence_width,
+            image_storage=config.image_storage,
+        )
+        self._remove_temp_files(output_dir)
+        uids = keep_existing_files(uids, writer, layout, output_dir)
+        series_filenames = layout.series_filenames(writer)
+        if manifest_store is not None:
+            start_incremental(
+                manifest_store, previous, hashes, uids, pixel_spec, series_filenames
+            )
+        if journal is not None:
+            journal.start(journal_header(hashes, uids, pixel_spec), uids.completed)
+
+        output_path, generated_count, series_sop_uids = self._write_outputs(
+            config,
+            plan,
+            writer,
+            uid_generator,
+            uids,
+            layout,
+            series_filenames,
+            journal,
+            manifest_store is not None,
+            progress_callback,
+        )
+        if manifest_store is not None:
+            save_manifest(
+                manifest_store,
+                hashes,
+                uids,
+                pixel_spec,
+                series_filenames,
+                series_sop_uids,
+            )
+        if journal is not None:
+            journal.remove()
+        return output_path, generated_count
+
+    def _assign_uids(
+        self,
+        config: GenerationConfig,
+        plan: GenerationPlan,
+        output_dir: Path,
+        uid_generator: UIDGenerator,
+        manifest_store: ManifestStore | None,
+        previous: GenerationManifest | None,
+        resumed: JournalState | None,
+    ) -> tuple[PixelSpec, FileLayout, ConfigHashes, UIDAssignment]:
+        """ノイズのシードと UID を、再開・差分再生成なら前回から引き継いで確定する."""
+        if resumed is not None:
+            previous_seed = resumed.header.noise_seed
+        else:
+            previous_seed = previous.noise_seed if previous is not None else None
+        pixel_spec = self._resolve_pixel_spec(config.pixel_spec, previous_seed)
+        layout = FileLayout.from_plan(plan, config.image_storage.frames_per_file)
+        hashes = config_hashes(config, plan, pixel_spec, layout)
+        if resumed is not None:
+            uids = prepare_resume(resumed, hashes, output_dir)
+        else:
+            uids = prepare_incremental(manifest_store, previous, hashes, uid_generator)
+        return pixel_spec, layout, hashes, uids
+
+    def _write_outputs(
+        self,
+        config: GenerationConfig,
+        plan: GenerationPlan,
+        writer: InstanceWriter,
+        uid_generator: UIDGenerator,
+        uids: UIDAssignment,
+        layout: FileLayout,
+        series_filenames: list[list[str]],
+        journal: GenerationJournal | None,
+        collect_sop_uids: bool,
+        progress_callback: Callable[[int, int], None] | None,
+    ) -> tuple[Path, int, list[list[str]]]:
+        """インスタンスと DICOMDIR を書き込み、出力先・生成枚数・SOP Instance UID を返す.
+
+        SOP Instance UID は DICOMDIR・マニフェストを作る場合のみ集める。
+        """
+        # 書き込み完了したファイルの SOP Instance UID（マニフェスト・DICOMDIR 用）
+        written: dict[int, str] | None = (
+            dict(uids.completed) if config.dicomdir or collect_sop_uids else None
+        )
+
+        def record(task: InstanceTask) -> None:
+            if journal is not None:
+                journal.record(task.file_sequence, task.sop_instance_uid)
+            if written is not None:
+                written[task.file_sequence] = task.sop_instance_uid
+
+        archive = self._open_archive(config, plan)
+        try:
+            generated_count = self._generate_instances(
+                config,
+                writer,
+                self._iter_tasks(
+                    config,
+                    uid_generator,
+                    uids.series_uids,
+                    skip_series=frozenset(uids.reused),
+                    skip_sequences=uids.completed.keys(),
+                ),
+                layout.pending_images(frozenset(uids.reused), uids.completed),
+                progress_callback,
+                record,
+                archive,
+            )
+            series_sop_uids = (
+                layout.series_sop_uids(uids.reused, written)
+                if written is not None
+                else []
+            )
+            output_path = self._finalize_outputs(
+                config,
+                plan,
+                writer,
+                uid_generator,
+                uids,
+                series_filenames,
+                series_sop_uids,
+                archive,
+            )
+        except BaseException:
+            if archive is not None:
+                archive.abort()
+            raise
+        return output_path, generated_count, series_sop_uids
+
+    @staticmethod
+    def _open_archive(
+        config: GenerationConfig, plan: GenerationPlan
+    ) -> ArchiveWriter | None:
+        """アーカイブ出力の場合は出力先のアーカイブを開く."""
+        if config.output_format == "directory":
+            return None
+        return open_archive(
+            Path(config.output_dir)
+            / f"{plan.filename_prefix}{ARCHIVE_SUFFIXES[config.output_format]}",
+            config.output_format,
+        )
+
+    @staticmethod
+    def _check_output_modes(
+        config: GenerationConfig, incremental: bool, resume: bool
+    ) -> None:
+        if incremental and resume:
+            raise ConfigurationError(
+                "incremental and resume cannot be used together",
+                {"incremental": incremental, "resume": resume},
+            )
+        if config.output_format != "directory" and (incremental or resume):
+            raise ConfigurationError(
+                "incremental and resume require output_format directory",
+                {
+                    "output_format": config.output_format,
+                    "incremental": incremental,
+                    "resume": resume,
+                },
+            )
+
+    @staticmethod
+    def _create_output_dir(config: GenerationConfig) -> Path:
+        output_dir = Path(config.output_dir)
+        try:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as exc:
+            raise DirectoryCreateError(str(output_dir), str(exc)) from exc
+        return output_dir
+
+    @staticmethod
+    def _create_uid_generator(
+        config: GenerationConfig,
+        uid_partition: tuple[int, int],
+        counter_store: UIDCounterStore | None,
+    ) -> UIDGenerator:
+        return UIDGenerator(
+            method=config.uid_method,
+            custom_root=config.uid_custom_root or "",
+            partition_index=uid_partition[0],
+            partition_count=uid_partition[1],
+            seed=config.uid_seed or "",
+            counter_lease=(
+                partial(counter_store.lease, config.uid_custom_root)
+                if counter_store is not None
+                else None
+            ),
+        )
+
+    def _generate_instances(
+        self,
+        config: GenerationConfig,
+        writer: InstanceWriter,
+        tasks: Iterator[InstanceTask],
+        pending_images: int,
+        progress_callback: Callable[[int, int], None] | None,
+        record: Callable[[InstanceTask], None],
+        archive: ArchiveWriter | None,
+    ) -> int:
+        """ワーカー数に応じてプロセスプールかパイプラインで生成し、生成枚数を返す."""
+        workers = self._effective_workers(config.execution.workers, pending_images)
+        if workers > 1 and archive is not None and writer.multiframe:
+            # 複数フレームはフレームを生成しながら書き込むため、
+            # アーカイブへの書き込みと同じプロセスで生成する
+            logger.info(
+                "Workers reduced for multiframe archive output: requested=%s",
+                workers,
+            )
+            workers = 1
+        if workers > 1:
+            return generate_parallel(
+                writer,
+                tasks,
+                workers,
+                config.execution,
+                pending_images,
+                progress_callback,
+                record,
+                archive,
+            )
+        return generate_pipelined(
+            writer,
+            tasks,
+            config,
+            pending_images,
+            progress_callback,
+            record,
+            archive,
+        )
+
+    def _finalize_outputs(
+        self,
+        config: GenerationConfig,
+        plan: GenerationPlan,
+        writer: InstanceWriter,
+        uid_generator: UIDGenerator,
+        uids: UIDAssignment,
+        series_filenames: list[list[str]],
+        series_sop_uids: list[list[str]],
+        archive: ArchiveWriter | None,
+    ) -> Path:
+        """DICOMDIR を追加し（指定時）、アーカイブを確定して出力先のパスを返す."""
+        output_dir = Path(config.output_dir)
+        if config.dicomdir:
+            dicomdir = self._encode_dicomdir(
+                writer,
+                plan,
+                uids.uid_context,
+                uid_generator,
+                uids.series_uids,
+                series_filenames,
+                series_sop_uids,
+            )
+            if archive is not None:
+                archive.add(DICOMDIR_FILENAME, dicomdir)
+            else:
+                self._write_dicomdir(output_dir, dicomdir)
+        if archive is not None:
+            return archive.commit()
+        return output_dir
+
+    def compile_plan(self, config: GenerationConfig) -> GenerationPlan:
+        """テンプレートをマージし、スタディ単位で不変な属性を解決した生成計画を作る.
+
+        作成した計画は不変かつ pickle 可能なため、CLI・GUI・ワーカープロセスで共有できる。
+        """
+        template = self._template_loader.merge_templates(
+            modality_name=config.modality_template,
+            hospital_name=config.hospital_template,
+        )
+        sop_class_uid, implementation_version_name = self._resolve_file_meta_settings(
+            template
+        )
+        specific_character_set, use_ideographic, use_phonetic = (
+            self._resolve_character_set_settings(config, template)
+        )
+        modality = self._resolve_modality(template)
+
+        study_attributes = self._dicom_builder.resolve_study_attributes(
+            patient=config.patient,
+            study_config=config.study,
+            sop_class_uid=sop_class_uid,
+            specific_character_set=specific_character_set,
+            use_ideographic=use_ideographic,
+            use_phonetic=use_phonetic,
+        )
+        series_plans = tuple(
+            self._compile_series_plan(series_config)
+            for series_config in config.series_list
+        )
+
+        return GenerationPlan(
+            modality=modality,
+            sop_class_uid=sop_class_uid,
+            transfer_syntax_uid=config.transfer_syntax.uid,
+            deflate_level=config.transfer_syntax.deflate_level,
+            implementation_version_name=implementation_version_name,
+            filename_prefix=(
+                f"{config.patient.patient_id}_{config.study.study_date}_{modality}"
+            ),
+            attributes=study_attributes + self._resolve_template_attributes(template),
+            series=series_plans,
+        )
+
+    def _compile_series_plan(self, series_config: SeriesConfig) -> SeriesPlan:
+        # 向き・画素間隔はスライス位置に依存しないため先頭スライスの値で解決する
+        first_slice = SpatialCalculator(
+            slice_thickness=series_config.slice_thickness,
+            slice_spacing=series_config.slice_spacing,
+            start_z=series_config.start_z,
+        ).position(0)
+        return SeriesPlan(
+            num_images=series_config.num_images,
+            slice_thickness=series_config.slice_thickness,
+            slice_spacing=series_config.slice_spacing,
+            start_z=series_config.start_z,
+            attributes=self._dicom_builder.resolve_series_attributes(
+                series_config=series_config,
+                image_orientation_patient=first_slice.image_orientation_patient,
+                pixel_spacing=first_slice.pixel_spacing,
+            ),
+        )
+
+    @staticmethod
+    def _effective_workers(requested: int, total_images: int) -> int:
+        """起動コストを回収できる範囲にワーカー数を制限する（1なら逐次生成）."""
+        workers = max(1, min(requested, total_images // MIN_IMAGES_PER_WORKER))
+        if workers < requested:
+            logger.debug(
+                "Workers reduced: requested=%s effective=%s total_images=%s",
+                requested,
+                workers,
+                total_images,
+            )
+        return workers
+
+    @staticmethod
+    def _iter_tasks(
+        config: GenerationConfig,
+        uid_generator: UIDGenerator,
+        series_uids: list[str],
+        skip_series: frozenset[int] = frozenset(),
+        skip_sequences: Container[int] = frozenset(),
+    ) -> Iterator[InstanceTask]:
+        """シリーズ順・ファイル順にSOP Instance UIDを採番しながらタスクを列挙する.
+
+        複数フレーム出力では1ファイルに ``frames_per_file`` 枚ずつスライスをまとめる。
+        ``skip_series`` のシリーズと、通し番号が ``skip_sequences`` に含まれる
+        インスタンスはタスクを作らず、通し番号だけを進める。
+        """
+        frames_per_file = config.image_storage.frames_per_file
+        file_sequence = 1
+        for series_index, series_config in enumerate(config.series_list):
+            frame_counts = file_frame_counts(
+                series_config.num_images, frames_per_file
+            )
+            if series_index in skip_series:
+                file_sequence += len(frame_counts)
+                continue
+            for file_index, n_frames in enumerate(frame_counts):
+                if file_sequence in skip_sequences:
+                    file_sequence += 1
+                    continue
+                sop_uid = uid_generator.generate_sop_uid(
+                    allow_invalid=config.abnormal.allow_invalid_sop_uid,
+                    series_index=series_index,
+                    instance_index=file_index,
+                )
+                yield InstanceTask(
+                    file_sequence=file_sequence,
+                    series_index=series_index,
+                    image_index=file_index * frames_per_file,
+                    series_instance_uid=series_uids[series_index],
+                    sop_instance_uid=sop_uid,
+                    n_frames=n_frames,
+                )
+                file_sequence += 1
+
+    def _encode_dicomdir(
+        self,
+        writer: InstanceWriter,
+        plan: GenerationPlan,
+        uid_context: UIDContext,
+        uid_generator: UIDGenerator,
+        series_uids: list[str],
+        series_filenames: list[list[str]],
+        series_sop_uids: list[list[str]],
+    ) -> bytes:
+        """書き込み時に集めた SOP Instance UID から DICOMDIR をエンコードする.
+
+        レコードの属性は生成計画から解決するため、出力ファイルは読み直さない。
+        """
+        file_meta = FileMetaBuilder().build(
+            sop_class_uid=MEDIA_STORAGE_DIRECTORY_STORAGE,
+            sop_instance_uid=uid_generator.generate_media_storage_uid(),
+            transfer_syntax_uid=EXPLICIT_VR_LITTLE_ENDIAN,
+            implementation_class_uid=uid_context.implementation_class_uid,
+            implementation_version_name=plan.implementation_version_name,
+        )
+        sop_class_uid = (
+            ENHANCED_CT_IMAGE_STORAGE if writer.multiframe else plan.sop_class_uid
+        )
+        series = [
+            DicomdirSeries(
+                attributes=series_plan.attributes
+                + (("Modality", plan.modality), ("SeriesInstanceUID", series_uid)),
+                sop_class_uid=sop_class_uid,
+                transfer_syntax_uid=plan.transfer_syntax_uid,
+                # Instance Number はシリーズ内のファイル順（複数フレームも同じ）
+                images=[
+                    DicomdirImage(filename, sop_uid, instance_number)
+                    for instance_number, (filename, sop_uid) in enumerate(
+                        zip(filenames, sop_uids), start=1
+                    )
+                ],
+            )
+            for series_plan, series_uid, filenames, sop_uids in zip(
+                plan.series, series_uids, series_filenames, series_sop_uids
+            )
+        ]
+        return encode_dicomdir(
+            file_meta,
+            plan.attributes
+            + (("StudyInstanceUID", uid_context.study_instance_uid),),
+            series,
+        )
+
+    @staticmethod
+    def _write_dicomdir(output_dir: Path, data: bytes) -> None:
+        path = output_dir / DICOMDIR_FILENAME
+        tmp_path = path.with_name(f".{path.name}{TEMP_FILE_SUFFIX}")
+        try:
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            raise FileWriteError(str(path), str(exc)) from exc
+
+    @staticmethod
+    def _remove_temp_files(output_dir: Path) -> None:
+        """前回中断したジョブが残した書きかけの一時ファイルを削除する."""
+        for tmp_path in output_dir.glob(f".*.dcm{TEMP_FILE_SUFFIX}"):
+            try:
+                tmp_path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as exc:
+                raise FileWriteError(str(tmp_path), str(exc)) from exc
+
+    def _resolve_template_attributes(self, template: Mapping[str, Any]) -> DicomAttributes:
+        attributes: list[tuple[str, str]] = []
+        general_equipment = template.get("general_equipment", {})
+        if isinstance(general_equipment, Mapping):
+            attributes.extend(
+                self._mapped_attributes(general_equipment, GENERAL_EQUIPMENT_TAG_MAP)
+            )
+
+        ct_image = template.get("ct_image", {})
+        if isinstance(ct_image, Mapping):
+            attributes.extend(self._mapped_attributes(ct_image, CT_IMAGE_TAG_MAP))
+        return tuple(attributes)
+
+    @staticmethod
+    def _mapped_attributes(
+        source: Mapping[str, Any], keyword_map: dict[str, str]
+    ) -> list[tuple[str, str]]:
+        return [
+            (dicom_keyword, str(source[source_key]))
+            for source_key, dicom_keyword in keyword_map.items()
+            if source.get(source_key) is not None
+        ]
+
+    def _resolve_pixel_spec(
+        self, pixel_spec: PixelSpec, previous_seed: int | None = None
+    ) -> PixelSpec:
+        """noiseパターンのシードを確定する.
+
+        シード省略時は前回のマニフェストに記録したシードを使い、それもなければ
+        ジョブごとにランダムなシードを採番してログに残す。
+        全ワーカーが同じノイズバンクを使えるようにする。
+        """
+        if (
+            not isinstance(pixel_spec, PixelSpecCTRealistic)
+            or pixel_spec.pattern != "noise"
+            or pixel_spec.seed is not None
+        ):
+            return pixel_spec
+        if previous_seed is not None:
+            return pixel_spec.model_copy(update={"seed": previous_seed})
+        seed = secrets.randbits(63)
+        logger.info("Noise seed generated: seed=%s", seed)
+        return pixel_spec.model_copy(update={"seed": seed})
+
+    def _resolve_modality(self, template: Mapping[str, Any]) -> str:
         info = template.get("info", {})
-        if isinstance(info, dict) and isinstance(info.get("modality"), str):
+        if isinstance(info, Mapping) and isinstance(info.get("modality"), str):
             return info["modality"]
         return "CT"
 
-    def _resolve_file_meta_settings(self, template: dict) -> tuple[str, str]:
+    def _resolve_file_meta_settings(
+        self, template: Mapping[str, Any]
+    ) -> tuple[str, str]:
         file_meta_config = template.get("file_meta", {})
-        if not isinstance(file_meta_config, dict):
+        if not isinstance(file_meta_config, Mapping):
             return CT_IMAGE_STORAGE, DEFAULT_IMPLEMENTATION_VERSION_NAME
 
         sop_class_uid = str(
@@ -217,66 +753,25 @@ class StudyGeneratorService:
         return sop_class_uid, implementation_version_name
 
     def _resolve_character_set_settings(
-        self, config: GenerationConfig, template: dict
+        self, config: GenerationConfig, template: Mapping[str, Any]
     ) -> tuple[str | None, bool, bool]:
         specific_character_set: str | None = config.character_set.specific_character_set
         use_ideographic = config.character_set.use_ideographic
         use_phonetic = config.character_set.use_phonetic
 
         character_set_config = template.get("character_set", {})
-        if isinstance(character_set_config, dict):
+        if isinstance(character_set_config, Mapping):
             if "specific_character_set" in character_set_config:
                 value = character_set_config["specific_character_set"]
                 specific_character_set = None if value is None else str(value)
 
         patient_module = template.get("patient_module", {})
-        if isinstance(patient_module, dict):
+        if isinstance(patient_module, Mapping):
             patient_name_cfg = patient_module.get("patient_name", {})
-            if isinstance(patient_name_cfg, dict):
+            if isinstance(patient_name_cfg, Mapping):
                 if "use_ideographic" in patient_name_cfg:
                     use_ideographic = bool(patient_name_cfg["use_ideographic"])
                 if "use_phonetic" in patient_name_cfg:
                     use_phonetic = bool(patient_name_cfg["use_phonetic"])
 
         return specific_character_set, use_ideographic, use_phonetic
-
-    def _generate_pixel_data(
-        self, config: GenerationConfig, sop_uid: str
-    ) -> tuple[np.ndarray, int]:
-        if isinstance(config.pixel_spec, PixelSpecCTRealistic):
-            pixels = self._pixel_generator.generate_ct_realistic(
-                width=config.pixel_spec.width,
-                height=config.pixel_spec.height,
-                pattern=config.pixel_spec.pattern,
-                bits_stored=config.pixel_spec.bits_stored,
-            )
-            return pixels, config.pixel_spec.bits_stored
-
-        pixels = self._pixel_generator.generate_simple_text(
-            sop_instance_uid=sop_uid,
-            width=config.pixel_spec.width,
-            height=config.pixel_spec.height,
-        )
-        return pixels, 8
-
-    @staticmethod
-    def _sequence_width(total_images: int) -> int:
-        return max(4, len(str(total_images)))
-
-    def _apply_template_attributes(self, dataset: Dataset, template: dict) -> None:
-        general_equipment = template.get("general_equipment", {})
-        if isinstance(general_equipment, dict):
-            self._apply_attributes(dataset, general_equipment, GENERAL_EQUIPMENT_TAG_MAP)
-
-        ct_image = template.get("ct_image", {})
-        if isinstance(ct_image, dict):
-            self._apply_attributes(dataset, ct_image, CT_IMAGE_TAG_MAP)
-
-    def _apply_attributes(
-        self, dataset: Dataset, source: dict, keyword_map: dict[str, str]
-    ) -> None:
-        for source_key, dicom_keyword in keyword_map.items():
-            value = source.get(source_key)
-            if value is None:
-                continue
-            setattr(dataset, dicom_keyword, str(value))
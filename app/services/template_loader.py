@@ -2,57 +2,146 @@
 
 from __future__ import annotations
 
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from collections.abc import Mapping
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any, NamedTuple
 
 import yaml
 
 from app.core.exceptions import TemplateNotFoundError, TemplateParseError
 
+logger = logging.getLogger(__name__)
+
+# libyaml があれば C 実装のローダーを使う（結果は SafeLoader と同じ）
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# ディスクキャッシュの形式を変えたら上げる
+_DISK_CACHE_VERSION = 1
+
+# テンプレートファイルの更新検出に使う (st_mtime_ns, st_size)
+_FileSignature = tuple[int, int]
+
+
+class _CachedTemplate(NamedTuple):
+    signature: tuple[_FileSignature | None, ...]
+    template: Mapping[str, Any]
+
+
+# プロセス内で共有するキャッシュ（パス -> 読み込み結果、(モダリティ, 病院) -> マージ結果）
+_cache_lock = threading.Lock()
+_loaded_templates: dict[Path, _CachedTemplate] = {}
+_merged_templates: dict[tuple[Path, Path | None], _CachedTemplate] = {}
+
+
+def clear_template_cache() -> None:
+    """プロセス内のテンプレートキャッシュを破棄する."""
+    with _cache_lock:
+        _loaded_templates.clear()
+        _merged_templates.clear()
+
+
+def _freeze(value: Any) -> Any:
+    """YAML の読み込み結果を変更できない値（マッピングとタプル）に変換する."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
 
 class TemplateLoaderService:
-    """テンプレート読み込みとマージを提供するサービス."""
+    """テンプレート読み込みとマージを提供するサービス.
+
+    読み込んだテンプレートとマージ結果は変更できないマッピングとして
+    プロセス内で共有し、ファイルの更新時刻とサイズが変わるまで再解析しない。
+    ``cache_dir`` を指定すると、解析結果を pickle で保存してプロセスをまたいで再利用する。
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, cache_dir: Path | None = None) -> None:
         self._project_root = Path(__file__).resolve().parents[2]
         self._modality_dir = self._project_root / "templates" / "modality"
         self._hospital_dir = self._project_root / "templates" / "hospital"
+        self._cache_dir = cache_dir
 
-    def load_modality_template(self, name: str) -> dict:
+    def load_modality_template(self, name: str) -> Mapping[str, Any]:
         """モダリティテンプレートを読み込む."""
         template_path = self._modality_dir / f"{name}.yaml"
         return self._load_yaml_template(template_path, name)
 
-    def load_hospital_template(self, name: str) -> dict:
+    def load_hospital_template(self, name: str) -> Mapping[str, Any]:
         """病院テンプレートを読み込む."""
         template_path = self._hospital_dir / f"{name}.yaml"
         return self._load_yaml_template(template_path, name)
 
-    def merge_templates(self, modality_name: str, hospital_name: str | None) -> dict:
+    def merge_templates(
+        self, modality_name: str, hospital_name: str | None
+    ) -> Mapping[str, Any]:
         """テンプレートを浅いマージで統合する."""
+        modality_path = self._modality_dir / f"{modality_name}.yaml"
+        hospital_path = None
+        hospital_signature = None
+        if hospital_name is not None:
+            hospital_path = self._hospital_dir / f"{hospital_name}.yaml"
+            hospital_signature = self._signature(hospital_path, hospital_name)
+        signature = (self._signature(modality_path, modality_name), hospital_signature)
+        key = (modality_path, hospital_path)
+        with _cache_lock:
+            cached = _merged_templates.get(key)
+        if cached is not None and cached.signature == signature:
+            return cached.template
+
         modality_template = self.load_modality_template(modality_name)
         if hospital_name is None:
-            return dict(modality_template)
-
-        hospital_template = self.load_hospital_template(hospital_name)
-        overrides = hospital_template.get("overrides", {})
-        if not isinstance(overrides, dict):
-            raise TemplateParseError(
-                str(self._hospital_dir / f"{hospital_name}.yaml"),
-                "'overrides' must be a mapping",
-            )
-
-        merged = dict(modality_template)
-        for key, value in overrides.items():
-            merged[key] = value
+            merged = modality_template
+        else:
+            hospital_template = self.load_hospital_template(hospital_name)
+            overrides = hospital_template.get("overrides", {})
+            if not isinstance(overrides, Mapping):
+                raise TemplateParseError(
+                    str(hospital_path), "'overrides' must be a mapping"
+                )
+            merged = MappingProxyType({**modality_template, **overrides})
+
+        with _cache_lock:
+            _merged_templates[key] = _CachedTemplate(signature, merged)
         return merged
 
-    def _load_yaml_template(self, path: Path, template_name: str) -> dict:
-        if not path.exists():
-            raise TemplateNotFoundError(template_name)
+    def _load_yaml_template(self, path: Path, template_name: str) -> Mapping[str, Any]:
+        signature = self._signature(path, template_name)
+        with _cache_lock:
+            cached = _loaded_templates.get(path)
+        if cached is not None and cached.signature == (signature,):
+            return cached.template
+
+        loaded = self._read_disk_cache(path, signature)
+        if loaded is None:
+            loaded = self._parse_yaml_template(path)
+            self._write_disk_cache(path, signature, loaded)
+        template = _freeze(loaded)
+        with _cache_lock:
+            _loaded_templates[path] = _CachedTemplate((signature,), template)
+        return template
+
+    @staticmethod
+    def _signature(path: Path, template_name: str) -> _FileSignature:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            raise TemplateNotFoundError(template_name) from None
+        except OSError as exc:
+            raise TemplateParseError(str(path), str(exc)) from exc
+        return stat.st_mtime_ns, stat.st_size
 
+    @staticmethod
+    def _parse_yaml_template(path: Path) -> dict:
         try:
             with path.open("r", encoding="utf-8") as fp:
-                loaded = yaml.safe_load(fp)
+                loaded = yaml.load(fp, Loader=_YAML_LOADER)
         except yaml.YAMLError as exc:
             raise TemplateParseError(str(path), str(exc)) from exc
         except OSError as exc:
@@ -63,3 +152,57 @@ class TemplateLoaderService:
 
         return loaded
 
+    def _disk_cache_path(self, path: Path) -> Path | None:
+        if self._cache_dir is None:
+            return None
+        digest = hashlib.sha256(str(path.resolve()).encode("utf-8")).hexdigest()
+        return self._cache_dir / f"{digest}.pickle"
+
+    def _read_disk_cache(self, path: Path, signature: _FileSignature) -> dict | None:
+        """ディスクキャッシュを読む（ない・古い・壊れている場合は ``None``）."""
+        cache_path = self._disk_cache_path(path)
+        if cache_path is None:
+            return None
+        try:
+            with cache_path.open("rb") as fp:
+                version, cached_signature, loaded = pickle.load(fp)
+        except FileNotFoundError:
+            return None
+        except (
+            OSError,
+            pickle.UnpicklingError,
+            EOFError,
+            ValueError,
+            TypeError,
+        ) as exc:
+            logger.debug("Template cache ignored: path=%s error=%s", cache_path, exc)
+            return None
+        if version != _DISK_CACHE_VERSION or cached_signature != signature:
+            return None
+        return loaded
+
+    def _write_disk_cache(
+        self, path: Path, signature: _FileSignature, loaded: dict
+    ) -> None:
+        """ディスクキャッシュを書く（失敗してもテンプレートの読み込みは続ける）."""
+        cache_path = self._disk_cache_path(path)
+        if cache_path is None:
+            return
+        # 同じプロセスの別スレッドと一時ファイルが重ならないようスレッドIDも含める
+        tmp_path = cache_path.with_name(
+            f".{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open("wb") as fp:
+                pickle.dump(
+                    (_DISK_CACHE_VERSION, signature, loaded),
+                    fp,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError as exc:
+            tmp_path.unlink(missing_ok=True)
+            logger.warning(
+                "Template cache write failed: path=%s error=%s", cache_path, exc
+            )
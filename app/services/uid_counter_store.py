@@ -0,0 +1,116 @@
+"""Persistent counter store that leases custom-root UID blocks across runs."""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+from collections.abc import Callable
+from contextlib import closing
+from pathlib import Path
+from typing import TypeVar
+
+from app.core import ConfigurationError, FileWriteError
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# 1回に払い出す連番の数
+UID_LEASE_SIZE = 100_000
+# 他のプロセスがブロックを払い出し中の場合に待つ秒数
+_BUSY_TIMEOUT_SECONDS = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uid_counters (
+    root TEXT PRIMARY KEY,
+    next_value INTEGER NOT NULL
+)
+"""
+
+
+class UIDCounterStore:
+    """カスタムRoot方式の連番を、Root ごとに重ならないブロックで払い出す SQLite ファイル.
+
+    ブロックの払い出しは ``BEGIN IMMEDIATE`` のトランザクションで行うため、
+    同じファイルを使う複数のプロセス・スレッド・実行の間で範囲が重ならない。
+    ファイルへのアクセスはブロックごとの1回のみで、UID ごとの I/O は発生しない。
+    接続はスレッドをまたがないよう、払い出しのたびに開く。
+    """
+
+    def __init__(self, path: Path, lease_size: int = UID_LEASE_SIZE) -> None:
+        if lease_size < 1:
+            raise ConfigurationError(
+                "lease_size must be >= 1", {"lease_size": lease_size}
+            )
+        self.path = path
+        self._lease_size = lease_size
+
+    def lease(self, root: str) -> range:
+        """``root`` の次のブロックを払い出す（最初のブロックは1から始まる）."""
+
+        def take(connection: sqlite3.Connection) -> range:
+            row = connection.execute(
+                "SELECT next_value FROM uid_counters WHERE root = ?", (root,)
+            ).fetchone()
+            start = row[0] if row is not None else 1
+            connection.execute(
+                "INSERT INTO uid_counters (root, next_value) VALUES (?, ?) "
+                "ON CONFLICT (root) DO UPDATE SET next_value = excluded.next_value",
+                (root, start + self._lease_size),
+            )
+            return range(start, start + self._lease_size)
+
+        block = self._transaction(take)
+        logger.debug(
+            "UID counter block leased: root=%s start=%s stop=%s",
+            root,
+            block.start,
+            block.stop,
+        )
+        return block
+
+    def release(self, root: str, unused: range) -> bool:
+        """使わなかった連番を返却する.
+
+        ``unused`` が最後に払い出したブロックの末尾の場合のみ返却し、次の
+        払い出しをそこから始める。その後に別のブロックが払い出されていれば
+        何もしない（連番は飛ぶが重複はしない）。返却できたかどうかを返す。
+        """
+        if not unused:
+            return False
+
+        def give_back(connection: sqlite3.Connection) -> bool:
+            cursor = connection.execute(
+                "UPDATE uid_counters SET next_value = ? "
+                "WHERE root = ? AND next_value = ?",
+                (unused.start, root, unused.stop),
+            )
+            return cursor.rowcount == 1
+
+        released = self._transaction(give_back)
+        logger.debug(
+            "UID counter block released: root=%s start=%s released=%s",
+            root,
+            unused.start,
+            released,
+        )
+        return released
+
+    def _transaction(self, operation: Callable[[sqlite3.Connection], _T]) -> _T:
+        try:
+            with closing(
+                sqlite3.connect(
+                    self.path, timeout=_BUSY_TIMEOUT_SECONDS, isolation_level=None
+                )
+            ) as connection:
+                connection.execute(_SCHEMA)
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    result = operation(connection)
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+                connection.execute("COMMIT")
+                return result
+        except sqlite3.Error as exc:
+            raise FileWriteError(str(self.path), str(exc)) from exc
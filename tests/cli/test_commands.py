@@ -2,8 +2,17 @@ from __future__ import annotations
 
 import argparse
 
-from app.cli.commands import generate_command, validate_command, version_command
+import pydicom
+
+from app.cli.commands import (
+    cohort_command,
+    generate_command,
+    patients_import_command,
+    validate_command,
+    version_command,
+)
 from app.cli.main import _map_exception_to_exit_code
+from app.services.template_loader import clear_template_cache
 
 
 def _write_job_yaml(path, output_dir):
@@ -113,6 +122,203 @@ def test_generate_command_success(tmp_path) -> None:
     assert len(list(output_dir.glob("*.dcm"))) == 1
 
 
+def test_generate_command_incremental_writes_manifest(tmp_path) -> None:
+    job_file = tmp_path / "job.yaml"
+    output_dir = tmp_path / "output"
+    _write_job_yaml(job_file, output_dir)
+    args = argparse.Namespace(
+        job_file=str(job_file),
+        output=None,
+        dry_run=False,
+        quiet=True,
+        incremental=True,
+    )
+
+    assert generate_command(args) == 0
+    dcm_file = next(output_dir.glob("*.dcm"))
+    mtime = dcm_file.stat().st_mtime_ns
+    assert generate_command(args) == 0
+
+    assert (output_dir / "generation_manifest.json").exists()
+    assert dcm_file.stat().st_mtime_ns == mtime
+
+
+def test_generate_command_template_cache_dir_saves_parsed_templates(tmp_path) -> None:
+    job_file = tmp_path / "job.yaml"
+    cache_dir = tmp_path / "template_cache"
+    _write_job_yaml(job_file, tmp_path / "output")
+    args = argparse.Namespace(
+        job_file=str(job_file),
+        output=None,
+        dry_run=False,
+        quiet=True,
+        template_cache_dir=str(cache_dir),
+    )
+    # プロセス内のキャッシュにあるとディスクキャッシュを書かない
+    clear_template_cache()
+
+    assert generate_command(args) == 0
+    assert list(cache_dir.glob("*.pickle"))
+
+
+def test_generate_command_workers_overrides_job(tmp_path, capsys) -> None:
+    job_file = tmp_path / "job.yaml"
+    output_dir = tmp_path / "output"
+    _write_job_yaml(job_file, output_dir)
+    args = argparse.Namespace(
+        job_file=str(job_file),
+        output=None,
+        dry_run=True,
+        quiet=False,
+        workers=4,
+    )
+
+    exit_code = generate_command(args)
+    captured = capsys.readouterr()
+
+    assert exit_code == 0
+    assert "Workers: 4" in captured.out
+
+
+def test_generate_command_output_format_writes_archive(tmp_path, capsys) -> None:
+    import tarfile
+
+    job_file = tmp_path / "job.yaml"
+    output_dir = tmp_path / "output"
+    _write_job_yaml(job_file, output_dir)
+    args = argparse.Namespace(
+        job_file=str(job_file),
+        output=None,
+        dry_run=False,
+        quiet=True,
+        output_format="tar",
+    )
+
+    assert generate_command(args) == 0
+
+    archives = list(output_dir.iterdir())
+    assert [path.suffix for path in archives] == [".tar"]
+    assert str(archives[0]) in capsys.readouterr().out
+    with tarfile.open(archives[0]) as tar:
+        assert [name.endswith(".dcm") for name in tar.getnames()] == [True]
+
+
+def test_generate_command_batch_glob_reports_per_job_results(tmp_path, capsys) -> None:
+    jobs_dir = tmp_path / "jobs"
+    jobs_dir.mkdir()
+    _write_job_yaml(jobs_dir / "a.yaml", tmp_path / "out_a")
+    _write_job_yaml(jobs_dir / "b.yaml", tmp_path / "out_b")
+    (jobs_dir / "c.yaml").write_text("job_name: [invalid", encoding="utf-8")
+    args = argparse.Namespace(
+        job_file=[str(jobs_dir / "*.yaml")],
+        output=None,
+        dry_run=False,
+        quiet=True,
+        max_workers=2,
+        jobs=None,
+    )
+
+    exit_code = generate_command(args)
+    out = capsys.readouterr().out
+
+    # 失敗したジョブの終了コード（Job YAML不正 = 2）を返し、他のジョブは生成する
+    assert exit_code == 2
+    assert "Batch summary: 2 succeeded, 1 failed" in out
+    assert f"[FAILED:2] {jobs_dir / 'c.yaml'}" in out
+    assert len(list((tmp_path / "out_a").glob("*.dcm"))) == 1
+    assert len(list((tmp_path / "out_b").glob("*.dcm"))) == 1
+
+
+def test_generate_command_batch_manifest_resolves_patient_id(tmp_path, capsys) -> None:
+    import json
+
+    import yaml
+
+    _write_job_yaml(tmp_path / "job.yaml", tmp_path / "unused")
+    job = yaml.safe_load((tmp_path / "job.yaml").read_text(encoding="utf-8"))
+    del job["patient"]
+    (tmp_path / "job.yaml").write_text(yaml.safe_dump(job), encoding="utf-8")
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text(
+        "\n".join(
+            json.dumps({"job_file": "job.yaml", "job_name": name, "patient_id": pid})
+            for name, pid in [("first", "P000001"), ("second", "P000002")]
+        ),
+        encoding="utf-8",
+    )
+    args = argparse.Namespace(
+        job_file=[str(manifest)],
+        output=str(tmp_path / "out"),
+        dry_run=False,
+        quiet=True,
+    )
+
+    assert generate_command(args) == 0
+    assert "Batch summary: 2 succeeded, 0 failed" in capsys.readouterr().out
+    for name, pid in [("first", "P000001"), ("second", "P000002")]:
+        dcm_file = next((tmp_path / "out" / name).glob("*.dcm"))
+        assert pydicom.dcmread(dcm_file).PatientID == pid
+
+
+def test_cohort_command_generates_studies_per_patient(tmp_path, capsys) -> None:
+    import yaml
+
+    cohort_file = tmp_path / "cohort.yaml"
+    cohort_file.write_text(
+        yaml.safe_dump(
+            {
+                "cohort_name": "cohort",
+                "output_dir": str(tmp_path / "output"),
+                "patients": {"patient_ids": ["P000001", "P000002"]},
+                "studies_per_patient": 2,
+                "study_date_from": "20240101",
+                "study_date_to": "20241231",
+                "job": {
+                    "series_list": [{"series_number": 1, "num_images": 1}],
+                    "modality_template": "fujifilm_scenaria_view_ct",
+                    "pixel_spec": {"mode": "simple_text", "width": 64, "height": 64},
+                    "transfer_syntax": {},
+                    "character_set": {},
+                },
+            }
+        ),
+        encoding="utf-8",
+    )
+    args = argparse.Namespace(
+        cohort_file=str(cohort_file),
+        output=None,
+        dry_run=False,
+        quiet=True,
+        max_workers=2,
+    )
+
+    assert cohort_command(args) == 0
+
+    assert "Batch summary: 4 succeeded, 0 failed" in capsys.readouterr().out
+    dcm_files = sorted((tmp_path / "output").glob("*/*/*.dcm"))
+    assert [path.parent.name for path in dcm_files] == [
+        "C000001",
+        "C000002",
+        "C000003",
+        "C000004",
+    ]
+    datasets = [pydicom.dcmread(path) for path in dcm_files]
+    assert [ds.PatientID for ds in datasets] == ["P000001"] * 2 + ["P000002"] * 2
+    assert len({ds.StudyInstanceUID for ds in datasets}) == 4
+
+
+def test_patients_import_command_writes_database(tmp_path, capsys) -> None:
+    from app.services import PatientLoaderService
+
+    database = tmp_path / "patients.sqlite3"
+    args = argparse.Namespace(master=None, output=str(database))
+
+    assert patients_import_command(args) == 0
+
+    assert f"Imported 100 patients: {database}" in capsys.readouterr().out
+    assert PatientLoaderService(database).find_by_id("P000001").patient_id == "P000001"
+
+
 def test_validate_command_pydantic_validation_error_returns_4(tmp_path) -> None:
     """Pydantic バリデーション失敗時に終了コード 4 を返す."""
     import yaml
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core import (
+    CohortConfig,
+    ConfigurationError,
+    Patient,
+    PatientName,
+    PatientNotFoundError,
+    cohort_patient_filter,
+    expand_cohort,
+    select_cohort_patients,
+)
+
+
+def _patient(patient_id: str, sex: str = "M", birth_date: str = "19800101") -> Patient:
+    return Patient(
+        patient_id=patient_id,
+        patient_name=PatientName(alphabetic="TEST^PATIENT"),
+        birth_date=birth_date,
+        sex=sex,
+    )
+
+
+def _cohort(**overrides) -> CohortConfig:
+    values = {
+        "cohort_name": "cohort",
+        "output_dir": "output",
+        "studies_per_patient": 2,
+        "study_date_from": "20240101",
+        "study_date_to": "20241231",
+        "job": {
+            "study": {"study_description": "CT"},
+            "series_list": [{"series_number": 1, "num_images": 1}],
+            "modality_template": "fujifilm_scenaria_view_ct",
+            "pixel_spec": {"mode": "ct_realistic", "pattern": "noise"},
+            "transfer_syntax": {},
+            "character_set": {},
+        },
+    }
+    values.update(overrides)
+    return CohortConfig.model_validate(values)
+
+
+def test_expand_cohort_is_deterministic() -> None:
+    patients = [_patient("P1"), _patient("P2")]
+
+    configs = list(expand_cohort(_cohort(), patients))
+
+    assert configs == list(expand_cohort(_cohort(), patients))
+    assert [config.study.accession_number for config in configs] == [
+        "C000001",
+        "C000002",
+        "C000003",
+        "C000004",
+    ]
+    assert [config.patient.patient_id for config in configs] == ["P1", "P1", "P2", "P2"]
+    first = configs[0]
+    assert first.job_name == "cohort_C000001"
+    assert first.output_dir.replace("\\", "/") == "output/P1/C000001"
+    assert first.study.study_description == "CT"
+    assert first.study.num_series == 1
+    assert "20240101" <= first.study.study_date <= "20241231"
+    assert "080000" <= first.study.study_time < "180000"
+    # noise のシードも検査ごとに固定され、シードを変えると検査日時も変わる
+    assert len({config.pixel_spec.seed for config in configs}) == 4
+    reseeded = list(expand_cohort(_cohort(seed=1), patients))
+    assert [(c.study.study_date, c.study.study_time) for c in reseeded] != [
+        (c.study.study_date, c.study.study_time) for c in configs
+    ]
+
+
+def test_expand_cohort_skips_patients_born_after_range() -> None:
+    patients = [_patient("P1", birth_date="20240601"), _patient("P2", "F", "20250101")]
+
+    configs = list(expand_cohort(_cohort(studies_per_patient=5), patients))
+
+    assert {config.patient.patient_id for config in configs} == {"P1"}
+    assert all(config.study.study_date >= "20240601" for config in configs)
+
+
+def test_select_cohort_patients_by_ids_and_sex() -> None:
+    patients = [_patient("P1"), _patient("P2", "F"), _patient("P3", "F")]
+
+    selected = select_cohort_patients(
+        _cohort(patients={"patient_ids": ["P3", "P1", "P2"], "sex": "F"}), patients
+    )
+
+    assert [patient.patient_id for patient in selected] == ["P3", "P2"]
+    with pytest.raises(PatientNotFoundError):
+        select_cohort_patients(_cohort(patients={"patient_ids": ["P9"]}), patients)
+
+
+def test_expand_cohort_rejects_too_long_accession_number() -> None:
+    # 接頭辞10文字 + 通し番号7桁（100万検査）は16文字を超える
+    cohort = _cohort(accession_prefix="ACCESSION_", studies_per_patient=1000)
+    patients = [_patient(f"P{index}") for index in range(1000)]
+
+    with pytest.raises(ConfigurationError, match="Accession number"):
+        next(expand_cohort(cohort, patients))
+
+
+def test_expand_cohort_derives_deterministic_uid_seed_per_study() -> None:
+    configs = list(expand_cohort(_cohort(), [_patient("P1"), _patient("P2")]))
+
+    assert {config.uid_method for config in configs} == {"deterministic"}
+    assert len({config.uid_seed for config in configs}) == 4
+    explicit = _cohort(job={**_cohort().job, "uid_method": "uuid_2_25"})
+    assert next(expand_cohort(explicit, [_patient("P1")])).uid_seed is None
+
+
+def test_cohort_patient_filter_keeps_expansion_unchanged() -> None:
+    patients = [
+        _patient("P1", "F", "19800101"),
+        _patient("P2", "M", "19800101"),
+        _patient("P3", "F", "20250101"),
+        _patient("P4", "F", "19900101"),
+    ]
+    cohort = _cohort(patients={"sex": "F"})
+    patient_filter = cohort_patient_filter(cohort)
+    candidates = [patient for patient in patients if patient_filter.matches(patient)]
+
+    assert [patient.patient_id for patient in candidates] == ["P1", "P4"]
+    assert list(expand_cohort(cohort, candidates)) == list(
+        expand_cohort(cohort, patients)
+    )
@@ -5,12 +5,14 @@ import pytest
 
 from app.core.dicom_writer import FileMetaBuilder, SpatialCalculator
 from app.core.exceptions import DICOMBuildError
-from app.core.generator import DICOMBuilder
+from app.core.generator import ENHANCED_CT_IMAGE_STORAGE, DICOMBuilder
 from app.core.models import (
+    GenerationPlan,
     InstanceConfig,
     Patient,
     PatientName,
     SeriesConfig,
+    SeriesPlan,
     StudyConfig,
     UIDContext,
 )
@@ -334,3 +336,151 @@ def test_invalid_calendar_date_raises_error() -> None:
             sop_instance_uid="2.25.107",
             series_instance_uid="2.25.207",
         )
+
+
+def _plan(builder: DICOMBuilder, data: dict, num_images: int = 1) -> GenerationPlan:
+    return GenerationPlan(
+        modality="CT",
+        sop_class_uid="1.2.840.10008.5.1.4.1.1.2",
+        transfer_syntax_uid="1.2.840.10008.1.2.1",
+        implementation_version_name="DICOM_GEN_1.1",
+        filename_prefix="P000001_20240115_CT",
+        attributes=builder.resolve_study_attributes(
+            patient=data["patient"], study_config=data["study"]
+        ),
+        series=(
+            SeriesPlan(
+                num_images=num_images,
+                slice_thickness=5.0,
+                slice_spacing=5.0,
+                start_z=0.0,
+                attributes=builder.resolve_series_attributes(
+                    series_config=data["series"],
+                    image_orientation_patient=data["spatial"].image_orientation_patient,
+                    pixel_spacing=data["spatial"].pixel_spacing,
+                ),
+            ),
+        ),
+    )
+
+
+def test_build_from_plan_matches_build_ct_image() -> None:
+    data = _base_inputs()
+    builder = DICOMBuilder()
+    file_meta = FileMetaBuilder().build(
+        sop_class_uid="1.2.840.10008.5.1.4.1.1.2",
+        sop_instance_uid="2.25.103",
+        transfer_syntax_uid="1.2.840.10008.1.2.1",
+        implementation_class_uid=data["uid_context"].implementation_class_uid,
+        implementation_version_name="DICOM_GEN_1.1",
+    )
+    plan = _plan(builder, data)
+
+    expected = builder.build_ct_image(
+        patient=data["patient"],
+        study_config=data["study"],
+        series_config=data["series"],
+        instance_config=data["instance"],
+        uid_context=data["uid_context"],
+        spatial=data["spatial"],
+        pixel_data=data["pixels"],
+        file_meta=file_meta,
+        sop_instance_uid="2.25.103",
+        series_instance_uid="2.25.203",
+    )
+    actual = builder.build_ct_image_from_plan(
+        plan=plan,
+        series_index=0,
+        uid_context=data["uid_context"],
+        spatial=data["spatial"],
+        pixel_data=data["pixels"],
+        file_meta=file_meta,
+        sop_instance_uid="2.25.103",
+        series_instance_uid="2.25.203",
+    )
+
+    assert actual == expected
+    assert actual.SpecificCharacterSet == ["ISO 2022 IR 6", "ISO 2022 IR 87"]
+    assert actual.PatientAge == "044Y"
+
+
+def test_build_enhanced_ct_from_plan_uses_functional_groups() -> None:
+    data = _base_inputs()
+    builder = DICOMBuilder()
+    file_meta = FileMetaBuilder().build(
+        sop_class_uid=ENHANCED_CT_IMAGE_STORAGE,
+        sop_instance_uid="2.25.104",
+        transfer_syntax_uid="1.2.840.10008.1.2.1",
+        implementation_class_uid=data["uid_context"].implementation_class_uid,
+        implementation_version_name="DICOM_GEN_1.1",
+    )
+
+    dataset = builder.build_enhanced_ct_from_plan(
+        plan=_plan(builder, data, num_images=5),
+        series_index=0,
+        uid_context=data["uid_context"],
+        frame_positions=[(0.0, 0.0, 10.0), (0.0, 0.0, 15.0)],
+        file_meta=file_meta,
+        sop_instance_uid="2.25.104",
+        series_instance_uid="2.25.204",
+        instance_number=2,
+        rows=8,
+        columns=8,
+        first_in_stack_position=3,
+    )
+
+    assert dataset.SOPClassUID == ENHANCED_CT_IMAGE_STORAGE
+    assert dataset.NumberOfFrames == 2
+    assert dataset.BitsAllocated == 16
+    assert "PixelData" not in dataset
+    # フレーム共通の属性はトップレベルではなく共有機能グループに置く
+    assert "ImageOrientationPatient" not in dataset
+    shared = dataset.SharedFunctionalGroupsSequence[0]
+    assert shared.PixelMeasuresSequence[0].SliceThickness == 5.0
+    assert len(shared.PlaneOrientationSequence[0].ImageOrientationPatient) == 6
+
+    per_frame = dataset.PerFrameFunctionalGroupsSequence
+    assert len(per_frame) == 2
+    assert [
+        item.FrameContentSequence[0].InStackPositionNumber for item in per_frame
+    ] == [3, 4]
+    assert [
+        float(item.PlanePositionSequence[0].ImagePositionPatient[2])
+        for item in per_frame
+    ] == [10.0, 15.0]
+
+
+def test_build_enhanced_ct_from_plan_rejects_other_sop_class() -> None:
+    data = _base_inputs()
+    builder = DICOMBuilder()
+    file_meta = FileMetaBuilder().build(
+        sop_class_uid="1.2.840.10008.5.1.4.1.1.2",
+        sop_instance_uid="2.25.105",
+        transfer_syntax_uid="1.2.840.10008.1.2.1",
+        implementation_class_uid=data["uid_context"].implementation_class_uid,
+        implementation_version_name="DICOM_GEN_1.1",
+    )
+
+    with pytest.raises(DICOMBuildError):
+        builder.build_enhanced_ct_from_plan(
+            plan=_plan(builder, data),
+            series_index=0,
+            uid_context=data["uid_context"],
+            frame_positions=[(0.0, 0.0, 0.0)],
+            file_meta=file_meta,
+            sop_instance_uid="2.25.105",
+            series_instance_uid="2.25.205",
+            instance_number=1,
+            rows=8,
+            columns=8,
+        )
+
+
+def test_resolve_study_attributes_propagates_patient_age_error() -> None:
+    data = _base_inputs()
+    study = data["study"].model_copy(update={"study_date": "19700101"})
+
+    with pytest.raises(DICOMBuildError, match="study_date must be on or after"):
+        DICOMBuilder().resolve_study_attributes(
+            patient=data["patient"], study_config=study
+        )
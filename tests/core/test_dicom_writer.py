@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import pytest
+
 from app.core.dicom_writer import FileMetaBuilder, SpatialCalculator
 
 
@@ -73,3 +75,41 @@ def test_spatial_calculator_default_orientation() -> None:
     spatial = calculator.calculate(0)
 
     assert spatial.image_orientation_patient == [1.0, 0.0, 0.0, 0.0, 1.0, 0.0]
+
+
+def test_spatial_calculator_z_positions_match_calculate() -> None:
+    calc = SpatialCalculator(slice_thickness=1.25, slice_spacing=0.625, start_z=-10.1)
+
+    z_positions = calc.z_positions(start_index=3, count=5)
+
+    assert z_positions.tolist() == [calc.calculate(i).slice_location for i in range(3, 8)]
+
+
+def test_spatial_calculator_position_matches_calculate() -> None:
+    calc = SpatialCalculator(slice_thickness=1.25, slice_spacing=0.625, start_z=-10.1)
+
+    for index in (0, 1, 7):
+        position = calc.position(index)
+        spatial = calc.calculate(index)
+        assert position.instance_number == spatial.instance_number
+        assert (
+            list(position.image_position_patient) == spatial.image_position_patient
+        )
+        assert position.slice_location == spatial.slice_location
+        assert list(position.image_orientation_patient) == (
+            spatial.image_orientation_patient
+        )
+        assert list(position.pixel_spacing) == spatial.pixel_spacing
+
+
+def test_spatial_calculator_calculate_batch_matches_calculate() -> None:
+    calc = SpatialCalculator(slice_thickness=5.0, slice_spacing=2.5, start_z=10.0)
+
+    batch = calc.calculate_batch(start_index=4, count=3)
+
+    assert batch.instance_numbers.tolist() == [5, 6, 7]
+    assert batch.z_positions.tolist() == [
+        calc.calculate(i).slice_location for i in range(4, 7)
+    ]
+    with pytest.raises(ValueError):
+        calc.calculate_batch(start_index=-1, count=2)
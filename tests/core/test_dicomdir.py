@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from io import BytesIO
+
+import pydicom
+import pytest
+from pydicom.dataset import FileMetaDataset
+
+from app.core import (
+    CT_IMAGE_STORAGE,
+    EXPLICIT_VR_LITTLE_ENDIAN,
+    MEDIA_STORAGE_DIRECTORY_STORAGE,
+    DICOMBuildError,
+    DicomdirImage,
+    DicomdirSeries,
+    encode_dicomdir,
+)
+
+_STUDY_ATTRIBUTES = (
+    ("SpecificCharacterSet", ("ISO 2022 IR 6", "ISO 2022 IR 87")),
+    ("PatientName", "YAMADA^TARO=山田^太郎"),
+    ("PatientID", "P000001"),
+    ("PatientBirthDate", "20000101"),
+    ("PatientSex", "M"),
+    ("StudyDate", "20240115"),
+    ("StudyTime", "120000"),
+    ("AccessionNumber", "ACC000001"),
+    ("StudyID", ""),
+    ("Modality", "CT"),
+    ("StudyInstanceUID", "2.25.1"),
+)
+
+
+def _file_meta() -> FileMetaDataset:
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = MEDIA_STORAGE_DIRECTORY_STORAGE
+    file_meta.MediaStorageSOPInstanceUID = "2.25.2"
+    file_meta.TransferSyntaxUID = EXPLICIT_VR_LITTLE_ENDIAN
+    file_meta.ImplementationClassUID = "2.25.3"
+    return file_meta
+
+
+def _series(series_number: int, n_images: int) -> DicomdirSeries:
+    return DicomdirSeries(
+        attributes=(
+            ("SeriesInstanceUID", f"2.25.{series_number}0"),
+            ("SeriesNumber", str(series_number)),
+            ("SeriesDescription", "頭部"),
+        ),
+        sop_class_uid=CT_IMAGE_STORAGE,
+        transfer_syntax_uid="1.2.840.10008.1.2",
+        images=[
+            DicomdirImage(
+                file_id=f"S{series_number}_{index:04d}.dcm",
+                sop_instance_uid=f"2.25.{series_number}0{index}",
+                instance_number=index + 1,
+            )
+            for index in range(n_images)
+        ],
+    )
+
+
+def _linked_records(dicomdir, offset: int) -> list:
+    """オフセットをたどり、同じ階層のレコードを下位階層のレコードと組にして並べる."""
+    records_by_offset = {
+        record.seq_item_tell: record for record in dicomdir.DirectoryRecordSequence
+    }
+    linked = []
+    while offset:
+        record = records_by_offset[offset]
+        lower_offset = record.OffsetOfReferencedLowerLevelDirectoryEntity
+        linked.append((record, _linked_records(dicomdir, lower_offset)))
+        offset = record.OffsetOfTheNextDirectoryRecord
+    return linked
+
+
+def test_encode_dicomdir_links_records_by_offset() -> None:
+    series = [_series(1, 3), _series(2, 2)]
+
+    data = encode_dicomdir(_file_meta(), _STUDY_ATTRIBUTES, series)
+
+    dicomdir = pydicom.dcmread(BytesIO(data))
+    assert dicomdir.file_meta.MediaStorageSOPClassUID == MEDIA_STORAGE_DIRECTORY_STORAGE
+    records = dicomdir.DirectoryRecordSequence
+    assert [record.DirectoryRecordType for record in records] == [
+        "PATIENT",
+        "STUDY",
+        "SERIES",
+        *["IMAGE"] * 3,
+        "SERIES",
+        *["IMAGE"] * 2,
+    ]
+    assert dicomdir.OffsetOfTheLastDirectoryRecordOfTheRootDirectoryEntity == (
+        records[0].seq_item_tell
+    )
+    # オフセットをたどって患者 → スタディ → シリーズ → 画像の階層を復元できる
+    [(patient, studies)] = _linked_records(
+        dicomdir, dicomdir.OffsetOfTheFirstDirectoryRecordOfTheRootDirectoryEntity
+    )
+    assert patient.PatientID == "P000001"
+    assert patient.PatientName == "YAMADA^TARO=山田^太郎"
+    [(study, series_records)] = studies
+    assert study.StudyInstanceUID == "2.25.1"
+    assert [record.SeriesNumber for record, _ in series_records] == [1, 2]
+    assert series_records[0][0].SeriesDescription == "頭部"
+    images = [image for image, _ in series_records[0][1]]
+    assert [image.ReferencedFileID for image in images] == [
+        "S1_0000.dcm",
+        "S1_0001.dcm",
+        "S1_0002.dcm",
+    ]
+    assert [image.InstanceNumber for image in images] == [1, 2, 3]
+    assert images[2].ReferencedSOPInstanceUIDInFile == "2.25.102"
+    assert images[0].ReferencedTransferSyntaxUIDInFile == "1.2.840.10008.1.2"
+    assert len(series_records[1][1]) == 2
+    # 各階層の末尾のレコードは次のレコードを持たない
+    assert records[-1].OffsetOfTheNextDirectoryRecord == 0
+    assert records[-1].OffsetOfReferencedLowerLevelDirectoryEntity == 0
+
+
+def test_encode_dicomdir_splits_file_id_components() -> None:
+    series = _series(1, 1)._replace(
+        images=[DicomdirImage("SUBDIR/IM0001", "2.25.100", 1)]
+    )
+
+    data = encode_dicomdir(_file_meta(), _STUDY_ATTRIBUTES, [series])
+
+    dicomdir = pydicom.dcmread(BytesIO(data))
+
+    image = dicomdir.DirectoryRecordSequence[-1]
+    assert image.ReferencedFileID == ["SUBDIR", "IM0001"]
+
+
+def test_encode_dicomdir_rejects_non_ascii_file_id() -> None:
+    series = _series(1, 1)._replace(images=[DicomdirImage("画像.dcm", "2.25.100", 1)])
+
+    with pytest.raises(DICOMBuildError, match="DICOMDIR"):
+        encode_dicomdir(_file_meta(), _STUDY_ATTRIBUTES, [series])
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import pickle
+
 from app.core.exceptions import (
     DICOMBuildError,
     DICOMGeneratorError,
@@ -81,3 +83,13 @@ def test_job_schema_error() -> None:
     exc = JobSchemaError(errors)
 
     assert exc.details["errors"] == errors
+
+
+def test_exception_pickle_roundtrip_keeps_details() -> None:
+    exc = FileWriteError("/tmp/out.dcm", "disk full")
+
+    restored = pickle.loads(pickle.dumps(exc))
+
+    assert type(restored) is FileWriteError
+    assert str(restored) == str(exc)
+    assert restored.details == exc.details
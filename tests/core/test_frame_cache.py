@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.core.exceptions import PixelGenerationError
+from app.core.frame_cache import FrameCache, FrameKey
+
+
+def _key(width: int = 64, pattern: str = "gradient") -> FrameKey:
+    return FrameKey(width=width, height=64, pattern=pattern, bits_stored=12, dtype="int16")
+
+
+def _frame(value: int = 1, width: int = 64) -> np.ndarray:
+    return np.full((64, width), value, dtype=np.int16)
+
+
+def test_get_or_create_counts_hits_and_misses() -> None:
+    cache = FrameCache()
+    calls = []
+
+    def factory() -> np.ndarray:
+        calls.append(1)
+        return _frame()
+
+    first = cache.get_or_create(_key(), factory)
+    second = cache.get_or_create(_key(), factory)
+
+    assert first is second
+    assert len(calls) == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cached_frame_is_read_only_with_little_endian_bytes() -> None:
+    cache = FrameCache()
+
+    frame = cache.get_or_create(_key(), lambda: _frame(value=0x0102))
+
+    assert not frame.array.flags.writeable
+    assert frame.data[:2] == b"\x02\x01"
+    assert frame.data == frame.array.astype("<i2").tobytes()
+
+
+def test_encoded_frame_is_cached_per_transfer_syntax() -> None:
+    cache = FrameCache()
+    rle_key = _key()._replace(transfer_syntax_uid="1.2.840.10008.1.2.5")
+
+    native = cache.get_or_create(_key(), _frame)
+    encoded = cache.get_or_create(rle_key, _frame, encoder=lambda array: b"encoded")
+
+    assert encoded.data == b"encoded"
+    assert native.data == native.array.tobytes()
+    assert cache.get_or_create(rle_key, _frame, encoder=lambda array: b"x") is encoded
+    assert cache.current_bytes == native.nbytes + encoded.nbytes
+
+
+def test_source_array_is_not_frozen() -> None:
+    cache = FrameCache()
+    source = _frame()
+
+    cache.get_or_create(_key(), lambda: source)
+
+    assert source.flags.writeable
+
+
+def test_least_recently_used_frame_is_evicted() -> None:
+    frame_bytes = _frame().nbytes * 2
+    cache = FrameCache(max_bytes=frame_bytes * 2)
+
+    cache.get_or_create(_key(pattern="a"), _frame)
+    cache.get_or_create(_key(pattern="b"), _frame)
+    cache.get_or_create(_key(pattern="a"), _frame)
+    cache.get_or_create(_key(pattern="c"), _frame)
+
+    assert len(cache) == 2
+    assert cache.current_bytes <= cache.max_bytes
+    cache.get_or_create(_key(pattern="a"), _frame)
+    assert cache.hits == 2
+    cache.get_or_create(_key(pattern="b"), _frame)
+    assert cache.misses == 4
+
+
+def test_frame_larger_than_budget_is_not_cached() -> None:
+    cache = FrameCache(max_bytes=0)
+
+    cache.get_or_create(_key(), _frame)
+    cache.get_or_create(_key(), _frame)
+
+    assert len(cache) == 0
+    assert cache.misses == 2
+
+
+def test_negative_budget_raises_error() -> None:
+    with pytest.raises(PixelGenerationError):
+        FrameCache(max_bytes=-1)
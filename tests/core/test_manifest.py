@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from app.core import (
+    AbnormalConfig,
+    GenerationPlan,
+    ImageStorageConfig,
+    PixelSpecCTRealistic,
+    SeriesPlan,
+    series_config_hash,
+    study_config_hash,
+)
+
+
+def _plan(patient_id: str = "P000001") -> GenerationPlan:
+    return GenerationPlan(
+        modality="CT",
+        sop_class_uid="1.2.840.10008.5.1.4.1.1.2",
+        transfer_syntax_uid="1.2.840.10008.1.2",
+        implementation_version_name="DICOM_GEN_1.1",
+        filename_prefix=f"{patient_id}_20240115_CT",
+        attributes=(("PatientID", patient_id),),
+        series=(
+            SeriesPlan(num_images=2, slice_thickness=5.0, slice_spacing=5.0, start_z=0.0),
+        ),
+    )
+
+
+def _study_hash(
+    plan: GenerationPlan,
+    seed: int | None = 1,
+    image_storage: ImageStorageConfig | None = None,
+) -> str:
+    return study_config_hash(
+        plan,
+        PixelSpecCTRealistic(pattern="noise", seed=seed),
+        image_storage or ImageStorageConfig(),
+        AbnormalConfig(),
+        "uuid_2_25",
+        None,
+    )
+
+
+def test_study_config_hash_is_stable_and_content_sensitive() -> None:
+    assert _study_hash(_plan()) == _study_hash(_plan())
+    assert _study_hash(_plan()) != _study_hash(_plan("P000002"))
+    assert _study_hash(_plan(), seed=1) != _study_hash(_plan(), seed=2)
+    assert _study_hash(_plan()) != _study_hash(
+        _plan(), image_storage=ImageStorageConfig(mode="enhanced_multiframe")
+    )
+
+
+def test_series_config_hash_depends_on_series_and_file_layout() -> None:
+    study_hash = _study_hash(_plan())
+    series_plan = _plan().series[0]
+    base = series_config_hash(study_hash, series_plan, 1, 4)
+
+    assert base == series_config_hash(study_hash, series_plan, 1, 4)
+    assert base != series_config_hash(study_hash, series_plan, 3, 4)
+    assert base != series_config_hash(study_hash, series_plan, 1, 5)
+    assert base != series_config_hash(
+        study_hash, series_plan.model_copy(update={"num_images": 3}), 1, 4
+    )
@@ -1,18 +1,26 @@
 from __future__ import annotations
 
+import pickle
+
 import pytest
 from pydantic import ValidationError
 
 from app.core.models import (
     AbnormalConfig,
     CharacterSetConfig,
+    CohortConfig,
+    ExecutionConfig,
     GenerationConfig,
+    GenerationPlan,
+    ImageStorageConfig,
     InstanceConfig,
     Patient,
+    PatientFilter,
     PatientName,
     PixelSpecCTRealistic,
     PixelSpecSimple,
     SeriesConfig,
+    SeriesPlan,
     SpatialCoordinates,
     StudyConfig,
     TransferSyntaxConfig,
@@ -178,6 +186,19 @@ def test_pixel_spec_ct_realistic_defaults() -> None:
     assert pixel_spec.height == 512
     assert pixel_spec.pattern == "gradient"
     assert pixel_spec.bits_stored == 12
+    assert pixel_spec.seed is None
+
+
+def test_pixel_spec_ct_realistic_negative_seed_is_invalid() -> None:
+    with pytest.raises(ValidationError):
+        PixelSpecCTRealistic(pattern="noise", seed=-1)
+
+
+def test_image_storage_config_frames_per_file() -> None:
+    assert ImageStorageConfig().frames_per_file == 1
+    assert ImageStorageConfig(frames_per_object=8).frames_per_file == 1
+    enhanced = ImageStorageConfig(mode="enhanced_multiframe", frames_per_object=8)
+    assert enhanced.frames_per_file == 8
 
 
 def test_transfer_syntax_config_defaults() -> None:
@@ -187,6 +208,13 @@ def test_transfer_syntax_config_defaults() -> None:
     assert transfer_syntax.name == "Implicit VR Little Endian"
     assert transfer_syntax.is_implicit_vr is True
     assert transfer_syntax.is_little_endian is True
+    assert transfer_syntax.deflate_level == 6
+
+
+@pytest.mark.parametrize("level", [-1, 10])
+def test_transfer_syntax_config_invalid_deflate_level(level: int) -> None:
+    with pytest.raises(ValidationError):
+        TransferSyntaxConfig(deflate_level=level)
 
 
 def test_character_set_config_defaults() -> None:
@@ -205,6 +233,22 @@ def test_abnormal_config_defaults() -> None:
     assert abnormal.invalid_sop_uid_probability == 0.1
 
 
+def test_execution_config_defaults() -> None:
+    execution = ExecutionConfig()
+
+    assert execution.workers == 1
+    assert execution.write_workers == 2
+    assert execution.max_in_flight == 8
+    assert execution.frame_cache_mb == 256
+    assert execution.fast_encoder is False
+    assert execution.compress_workers == 4
+
+
+def test_execution_config_invalid_workers() -> None:
+    with pytest.raises(ValidationError):
+        ExecutionConfig(workers=0)
+
+
 def test_generation_config_valid() -> None:
     config = GenerationConfig(
         job_name="job-001",
@@ -285,6 +329,33 @@ def test_generation_config_minimal() -> None:
     assert config.uid_method == "uuid_2_25"
     assert config.uid_custom_root is None
     assert config.abnormal.level == "none"
+    assert config.execution.workers == 1
+
+
+def test_generation_config_enhanced_multiframe_requires_ct_realistic() -> None:
+    with pytest.raises(ValidationError, match="requires pixel_spec.mode ct_realistic"):
+        GenerationConfig(
+            job_name="job-enhanced",
+            output_dir="/tmp/output",
+            patient=Patient(
+                patient_id="P000001",
+                patient_name=PatientName(alphabetic="YAMADA^TARO"),
+                birth_date="19800115",
+                sex="M",
+            ),
+            study=StudyConfig(
+                accession_number="ACC000001",
+                study_date="20240115",
+                study_time="120000",
+                num_series=1,
+            ),
+            series_list=[SeriesConfig(series_number=1, num_images=1)],
+            modality_template="ct_default",
+            pixel_spec=PixelSpecSimple(),
+            image_storage=ImageStorageConfig(mode="enhanced_multiframe"),
+            transfer_syntax=TransferSyntaxConfig(),
+            character_set=CharacterSetConfig(),
+        )
 
 
 def test_generation_config_invalid_series_list_empty() -> None:
@@ -360,3 +431,128 @@ def test_generation_config_study_date_before_birth_date_is_invalid() -> None:
             transfer_syntax=TransferSyntaxConfig(),
             character_set=CharacterSetConfig(),
         )
+
+
+def test_generation_plan_is_frozen_and_picklable() -> None:
+    plan = GenerationPlan(
+        modality="CT",
+        sop_class_uid="1.2.840.10008.5.1.4.1.1.2",
+        transfer_syntax_uid="1.2.840.10008.1.2.1",
+        implementation_version_name="DICOM_GEN_1.1",
+        filename_prefix="P000001_20240115_CT",
+        attributes=[("PatientID", "P000001"), ("SpecificCharacterSet", ["A", "B"])],
+        series=[
+            SeriesPlan(
+                num_images=2,
+                slice_thickness=5.0,
+                slice_spacing=5.0,
+                start_z=0.0,
+                attributes=[("SeriesNumber", "1")],
+            )
+        ],
+    )
+
+    assert plan.attributes[1] == ("SpecificCharacterSet", ("A", "B"))
+    assert pickle.loads(pickle.dumps(plan)) == plan
+    with pytest.raises(ValidationError):
+        plan.modality = "MR"
+
+
+def test_cohort_config_rejects_reversed_study_date_range() -> None:
+    with pytest.raises(ValidationError, match="study_date_to must be on or after"):
+        CohortConfig(
+            cohort_name="cohort",
+            output_dir="output",
+            study_date_from="20240201",
+            study_date_to="20240101",
+            job={},
+        )
+
+
+def test_generation_config_deterministic_uid_requires_seed() -> None:
+    values = {
+        "job_name": "test",
+        "output_dir": "output",
+        "patient": {
+            "patient_id": "P000001",
+            "patient_name": {"alphabetic": "TEST^PATIENT"},
+            "birth_date": "20000101",
+            "sex": "M",
+        },
+        "study": {
+            "accession_number": "ACC000001",
+            "study_date": "20240115",
+            "study_time": "120000",
+            "num_series": 1,
+        },
+        "series_list": [{"series_number": 1, "num_images": 1}],
+        "modality_template": "ct_default",
+        "pixel_spec": {"mode": "simple_text"},
+        "transfer_syntax": {},
+        "character_set": {},
+        "uid_method": "deterministic",
+    }
+
+    with pytest.raises(ValidationError, match="uid_seed is required"):
+        GenerationConfig.model_validate(values)
+    assert GenerationConfig.model_validate({**values, "uid_seed": "s"}).uid_seed == "s"
+    with pytest.raises(ValidationError, match="uid_counter_store requires"):
+        GenerationConfig.model_validate(
+            {**values, "uid_seed": "s", "uid_counter_store": "uids.sqlite3"}
+        )
+
+
+@pytest.mark.parametrize("reference_date", ["20240228", "20240229", "20250228"])
+def test_patient_filter_age_bounds_match_patient_age(reference_date: str) -> None:
+    from datetime import date, timedelta
+
+    from app.core.generator import DICOMBuilder
+
+    builder = DICOMBuilder.__new__(DICOMBuilder)
+    bounds = {
+        age: (
+            PatientFilter(min_age=age, reference_date=reference_date)
+            .birth_date_bounds()[1],
+            PatientFilter(max_age=age, reference_date=reference_date)
+            .birth_date_bounds()[0],
+        )
+        for age in range(6)
+    }
+    birth = date(2018, 1, 1)
+    while birth.strftime("%Y%m%d") <= reference_date:
+        birth_date = birth.strftime("%Y%m%d")
+        age = int(builder._calculate_patient_age(birth_date, reference_date)[:3])
+        for threshold, (latest, earliest) in bounds.items():
+            assert (birth_date <= latest) == (age >= threshold)
+            assert (birth_date >= earliest) == (age <= threshold)
+        birth += timedelta(days=1)
+
+
+def test_patient_filter_requires_reference_date_for_ages() -> None:
+    with pytest.raises(ValidationError):
+        PatientFilter(min_age=20)
+    with pytest.raises(ValidationError):
+        PatientFilter(min_age=30, max_age=20, reference_date="20240101")
+
+    bounded = PatientFilter(
+        birth_date_from="19900101", min_age=20, reference_date="20240101"
+    )
+
+    assert bounded.birth_date_bounds() == ("19900101", "20040102")
+    assert bounded.matches(
+        Patient(
+            patient_id="P",
+            patient_name=PatientName(alphabetic="TEST"),
+            birth_date="20040102",
+            sex="F",
+        )
+    )
+    assert not PatientFilter(sex="M").matches(
+        Patient(
+            patient_id="P",
+            patient_name=PatientName(alphabetic="TEST"),
+            birth_date="20040102",
+            sex="F",
+        )
+    )
+    assert PatientFilter().birth_date_bounds() == (None, None)
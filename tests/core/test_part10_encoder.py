@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+from io import BytesIO
+
+import numpy as np
+import pydicom
+import pytest
+
+from app.core.dicom_writer import FileMetaBuilder, SpatialCalculator
+from app.core.exceptions import DICOMBuildError
+from app.core.generator import CT_IMAGE_STORAGE, DICOMBuilder
+from app.core.models import (
+    InstanceConfig,
+    Patient,
+    PatientName,
+    SeriesConfig,
+    StudyConfig,
+    UIDContext,
+)
+from app.core.part10_encoder import (
+    DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN,
+    Part10Template,
+    deflate_part10,
+    encode_part10,
+    encode_streaming_header,
+)
+from app.core.rle_encoder import (
+    ENCAPSULATED_PIXEL_DATA_END,
+    RLE_LOSSLESS,
+    encapsulated_item,
+    rle_encode_frame,
+)
+
+PATIENT = Patient(
+    patient_id="P000001",
+    patient_name=PatientName(
+        alphabetic="YAMADA^TARO",
+        ideographic="山田^太郎",
+        phonetic="ヤマダ^タロウ",
+    ),
+    birth_date="19800115",
+    sex="M",
+)
+STUDY = StudyConfig(
+    accession_number="ACC000001",
+    study_date="20240115",
+    study_time="120000",
+    num_series=1,
+)
+UID_CONTEXT = UIDContext(
+    study_instance_uid="2.25.1",
+    frame_of_reference_uid="2.25.2",
+    implementation_class_uid="2.25.3",
+    instance_creator_uid="2.25.4",
+)
+
+
+def _build(
+    transfer_syntax_uid: str,
+    sop_instance_uid: str,
+    index: int,
+    pixels: np.ndarray,
+    bits_stored: int,
+):
+    file_meta = FileMetaBuilder().build(
+        sop_class_uid=CT_IMAGE_STORAGE,
+        sop_instance_uid=sop_instance_uid,
+        transfer_syntax_uid=transfer_syntax_uid,
+        implementation_class_uid=UID_CONTEXT.implementation_class_uid,
+        implementation_version_name="DICOM_GEN_1.1",
+    )
+    spatial = SpatialCalculator(
+        slice_thickness=1.25, slice_spacing=0.625, start_z=-10.5
+    ).calculate(index)
+    dataset = DICOMBuilder().build_ct_image(
+        patient=PATIENT,
+        study_config=STUDY,
+        series_config=SeriesConfig(series_number=1, num_images=10),
+        instance_config=InstanceConfig(instance_number=index + 1),
+        uid_context=UID_CONTEXT,
+        spatial=spatial,
+        pixel_data=pixels,
+        file_meta=file_meta,
+        sop_instance_uid=sop_instance_uid,
+        series_instance_uid="2.25.200",
+        bits_stored=bits_stored,
+    )
+    return dataset, spatial
+
+
+@pytest.mark.parametrize(
+    "transfer_syntax_uid",
+    ["1.2.840.10008.1.2", "1.2.840.10008.1.2.1", "1.2.840.10008.1.2.2"],
+)
+@pytest.mark.parametrize(
+    ("pixels", "bits_stored"),
+    [
+        (np.arange(63, dtype=np.uint8).reshape(7, 9), 8),
+        (np.arange(64, dtype=np.int16).reshape(8, 8) - 32, 12),
+    ],
+    ids=["uint8-odd-length", "int16"],
+)
+def test_encode_is_byte_identical_to_dcmwrite(
+    transfer_syntax_uid: str, pixels: np.ndarray, bits_stored: int
+) -> None:
+    prototype, _ = _build(transfer_syntax_uid, "2.25.100", 0, pixels, bits_stored)
+    template = Part10Template.from_dataset(prototype)
+
+    # UID の奇数長・偶数長とスライス位置の桁数変化を含める
+    for index, sop_instance_uid in enumerate(["2.25.100", "2.25.1001", "2.25.10012"]):
+        dataset, spatial = _build(
+            transfer_syntax_uid, sop_instance_uid, index, pixels, bits_stored
+        )
+        expected = BytesIO()
+        pydicom.dcmwrite(expected, dataset, enforce_file_format=True)
+
+        actual = template.encode(
+            sop_instance_uid=sop_instance_uid,
+            instance_number=spatial.instance_number,
+            image_position_patient=spatial.image_position_patient,
+            slice_location=spatial.slice_location,
+            pixel_bytes=pixels.tobytes(),
+        )
+
+        assert actual == expected.getvalue()
+
+
+def test_from_dataset_missing_variable_element_raises_error() -> None:
+    pixels = np.zeros((4, 4), dtype=np.uint8)
+    dataset, _ = _build("1.2.840.10008.1.2.1", "2.25.100", 0, pixels, 8)
+    del dataset.SliceLocation
+
+    with pytest.raises(DICOMBuildError, match="missing elements: SliceLocation"):
+        Part10Template.from_dataset(dataset)
+
+
+
+@pytest.mark.parametrize(
+    "transfer_syntax_uid",
+    ["1.2.840.10008.1.2", "1.2.840.10008.1.2.1", "1.2.840.10008.1.2.2"],
+)
+def test_encode_streaming_header_matches_dcmwrite(transfer_syntax_uid: str) -> None:
+    pixels = np.arange(64, dtype=np.int16).reshape(8, 8) - 32
+    dataset, _ = _build(transfer_syntax_uid, "2.25.100", 0, pixels, 12)
+    expected = BytesIO()
+    pydicom.dcmwrite(expected, dataset, enforce_file_format=True)
+    pixel_bytes = dataset.PixelData
+    del dataset.PixelData
+
+    header = encode_streaming_header(dataset, len(pixel_bytes))
+
+    assert header + pixel_bytes == expected.getvalue()
+
+
+def test_encode_streaming_header_rejects_pixel_data() -> None:
+    pixels = np.zeros((4, 4), dtype=np.int16)
+    dataset, _ = _build("1.2.840.10008.1.2.1", "2.25.100", 0, pixels, 12)
+
+    with pytest.raises(DICOMBuildError, match="must not contain Pixel Data"):
+        encode_streaming_header(dataset, 32)
+
+
+def test_encode_rle_is_byte_identical_to_dcmwrite() -> None:
+    pixels = np.arange(64, dtype=np.int16).reshape(8, 8) // 8
+    prototype, _ = _build(RLE_LOSSLESS, "2.25.100", 0, pixels, 12)
+    template = Part10Template.from_dataset(prototype)
+
+    for index, sop_instance_uid in enumerate(["2.25.100", "2.25.1001"]):
+        dataset, spatial = _build(RLE_LOSSLESS, sop_instance_uid, index, pixels, 12)
+        expected = BytesIO()
+        pydicom.dcmwrite(expected, dataset, enforce_file_format=True)
+
+        actual = template.encode(
+            sop_instance_uid=sop_instance_uid,
+            instance_number=spatial.instance_number,
+            image_position_patient=spatial.image_position_patient,
+            slice_location=spatial.slice_location,
+            pixel_bytes=dataset.PixelData,
+        )
+
+        assert actual == expected.getvalue()
+        assert (pydicom.dcmread(BytesIO(actual)).pixel_array == pixels).all()
+
+
+def test_encode_streaming_header_rle_matches_dcmwrite() -> None:
+    pixels = np.arange(64, dtype=np.int16).reshape(8, 8) // 8
+    dataset, _ = _build(RLE_LOSSLESS, "2.25.100", 0, pixels, 12)
+    expected = BytesIO()
+    pydicom.dcmwrite(expected, dataset, enforce_file_format=True)
+    del dataset.PixelData
+
+    header = encode_streaming_header(dataset, 0)
+    streamed = (
+        header + encapsulated_item(rle_encode_frame(pixels)) + ENCAPSULATED_PIXEL_DATA_END
+    )
+
+    assert streamed == expected.getvalue()
+
+
+def test_deflate_part10_matches_dcmwrite() -> None:
+    pixels = np.arange(64, dtype=np.int16).reshape(8, 8)
+    prototype, _ = _build(DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN, "2.25.100", 0, pixels, 12)
+    template = Part10Template.from_dataset(prototype)
+
+    for index, sop_instance_uid in enumerate(["2.25.100", "2.25.1001"]):
+        dataset, spatial = _build(
+            DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN, sop_instance_uid, index, pixels, 12
+        )
+        expected = BytesIO()
+        pydicom.dcmwrite(expected, dataset, enforce_file_format=True)
+        encoded = template.encode(
+            sop_instance_uid=sop_instance_uid,
+            instance_number=spatial.instance_number,
+            image_position_patient=spatial.image_position_patient,
+            slice_location=spatial.slice_location,
+            pixel_bytes=pixels.tobytes(),
+        )
+
+        # 圧縮前のバイト列はテンプレートと pydicom のエンコードで一致する
+        assert encoded == encode_part10(dataset)
+        assert deflate_part10(encoded, 6) == expected.getvalue()
+
+    best = pydicom.dcmread(BytesIO(deflate_part10(encoded, 9)))
+    assert best.SOPInstanceUID == "2.25.1001"
+    assert (best.pixel_array == pixels).all()
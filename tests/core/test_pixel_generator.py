@@ -4,6 +4,7 @@ import numpy as np
 import pytest
 
 from app.core.exceptions import PixelGenerationError
+from app.core.glyph_atlas import GlyphAtlas
 from app.core.pixel_generator import PixelGenerator
 
 
@@ -33,6 +34,65 @@ def test_simple_text_has_nonzero_pixels() -> None:
     assert np.any(pixels > 0)
 
 
+def test_simple_text_honors_colors() -> None:
+    generator = PixelGenerator()
+
+    pixels = generator.generate_simple_text(
+        "2.25.123456", width=128, height=128, background_color=40, text_color=200
+    )
+
+    assert pixels[0, 0] == 40
+    assert pixels.min() == 40
+    assert pixels.max() == 200
+
+
+def test_simple_text_font_size_changes_glyph_height() -> None:
+    generator = PixelGenerator()
+
+    small = generator.generate_simple_text("2.25.1", width=256, height=256, font_size=12)
+    large = generator.generate_simple_text("2.25.1", width=256, height=256, font_size=48)
+
+    small_rows = np.count_nonzero(small.any(axis=1))
+    large_rows = np.count_nonzero(large.any(axis=1))
+    assert large_rows > small_rows * 2
+
+
+def test_simple_text_rasterizes_glyphs_once(monkeypatch) -> None:
+    import app.core.glyph_atlas as glyph_atlas
+
+    generator = PixelGenerator()
+    first = generator.generate_simple_text("2.25.1", width=128, height=128)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("PIL called after atlas creation")
+
+    monkeypatch.setattr(glyph_atlas.Image, "new", fail)
+    second = generator.generate_simple_text("2.25.1", width=128, height=128)
+    other = generator.generate_simple_text("2.25.2", width=128, height=128)
+
+    assert np.array_equal(first, second)
+    assert not np.array_equal(first, other)
+
+
+def test_simple_text_long_text_is_clipped_to_frame() -> None:
+    generator = PixelGenerator()
+
+    pixels = generator.generate_simple_text("9" * 500, width=64, height=64, font_size=72)
+
+    assert pixels.shape == (64, 64)
+
+
+def test_glyph_atlas_render_line_replaces_unknown_characters() -> None:
+    atlas = GlyphAtlas(font_size=16, background_color=0, text_color=255)
+
+    line = atlas.render_line("1.é")
+
+    assert line.shape == (atlas.cell_height, atlas.cell_width * 3)
+    assert np.array_equal(
+        line[:, 2 * atlas.cell_width :], atlas.render_line("?")
+    )
+
+
 def test_ct_realistic_gradient_shape_dtype() -> None:
     generator = PixelGenerator()
 
@@ -82,3 +142,117 @@ def test_ct_realistic_unknown_pattern_raises_error() -> None:
 
     with pytest.raises(PixelGenerationError):
         generator.generate_ct_realistic(pattern="unknown")
+
+
+def test_ct_volume_noise_shape_and_distinct_slices() -> None:
+    generator = PixelGenerator()
+
+    volume = generator.generate_ct_volume(4, width=64, height=32, pattern="noise")
+
+    assert volume.shape == (4, 32, 64)
+    assert volume.dtype == np.int16
+    assert not np.array_equal(volume[0], volume[1])
+
+
+def test_ct_volume_seeded_noise_is_independent_of_slab_split() -> None:
+    whole = PixelGenerator().generate_ct_volume(
+        6, width=64, height=32, pattern="noise", bits_stored=12, seed=7
+    )
+    generator = PixelGenerator()
+    parts = [
+        generator.generate_ct_volume(
+            n, width=64, height=32, pattern="noise", bits_stored=12, seed=7,
+            first_slice=first,
+        )
+        for first, n in ((0, 4), (4, 2))
+    ]
+
+    assert np.array_equal(whole, np.concatenate(parts))
+    assert int(whole.min()) >= 0
+    assert int(whole.max()) <= 4095
+    assert len({whole[i].tobytes() for i in range(6)}) == 6
+
+
+def test_ct_volume_noise_seed_changes_output() -> None:
+    generator = PixelGenerator()
+
+    first = generator.generate_ct_volume(2, width=64, height=64, pattern="noise", seed=1)
+    second = generator.generate_ct_volume(2, width=64, height=64, pattern="noise", seed=2)
+
+    assert not np.array_equal(first, second)
+
+
+def test_ct_volume_deterministic_pattern_is_read_only_view() -> None:
+    generator = PixelGenerator()
+
+    volume = generator.generate_ct_volume(1000, width=64, height=64, pattern="circle")
+    frame = generator.generate_ct_realistic(width=64, height=64, pattern="circle")
+
+    assert volume.shape == (1000, 64, 64)
+    assert volume.strides[0] == 0
+    assert not volume.flags.writeable
+    assert np.array_equal(volume[999], frame)
+
+
+def test_ct_volume_invalid_slice_count_raises_error() -> None:
+    generator = PixelGenerator()
+
+    with pytest.raises(PixelGenerationError, match="n_slices"):
+        generator.generate_ct_volume(0)
+
+
+def test_ct_volume_phantom_varies_along_z() -> None:
+    generator = PixelGenerator()
+
+    volume = generator.generate_ct_volume(
+        3,
+        width=128,
+        height=128,
+        pattern="phantom",
+        z_positions=[-20.0, 0.0, 20.0],
+        center_z=0.0,
+    )
+
+    assert volume.shape == (3, 128, 128)
+    assert volume.dtype == np.int16
+    assert not np.array_equal(volume[0], volume[1])
+    # 中心スライス: 画像端は空気、中央は脳実質（40 HU）
+    assert volume[1, 0, 0] == 24
+    assert volume[1, 64, 64] == 1064
+
+
+def test_ct_volume_phantom_slabs_match_full_volume() -> None:
+    generator = PixelGenerator()
+    z_positions = np.arange(10, dtype=np.float64) * 5.0
+
+    options = {"width": 64, "height": 64, "pattern": "phantom", "center_z": 22.5}
+
+    full = generator.generate_ct_volume(10, z_positions=z_positions, **options)
+    slabs = [
+        generator.generate_ct_volume(len(chunk), z_positions=chunk, **options)
+        for chunk in (z_positions[:4], z_positions[4:])
+    ]
+
+    assert np.array_equal(np.concatenate(slabs), full)
+
+
+def test_ct_volume_phantom_z_positions_length_mismatch_raises_error() -> None:
+    generator = PixelGenerator()
+
+    with pytest.raises(PixelGenerationError, match="z_positions"):
+        generator.generate_ct_volume(2, pattern="phantom", z_positions=[0.0])
+
+
+def test_noise_bank_tiles_are_slice_sized_and_wrap_around() -> None:
+    from app.core.noise_bank import NoiseBank
+
+    bank = NoiseBank(seed=5, width=7, height=5, value_bits=12)
+    volume = bank.volume(0, 20)
+
+    assert bank._tiles.shape == (4, 5, 7)
+    for index, pixels in enumerate(volume):
+        (first, y1, x1), (second, y2, x2) = bank._shifts(index)
+        expected = np.roll(bank._tiles[first], (-y1, -x1), axis=(0, 1)) ^ np.roll(
+            bank._tiles[second], (-y2, -x2), axis=(0, 1)
+        )
+        np.testing.assert_array_equal(pixels, expected)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from pydicom.encaps import generate_frames
+from pydicom.pixels.encoders import RLELosslessEncoder
+
+from app.core.exceptions import DICOMBuildError
+from app.core.rle_encoder import encapsulate_frames, rle_encode_frame
+
+
+def _pydicom_rle(pixels: np.ndarray) -> bytes:
+    rows, columns = pixels.shape
+    return RLELosslessEncoder.encode(
+        pixels,
+        encoding_plugin="pydicom",
+        rows=rows,
+        columns=columns,
+        samples_per_pixel=1,
+        bits_allocated=pixels.dtype.itemsize * 8,
+        bits_stored=pixels.dtype.itemsize * 8,
+        pixel_representation=1 if pixels.dtype.kind == "i" else 0,
+        photometric_interpretation="MONOCHROME2",
+        number_of_frames=1,
+    )
+
+
+@pytest.mark.parametrize(
+    "pixels",
+    [
+        np.zeros((4, 5), dtype=np.uint8),
+        np.arange(20, dtype=np.uint8).reshape(4, 5),
+        # 128 を超えるラン（複製・リテラルとも分割が必要）
+        np.full((3, 300), 7, dtype=np.int16),
+        np.arange(600, dtype=np.int16).reshape(2, 300) - 300,
+        # 長さ1・2のランが行末・行頭をまたぐ
+        np.array([[1, 1, 2, 3, 3], [3, 4, 4, 5, 1]], dtype=np.uint8),
+        np.zeros((1, 1), dtype=np.int16),
+    ],
+    ids=["uniform", "literal", "long-runs", "long-literal", "row-boundary", "1x1"],
+)
+def test_rle_encode_frame_matches_pydicom(pixels: np.ndarray) -> None:
+    assert rle_encode_frame(pixels) == _pydicom_rle(pixels)
+
+
+def test_rle_encode_frame_matches_pydicom_for_random_frames() -> None:
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        rows, columns = rng.integers(1, 20, size=2) * (1, rng.integers(1, 40))
+        dtype = rng.choice([np.uint8, np.int16])
+        pixels = rng.integers(0, rng.integers(1, 5), size=(rows, columns)).astype(dtype)
+
+        assert rle_encode_frame(pixels) == _pydicom_rle(pixels)
+
+
+def test_encapsulate_frames_uses_one_fragment_per_frame() -> None:
+    frames = [rle_encode_frame(np.full((4, 4), value, dtype=np.int16)) for value in (1, 2)]
+
+    encapsulated = encapsulate_frames(frames)
+
+    assert list(generate_frames(encapsulated, number_of_frames=2)) == frames
+
+
+def test_rle_encode_frame_rejects_non_2d_array() -> None:
+    with pytest.raises(DICOMBuildError, match="2-dimensional"):
+        rle_encode_frame(np.zeros((2, 2, 2), dtype=np.uint8))
@@ -106,3 +106,142 @@ def test_generate_instance_creator_uid() -> None:
     uid = generator.generate_instance_creator_uid()
 
     assert uid.startswith("2.25.")
+
+
+def test_uuid_2_25_pool_is_uuid4_and_unique_across_refills() -> None:
+    import uuid
+
+    generator = UIDGenerator()
+    uids = [generator.generate_sop_uid() for _ in range(10000)]
+
+    assert len(set(uids)) == len(uids)
+    parsed = uuid.UUID(int=int(uids[-1].removeprefix("2.25.")))
+    assert parsed.version == 4
+    assert parsed.variant == uuid.RFC_4122
+
+
+def test_uid_generator_is_thread_safe() -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    for generator in (
+        UIDGenerator(),
+        UIDGenerator(method="custom_root", custom_root="1.2.3"),
+    ):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            batches = list(
+                executor.map(
+                    lambda _: [generator.generate_sop_uid() for _ in range(2000)],
+                    range(8),
+                )
+            )
+        uids = [uid for batch in batches for uid in batch]
+        assert len(set(uids)) == len(uids) == 16000
+
+
+def test_custom_root_partitions_do_not_overlap() -> None:
+    root = "1.2.392.200036.9999"
+    generator = UIDGenerator(method="custom_root", custom_root=root)
+    workers = [generator.partition(index, 3) for index in range(3)]
+
+    uids = [[worker.generate_study_uid() for _ in range(3)] for worker in workers]
+
+    assert uids[0] == [f"{root}.1", f"{root}.4", f"{root}.7"]
+    assert uids[2] == [f"{root}.3", f"{root}.6", f"{root}.9"]
+    assert len({uid for batch in uids for uid in batch}) == 9
+
+
+def test_partition_rejects_invalid_index_and_nested_partition() -> None:
+    generator = UIDGenerator(method="custom_root", custom_root="1.2.3")
+
+    with pytest.raises(UIDGenerationError):
+        generator.partition(3, 3)
+    with pytest.raises(UIDGenerationError):
+        generator.partition(0, 2).partition(0, 2)
+
+
+def test_deterministic_uids_depend_only_on_seed_and_indices() -> None:
+    first = UIDGenerator(method="deterministic", seed="job-1")
+    second = UIDGenerator(method="deterministic", seed="job-1")
+
+    # 採番の順序が違っても、同じ番号なら同じ UID になる
+    forward = [
+        first.generate_sop_uid(series_index=0, instance_index=i) for i in range(3)
+    ]
+    backward = [
+        second.generate_sop_uid(series_index=0, instance_index=i) for i in (2, 1, 0)
+    ]
+
+    assert forward == backward[::-1]
+    assert first.generate_study_uid() == second.generate_study_uid()
+    assert first.generate_series_uid(series_index=1) != first.generate_series_uid(
+        series_index=2
+    )
+    assert forward[0] != UIDGenerator(
+        method="deterministic", seed="job-2"
+    ).generate_sop_uid(series_index=0, instance_index=0)
+    assert forward[0].startswith("2.25.")
+    assert len(forward[0]) <= 64
+
+
+def test_deterministic_invalid_sop_uids_are_reproducible() -> None:
+    def generate() -> list[str]:
+        generator = UIDGenerator(method="deterministic", seed="seed")
+        return [
+            generator.generate_sop_uid(
+                allow_invalid=True, series_index=0, instance_index=index
+            )
+            for index in range(200)
+        ]
+
+    uids = generate()
+
+    assert uids == generate()
+    assert 5 <= sum(1 for uid in uids if ".0" in uid) <= 40
+
+
+def test_deterministic_requires_seed() -> None:
+    with pytest.raises(UIDGenerationError):
+        UIDGenerator(method="deterministic")
+
+
+def test_custom_root_leases_counter_blocks() -> None:
+    root = "1.2.3"
+    blocks = iter([range(10, 12), range(100, 102), range(200, 202)])
+    leases: list[range] = []
+
+    def lease() -> range:
+        leases.append(next(blocks))
+        return leases[-1]
+
+    generator = UIDGenerator(
+        method="custom_root", custom_root=root, counter_lease=lease
+    )
+
+    assert leases == []
+    uids = [generator.generate_sop_uid() for _ in range(3)]
+
+    assert uids == [f"{root}.10", f"{root}.11", f"{root}.100"]
+    assert generator.unused_counters() == range(101, 102)
+    # 未使用分を返した後は新しいブロックを受け取る
+    assert generator.generate_sop_uid() == f"{root}.200"
+
+
+def test_leased_counter_partition_shares_lease_and_rejects_split() -> None:
+    blocks = iter([range(1, 3), range(3, 5)])
+    generator = UIDGenerator(
+        method="custom_root", custom_root="1.2.3", counter_lease=lambda: next(blocks)
+    )
+
+    worker = generator.partition(1, 2)
+
+    assert worker.generate_study_uid() == "1.2.3.1"
+    assert generator.generate_study_uid() == "1.2.3.3"
+    assert UIDGenerator().unused_counters() == range(0)
+    with pytest.raises(UIDGenerationError):
+        UIDGenerator(
+            method="custom_root",
+            custom_root="1.2.3",
+            partition_index=0,
+            partition_count=2,
+            counter_lease=lambda: range(1, 2),
+        )
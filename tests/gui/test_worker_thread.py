@@ -92,7 +92,7 @@ def test_worker_handles_dicom_generator_error(monkeypatch, qtbot, tmp_path):
     config = _make_config(str(tmp_path))
 
     class _DummyService:
-        def generate(self, config, progress_callback):
+        def generate(self, config, progress_callback, plan=None):
             raise DICOMGeneratorError("broken config")
 
     monkeypatch.setattr("app.gui.worker_thread.StudyGeneratorService", _DummyService)
@@ -111,7 +111,7 @@ def test_worker_handles_unexpected_exception(monkeypatch, qtbot, tmp_path):
     config = _make_config(str(tmp_path))
 
     class _DummyService:
-        def generate(self, config, progress_callback):
+        def generate(self, config, progress_callback, plan=None):
             raise RuntimeError("boom")
 
     monkeypatch.setattr("app.gui.worker_thread.StudyGeneratorService", _DummyService)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core import (
+    CharacterSetConfig,
+    ConfigurationError,
+    ExecutionConfig,
+    GenerationConfig,
+    Patient,
+    PatientName,
+    PixelSpecSimple,
+    SeriesConfig,
+    StudyConfig,
+    TemplateNotFoundError,
+    TransferSyntaxConfig,
+)
+from app.services.batch_generator import BatchGeneratorService, BatchJob
+from app.services.template_loader import (
+    TemplateLoaderService,
+    clear_template_cache,
+)
+
+
+def _make_config(output_dir, num_images=2, workers=1, modality_template=None):
+    return GenerationConfig(
+        job_name="test",
+        output_dir=str(output_dir),
+        patient=Patient(
+            patient_id="P000001",
+            patient_name=PatientName(alphabetic="TEST^PATIENT"),
+            birth_date="20000101",
+            sex="M",
+        ),
+        study=StudyConfig(
+            accession_number="ACC000001",
+            study_date="20240115",
+            study_time="120000",
+            num_series=1,
+        ),
+        series_list=[SeriesConfig(series_number=1, num_images=num_images)],
+        modality_template=modality_template or "fujifilm_scenaria_view_ct",
+        pixel_spec=PixelSpecSimple(),
+        transfer_syntax=TransferSyntaxConfig(),
+        character_set=CharacterSetConfig(
+            specific_character_set="",
+            use_ideographic=False,
+            use_phonetic=False,
+        ),
+        execution=ExecutionConfig(workers=workers),
+    )
+
+
+def test_batch_generates_jobs_and_aggregates_progress(tmp_path) -> None:
+    jobs = [
+        BatchJob(f"job{index}", _make_config(tmp_path / f"out{index}", num_images=2))
+        for index in range(3)
+    ]
+    progress: list[tuple[int, int]] = []
+
+    results = BatchGeneratorService(max_workers=2).run(
+        jobs, progress_callback=lambda current, total: progress.append((current, total))
+    )
+
+    assert [result.name for result in results] == ["job0", "job1", "job2"]
+    assert [result.error for result in results] == [None] * 3
+    for index, result in enumerate(results):
+        assert result.output_path == tmp_path / f"out{index}"
+        assert len(list(result.output_path.glob("*.dcm"))) == 2
+    assert progress[-1] == (6, 6)
+    assert [current for current, _ in progress] == sorted(
+        current for current, _ in progress
+    )
+
+
+def test_batch_failed_job_does_not_stop_others(tmp_path) -> None:
+    jobs = [
+        BatchJob("missing", _make_config(tmp_path / "a", modality_template="nope")),
+        BatchJob("ok", _make_config(tmp_path / "b")),
+    ]
+
+    results = BatchGeneratorService(max_workers=1).run(jobs)
+
+    assert isinstance(results[0].error, TemplateNotFoundError)
+    assert results[0].output_path is None
+    assert results[1].error is None
+    assert len(list((tmp_path / "b").glob("*.dcm"))) == 2
+
+
+def test_batch_rejects_jobs_sharing_output_dir(tmp_path) -> None:
+    jobs = [
+        BatchJob("first", _make_config(tmp_path / "out")),
+        BatchJob("second", _make_config(tmp_path / "out")),
+    ]
+
+    progress: list[tuple[int, int]] = []
+
+    results = BatchGeneratorService(max_workers=2).run(
+        jobs, progress_callback=lambda current, total: progress.append((current, total))
+    )
+
+    assert results[0].error is None
+    assert isinstance(results[1].error, ConfigurationError)
+    # 実行しなかったジョブは進捗の総数に含めない
+    assert progress[-1] == (2, 2)
+
+
+def test_batch_limits_job_workers_and_parses_templates_once(
+    tmp_path, monkeypatch
+) -> None:
+    loaded: list[str] = []
+    original = TemplateLoaderService._parse_yaml_template
+
+    def counting_parse(path):
+        loaded.append(path.stem)
+        return original(path)
+
+    clear_template_cache()
+    monkeypatch.setattr(
+        TemplateLoaderService, "_parse_yaml_template", staticmethod(counting_parse)
+    )
+    service = BatchGeneratorService(max_workers=2)
+    jobs = [
+        BatchJob(f"job{index}", _make_config(tmp_path / f"out{index}", workers=8))
+        for index in range(2)
+    ]
+
+    results = service.run(jobs)
+
+    assert [result.error for result in results] == [None, None]
+    assert loaded == ["fujifilm_scenaria_view_ct"]
+    assert service._limit_workers(jobs[0].config).execution.workers == 2
+
+
+def test_batch_rejects_invalid_budget() -> None:
+    with pytest.raises(ConfigurationError):
+        BatchGeneratorService(max_workers=-1)
+
+
+def test_batch_partitions_shared_custom_root_counter(tmp_path) -> None:
+    import pydicom
+
+    jobs = [
+        BatchJob(
+            f"job{index}",
+            _make_config(tmp_path / f"out{index}", num_images=3).model_copy(
+                update={"uid_method": "custom_root", "uid_custom_root": "1.2.3"}
+            ),
+        )
+        for index in range(2)
+    ]
+
+    results = BatchGeneratorService(max_workers=2).run(jobs)
+
+    sop_uids = [
+        pydicom.dcmread(path).SOPInstanceUID
+        for result in results
+        for path in result.output_path.glob("*.dcm")
+    ]
+    assert len(sop_uids) == 6
+    assert len(set(sop_uids)) == 6
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core import FileReadError, GenerationJournalHeader, UIDContext
+from app.services.generation_journal import GenerationJournal
+
+
+def _header() -> GenerationJournalHeader:
+    return GenerationJournalHeader(
+        version=1,
+        job_hash="abc",
+        uid_context=UIDContext(
+            study_instance_uid="1.2.3",
+            frame_of_reference_uid="1.2.4",
+            implementation_class_uid="1.2.5",
+            instance_creator_uid="1.2.6",
+        ),
+        series_instance_uids=("1.2.7",),
+    )
+
+
+def test_journal_round_trip_ignores_truncated_tail(tmp_path) -> None:
+    journal = GenerationJournal(tmp_path)
+    journal.start(_header())
+    journal.record(1, "1.2.8.1")
+    journal.record(2, "1.2.8.2")
+    journal.close()
+    with journal.path.open("a", encoding="utf-8") as file:
+        file.write('{"seq":3,"so')
+
+    state = journal.load()
+
+    assert state is not None
+    assert state.header == _header()
+    assert state.completed == {1: "1.2.8.1", 2: "1.2.8.2"}
+
+
+def test_journal_restart_drops_truncated_tail(tmp_path) -> None:
+    journal = GenerationJournal(tmp_path)
+    journal.start(_header())
+    journal.record(1, "1.2.8.1")
+    journal.close()
+    with journal.path.open("a", encoding="utf-8") as file:
+        file.write('{"seq":2')
+
+    state = journal.load()
+    journal.start(state.header, state.completed)
+    journal.record(3, "1.2.8.3")
+    journal.close()
+
+    assert journal.load().completed == {1: "1.2.8.1", 3: "1.2.8.3"}
+
+
+def test_journal_invalid_record_raises(tmp_path) -> None:
+    journal = GenerationJournal(tmp_path)
+    journal.start(_header())
+    journal.close()
+    with journal.path.open("a", encoding="utf-8") as file:
+        file.write("broken\n")
+        file.write('{"seq":1,"sop":"1.2.8.1"}\n')
+
+    with pytest.raises(FileReadError):
+        journal.load()
+
+
+def test_journal_missing_returns_none(tmp_path) -> None:
+    assert GenerationJournal(tmp_path).load() is None
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.core import FileWriteError, GenerationError
+from app.services.generation_pipeline import GenerationPipeline
+
+
+def test_pipeline_runs_all_stages_in_order_per_item() -> None:
+    written: list[int] = []
+    lock = threading.Lock()
+
+    def sink(value: int) -> int:
+        with lock:
+            written.append(value)
+        return value
+
+    pipeline = GenerationPipeline(
+        stages=[lambda v: v + 1, lambda v: v * 10],
+        sink=sink,
+        sink_workers=3,
+        max_in_flight=2,
+    )
+
+    completed = pipeline.run(range(20))
+
+    assert completed == 20
+    assert sorted(written) == [(v + 1) * 10 for v in range(20)]
+
+
+def test_pipeline_runs_stage_on_multiple_workers() -> None:
+    stage_threads: set[str] = set()
+    barrier = threading.Barrier(3, timeout=5)
+    lock = threading.Lock()
+
+    def slow_stage(value: int) -> int:
+        with lock:
+            stage_threads.add(threading.current_thread().name)
+        # 最初の3要素は3スレッドが同時に処理しないと進まない
+        if value < 3:
+            barrier.wait()
+        return value * 10
+
+    pipeline = GenerationPipeline(
+        stages=[lambda v: v + 1, slow_stage],
+        sink=lambda v: v,
+        sink_workers=2,
+        max_in_flight=4,
+        stage_workers=[1, 3],
+    )
+    results: list[int] = []
+
+    completed = pipeline.run(range(-1, 19), on_complete=results.append)
+
+    assert completed == 20
+    assert sorted(results) == [v * 10 for v in range(20)]
+    assert len(stage_threads) == 3
+
+
+def test_pipeline_invalid_stage_workers_raises_error() -> None:
+    with pytest.raises(GenerationError):
+        GenerationPipeline(stages=[lambda v: v], sink=lambda v: v, stage_workers=[0])
+    with pytest.raises(GenerationError):
+        GenerationPipeline(stages=[lambda v: v], sink=lambda v: v, stage_workers=[1, 1])
+
+
+def test_pipeline_reports_completion_on_caller_thread() -> None:
+    caller = threading.current_thread()
+    seen_threads: set[threading.Thread] = set()
+    pipeline = GenerationPipeline(stages=[], sink=lambda v: v, sink_workers=2)
+
+    pipeline.run(range(5), on_complete=lambda _: seen_threads.add(threading.current_thread()))
+
+    assert seen_threads == {caller}
+
+
+def test_pipeline_caps_items_in_flight() -> None:
+    max_in_flight = 3
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def first_stage(value: int) -> int:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        return value
+
+    def sink(value: int) -> int:
+        nonlocal in_flight
+        with lock:
+            in_flight -= 1
+        return value
+
+    pipeline = GenerationPipeline(
+        stages=[first_stage], sink=sink, sink_workers=2, max_in_flight=max_in_flight
+    )
+
+    pipeline.run(range(50))
+
+    assert peak <= max_in_flight
+
+
+def test_pipeline_propagates_stage_error() -> None:
+    def failing_sink(value: int) -> int:
+        if value == 3:
+            raise FileWriteError("/tmp/out.dcm", "disk full")
+        return value
+
+    pipeline = GenerationPipeline(stages=[lambda v: v], sink=failing_sink, sink_workers=2)
+
+    with pytest.raises(FileWriteError):
+        pipeline.run(range(100))
+
+
+def test_pipeline_propagates_intermediate_stage_error() -> None:
+    def failing_stage(value: int) -> int:
+        if value == 5:
+            raise GenerationError("stage failed")
+        return value
+
+    pipeline = GenerationPipeline(
+        stages=[lambda v: v, failing_stage, lambda v: v],
+        sink=lambda v: v,
+        sink_workers=2,
+    )
+
+    with pytest.raises(GenerationError, match="stage failed"):
+        pipeline.run(range(100))
+
+
+def test_pipeline_forwards_none_stage_results() -> None:
+    pipeline = GenerationPipeline(stages=[lambda v: None], sink=lambda v: v)
+
+    assert pipeline.run(range(3)) == 3
+
+
+def test_pipeline_forwards_none_source_items() -> None:
+    results: list[object] = []
+    pipeline = GenerationPipeline(stages=[], sink=lambda v: v)
+
+    completed = pipeline.run([1, None, 2], on_complete=results.append)
+
+    assert completed == 3
+    assert results == [1, None, 2]
+
+
+def test_pipeline_invalid_max_in_flight_raises_error() -> None:
+    with pytest.raises(GenerationError):
+        GenerationPipeline(stages=[], sink=lambda v: v, max_in_flight=0)
+
+
+def test_pipeline_invalid_sink_workers_raises_error() -> None:
+    with pytest.raises(GenerationError):
+        GenerationPipeline(stages=[], sink=lambda v: v, sink_workers=0)
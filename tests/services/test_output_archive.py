@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import tarfile
+import zipfile
+
+import pytest
+
+from app.core import ConfigurationError
+from app.services.output_archive import (
+    ArchiveWriter,
+    TarArchiveWriter,
+    ZipArchiveWriter,
+    open_archive,
+)
+
+
+def _write_members(writer) -> None:
+    writer.add("a.dcm", b"first")
+    # 長さを事前に決めずに書き込むメンバー（ブロック境界をまたぐ）
+    with writer.open("b.dcm") as member:
+        member.write(b"x" * 700)
+        member.write(memoryview(b"yz"))
+    writer.add("c.dcm", b"")
+
+
+def test_tar_archive_writer_streams_members(tmp_path) -> None:
+    path = tmp_path / "out.tar"
+
+    with TarArchiveWriter(path) as writer:
+        _write_members(writer)
+
+    with tarfile.open(path) as tar:
+        assert tar.getnames() == ["a.dcm", "b.dcm", "c.dcm"]
+        assert tar.extractfile("a.dcm").read() == b"first"
+        assert tar.extractfile("b.dcm").read() == b"x" * 700 + b"yz"
+        assert tar.getmember("c.dcm").size == 0
+    assert path.stat().st_size % tarfile.RECORDSIZE == 0
+
+
+def test_zip_archive_writer_streams_members(tmp_path) -> None:
+    path = tmp_path / "out.zip"
+
+    with ZipArchiveWriter(path) as writer:
+        _write_members(writer)
+
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["a.dcm", "b.dcm", "c.dcm"]
+        assert archive.read("b.dcm") == b"x" * 700 + b"yz"
+        assert archive.getinfo("a.dcm").compress_type == zipfile.ZIP_STORED
+
+
+@pytest.mark.parametrize("archive_format", ["tar", "zip"])
+def test_archive_writer_removes_partial_archive_on_error(
+    tmp_path, archive_format
+) -> None:
+    path = tmp_path / f"out.{archive_format}"
+
+    with pytest.raises(RuntimeError):
+        with open_archive(path, archive_format) as writer:
+            writer.add("a.dcm", b"first")
+            raise RuntimeError("interrupted")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_open_archive_rejects_unknown_format(tmp_path) -> None:
+    with pytest.raises(ConfigurationError):
+        open_archive(tmp_path / "out.7z", "7z")
+
+
+def test_archive_writer_requires_format_implementation(tmp_path) -> None:
+    with pytest.raises(TypeError):
+        ArchiveWriter(tmp_path / "out.tar")
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core import (
+    FileReadError,
+    Patient,
+    PatientFilter,
+    PatientName,
+    PatientNotFoundError,
+)
+from app.services.patient_database import SQLitePatientRepository, import_patients
+from app.services.patient_loader import PatientLoaderService
+
+
+def _patient(patient_id: str, sex: str = "M", birth_date: str = "19800101") -> Patient:
+    return Patient(
+        patient_id=patient_id,
+        patient_name=PatientName(alphabetic=f"TEST^{patient_id}"),
+        birth_date=birth_date,
+        sex=sex,
+    )
+
+
+@pytest.fixture
+def repository(tmp_path) -> SQLitePatientRepository:
+    patients = [
+        _patient("P1", "M", "19500101"),
+        _patient("P2", "F", "19800615"),
+        _patient("P3", "M", "20000301"),
+        _patient("P1", "F", "19990101"),
+        _patient("P4", "F", "20100101"),
+    ]
+    path = tmp_path / "patients.sqlite3"
+
+    assert import_patients(patients, path) == 4
+    return SQLitePatientRepository(path)
+
+
+def test_import_keeps_master_order_and_first_duplicate(repository) -> None:
+    assert len(repository) == 4
+    assert repository.ids() == ["P1", "P2", "P3", "P4"]
+    assert repository.get("P1").sex == "M"
+    assert repository[1].patient_id == "P2"
+    assert repository[-1].patient_id == "P4"
+    assert [patient.patient_id for patient in repository[1:3]] == ["P2", "P3"]
+    assert [patient.patient_id for patient in repository[::2]] == ["P1", "P3"]
+    assert "P3" in repository
+    assert "P9" not in repository
+    with pytest.raises(PatientNotFoundError):
+        repository.get("P9")
+    with pytest.raises(IndexError):
+        repository[4]
+
+
+def test_filtered_iteration_page_and_count(repository) -> None:
+    females = PatientFilter(sex="F")
+    adults = PatientFilter(min_age=20, max_age=60, reference_date="20240101")
+
+    assert [p.patient_id for p in repository.iter_patients(females)] == ["P2", "P4"]
+    assert [p.patient_id for p in repository.iter_patients(adults)] == ["P2", "P3"]
+    assert repository.count(females) == 2
+    assert repository.count() == 4
+    assert [p.patient_id for p in repository.page(1, 2)] == ["P2", "P3"]
+    assert [p.patient_id for p in repository.page(1, 5, females)] == ["P4"]
+
+
+def test_yaml_and_sqlite_repositories_filter_alike(tmp_path) -> None:
+    yaml_repository = PatientLoaderService().repository()
+    database = tmp_path / "patients.sqlite3"
+    PatientLoaderService(prefer_database=False).import_to_database(database)
+    sqlite_repository = PatientLoaderService(database).repository()
+    patient_filter = PatientFilter(
+        sex="F", min_age=30, max_age=59, reference_date="20240401"
+    )
+
+    assert isinstance(sqlite_repository, SQLitePatientRepository)
+    assert sqlite_repository.ids() == yaml_repository.ids()
+    assert list(sqlite_repository.iter_patients(patient_filter)) == list(
+        yaml_repository.iter_patients(patient_filter)
+    )
+    assert sqlite_repository.page(10, 5, patient_filter) == yaml_repository.page(
+        10, 5, patient_filter
+    )
+    assert sqlite_repository.count(patient_filter) == yaml_repository.count(
+        patient_filter
+    )
+
+
+def test_invalid_database_raises_file_read_error(tmp_path) -> None:
+    path = tmp_path / "patients.sqlite3"
+    path.write_bytes(b"not a database")
+
+    with pytest.raises(FileReadError):
+        PatientLoaderService(path).repository()
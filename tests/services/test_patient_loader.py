@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import pytest
 
-from app.core import PatientNotFoundError
+from app.core import FileReadError, PatientDataInvalidError, PatientNotFoundError
 from app.services.patient_loader import PatientLoaderService
 
 
@@ -38,3 +38,58 @@ def test_patient_data_validation() -> None:
     assert patient.patient_name
     assert patient.birth_date
     assert patient.sex
+
+
+def _write_master(path, patients) -> None:
+    import yaml
+
+    path.write_text(yaml.safe_dump({"patients": patients}), encoding="utf-8")
+
+
+def _record(patient_id: str, sex: str = "M") -> dict:
+    return {
+        "patient_id": patient_id,
+        "patient_name": {"alphabetic": f"TEST^{patient_id}"},
+        "birth_date": "19800101",
+        "sex": sex,
+    }
+
+
+def test_repository_is_shared_and_reloaded_when_master_changes(tmp_path) -> None:
+    master = tmp_path / "patients.yaml"
+    _write_master(master, [_record("A1"), _record("A2")])
+
+    repository = PatientLoaderService(master).repository()
+
+    assert PatientLoaderService(master).repository() is repository
+    assert repository.ids() == ["A1", "A2"]
+    assert repository[1].patient_id == "A2"
+    assert "A1" in repository
+
+    _write_master(master, [_record("A1"), _record("A2"), _record("A3")])
+    reloaded = PatientLoaderService(master).find_by_id("A3")
+
+    assert reloaded.patient_id == "A3"
+    assert len(PatientLoaderService(master).repository()) == 3
+
+
+def test_repository_validates_records_lazily(tmp_path) -> None:
+    master = tmp_path / "patients.yaml"
+    _write_master(master, [_record("A1"), {**_record("BAD"), "sex": "X"}])
+    service = PatientLoaderService(master)
+
+    assert service.find_by_id("A1").sex == "M"
+    with pytest.raises(PatientDataInvalidError):
+        service.find_by_id("BAD")
+    with pytest.raises(PatientDataInvalidError):
+        service.load_all()
+
+
+def test_repository_rejects_records_without_patient_id(tmp_path) -> None:
+    master = tmp_path / "patients.yaml"
+    _write_master(master, [{"sex": "M"}])
+
+    with pytest.raises(PatientDataInvalidError):
+        PatientLoaderService(master).repository()
+    with pytest.raises(FileReadError):
+        PatientLoaderService(tmp_path / "missing.yaml").repository()
@@ -3,21 +3,28 @@ from __future__ import annotations
 from unittest.mock import MagicMock
 
 import pydicom
+import pytest
 
 from app.core import (
     CharacterSetConfig,
+    ExecutionConfig,
     GenerationConfig,
+    ImageStorageConfig,
     Patient,
     PatientName,
+    PixelSpecCTRealistic,
     PixelSpecSimple,
     SeriesConfig,
     StudyConfig,
     TransferSyntaxConfig,
 )
+from app.services.generation_state import sequence_width
 from app.services.study_generator import StudyGeneratorService
 
 
-def _make_config(tmp_path, num_series=1, images_per_series=None):
+def _make_config(
+    tmp_path, num_series=1, images_per_series=None, workers=1, write_workers=2
+):
     if images_per_series is None:
         images_per_series = [1]
     return GenerationConfig(
@@ -47,6 +54,7 @@ def _make_config(tmp_path, num_series=1, images_per_series=None):
             use_ideographic=False,
             use_phonetic=False,
         ),
+        execution=ExecutionConfig(workers=workers, write_workers=write_workers),
     )
 
 
@@ -152,10 +160,831 @@ def test_japanese_patient_name_roundtrip(tmp_path) -> None:
 
 
 def test_sequence_width_minimum_four() -> None:
-    assert StudyGeneratorService._sequence_width(1) == 4
-    assert StudyGeneratorService._sequence_width(9999) == 4
+    assert sequence_width(1) == 4
+    assert sequence_width(9999) == 4
 
 
 def test_sequence_width_expands_with_total_images() -> None:
-    assert StudyGeneratorService._sequence_width(10000) == 5
-    assert StudyGeneratorService._sequence_width(100000) == 6
+    assert sequence_width(10000) == 5
+    assert sequence_width(100000) == 6
+
+
+def test_generate_parallel_keeps_file_naming_and_uid_uniqueness(
+    tmp_path, monkeypatch
+) -> None:
+    monkeypatch.setattr("app.services.study_generator.MIN_IMAGES_PER_WORKER", 1)
+    service = StudyGeneratorService()
+    config = _make_config(
+        tmp_path=tmp_path, num_series=2, images_per_series=[3, 4], workers=2
+    )
+
+    output_dir = service.generate(config=config)
+    files = sorted(output_dir.glob("*.dcm"))
+
+    assert [f.name for f in files] == [
+        f"P000001_20240115_CT_{seq:04d}.dcm" for seq in range(1, 8)
+    ]
+    datasets = [pydicom.dcmread(str(f)) for f in files]
+    assert len({str(ds.SOPInstanceUID) for ds in datasets}) == 7
+    assert len({str(ds.SeriesInstanceUID) for ds in datasets}) == 2
+    assert len({str(ds.StudyInstanceUID) for ds in datasets}) == 1
+    assert [int(ds.InstanceNumber) for ds in datasets] == [1, 2, 3, 1, 2, 3, 4]
+
+
+def test_generate_parallel_progress_is_ordered(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("app.services.study_generator.MIN_IMAGES_PER_WORKER", 1)
+    service = StudyGeneratorService()
+    config = _make_config(
+        tmp_path=tmp_path, num_series=1, images_per_series=[5], workers=2
+    )
+    progress_callback = MagicMock()
+
+    service.generate(config=config, progress_callback=progress_callback)
+
+    assert [c.args for c in progress_callback.call_args_list] == [
+        (current, 5) for current in range(1, 6)
+    ]
+
+
+def test_generate_pipelined_with_multiple_write_workers(tmp_path) -> None:
+    service = StudyGeneratorService()
+    config = _make_config(
+        tmp_path=tmp_path, num_series=2, images_per_series=[4, 4], write_workers=4
+    )
+    progress_callback = MagicMock()
+
+    output_dir = service.generate(config=config, progress_callback=progress_callback)
+    files = sorted(output_dir.glob("*.dcm"))
+
+    assert len(files) == 8
+    assert [c.args for c in progress_callback.call_args_list] == [
+        (current, 8) for current in range(1, 9)
+    ]
+    ds = pydicom.dcmread(str(files[-1]))
+    assert int(ds.InstanceNumber) == 4
+
+
+def test_effective_workers_falls_back_to_serial_for_small_jobs() -> None:
+    assert StudyGeneratorService._effective_workers(8, 41) == 1
+    assert StudyGeneratorService._effective_workers(1, 100000) == 1
+
+
+def test_effective_workers_scales_with_total_images() -> None:
+    assert StudyGeneratorService._effective_workers(32, 1024) == 4
+    assert StudyGeneratorService._effective_workers(32, 100000) == 32
+
+
+def test_generate_ct_gradient_uses_frame_cache(tmp_path, monkeypatch) -> None:
+    from app.core.pixel_generator import PixelGenerator
+
+    calls = []
+    original = PixelGenerator.generate_ct_realistic
+
+    def counting(self, *args, **kwargs):
+        calls.append(1)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(PixelGenerator, "generate_ct_realistic", counting)
+    service = StudyGeneratorService()
+    config = _make_config(
+        tmp_path=tmp_path, num_series=1, images_per_series=[3]
+    ).model_copy(update={"pixel_spec": PixelSpecCTRealistic(width=64, height=64)})
+
+    output_dir = service.generate(config=config)
+    files = sorted(output_dir.glob("*.dcm"))
+
+    pixel_data = {pydicom.dcmread(str(f)).PixelData for f in files}
+    assert len(files) == 3
+    assert len(pixel_data) == 1
+    assert len(calls) == 1
+
+
+def test_compile_plan_resolves_template_attributes_once(tmp_path) -> None:
+    service = StudyGeneratorService()
+    config = _make_config(tmp_path=tmp_path, num_series=2, images_per_series=[1, 2])
+
+    plan = service.compile_plan(config)
+    attributes = dict(plan.attributes)
+
+    assert plan.modality == "CT"
+    assert plan.filename_prefix == "P000001_20240115_CT"
+    assert attributes["PatientAge"] == "024Y"
+    assert attributes["Manufacturer"] == "FUJIFILM Healthcare"
+    assert [dict(s.attributes)["SeriesNumber"] for s in plan.series] == ["1", "2"]
+
+
+def test_generate_reuses_given_plan(tmp_path, monkeypatch) -> None:
+    service = StudyGeneratorService()
+    config = _make_config(tmp_path=tmp_path, num_series=1, images_per_series=[3])
+    plan = service.compile_plan(config)
+    merge_templates = MagicMock(side_effect=AssertionError("template re-merged"))
+    monkeypatch.setattr(service._template_loader, "merge_templates", merge_templates)
+
+    output_dir = service.generate(config=config, plan=plan)
+    files = sorted(output_dir.glob("*.dcm"))
+    datasets = [pydicom.dcmread(str(f)) for f in files]
+
+    assert len(files) == 3
+    assert {ds.Manufacturer for ds in datasets} == {"FUJIFILM Healthcare"}
+    assert [int(ds.InstanceNumber) for ds in datasets] == [1, 2, 3]
+    assert len({ds.SOPInstanceUID for ds in datasets}) == 3
+
+
+def test_generate_fast_encoder_matches_pydicom_output(tmp_path) -> None:
+    service = StudyGeneratorService()
+    outputs = []
+    for fast_encoder in (False, True):
+        config = _make_config(
+            tmp_path=tmp_path / str(fast_encoder),
+            num_series=2,
+            images_per_series=[3, 2],
+        ).model_copy(
+            update={
+                "uid_method": "custom_root",
+                "uid_custom_root": "1.2.392.200036.9999",
+                "pixel_spec": PixelSpecCTRealistic(width=64, height=64),
+                "execution": ExecutionConfig(fast_encoder=fast_encoder),
+            }
+        )
+        output_dir = service.generate(config=config)
+        outputs.append(
+            {f.name: f.read_bytes() for f in sorted(output_dir.glob("*.dcm"))}
+        )
+
+    assert len(outputs[0]) == 5
+    assert outputs[1] == outputs[0]
+
+
+@pytest.mark.parametrize(
+    ("pattern", "execution", "image_storage"),
+    [
+        ("gradient", ExecutionConfig(), ImageStorageConfig()),
+        ("noise", ExecutionConfig(fast_encoder=True), ImageStorageConfig()),
+        (
+            "gradient",
+            ExecutionConfig(),
+            ImageStorageConfig(mode="enhanced_multiframe", frames_per_object=2),
+        ),
+    ],
+    ids=["cached-frame", "fast-encoder", "enhanced-multiframe"],
+)
+def test_generate_rle_lossless_decodes_to_native_pixels(
+    tmp_path, pattern, execution, image_storage
+) -> None:
+    service = StudyGeneratorService()
+
+    def generate(subdir, transfer_syntax):
+        config = _make_config(
+            tmp_path=tmp_path / subdir, num_series=1, images_per_series=[3]
+        ).model_copy(
+            update={
+                "pixel_spec": PixelSpecCTRealistic(
+                    width=64, height=64, pattern=pattern, seed=1
+                ),
+                "transfer_syntax": transfer_syntax,
+                "execution": execution,
+                "image_storage": image_storage,
+            }
+        )
+        output_dir = service.generate(config=config)
+        return [pydicom.dcmread(str(f)) for f in sorted(output_dir.glob("*.dcm"))]
+
+    native = generate("native", TransferSyntaxConfig())
+    rle = generate(
+        "rle",
+        TransferSyntaxConfig(
+            uid="1.2.840.10008.1.2.5",
+            name="RLE Lossless",
+            is_implicit_vr=False,
+        ),
+    )
+
+    assert len(rle) == len(native)
+    for rle_ds, native_ds in zip(rle, native):
+        assert rle_ds.file_meta.TransferSyntaxUID == "1.2.840.10008.1.2.5"
+        assert (rle_ds.pixel_array == native_ds.pixel_array).all()
+
+
+@pytest.mark.parametrize(
+    ("execution", "image_storage"),
+    [
+        (ExecutionConfig(compress_workers=2), ImageStorageConfig()),
+        (ExecutionConfig(workers=2, fast_encoder=True), ImageStorageConfig()),
+        (
+            ExecutionConfig(),
+            ImageStorageConfig(mode="enhanced_multiframe", frames_per_object=2),
+        ),
+    ],
+    ids=["pipelined", "parallel-fast-encoder", "enhanced-multiframe"],
+)
+def test_generate_deflated_matches_explicit_little_endian(
+    tmp_path, monkeypatch, execution, image_storage
+) -> None:
+    monkeypatch.setattr("app.services.study_generator.MIN_IMAGES_PER_WORKER", 1)
+    service = StudyGeneratorService()
+
+    def generate(subdir, transfer_syntax):
+        config = _make_config(
+            tmp_path=tmp_path / subdir, num_series=1, images_per_series=[3]
+        ).model_copy(
+            update={
+                "pixel_spec": PixelSpecCTRealistic(width=64, height=64, pattern="circle"),
+                "transfer_syntax": transfer_syntax,
+                "execution": execution,
+                "image_storage": image_storage,
+            }
+        )
+        output_dir = service.generate(config=config)
+        return sorted(output_dir.glob("*.dcm"))
+
+    explicit = generate(
+        "explicit",
+        TransferSyntaxConfig(
+            uid="1.2.840.10008.1.2.1", name="Explicit VR Little Endian", is_implicit_vr=False
+        ),
+    )
+    deflated = generate(
+        "deflated",
+        TransferSyntaxConfig(
+            uid="1.2.840.10008.1.2.1.99",
+            name="Deflated Explicit VR Little Endian",
+            is_implicit_vr=False,
+            deflate_level=9,
+        ),
+    )
+
+    assert len(deflated) == len(explicit)
+    for deflated_path, explicit_path in zip(deflated, explicit):
+        deflated_ds = pydicom.dcmread(str(deflated_path))
+        explicit_ds = pydicom.dcmread(str(explicit_path))
+        assert deflated_ds.file_meta.TransferSyntaxUID == "1.2.840.10008.1.2.1.99"
+        assert deflated_path.stat().st_size < explicit_path.stat().st_size / 2
+        assert (deflated_ds.pixel_array == explicit_ds.pixel_array).all()
+        assert deflated_ds.InstanceNumber == explicit_ds.InstanceNumber
+
+
+def test_generate_simple_text_uses_pixel_spec_colors(tmp_path) -> None:
+    service = StudyGeneratorService()
+    config = _make_config(tmp_path=tmp_path).model_copy(
+        update={
+            "pixel_spec": PixelSpecSimple(
+                width=128, height=128, background_color=30, text_color=220, font_size=12
+            )
+        }
+    )
+
+    output_dir = service.generate(config=config)
+    ds = pydicom.dcmread(str(next(output_dir.glob("*.dcm"))))
+
+    assert ds.pixel_array.min() == 30
+    assert ds.pixel_array.max() == 220
+
+
+def test_generate_ct_noise_uses_volume_slabs(tmp_path, monkeypatch) -> None:
+    import app.services.instance_writer as instance_writer
+    from app.core.pixel_generator import PixelGenerator
+
+    slab_sizes = []
+    original = PixelGenerator.generate_ct_volume
+
+    def counting(self, n_slices, *args, **kwargs):
+        slab_sizes.append(n_slices)
+        return original(self, n_slices, *args, **kwargs)
+
+    monkeypatch.setattr(PixelGenerator, "generate_ct_volume", counting)
+    monkeypatch.setattr(instance_writer, "VOLUME_SLAB_SLICES", 4)
+    service = StudyGeneratorService()
+    config = _make_config(
+        tmp_path=tmp_path, num_series=2, images_per_series=[6, 3]
+    ).model_copy(
+        update={"pixel_spec": PixelSpecCTRealistic(width=64, height=64, pattern="noise")}
+    )
+
+    output_dir = service.generate(config=config)
+    pixel_data = {pydicom.dcmread(str(f)).PixelData for f in output_dir.glob("*.dcm")}
+
+    assert slab_sizes == [4, 2, 3]
+    assert len(pixel_data) == 9
+
+
+def test_generate_seeded_noise_is_reproducible_across_workers(
+    tmp_path, monkeypatch
+) -> None:
+    monkeypatch.setattr("app.services.study_generator.MIN_IMAGES_PER_WORKER", 1)
+    service = StudyGeneratorService()
+    pixel_spec = PixelSpecCTRealistic(width=64, height=64, pattern="noise", seed=42)
+
+    def pixel_data(subdir, workers):
+        config = _make_config(
+            tmp_path=tmp_path / subdir,
+            num_series=2,
+            images_per_series=[5, 3],
+            workers=workers,
+        ).model_copy(update={"pixel_spec": pixel_spec})
+        output_dir = service.generate(config=config)
+        return [
+            pydicom.dcmread(str(f)).PixelData for f in sorted(output_dir.glob("*.dcm"))
+        ]
+
+    serial = pixel_data("serial", workers=1)
+
+    assert len(set(serial)) == 8
+    assert pixel_data("serial_again", workers=1) == serial
+    assert pixel_data("parallel", workers=2) == serial
+
+
+def test_generate_ct_phantom_varies_across_slices(tmp_path) -> None:
+    service = StudyGeneratorService()
+    config = _make_config(
+        tmp_path=tmp_path, num_series=1, images_per_series=[5]
+    ).model_copy(
+        update={"pixel_spec": PixelSpecCTRealistic(width=64, height=64, pattern="phantom")}
+    )
+
+    output_dir = service.generate(config=config)
+    datasets = [pydicom.dcmread(str(f)) for f in sorted(output_dir.glob("*.dcm"))]
+
+    assert len(datasets) == 5
+    # 5mm 間隔・5枚のシリーズでは中央スライスにファントム中心が来る
+    center = datasets[2].pixel_array
+    assert center[32, 32] == 1064
+    assert len({ds.PixelData for ds in datasets}) >= 3
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_generate_enhanced_multiframe_matches_single_frame_pixels(
+    tmp_path, monkeypatch, workers
+) -> None:
+    monkeypatch.setattr("app.services.study_generator.MIN_IMAGES_PER_WORKER", 1)
+    service = StudyGeneratorService()
+    pixel_spec = PixelSpecCTRealistic(width=64, height=64, pattern="noise", seed=7)
+
+    def generate(subdir, image_storage):
+        config = _make_config(
+            tmp_path=tmp_path / subdir,
+            num_series=2,
+            images_per_series=[5, 3],
+            workers=workers,
+        ).model_copy(update={"pixel_spec": pixel_spec, "image_storage": image_storage})
+        progress: list[int] = []
+        output_dir = service.generate(
+            config=config,
+            progress_callback=lambda current, _total: progress.append(current),
+        )
+        return output_dir, progress
+
+    single_dir, _ = generate("single", ImageStorageConfig())
+    enhanced_dir, progress = generate(
+        "enhanced", ImageStorageConfig(mode="enhanced_multiframe", frames_per_object=2)
+    )
+    single = [pydicom.dcmread(str(f)) for f in sorted(single_dir.glob("*.dcm"))]
+    enhanced = [pydicom.dcmread(str(f)) for f in sorted(enhanced_dir.glob("*.dcm"))]
+
+    # 5枚のシリーズは 2/2/1 フレーム、3枚のシリーズは 2/1 フレームに分割される
+    assert [ds.NumberOfFrames for ds in enhanced] == [2, 2, 1, 2, 1]
+    assert [ds.InstanceNumber for ds in enhanced] == [1, 2, 3, 1, 2]
+    assert progress[-1] == 8
+    assert all(ds.SOPClassUID == "1.2.840.10008.5.1.4.1.1.2.1" for ds in enhanced)
+    frames = [
+        frame
+        for ds in enhanced
+        for frame in ds.pixel_array.reshape(-1, ds.Rows, ds.Columns)
+    ]
+    assert len(frames) == len(single)
+    for frame, ds in zip(frames, single):
+        assert (frame == ds.pixel_array).all()
+    positions = [
+        float(item.PlanePositionSequence[0].ImagePositionPatient[2])
+        for ds in enhanced
+        for item in ds.PerFrameFunctionalGroupsSequence
+    ]
+    assert positions == [float(ds.ImagePositionPatient[2]) for ds in single]
+
+
+def _uids_by_file(output_dir):
+    return {
+        f.name: (
+            pydicom.dcmread(str(f)).StudyInstanceUID,
+            pydicom.dcmread(str(f)).SOPInstanceUID,
+        )
+        for f in output_dir.glob("*.dcm")
+    }
+
+
+def test_generate_incremental_skips_unchanged_series(tmp_path) -> None:
+    service = StudyGeneratorService()
+    config = _make_config(tmp_path=tmp_path, num_series=2, images_per_series=[2, 3])
+
+    output_dir = service.generate(config=config, incremental=True)
+    first_uids = _uids_by_file(output_dir)
+    progress_callback = MagicMock()
+    service.generate(
+        config=config, progress_callback=progress_callback, incremental=True
+    )
+
+    assert (output_dir / "generation_manifest.json").exists()
+    progress_callback.assert_not_called()
+    assert _uids_by_file(output_dir) == first_uids
+
+
+def test_generate_incremental_regenerates_only_changed_series(tmp_path) -> None:
+    service = StudyGeneratorService()
+    config = _make_config(tmp_path=tmp_path, num_series=2, images_per_series=[2, 3])
+    output_dir = service.generate(config=config, incremental=True)
+    first_uids = _uids_by_file(output_dir)
+
+    changed_series = config.series_list[1].model_copy(
+        update={"series_description": "changed"}
+    )
+    changed = config.model_copy(
+        update={"series_list": [config.series_list[0], changed_series]}
+    )
+    progress_callback = MagicMock()
+    service.generate(
+        config=changed, progress_callback=progress_callback, incremental=True
+    )
+    second_uids = _uids_by_file(output_dir)
+
+    assert progress_callback.call_count == 3
+    progress_callback.assert_called_with(3, 3)
+    names = sorted(first_uids)
+    assert [second_uids[name] for name in names[:2]] == [
+        first_uids[name] for name in names[:2]
+    ]
+    for name in names[2:]:
+        assert second_uids[name][0] == first_uids[name][0]
+        assert second_uids[name][1] != first_uids[name][1]
+        assert pydicom.dcmread(str(output_dir / name)).SeriesDescription == "changed"
+
+
+def test_generate_incremental_regenerates_missing_files_and_removes_stale(
+    tmp_path,
+) -> None:
+    service = StudyGeneratorService()
+    config = _make_config(tmp_path=tmp_path, num_series=2, images_per_series=[2, 3])
+    output_dir = service.generate(config=config, incremental=True)
+    names = sorted(f.name for f in output_dir.glob("*.dcm"))
+
+    (output_dir / names[0]).unlink()
+    shrunk = config.model_copy(
+        update={
+            "series_list": config.series_list[:1],
+            "study": config.study.model_copy(update={"num_series": 1}),
+        }
+    )
+    service.generate(config=shrunk, incremental=True)
+
+    assert sorted(f.name for f in output_dir.glob("*.dcm")) == names[:2]
+
+
+def test_generate_incremental_reuses_noise_seed(tmp_path) -> None:
+    service = StudyGeneratorService()
+    config = _make_config(
+        tmp_path=tmp_path, num_series=2, images_per_series=[2, 2]
+    ).model_copy(
+        update={"pixel_spec": PixelSpecCTRealistic(width=64, height=64, pattern="noise")}
+    )
+    output_dir = service.generate(config=config, incremental=True)
+    first_uids = _uids_by_file(output_dir)
+
+    service.generate(config=config, incremental=True)
+
+    assert _uids_by_file(output_dir) == first_uids
+
+
+def test_generate_without_incremental_writes_no_manifest(tmp_path) -> None:
+    service = StudyGeneratorService()
+    config = _make_config(tmp_path=tmp_path)
+
+    output_dir = service.generate(config=config)
+
+    assert not (output_dir / "generation_manifest.json").exists()
+
+
+def _interrupt_after(monkeypatch, writes: int) -> None:
+    from app.core import FileWriteError
+    from app.services.instance_writer import InstanceWriter
+
+    original = InstanceWriter.write_encoded
+    count = 0
+
+    def interrupting(self, item):
+        nonlocal count
+        count += 1
+        if count > writes:
+            raise FileWriteError("interrupted", "disk full")
+        return original(self, item)
+
+    monkeypatch.setattr(InstanceWriter, "write_encoded", interrupting)
+
+
+def test_generate_resume_continues_with_same_uids(tmp_path, monkeypatch) -> None:
+    from app.core import FileWriteError
+
+    service = StudyGeneratorService()
+    config = _make_config(
+        tmp_path=tmp_path, num_series=2, images_per_series=[3, 3]
+    ).model_copy(
+        update={"execution": ExecutionConfig(write_workers=1, max_in_flight=1)}
+    )
+    output_dir = tmp_path / "output"
+    with monkeypatch.context() as patch:
+        _interrupt_after(patch, writes=4)
+        with pytest.raises(FileWriteError):
+            service.generate(config=config)
+    written = _uids_by_file(output_dir)
+    stray = output_dir / ".stray.dcm.tmp"
+    stray.write_bytes(b"partial")
+
+    assert (output_dir / "generation_journal.jsonl").exists()
+    progress_callback = MagicMock()
+    service.generate(config=config, progress_callback=progress_callback, resume=True)
+    resumed = _uids_by_file(output_dir)
+
+    assert len(written) == 4
+    assert len(resumed) == 6
+    assert {name: resumed[name] for name in written} == written
+    assert len({uids[0] for uids in resumed.values()}) == 1
+    series_uids = [
+        pydicom.dcmread(str(f)).SeriesInstanceUID
+        for f in sorted(output_dir.glob("*.dcm"))
+    ]
+    assert series_uids[3] == series_uids[5] != series_uids[0]
+    progress_callback.assert_called_with(2, 2)
+    assert not stray.exists()
+    assert not (output_dir / "generation_journal.jsonl").exists()
+
+
+def test_generate_resume_rejects_changed_config(tmp_path, monkeypatch) -> None:
+    from app.core import ConfigurationError, FileWriteError
+
+    service = StudyGeneratorService()
+    config = _make_config(tmp_path=tmp_path, num_series=1, images_per_series=[3])
+    with monkeypatch.context() as patch:
+        _interrupt_after(patch, writes=1)
+        with pytest.raises(FileWriteError):
+            service.generate(config=config)
+    changed = config.model_copy(
+        update={"study": config.study.model_copy(update={"accession_number": "ACC2"})}
+    )
+
+    with pytest.raises(ConfigurationError):
+        service.generate(config=changed, resume=True)
+
+
+def test_generate_without_journal_or_temp_files_left(tmp_path) -> None:
+    service = StudyGeneratorService()
+    config = _make_config(tmp_path=tmp_path, num_series=1, images_per_series=[2])
+
+    output_dir = service.generate(config=config)
+
+    assert sorted(p.suffix for p in output_dir.iterdir()) == [".dcm", ".dcm"]
+
+
+def _archive_members(path):
+    import tarfile
+    import zipfile
+    from io import BytesIO
+
+    if path.suffix == ".tar":
+        with tarfile.open(path) as tar:
+            return {
+                member.name: pydicom.dcmread(BytesIO(tar.extractfile(member).read()))
+                for member in tar.getmembers()
+            }
+    with zipfile.ZipFile(path) as archive:
+        return {
+            name: pydicom.dcmread(BytesIO(archive.read(name)))
+            for name in archive.namelist()
+        }
+
+
+@pytest.mark.parametrize("output_format", ["tar", "zip"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_generate_archive_contains_directory_files(
+    tmp_path, monkeypatch, output_format, workers
+) -> None:
+    monkeypatch.setattr("app.services.study_generator.MIN_IMAGES_PER_WORKER", 1)
+    service = StudyGeneratorService()
+    directory_config = _make_config(
+        tmp_path=tmp_path / "directory", num_series=2, images_per_series=[2, 3]
+    )
+    archive_config = _make_config(
+        tmp_path=tmp_path / "archive",
+        num_series=2,
+        images_per_series=[2, 3],
+        workers=workers,
+    ).model_copy(update={"output_format": output_format})
+
+    output_dir = service.generate(config=directory_config)
+    archive_path = service.generate(config=archive_config)
+
+    # 出力先にはアーカイブのみが残り、中間ファイルやジャーナルは作られない
+    assert list(archive_path.parent.iterdir()) == [archive_path]
+    assert archive_path.name == f"P000001_20240115_CT.{output_format}"
+    members = _archive_members(archive_path)
+    assert sorted(members) == sorted(p.name for p in output_dir.glob("*.dcm"))
+    for name, dataset in members.items():
+        expected = pydicom.dcmread(str(output_dir / name))
+        assert dataset.InstanceNumber == expected.InstanceNumber
+        assert dataset.SeriesNumber == expected.SeriesNumber
+        assert len(dataset.PixelData) == len(expected.PixelData)
+
+
+@pytest.mark.parametrize(
+    ("output_format", "transfer_syntax_uid"),
+    [("tar", "1.2.840.10008.1.2.5"), ("zip", "1.2.840.10008.1.2.1.99")],
+)
+def test_generate_archive_streams_enhanced_multiframe(
+    tmp_path, output_format, transfer_syntax_uid
+) -> None:
+    config = _make_config(
+        tmp_path=tmp_path, num_series=1, images_per_series=[3], workers=2
+    ).model_copy(
+        update={
+            "output_format": output_format,
+            "pixel_spec": PixelSpecCTRealistic(width=64, height=64, pattern="circle"),
+            "image_storage": ImageStorageConfig(
+                mode="enhanced_multiframe", frames_per_object=2
+            ),
+            "transfer_syntax": TransferSyntaxConfig(
+                uid=transfer_syntax_uid, name="compressed", is_implicit_vr=False
+            ),
+        }
+    )
+
+    archive_path = StudyGeneratorService().generate(config=config)
+
+    members = _archive_members(archive_path)
+    assert [ds.NumberOfFrames for _, ds in sorted(members.items())] == [2, 1]
+    for dataset in members.values():
+        assert dataset.file_meta.TransferSyntaxUID == transfer_syntax_uid
+        assert dataset.pixel_array.shape[-2:] == (64, 64)
+
+
+def test_generate_archive_rejects_incremental(tmp_path) -> None:
+    from app.core import ConfigurationError
+
+    config = _make_config(tmp_path=tmp_path).model_copy(update={"output_format": "tar"})
+
+    with pytest.raises(ConfigurationError, match="output_format directory"):
+        StudyGeneratorService().generate(config=config, incremental=True)
+
+
+def test_generate_archive_removes_partial_archive_on_failure(
+    tmp_path, monkeypatch
+) -> None:
+    from app.core import FileWriteError
+    from app.services.output_archive import TarArchiveWriter
+
+    def failing_add(self, name, data):
+        raise FileWriteError(name, "disk full")
+
+    monkeypatch.setattr(TarArchiveWriter, "add", failing_add)
+    config = _make_config(tmp_path=tmp_path, images_per_series=[2]).model_copy(
+        update={"output_format": "tar"}
+    )
+
+    with pytest.raises(FileWriteError):
+        StudyGeneratorService().generate(config=config)
+
+    assert list((tmp_path / "output").iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    ("output_format", "image_storage"),
+    [
+        ("directory", ImageStorageConfig()),
+        ("zip", ImageStorageConfig()),
+        (
+            "directory",
+            ImageStorageConfig(mode="enhanced_multiframe", frames_per_object=2),
+        ),
+    ],
+    ids=["directory", "zip", "enhanced-multiframe"],
+)
+def test_generate_dicomdir_indexes_written_files(
+    tmp_path, output_format, image_storage
+) -> None:
+    import zipfile
+
+    from pydicom.fileset import FileSet
+
+    config = _make_config(
+        tmp_path=tmp_path, num_series=2, images_per_series=[3, 2]
+    ).model_copy(
+        update={
+            "output_format": output_format,
+            "dicomdir": True,
+            "pixel_spec": PixelSpecCTRealistic(width=64, height=64, pattern="circle"),
+            "image_storage": image_storage,
+        }
+    )
+
+    output_path = StudyGeneratorService().generate(config=config)
+
+    if output_format == "zip":
+        with zipfile.ZipFile(output_path) as archive:
+            archive.extractall(tmp_path / "extracted")
+        output_path = tmp_path / "extracted"
+    file_set = FileSet(pydicom.dcmread(str(output_path / "DICOMDIR")))
+    files = {
+        path.name: pydicom.dcmread(str(path)) for path in output_path.glob("*.dcm")
+    }
+    assert len(file_set) == len(files)
+    for instance in file_set:
+        dataset = files[instance.ReferencedFileID]
+        assert instance.SOPInstanceUID == dataset.SOPInstanceUID
+        assert instance.SOPClassUID == dataset.SOPClassUID
+        assert instance.SeriesInstanceUID == dataset.SeriesInstanceUID
+        assert instance.StudyInstanceUID == dataset.StudyInstanceUID
+        assert instance.InstanceNumber == dataset.InstanceNumber
+        assert instance.PatientID == "P000001"
+
+
+def test_generate_dicomdir_includes_reused_series(tmp_path) -> None:
+    from pydicom.fileset import FileSet
+
+    service = StudyGeneratorService()
+    config = _make_config(
+        tmp_path=tmp_path, num_series=2, images_per_series=[2, 3]
+    ).model_copy(update={"dicomdir": True})
+    output_dir = service.generate(config=config, incremental=True)
+    before = _uids_by_file(output_dir)
+
+    changed = config.model_copy(
+        update={
+            "series_list": [
+                config.series_list[0],
+                config.series_list[1].model_copy(update={"series_description": "x"}),
+            ]
+        }
+    )
+    service.generate(config=changed, incremental=True)
+
+    file_set = FileSet(pydicom.dcmread(str(output_dir / "DICOMDIR")))
+    after = _uids_by_file(output_dir)
+    assert {instance.SOPInstanceUID for instance in file_set} == {
+        sop_uid for _, sop_uid in after.values()
+    }
+    # 再利用したシリーズはマニフェストに記録した UID で DICOMDIR に載る
+    reused = [name for name in before if before[name] == after[name]]
+    assert len(reused) == 2
+
+
+@pytest.mark.parametrize("workers", [1, 2], ids=["pipelined", "parallel"])
+def test_generate_deterministic_uids_are_identical_across_runs(
+    tmp_path, workers
+) -> None:
+    def uids(output_name: str) -> list[tuple[str, str, str]]:
+        config = _make_config(
+            tmp_path=tmp_path, num_series=2, images_per_series=[2, 3], workers=workers
+        ).model_copy(
+            update={
+                "output_dir": str(tmp_path / output_name),
+                "uid_method": "deterministic",
+                "uid_seed": "job-seed",
+            }
+        )
+        StudyGeneratorService().generate(config=config)
+        datasets = [
+            pydicom.dcmread(path)
+            for path in sorted((tmp_path / output_name).glob("*.dcm"))
+        ]
+        return [
+            (ds.StudyInstanceUID, ds.SeriesInstanceUID, ds.SOPInstanceUID)
+            for ds in datasets
+        ]
+
+    first = uids("first")
+
+    assert first == uids("second")
+    assert len({sop for _, _, sop in first}) == 5
+    assert len({series for _, series, _ in first}) == 2
+
+
+def test_generate_custom_root_counter_store_continues_across_runs(tmp_path) -> None:
+    root = "1.2.392.200036.9999"
+    store_path = tmp_path / "uids.sqlite3"
+
+    def sop_uids(output_name: str) -> list[str]:
+        config = _make_config(tmp_path=tmp_path, images_per_series=[3]).model_copy(
+            update={
+                "output_dir": str(tmp_path / output_name),
+                "uid_method": "custom_root",
+                "uid_custom_root": root,
+                "uid_counter_store": str(store_path),
+            }
+        )
+        StudyGeneratorService().generate(config=config)
+        return sorted(
+            pydicom.dcmread(path).SOPInstanceUID
+            for path in (tmp_path / output_name).glob("*.dcm")
+        )
+
+    first = sop_uids("first")
+    second = sop_uids("second")
+
+    assert not set(first) & set(second)
+    # 使わなかった連番は返却され、次の実行はその続きから採番する
+    assert max(int(uid.rsplit(".", 1)[1]) for uid in second) < 100
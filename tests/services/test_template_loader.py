@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
+
 import pytest
 
 from app.core import TemplateNotFoundError, TemplateParseError
-from app.services.template_loader import TemplateLoaderService
+from app.services.template_loader import TemplateLoaderService, clear_template_cache
 
 
 def test_load_modality_template_success() -> None:
@@ -11,7 +13,7 @@ def test_load_modality_template_success() -> None:
 
     template = service.load_modality_template("fujifilm_scenaria_view_ct")
 
-    assert isinstance(template, dict)
+    assert isinstance(template, Mapping)
     assert "info" in template
 
 
@@ -27,7 +29,7 @@ def test_load_hospital_template_success() -> None:
 
     template = service.load_hospital_template("hospital_a")
 
-    assert isinstance(template, dict)
+    assert isinstance(template, Mapping)
     assert "overrides" in template
 
 
@@ -65,3 +67,82 @@ def test_template_parse_error(tmp_path) -> None:
 
     with pytest.raises(TemplateParseError):
         service.load_modality_template("broken")
+
+
+def _service_with_modality(tmp_path, **kwargs) -> TemplateLoaderService:
+    service = TemplateLoaderService(**kwargs)
+    service._modality_dir = tmp_path / "modality"
+    service._modality_dir.mkdir(exist_ok=True)
+    return service
+
+
+def test_templates_are_cached_until_file_changes(tmp_path, monkeypatch) -> None:
+    service = _service_with_modality(tmp_path)
+    path = service._modality_dir / "ct.yaml"
+    path.write_text("info:\n  modality: CT\n", encoding="utf-8")
+    parsed: list[str] = []
+    original = TemplateLoaderService._parse_yaml_template
+
+    def counting_parse(template_path):
+        parsed.append(template_path.name)
+        return original(template_path)
+
+    monkeypatch.setattr(
+        TemplateLoaderService, "_parse_yaml_template", staticmethod(counting_parse)
+    )
+
+    first = service.merge_templates("ct", None)
+    again = _service_with_modality(tmp_path).merge_templates("ct", None)
+    path.write_text("info:\n  modality: MRI\n", encoding="utf-8")
+    changed = service.merge_templates("ct", None)
+
+    assert again is first
+    assert parsed == ["ct.yaml", "ct.yaml"]
+    assert changed["info"]["modality"] == "MRI"
+
+
+def test_templates_are_immutable() -> None:
+    template = TemplateLoaderService().merge_templates(
+        "fujifilm_scenaria_view_ct", "hospital_a"
+    )
+
+    with pytest.raises(TypeError):
+        template["info"] = {}  # type: ignore[index]
+    with pytest.raises(TypeError):
+        template["general_equipment"]["institution_name"] = "B"  # type: ignore[index]
+
+
+def test_disk_cache_reuses_parsed_template(tmp_path, monkeypatch) -> None:
+    cache_dir = tmp_path / "cache"
+    service = _service_with_modality(tmp_path, cache_dir=cache_dir)
+    (service._modality_dir / "ct.yaml").write_text(
+        "info:\n  modality: CT\nkernels: [a, b]\n", encoding="utf-8"
+    )
+    service.load_modality_template("ct")
+    assert len(list(cache_dir.glob("*.pickle"))) == 1
+
+    clear_template_cache()
+    monkeypatch.setattr(
+        TemplateLoaderService,
+        "_parse_yaml_template",
+        staticmethod(lambda path: pytest.fail("template re-parsed")),
+    )
+    template = service.load_modality_template("ct")
+
+    assert template["kernels"] == ("a", "b")
+
+
+def test_corrupted_disk_cache_is_parsed_again(tmp_path) -> None:
+    cache_dir = tmp_path / "cache"
+    service = _service_with_modality(tmp_path, cache_dir=cache_dir)
+    (service._modality_dir / "ct.yaml").write_text(
+        "info:\n  modality: CT\n", encoding="utf-8"
+    )
+    service.load_modality_template("ct")
+    [cache_path] = cache_dir.glob("*.pickle")
+    cache_path.write_bytes(b"\x80\x05broken")
+    clear_template_cache()
+
+    template = service.load_modality_template("ct")
+
+    assert template["info"]["modality"] == "CT"
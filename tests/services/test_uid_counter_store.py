@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core import ConfigurationError, FileWriteError
+from app.services.uid_counter_store import UIDCounterStore
+
+
+def test_lease_hands_out_consecutive_blocks_per_root(tmp_path) -> None:
+    store = UIDCounterStore(tmp_path / "uids.sqlite3", lease_size=10)
+
+    assert store.lease("1.2.3") == range(1, 11)
+    assert store.lease("1.2.3") == range(11, 21)
+    assert store.lease("1.2.4") == range(1, 11)
+    # 別のインスタンス（別の実行）からも続きを払い出す
+    assert UIDCounterStore(store.path, lease_size=5).lease("1.2.3") == range(21, 26)
+
+
+def test_concurrent_leases_do_not_overlap(tmp_path) -> None:
+    path = tmp_path / "uids.sqlite3"
+    stores = [UIDCounterStore(path, lease_size=3) for _ in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        blocks = list(
+            executor.map(
+                lambda store: [store.lease("1.2.3") for _ in range(20)], stores
+            )
+        )
+
+    values = [value for batch in blocks for block in batch for value in block]
+    assert sorted(values) == list(range(1, 241))
+
+
+def test_release_returns_only_the_latest_block_tail(tmp_path) -> None:
+    store = UIDCounterStore(tmp_path / "uids.sqlite3", lease_size=10)
+    first = store.lease("1.2.3")
+    second = store.lease("1.2.3")
+
+    assert not store.release("1.2.3", first[4:])
+    assert store.release("1.2.3", second[2:])
+    assert store.lease("1.2.3") == range(13, 23)
+    assert not store.release("1.2.3", range(0))
+
+
+def test_store_errors(tmp_path) -> None:
+    with pytest.raises(ConfigurationError):
+        UIDCounterStore(tmp_path / "uids.sqlite3", lease_size=0)
+    with pytest.raises(FileWriteError):
+        UIDCounterStore(tmp_path / "missing" / "uids.sqlite3").lease("1.2.3")